@@ -0,0 +1,143 @@
+// -*- lsst-c++ -*-
+
+/*
+ * LSST Data Management System
+ * Copyright 2016 LSST Corporation.
+ *
+ * This product includes software developed by the
+ * LSST Project (http://www.lsst.org/).
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the LSST License Statement and
+ * the GNU General Public License along with this program.  If not,
+ * see <http://www.lsstcorp.org/LegalNotices/>.
+ */
+
+/*
+ * Detect objects in a MaskedImage on disk, reading it a strip of rows at a time, and compare the
+ * results with a FootprintSet made from the whole image.
+ */
+#include <algorithm>
+#include <cmath>
+#include <iostream>
+#include <random>
+#include <sstream>
+
+#include "lsst/daf/base/PropertySet.h"
+#include "lsst/afw/image.h"
+#include "lsst/afw/detection/FootprintSet.h"
+#include "lsst/afw/detection/FootprintStream.h"
+
+namespace afwImage = lsst::afw::image;
+namespace afwDetect = lsst::afw::detection;
+namespace afwGeom = lsst::afw::geom;
+
+const std::string imagePath("footprintStream.fits");
+const unsigned DefNCols = 1024;
+const unsigned DefStripHeight = 64;
+
+int main(int argc, char **argv) {
+    if ((argc == 2) && (argv[1][0] == '-')) {
+        std::cout << "Usage: footprintStream [nCols [stripHeight]]" << std::endl;
+        std::cout << "nCols (default " << DefNCols << ") is the number of rows and columns" << std::endl;
+        std::cout << "stripHeight (default " << DefStripHeight << ") is the number of rows in each strip"
+                  << std::endl;
+        return 1;
+    }
+
+    unsigned nCols = DefNCols;
+    if (argc > 1) {
+        std::istringstream(argv[1]) >> nCols;
+    }
+    unsigned stripHeight = DefStripHeight;
+    if (argc > 2) {
+        std::istringstream(argv[2]) >> stripHeight;
+    }
+    //
+    // Write an image of noise and Gaussian sources to disk
+    //
+    afwGeom::Box2I bbox;
+    {
+        afwImage::MaskedImage<float> mimage(afwGeom::Extent2I(nCols, nCols));
+        *mimage.getMask() = 0x0;
+        *mimage.getVariance() = 1.0;
+
+        std::mt19937 rng(12345);
+        std::normal_distribution<float> noise(0.0, 1.0);
+        std::uniform_real_distribution<double> uniform(0.0, 1.0);
+        afwImage::Image<float> &image = *mimage.getImage();
+        for (int y = 0; y != image.getHeight(); ++y) {
+            for (afwImage::Image<float>::x_iterator ptr = image.row_begin(y), end = image.row_end(y);
+                 ptr != end; ++ptr) {
+                *ptr = noise(rng);
+            }
+        }
+        double const sigma = 2.0;
+        int const radius = static_cast<int>(4*sigma);
+        for (unsigned i = 0; i < nCols; ++i) {
+            double const xc = uniform(rng)*nCols;
+            double const yc = uniform(rng)*nCols;
+            double const amp = 10.0 + 1000.0*std::pow(uniform(rng), 4);
+            for (int y = std::max(0, static_cast<int>(yc) - radius);
+                 y <= std::min(static_cast<int>(nCols) - 1, static_cast<int>(yc) + radius); ++y) {
+                for (int x = std::max(0, static_cast<int>(xc) - radius);
+                     x <= std::min(static_cast<int>(nCols) - 1, static_cast<int>(xc) + radius); ++x) {
+                    double const r2 = (x - xc)*(x - xc) + (y - yc)*(y - yc);
+                    image(x, y) += amp*std::exp(-0.5*r2/(sigma*sigma));
+                }
+            }
+        }
+        mimage.writeFits(imagePath);
+        bbox = mimage.getBBox();
+    }
+
+    afwDetect::Threshold const threshold(5.0, afwDetect::Threshold::PIXEL_STDEV);
+    //
+    // Detect objects in strips read from disk, processing the Footprints as soon as they're finished
+    //
+    afwDetect::FootprintStream stream(bbox, threshold, 5);
+    std::size_t nFootprints = 0, nPeaks = 0, maxFinished = 0;
+    while (!stream.isFinished()) {
+        int const y0 = stream.getNextRow();
+        if (y0 > bbox.getMaxY()) {
+            stream.finish();
+        } else {
+            int const y1 = std::min(y0 + static_cast<int>(stripHeight) - 1, bbox.getMaxY());
+            afwImage::MaskedImage<float> strip(imagePath, PTR(lsst::daf::base::PropertySet)(),
+                                               afwGeom::Box2I(afwGeom::Point2I(bbox.getMinX(), y0),
+                                                              afwGeom::Point2I(bbox.getMaxX(), y1)));
+            stream.addStrip(strip);
+        }
+
+        PTR(afwDetect::FootprintStream::FootprintList) footprints = stream.takeFootprints();
+        maxFinished = std::max(maxFinished, footprints->size());
+        for (afwDetect::FootprintStream::FootprintList::const_iterator ptr = footprints->begin();
+             ptr != footprints->end(); ++ptr) {
+            ++nFootprints;
+            nPeaks += (*ptr)->getPeaks().size();
+        }
+    }
+    std::cout << "Detected " << nFootprints << " objects with " << nPeaks << " peaks in strips of "
+              << stripHeight << " rows; at most " << maxFinished << " were finished by a strip" << std::endl;
+    //
+    // Compare with detection in the whole image
+    //
+    afwImage::MaskedImage<float> mimage(imagePath);
+    afwDetect::FootprintSet fs(mimage, threshold, "", 5);
+    std::size_t nFullPeaks = 0;
+    for (afwDetect::FootprintSet::FootprintList::const_iterator ptr = fs.getFootprints()->begin();
+         ptr != fs.getFootprints()->end(); ++ptr) {
+        nFullPeaks += (*ptr)->getPeaks().size();
+    }
+    std::cout << "Detected " << fs.getFootprints()->size() << " objects with " << nFullPeaks
+              << " peaks in the whole image" << std::endl;
+}
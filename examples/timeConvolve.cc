@@ -31,9 +31,12 @@
 #include "lsst/afw/image/MaskedImage.h"
 #include "lsst/afw/math/Kernel.h"
 #include "lsst/afw/math/KernelFunctions.h"
+#include "lsst/afw/math/ConvolveImage.h"
+#include "lsst/afw/math/detail/Convolve.h"
 
 namespace afwImage = lsst::afw::image;
 namespace afwMath = lsst::afw::math;
+namespace mathDetail = lsst::afw::math::detail;
 
 typedef float ImageType;
 typedef double KernelType;
@@ -43,6 +46,7 @@ const unsigned DefNIter = 10;
 const unsigned MinKernelSize = 5;
 const unsigned MaxKernelSize = 15;
 const unsigned DeltaKernelSize = 5;
+const unsigned SeparableKernelSizes[] = {5, 11, 21, 31, 41, 51};
 
 template <class ImageClass>
 void timeConvolution(ImageClass &image, unsigned int nIter) {
@@ -76,27 +80,40 @@ void timeConvolution(ImageClass &image, unsigned int nIter) {
             << "\t" << secPerIter << "\t" << mOpsPerSec << std::endl;
     }
 
-    std::cout << std::endl << "Separable Kernel" << std::endl;
-    std::cout << "ImWid\tImHt\tKerWid\tKerHt\tMOps\tCnvSec\tMOpsPerSec" << std::endl;
+    std::cout << std::endl << "Separable Kernel (row buffers vs. pixel iterators)" << std::endl;
+    std::cout << "ImWid\tImHt\tKerWid\tKerHt\tMOps\tCnvSec\tMOpsPerSec\tItrSec\tSpeedup" << std::endl;
 
-    for (unsigned kSize = MinKernelSize; kSize <= MaxKernelSize; kSize += DeltaKernelSize) {
+    afwMath::ConvolutionControl convolutionControl;
+    for (unsigned kSize : SeparableKernelSizes) {
+        if (kSize > imWidth || kSize > imHeight) {
+            break;
+        }
         // construct kernel
-        afwMath::GaussianFunction1<KernelType> gaussFunc(Sigma);
+        afwMath::GaussianFunction1<KernelType> gaussFunc(kSize/6.0);
         afwMath::SeparableKernel separableKernel(kSize, kSize, gaussFunc, gaussFunc);
 
         clock_t startTime = clock();
         for (unsigned int iter = 0; iter < nIter; ++iter) {
-            // convolve
-            afwMath::convolve(resImage, image, separableKernel, true);
+            // convolve using the default (row buffer) code, without setting the edge pixels
+            mathDetail::basicConvolve(resImage, image, separableKernel, convolutionControl);
         }
         double secPerIter = (clock() - startTime)/
             (static_cast<double>(CLOCKS_PER_SEC)*static_cast<double>(nIter));
 
+        startTime = clock();
+        for (unsigned int iter = 0; iter < nIter; ++iter) {
+            // convolve using the pixel iterator code
+            mathDetail::convolveSeparableWithIterators(resImage, image, separableKernel, convolutionControl);
+        }
+        double iterSecPerIter = (clock() - startTime)/
+            (static_cast<double>(CLOCKS_PER_SEC)*static_cast<double>(nIter));
+
         double mOps = static_cast<double>((
             imHeight + 1 - kSize) * (imWidth + 1 - kSize) * kSize * kSize) / 1.0e6;
         double mOpsPerSec = mOps / secPerIter;
         std::cout << imWidth << "\t" << imHeight << "\t" << kSize << "\t" << kSize << "\t" << mOps
-            << "\t" << secPerIter << "\t" << mOpsPerSec << std::endl;
+            << "\t" << secPerIter << "\t" << mOpsPerSec << "\t" << iterSecPerIter
+            << "\t" << iterSecPerIter / secPerIter << std::endl;
     }
 }
 
@@ -131,6 +148,9 @@ int main(int argc, char **argv) {
     std::cout << "  * one OR (for the mask)" << std::endl;
     std::cout << "  * four pixel pointer increments (for image, variance, mask and kernel)" << std::endl;
     std::cout << "* CnvSec: time to perform one convolution (sec)" << std::endl;
+    std::cout << "* ItrSec: time to perform one separable convolution using pixel iterators (sec)"
+              << std::endl;
+    std::cout << "* Speedup: ItrSec / CnvSec" << std::endl;
 
     std::cout << std::endl << "Image " << inImagePath << std::endl;
     afwImage::Image<ImageType> image(inImagePath);
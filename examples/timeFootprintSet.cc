@@ -0,0 +1,170 @@
+// -*- lsst-c++ -*-
+
+/*
+ * LSST Data Management System
+ * Copyright 2016 LSST Corporation.
+ *
+ * This product includes software developed by the
+ * LSST Project (http://www.lsst.org/).
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the LSST License Statement and
+ * the GNU General Public License along with this program.  If not,
+ * see <http://www.lsstcorp.org/LegalNotices/>.
+ */
+
+/*
+ * Time the detection of Footprints (and their Peaks) in sparse and crowded fields.
+ *
+ * Floating point images are thresholded a row at a time, finding the peaks in the same pass;
+ * integer images use the general pixel iterator code, so the same field is also searched
+ * as an integer image (scaled to keep the same detections) for comparison.
+ */
+#include <algorithm>
+#include <cmath>
+#include <ctime>
+#include <iostream>
+#include <random>
+#include <sstream>
+
+#include "lsst/afw/image.h"
+#include "lsst/afw/detection/FootprintSet.h"
+
+namespace afwImage = lsst::afw::image;
+namespace afwDetect = lsst::afw::detection;
+namespace afwGeom = lsst::afw::geom;
+
+const unsigned DefNIter = 10;
+const unsigned DefNCols = 2048;
+const double Sigma = 2.0;               // width of the sources
+const double Scale = 100.0;             // scale factor for the integer images
+
+// Make an image of unit-variance noise and nSources Gaussian sources of random position and amplitude
+afwImage::MaskedImage<float> makeField(unsigned nCols, unsigned nRows, unsigned nSources) {
+    afwImage::MaskedImage<float> mimage(afwGeom::Extent2I(nCols, nRows));
+    *mimage.getVariance() = 1.0;
+    *mimage.getMask() = 0x0;
+
+    std::mt19937 rng(12345);
+    std::normal_distribution<float> noise(0.0, 1.0);
+    std::uniform_real_distribution<double> uniform(0.0, 1.0);
+
+    afwImage::Image<float> &image = *mimage.getImage();
+    for (int y = 0; y != image.getHeight(); ++y) {
+        for (afwImage::Image<float>::x_iterator ptr = image.row_begin(y); ptr != image.row_end(y); ++ptr) {
+            *ptr = noise(rng);
+        }
+    }
+
+    int const radius = static_cast<int>(4*Sigma);
+    for (unsigned i = 0; i < nSources; ++i) {
+        double const xc = uniform(rng)*nCols;
+        double const yc = uniform(rng)*nRows;
+        double const amp = 10.0 + 1000.0*std::pow(uniform(rng), 4);
+        for (int y = std::max(0, static_cast<int>(yc) - radius);
+             y <= std::min(static_cast<int>(nRows) - 1, static_cast<int>(yc) + radius); ++y) {
+            for (int x = std::max(0, static_cast<int>(xc) - radius);
+                 x <= std::min(static_cast<int>(nCols) - 1, static_cast<int>(xc) + radius); ++x) {
+                double const r2 = (x - xc)*(x - xc) + (y - yc)*(y - yc);
+                image(x, y) += amp*std::exp(-0.5*r2/(Sigma*Sigma));
+            }
+        }
+    }
+
+    return mimage;
+}
+
+template <typename MaskedImageT>
+double timeDetection(MaskedImageT const &mimage, afwDetect::Threshold const &threshold,
+                     unsigned nIter, int &nFootprints, int &nPeaks) {
+    clock_t startTime = clock();
+    for (unsigned iter = 0; iter < nIter; ++iter) {
+        afwDetect::FootprintSet fs(mimage, threshold, "", 5);
+        nFootprints = fs.getFootprints()->size();
+        nPeaks = 0;
+        for (afwDetect::FootprintSet::FootprintList::const_iterator ptr = fs.getFootprints()->begin();
+             ptr != fs.getFootprints()->end(); ++ptr) {
+            nPeaks += (*ptr)->getPeaks().size();
+        }
+    }
+    // separate casts for CLOCKS_PER_SEC and nIter avoids incorrect results, perhaps due to overflow
+    return (clock() - startTime)/(static_cast<double>(CLOCKS_PER_SEC)*static_cast<double>(nIter));
+}
+
+int main(int argc, char **argv) {
+    if ((argc == 2) && (argv[1][0] == '-')) {
+        std::cout << "Usage: timeFootprintSet [nIter [nCols [nRows]]]" << std::endl;
+        std::cout << "nIter (default " << DefNIter << ") is the number of iterations" << std::endl;
+        std::cout << "nCols (default " << DefNCols << ") is the number of columns" << std::endl;
+        std::cout << "nRows (default = nCols) is the number of rows" << std::endl;
+        return 1;
+    }
+
+    unsigned nIter = DefNIter;
+    if (argc > 1) {
+        std::istringstream(argv[1]) >> nIter;
+    }
+    unsigned nCols = DefNCols;
+    if (argc > 2) {
+        std::istringstream(argv[2]) >> nCols;
+    }
+    unsigned nRows = nCols;
+    if (argc > 3) {
+        std::istringstream(argv[3]) >> nRows;
+    }
+
+    std::cout << "Columns:" << std::endl;
+    std::cout << "* NSrc: number of sources added to the field" << std::endl;
+    std::cout << "* NFoot, NPeak: number of Footprints and Peaks found" << std::endl;
+    std::cout << "* FltSec: time to detect in a float MaskedImage (row search, sec)" << std::endl;
+    std::cout << "* IntSec: time to detect in an int MaskedImage (pixel iterators, sec)" << std::endl;
+    std::cout << "* Speedup: IntSec / FltSec" << std::endl;
+    std::cout << std::endl;
+
+    std::cout << "Field\tThresh\tCols\tRows\tNSrc\tNFoot\tNPeak\tFltSec\tIntSec\tSpeedup" << std::endl;
+
+    double const megaPix = static_cast<double>(nCols*nRows)/1.0e6;
+    unsigned const nSourcesList[] = {static_cast<unsigned>(100*megaPix),     // sparse
+                                     static_cast<unsigned>(10000*megaPix)};  // crowded
+    char const *fieldNames[] = {"sparse", "crowded"};
+    for (int i = 0; i < 2; ++i) {
+        afwImage::MaskedImage<float> fmimage = makeField(nCols, nRows, nSourcesList[i]);
+        afwImage::MaskedImage<int> imimage(fmimage.getDimensions());
+        for (int y = 0; y != fmimage.getHeight(); ++y) {
+            afwImage::Image<float>::x_iterator fptr = fmimage.getImage()->row_begin(y);
+            for (afwImage::Image<int>::x_iterator iptr = imimage.getImage()->row_begin(y),
+                     end = imimage.getImage()->row_end(y); iptr != end; ++iptr, ++fptr) {
+                *iptr = static_cast<int>(std::floor(Scale*(*fptr) + 0.5));
+            }
+        }
+        *imimage.getMask() = 0x0;
+        *imimage.getVariance() = Scale*Scale;
+
+        afwDetect::Threshold::ThresholdType const types[] = {afwDetect::Threshold::VALUE,
+                                                             afwDetect::Threshold::PIXEL_STDEV};
+        for (int j = 0; j < 2; ++j) {
+            bool const isValue = (types[j] == afwDetect::Threshold::VALUE);
+            afwDetect::Threshold const fThreshold(5.0, types[j]);
+            afwDetect::Threshold const iThreshold(isValue ? 5.0*Scale : 5.0, types[j]);
+
+            int nFootprints = 0, nPeaks = 0;
+            double const fltSec = timeDetection(fmimage, fThreshold, nIter, nFootprints, nPeaks);
+            int nIntFootprints = 0, nIntPeaks = 0;
+            double const intSec = timeDetection(imimage, iThreshold, nIter, nIntFootprints, nIntPeaks);
+
+            std::cout << fieldNames[i] << "\t" << afwDetect::Threshold::getTypeString(types[j])
+                      << "\t" << nCols << "\t" << nRows << "\t" << nSourcesList[i]
+                      << "\t" << nFootprints << "\t" << nPeaks
+                      << "\t" << fltSec << "\t" << intSec << "\t" << intSec/fltSec << std::endl;
+        }
+    }
+}
@@ -30,6 +30,7 @@
 #include "lsst/afw/detection/Threshold.h"
 #include "lsst/afw/detection/FootprintFunctor.h"
 #include "lsst/afw/detection/FootprintSet.h"
+#include "lsst/afw/detection/FootprintStream.h"
 #include "lsst/afw/detection/FootprintArray.h"
 #include "lsst/afw/detection/Footprint.h"
 #include "lsst/afw/detection/HeavyFootprint.h"
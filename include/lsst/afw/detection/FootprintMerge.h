@@ -100,6 +100,9 @@ public:
      *  not be added to existing footprints.  If minNewPeakDist >= 0, then new peaks will be added
      *  that are farther away than minNewPeakDist to the nearest existing peak.
      *
+     *  Only the FootprintMerges whose bounding boxes are near each object (as found using a uniform
+     *  grid over pixel coordinates) are tested for overlap.
+     *
      *  The SourceTable is used to create new SourceRecords that store the filter information.
      */
     void addCatalog(
@@ -62,7 +62,7 @@ public:
     template <typename ImagePixelT>
     FootprintSet(image::Image<ImagePixelT> const& img,
                  Threshold const& threshold,
-                 int const npixMin=1, bool const setPeaks=true);
+                 int const npixMin=1, bool const setPeaks=true, int const nThreads=1);
 
     template <typename MaskPixelT>
     FootprintSet(image::Mask<MaskPixelT> const& img,
@@ -73,7 +73,7 @@ public:
     FootprintSet(image::MaskedImage<ImagePixelT, MaskPixelT> const& img,
                  Threshold const& threshold,
                  std::string const& planeName = "",
-                 int const npixMin=1, bool const setPeaks=true);
+                 int const npixMin=1, bool const setPeaks=true, int const nThreads=1);
 
 #else // workaround for https://github.com/swig/swig/issues/245
     // if that bug is fixed then you may update footprintset.i by uncommenting two lines
@@ -87,35 +87,35 @@ public:
 
     FootprintSet(image::Image<std::uint16_t> const& img,
                  Threshold const& threshold,
-                 int const npixMin=1, bool const setPeaks=true);
+                 int const npixMin=1, bool const setPeaks=true, int const nThreads=1);
     FootprintSet(image::MaskedImage<std::uint16_t, image::MaskPixel> const& img,
                  Threshold const& threshold,
                  std::string const& planeName = "",
-                 int const npixMin=1, bool const setPeaks=true);
+                 int const npixMin=1, bool const setPeaks=true, int const nThreads=1);
 
     FootprintSet(image::Image<int> const& img,
                  Threshold const& threshold,
-                 int const npixMin=1, bool const setPeaks=true);
+                 int const npixMin=1, bool const setPeaks=true, int const nThreads=1);
     FootprintSet(image::MaskedImage<int, image::MaskPixel> const& img,
                  Threshold const& threshold,
                  std::string const& planeName = "",
-                 int const npixMin=1, bool const setPeaks=true);
+                 int const npixMin=1, bool const setPeaks=true, int const nThreads=1);
 
     FootprintSet(image::Image<float> const& img,
                  Threshold const& threshold,
-                 int const npixMin=1, bool const setPeaks=true);
+                 int const npixMin=1, bool const setPeaks=true, int const nThreads=1);
     FootprintSet(image::MaskedImage<float, image::MaskPixel> const& img,
                  Threshold const& threshold,
                  std::string const& planeName = "",
-                 int const npixMin=1, bool const setPeaks=true);
+                 int const npixMin=1, bool const setPeaks=true, int const nThreads=1);
 
     FootprintSet(image::Image<double> const& img,
                  Threshold const& threshold,
-                 int const npixMin=1, bool const setPeaks=true);
+                 int const npixMin=1, bool const setPeaks=true, int const nThreads=1);
     FootprintSet(image::MaskedImage<double, image::MaskPixel> const& img,
                  Threshold const& threshold,
                  std::string const& planeName = "",
-                 int const npixMin=1, bool const setPeaks=true);
+                 int const npixMin=1, bool const setPeaks=true, int const nThreads=1);
 
 #endif
 
@@ -0,0 +1,149 @@
+// -*- lsst-c++ -*-
+/*
+ * LSST Data Management System
+ * Copyright 2016 LSST Corporation.
+ *
+ * This product includes software developed by the
+ * LSST Project (http://www.lsstcorp.org/).
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the LSST License Statement and
+ * the GNU General Public License along with this program.  If not,
+ * see <http://www.lsstcorp.org/LegalNotices/>.
+ */
+
+#ifndef LSST_AFW_DETECTION_FOOTPRINTSTREAM_H
+#define LSST_AFW_DETECTION_FOOTPRINTSTREAM_H
+/**
+ * \file
+ * \brief Detect Footprints in an image that is supplied a strip of rows at a time
+ */
+#include <map>
+#include <vector>
+
+#include "lsst/afw/geom.h"
+#include "lsst/afw/detection/Threshold.h"
+#include "lsst/afw/detection/Footprint.h"
+#include "lsst/afw/detection/FootprintSet.h"
+#include "lsst/afw/image/MaskedImage.h"
+
+namespace lsst { namespace afw { namespace detection {
+
+/**
+ *  @brief Find the Footprints in an image that's too large to hold in memory
+ *
+ *  The image is passed to addStrip() as a sequence of strips of rows (e.g. read from disk using the
+ *  MaskedImage constructor that reads only a bounding box from a FITS file); each strip must span the
+ *  full width of the region being searched, and start at the row following the end of the previous one.
+ *  The runs of pixels above threshold are joined into objects as the rows arrive, and a Footprint
+ *  (with its Peaks) is made as soon as its object can no longer grow, i.e. as soon as a row is added
+ *  that it doesn't reach.  The finished Footprints may be retrieved with takeFootprints() at any time;
+ *  call finish() once the last row has been added to finish the objects that touch it.
+ *
+ *  Only the few most recent rows of pixels and the objects that are still growing are kept, so the
+ *  memory used is of order the width of the region times the height of the tallest object.
+ *
+ *  The Footprints and Peaks are the same as those found by the FootprintSet constructors, but are
+ *  returned in the order in which they're finished rather than in the order of their first pixels.
+ *  Thresholds of type STDEV and VARIANCE need the statistics of the whole image so are not supported;
+ *  use a VALUE threshold computed from the known noise level instead.
+ */
+class FootprintStream {
+public:
+    typedef FootprintSet::FootprintList FootprintList;
+
+    /**
+     *  @param[in]  region     Bounding box (in PARENT coordinates) of the image to be searched
+     *  @param[in]  threshold  Threshold to find objects; must be of type VALUE or PIXEL_STDEV
+     *  @param[in]  npixMin    Minimum number of pixels in an object
+     *  @param[in]  setPeaks   Should I set the Footprints' Peaks?
+     */
+    FootprintStream(geom::Box2I const & region, Threshold const & threshold,
+                    int npixMin=1, bool setPeaks=true);
+
+    ~FootprintStream();
+
+    /**
+     *  @brief Process the next strip of rows of the image
+     *
+     *  @throw pex::exceptions::InvalidParameterError if the strip doesn't cover the full width of the
+     *         region, or doesn't start at the next row; or if the threshold is of type PIXEL_STDEV
+     *         (which needs a variance)
+     *  @throw pex::exceptions::LogicError if finish() has already been called
+     */
+    template <typename ImagePixelT>
+    void addStrip(image::Image<ImagePixelT> const & strip);
+
+    /**
+     *  @brief Process the next strip of rows of the image, using its variance for PIXEL_STDEV thresholds
+     */
+    template <typename ImagePixelT>
+    void addStrip(image::MaskedImage<ImagePixelT> const & strip);
+
+    /**
+     *  @brief Finish all the objects that are still open, once the last row of the region has been added
+     *
+     *  @throw pex::exceptions::LogicError if some rows of the region haven't been added yet
+     */
+    void finish();
+
+    /// Return the Footprints that have been finished since the last call, and forget them
+    PTR(FootprintList) takeFootprints();
+
+    /// Return the bounding box of the image being searched
+    geom::Box2I getRegion() const { return _region; }
+
+    /// Return the row (in PARENT coordinates) that must start the next strip
+    int getNextRow() const { return _region.getMinY() + _y; }
+
+    /// Has finish() been called?
+    bool isFinished() const { return _finished; }
+
+private:
+    struct Object;                      // An object that's still growing; defined in the .cc file
+    struct Segment {                    // A run of pixels in a row, and the object that it belongs to
+        Segment(int x0_, int x1_, int id_) : x0(x0_), x1(x1_), id(id_) {}
+        int x0, x1;
+        int id;
+    };
+
+    FootprintStream(FootprintStream const &);
+    FootprintStream & operator=(FootprintStream const &);
+
+    template <typename ImagePixelT, typename VariancePixelT>
+    void _addRows(image::ImageBase<ImagePixelT> const & img, image::ImageBase<VariancePixelT> const * var);
+    void _addRow(std::vector<unsigned char> const & above, std::vector<unsigned char> const & included);
+    void _findPeaks();
+    int _resolve(int id);
+    int _join(int id1, int id2);
+    void _emit(int id);
+
+    geom::Box2I _region;
+    double _footprintThreshold;         // threshold for pixels to be in a Footprint
+    double _includeThreshold;           // threshold for a Footprint to be included in the results
+    bool _polarity;                     // if false, search _below_ the threshold
+    bool _pixelStdev;                   // is the threshold in units of each pixel's standard deviation?
+    int _npixMin;
+    bool _setPeaks;
+    bool _finished;
+    int _y;                             // number of rows processed
+    int _nextId;                        // ID for the next new object
+    std::vector<double> _rows[3];       // pixel values of the last three rows; _rows[2] is the newest
+    std::vector<Segment> _segments;     // segments of the last row processed
+    std::map<int, int> _aliases;        // objects joined to others while processing the current row
+    std::map<int, PTR(Object)> _objects; // objects that may still grow
+    PTR(FootprintList) _footprints;     // finished Footprints
+};
+
+}}} // namespace lsst::afw::detection
+
+#endif // !LSST_AFW_DETECTION_FOOTPRINTSTREAM_H
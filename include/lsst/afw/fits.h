@@ -465,6 +465,14 @@ public:
     /// @brief Write a string to a binary table.
     void writeTableScalar(std::size_t row, int col, std::string const & value);
 
+    /**
+     *  @brief Write strings to consecutive rows of a binary table string column.
+     *
+     *  nElements strings are written, starting at the given row; each one is truncated at its first
+     *  null character.
+     */
+    void writeTableArray(std::size_t row, int col, int nElements, std::string const * value);
+
     /// @brief Read an array value from a binary table.
     template <typename T>
     void readTableArray(std::size_t row, int col, int nElements, T * value);
@@ -476,6 +484,9 @@ public:
     /// @brief Read a string from a binary table.
     void readTableScalar(std::size_t row, int col, std::string & value);
 
+    /// @brief Read strings from consecutive rows of a binary table string column.
+    void readTableArray(std::size_t row, int col, int nElements, std::string * value);
+
     /// @brief Return the size of an array column.
     long getTableArraySize(int col);
 
@@ -60,23 +60,48 @@ namespace math {
                 bool doNormalize = true,    ///< normalize the kernel to sum=1?
                 bool doCopyEdge = false,    ///< copy edge pixels from source image
                     ///< instead of setting them to the standard edge pixel?
-                int maxInterpolationDistance = 10  ///< maximum width or height of a region
+                int maxInterpolationDistance = 10,  ///< maximum width or height of a region
                     ///< over which to use linear interpolation interpolate
+                int fftMinKernelSize = 41   ///< convolve floating-point images with spatially invariant
+                    ///< kernels at least this wide and high using FFTs; if <= 0 then never use FFTs
                 )
         :
             _doNormalize(doNormalize),
             _doCopyEdge(doCopyEdge),
-            _maxInterpolationDistance(maxInterpolationDistance)
+            _maxInterpolationDistance(maxInterpolationDistance),
+            _fftMinKernelSize(fftMinKernelSize),
+            _numThreads(1)
         { }
 
         bool getDoNormalize() const { return _doNormalize; }
         bool getDoCopyEdge() const { return _doCopyEdge; }
         int getMaxInterpolationDistance() const { return _maxInterpolationDistance; };
+        int getFftMinKernelSize() const { return _fftMinKernelSize; }
+        /// Number of threads used to convolve with spatially varying kernels using interpolation
+        /// (the result doesn't depend on it)
+        int getNumThreads() const { return _numThreads; }
 
         void setDoNormalize(bool doNormalize) {_doNormalize = doNormalize; }
         void setDoCopyEdge(bool doCopyEdge) { _doCopyEdge = doCopyEdge; }
         void setMaxInterpolationDistance(int maxInterpolationDistance) {
             _maxInterpolationDistance = maxInterpolationDistance; }
+        void setFftMinKernelSize(int fftMinKernelSize) { _fftMinKernelSize = fftMinKernelSize; }
+        /**
+         * @brief set the number of threads used to convolve with spatially varying kernels using
+         * interpolation
+         *
+         * The rows of interpolation regions are split into bands, each convolved on its own thread
+         * with its own copy of the kernel.
+         *
+         * @throw lsst::pex::exceptions::InvalidParameterError if numThreads < 1
+         */
+        void setNumThreads(int numThreads) {
+            if (numThreads < 1) {
+                throw LSST_EXCEPT(lsst::pex::exceptions::InvalidParameterError,
+                                  "numThreads must be at least 1");
+            }
+            _numThreads = numThreads;
+        }
 
     private:
         bool _doNormalize;  ///< normalize the kernel to sum=1?
@@ -84,6 +109,9 @@ namespace math {
                     ///< instead of setting them to the standard edge pixel?
         int _maxInterpolationDistance;  ///< maximum width or height of a region
                     ///< over which to attempt interpolation
+        int _fftMinKernelSize;  ///< minimum width and height of a spatially invariant kernel
+                    ///< for which to convolve using FFTs; if <= 0 then never use FFTs
+        int _numThreads;    ///< number of threads used to convolve with spatially varying kernels
     };
 
     template <typename OutImageT, typename InImageT>
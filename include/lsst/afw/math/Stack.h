@@ -29,7 +29,9 @@
  * @brief Functions to stack images
  * @ingroup stack
  */
+#include <string>
 #include <vector>
+#include "lsst/afw/fits.h"
 #include "lsst/afw/image/Image.h"
 #include "lsst/afw/math/Statistics.h"
 
@@ -91,6 +93,39 @@ void statisticsStack(
         std::vector<lsst::afw::image::VariancePixel>(0) ///< vector containing weights
     );
 
+/**
+ * @brief compute statistical stack of MaskedImages stored in FITS files, reading them a strip at a time
+ *
+ * The region stacked is the bounding box (in PARENT coordinates) of the output image, which must be
+ * contained in every input.  Only stripHeight rows of each input are in memory at any time, so the
+ * memory needed to stack N inputs is proportional to N*stripHeight rather than N*height.
+ */
+template<typename PixelT>
+void statisticsStack(
+    lsst::afw::image::MaskedImage<PixelT>& out, ///< Output image; its PARENT bbox is the region to stack
+    std::vector<std::string> const& fileNames, ///< FITS files containing the MaskedImages to process
+    Property flags, ///< statistics requested
+    StatisticsControl const& sctrl=StatisticsControl(), ///< control structure
+    std::vector<lsst::afw::image::VariancePixel> const& wvector=
+        std::vector<lsst::afw::image::VariancePixel>(0), ///< vector containing weights
+    int stripHeight=256 ///< number of rows to read from each input at a time
+    );
+
+/**
+ * @brief compute statistical stack of MaskedImages stored in in-memory FITS files, a strip at a time
+ *
+ * @sa the std::vector<std::string> overload
+ */
+template<typename PixelT>
+void statisticsStack(
+    lsst::afw::image::MaskedImage<PixelT>& out, ///< Output image; its PARENT bbox is the region to stack
+    std::vector<PTR(lsst::afw::fits::MemFileManager)> const& managers, ///< in-memory FITS files to process
+    Property flags, ///< statistics requested
+    StatisticsControl const& sctrl=StatisticsControl(), ///< control structure
+    std::vector<lsst::afw::image::VariancePixel> const& wvector=
+        std::vector<lsst::afw::image::VariancePixel>(0), ///< vector containing weights
+    int stripHeight=256 ///< number of rows to read from each input at a time
+    );
 
 /**
  * @brief A function to compute some statistics of a stack of std::vectors
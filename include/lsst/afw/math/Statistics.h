@@ -110,7 +110,8 @@ public:
         _isNanSafe(isNanSafe),
         _useWeights(useWeights == 0 ? WEIGHTS_FALSE : (useWeights == 1) ? WEIGHTS_TRUE : WEIGHTS_NONE),
         _calcErrorFromInputVariance(false),
-        _maskPropagationThresholds()
+        _maskPropagationThresholds(),
+        _numThreads(1)
     {
         try {
             _noGoodPixelsMask = lsst::afw::image::Mask<>::getPlaneBitMask("NO_DATA");
@@ -140,6 +141,8 @@ public:
     bool getWeighted() const { return _useWeights == WEIGHTS_TRUE ? true : false; }
     bool getWeightedIsSet() const { return _useWeights != WEIGHTS_NONE ? true : false; }
     bool getCalcErrorFromInputVariance() const { return _calcErrorFromInputVariance; }
+    /// Number of threads used by statisticsStack (the result doesn't depend on it)
+    int getNumThreads() const { return _numThreads; }
 
     void setNumSigmaClip(double numSigmaClip) { assert(numSigmaClip > 0); _numSigmaClip = numSigmaClip; }
     void setNumIter(int numIter) { assert(numIter > 0); _numIter = numIter; }
@@ -150,6 +153,7 @@ public:
     void setCalcErrorFromInputVariance(bool calcErrorFromInputVariance) {
         _calcErrorFromInputVariance = calcErrorFromInputVariance;
     }
+    void setNumThreads(int numThreads) { assert(numThreads > 0); _numThreads = numThreads; }
 
 private:
 
@@ -164,6 +168,28 @@ private:
     bool _calcErrorFromInputVariance;     // Calculate errors from the input variances, if available
     std::vector<double> _maskPropagationThresholds; // Thresholds for when to propagate mask bits,
                                                     // treated like a dict (unset bits are set to 1.0)
+    int _numThreads;                      // Number of threads to use when stacking
+};
+
+/**
+ * @brief Working space for Statistics, which may be reused by a caller that measures many images
+ *
+ * Statistics copies the good pixels into a buffer to find the median and quantiles (which are needed
+ * for MEDIAN, IQRANGE and the clipped statistics); passing the same StatisticsBuffer to each call of
+ * makeStatistics avoids allocating a new buffer every time, e.g. when estimating the background in many
+ * small bins.  A StatisticsBuffer holds no results, but mustn't be used by two threads at once.
+ */
+class StatisticsBuffer {
+public:
+    StatisticsBuffer() : _values() {}
+
+    /// Return the number of pixels that the buffer can hold without being reallocated
+    std::size_t getCapacity() const { return _values.capacity(); }
+
+private:
+    friend class Statistics;
+
+    std::vector<double> _values;        // the good pixels' values
 };
 
 /**
@@ -219,7 +245,8 @@ public:
                         MaskT const &msk,
                         VarianceT const &var,
                         int const flags,
-                        StatisticsControl const& sctrl = StatisticsControl());
+                        StatisticsControl const& sctrl = StatisticsControl(),
+                        StatisticsBuffer *buffer = NULL);
 
     template<typename ImageT, typename MaskT, typename VarianceT, typename WeightT>
     explicit Statistics(ImageT const &img,
@@ -227,7 +254,8 @@ public:
                         VarianceT const &var,
                         WeightT const &weights,
                         int const flags,
-                        StatisticsControl const& sctrl = StatisticsControl());
+                        StatisticsControl const& sctrl = StatisticsControl(),
+                        StatisticsBuffer *buffer = NULL);
 
     Value getResult(Property const prop = NOTHING) const;
 
@@ -261,7 +289,8 @@ private:
                       VarianceT const &var,
                       WeightT const &weights,
                       int const flags,
-                      StatisticsControl const& sctrl);
+                      StatisticsControl const& sctrl,
+                      StatisticsBuffer *buffer);
 };
 
 /*************************************  The factory functions **********************************/
@@ -304,10 +333,11 @@ template<typename Pixel>
 Statistics makeStatistics(lsst::afw::image::Image<Pixel> const &img,
                           lsst::afw::image::Mask<image::MaskPixel> const &msk,
                           int const flags,
-                          StatisticsControl const& sctrl = StatisticsControl()
+                          StatisticsControl const& sctrl = StatisticsControl(),
+                          StatisticsBuffer *buffer = NULL
                          ) {
     MaskImposter<WeightPixel> var;
-    return Statistics(img, msk, var, flags, sctrl);
+    return Statistics(img, msk, var, flags, sctrl, buffer);
 }
 
 
@@ -320,9 +350,10 @@ Statistics makeStatistics(ImageT const &img,
                           MaskT const &msk,
                           VarianceT const &var,
                           int const flags,
-                          StatisticsControl const& sctrl = StatisticsControl()
+                          StatisticsControl const& sctrl = StatisticsControl(),
+                          StatisticsBuffer *buffer = NULL
                          ) {
-    return Statistics(img, msk, var, flags, sctrl);
+    return Statistics(img, msk, var, flags, sctrl, buffer);
 }
 
 /**
@@ -333,14 +364,15 @@ template<typename Pixel>
 Statistics makeStatistics(
         lsst::afw::image::MaskedImage<Pixel> const &mimg,
         int const flags,
-        StatisticsControl const& sctrl = StatisticsControl()
+        StatisticsControl const& sctrl = StatisticsControl(),
+        StatisticsBuffer *buffer = NULL
                          )
 {
     if (sctrl.getWeighted() || sctrl.getCalcErrorFromInputVariance()) {
-        return Statistics(*mimg.getImage(), *mimg.getMask(), *mimg.getVariance(), flags, sctrl);
+        return Statistics(*mimg.getImage(), *mimg.getMask(), *mimg.getVariance(), flags, sctrl, buffer);
     } else {
         MaskImposter<WeightPixel> var;
-        return Statistics(*mimg.getImage(), *mimg.getMask(), var, flags, sctrl);
+        return Statistics(*mimg.getImage(), *mimg.getMask(), var, flags, sctrl, buffer);
     }
 }
 
@@ -384,12 +416,13 @@ template<typename Pixel>
 Statistics makeStatistics(
         lsst::afw::image::Image<Pixel> const &img, ///< Image (or Image) whose properties we want
         int const flags,   ///< Describe what we want to calculate
-        StatisticsControl const& sctrl = StatisticsControl() ///< Control calculation
+        StatisticsControl const& sctrl = StatisticsControl(), ///< Control calculation
+        StatisticsBuffer *buffer = NULL ///< Working space to reuse for the median and quantiles
 ) {
     // make a phony mask that will be compiled out
     MaskImposter<lsst::afw::image::MaskPixel> const msk;
     MaskImposter<WeightPixel> const var;
-    return Statistics(img, msk, var, flags, sctrl);
+    return Statistics(img, msk, var, flags, sctrl, buffer);
 }
 
 
@@ -0,0 +1,134 @@
+// -*- LSST-C++ -*-
+/*
+ * LSST Data Management System
+ * Copyright 2016 LSST Corporation.
+ *
+ * This product includes software developed by the
+ * LSST Project (http://www.lsst.org/).
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the LSST License Statement and
+ * the GNU General Public License along with this program.  If not,
+ * see <http://www.lsstcorp.org/LegalNotices/>.
+ */
+
+#ifndef LSST_AFW_MATH_WarpingPlan_h_INCLUDED
+#define LSST_AFW_MATH_WarpingPlan_h_INCLUDED
+
+#include <vector>
+
+#include "lsst/base.h"
+#include "lsst/afw/geom/Box.h"
+#include "lsst/afw/geom/Point.h"
+#include "lsst/afw/geom/XYTransform.h"
+#include "lsst/afw/table/io/Persistable.h"
+
+namespace lsst { namespace afw {
+namespace image {
+    class Wcs;
+}
+namespace math {
+
+/**
+ *  @brief The source positions needed to warp images onto a particular destination bounding box.
+ *
+ *  Warping evaluates the transform from destination to source pixels only at a grid of nodes: the
+ *  destination rows and columns -1, interpLength-1, 2*interpLength-1, ... and the last row and column
+ *  (every row and column if interpLength is 0 or 1); all other positions are interpolated.
+ *  A WarpingPlan holds the source positions at those nodes, so that many images that share a pair of
+ *  WCS (e.g. several bands or auxiliary planes) can be warped to the same destination bounding box
+ *  without evaluating either WCS again (see the warpImage overload that takes a WarpingPlan).
+ *  The result is identical to that of warping with the WCS directly.
+ *
+ *  Source positions are in the parent pixel coordinates of the source images, so the plan may be applied
+ *  to any source image with the right WCS, whatever its bounding box.
+ */
+class WarpingPlan : public table::io::PersistableFacade<WarpingPlan>, public table::io::Persistable {
+public:
+
+    /**
+     *  @brief Compute the source positions for a pair of WCS.
+     *
+     *  @param[in] destWcs       WCS of the destination images
+     *  @param[in] destBBox      parent bounding box of the destination images
+     *  @param[in] srcWcs        WCS of the source images
+     *  @param[in] interpLength  interpolation length; must match WarpingControl::getInterpLength
+     *                           when the plan is used
+     */
+    WarpingPlan(
+        image::Wcs const & destWcs,
+        geom::Box2I const & destBBox,
+        image::Wcs const & srcWcs,
+        int interpLength
+    );
+
+    /**
+     *  @brief Compute the source positions for an XYTransform.
+     *
+     *  @param[in] destBBox      parent bounding box of the destination images
+     *  @param[in] xyTransform   transform mapping source position to destination position in the forward
+     *                           direction (but only the reverse direction is used)
+     *  @param[in] interpLength  interpolation length; must match WarpingControl::getInterpLength
+     *                           when the plan is used
+     */
+    WarpingPlan(
+        geom::Box2I const & destBBox,
+        geom::XYTransform const & xyTransform,
+        int interpLength
+    );
+
+    /// Return the parent bounding box of the destination images
+    geom::Box2I getDestBBox() const { return _destBBox; }
+
+    /// Return the interpolation length the plan was computed for
+    int getInterpLength() const { return _interpLength; }
+
+    /**
+     *  @brief Return the source position of a node of the grid.
+     *
+     *  @param[in] destCol   column index in the destination image (0 is the first column of destBBox)
+     *  @param[in] destRow   row index in the destination image (0 is the first row of destBBox)
+     *
+     *  @throw lsst::pex::exceptions::InvalidParameterError if (destCol, destRow) is not a node
+     */
+    geom::Point2D getSrcPosition(int destCol, int destRow) const;
+
+    /// WarpingPlan is always persistable.
+    virtual bool isPersistable() const { return true; }
+
+protected:
+
+    virtual std::string getPersistenceName() const;
+
+    virtual std::string getPythonModule() const;
+
+    virtual void write(OutputArchiveHandle & handle) const;
+
+private:
+
+    friend class WarpingPlanFactory;
+
+    // Initialize the nodes, but not the source positions
+    WarpingPlan(geom::Box2I const & destBBox, int interpLength);
+
+    void _computeSrcPositions(geom::XYTransform const & xyTransform);
+
+    geom::Box2I _destBBox;
+    int _interpLength;
+    std::vector<int> _colNodes;           // destination column index of each column of nodes
+    std::vector<int> _rowNodes;           // destination row index of each row of nodes
+    std::vector<geom::Point2D> _srcPos;   // source positions of the nodes, ordered by row then column
+};
+
+}}} // namespace lsst::afw::math
+
+#endif // !LSST_AFW_MATH_WarpingPlan_h_INCLUDED
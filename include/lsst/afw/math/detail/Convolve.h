@@ -85,6 +85,39 @@ namespace detail {
             lsst::afw::math::Kernel const& kernel,
             lsst::afw::math::ConvolutionControl const& convolutionControl);
 
+    template <typename OutImageT, typename InImageT>
+    void convolveWithFft(
+            OutImageT &convolvedImage,
+            InImageT const& inImage,
+            lsst::afw::math::Kernel const& kernel,
+            lsst::afw::math::ConvolutionControl const& convolutionControl);
+
+    template <typename OutImageT, typename InImageT>
+    void convolveSeparableWithIterators(
+            OutImageT &convolvedImage,
+            InImageT const& inImage,
+            lsst::afw::math::SeparableKernel const& kernel,
+            lsst::afw::math::ConvolutionControl const& convolutionControl);
+
+    template <typename OutImageT, typename InImageT>
+    void convolveWithBasisKernels(
+            OutImageT &convolvedImage,
+            InImageT const& inImage,
+            lsst::afw::math::LinearCombinationKernel const& kernel,
+            lsst::afw::math::ConvolutionControl const& convolutionControl);
+
+    bool isBasisConvolutionFaster(
+            lsst::afw::math::LinearCombinationKernel const& kernel,
+            lsst::afw::geom::Extent2I const& imageDimensions,
+            bool hasVariance,
+            lsst::afw::math::ConvolutionControl const& convolutionControl);
+
+    void convolveMask(
+            lsst::afw::image::Mask<lsst::afw::image::MaskPixel> &convolvedMask,
+            lsst::afw::image::Mask<lsst::afw::image::MaskPixel> const& inMask,
+            lsst::afw::image::Image<lsst::afw::math::Kernel::Pixel> const& kernelImage,
+            lsst::afw::geom::Point2I const& kernelCtr);
+
     // I would prefer this to be nested in KernelImagesForRegion but SWIG doesn't support that
     class RowOfKernelImagesForRegion;
 
@@ -170,6 +203,8 @@ namespace detail {
         lsst::afw::geom::Point2I getPixelIndex(Location location) const;
         bool computeNextRow(RowOfKernelImagesForRegion &regionRow) const;
 
+        static std::vector<int> computeSubregionLengths(int length, int nDivisions);
+
         /**
          * Get the minInterpolationSize class constant
          */
@@ -183,7 +218,6 @@ namespace detail {
 
         // static helper functions
         static inline int _computeNextSubregionLength(int length, int nDivisions);
-        static std::vector<int> _computeSubregionLengths(int length, int nDivisions);
 
         // member variables
         KernelConstPtr _kernelPtr;
@@ -206,7 +240,7 @@ namespace detail {
         typedef RegionList::iterator Iterator;
         typedef RegionList::const_iterator ConstIterator;
 
-        RowOfKernelImagesForRegion(int nx, int ny);
+        RowOfKernelImagesForRegion(int nx, int ny, int firstYInd=0);
         /**
          * @brief Return the begin iterator for the list
          */
@@ -0,0 +1,128 @@
+// -*- LSST-C++ -*-
+
+/*
+ * LSST Data Management System
+ * Copyright 2016 LSST Corporation.
+ *
+ * This product includes software developed by the
+ * LSST Project (http://www.lsst.org/).
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the LSST License Statement and
+ * the GNU General Public License along with this program.  If not,
+ * see <http://www.lsstcorp.org/LegalNotices/>.
+ */
+
+/**
+ * @file
+ *
+ * @brief Run independent pieces of work (e.g. bands of image rows) on several threads
+ *
+ * @ingroup afw
+ */
+#ifndef LSST_AFW_MATH_DETAIL_PARALLEL_H
+#define LSST_AFW_MATH_DETAIL_PARALLEL_H
+
+#include <algorithm>
+#include <exception>
+#include <thread>
+#include <utility>
+#include <vector>
+
+namespace lsst {
+namespace afw {
+namespace math {
+namespace detail {
+
+    typedef std::pair<int, int> Band;   ///< A half-open range [first, second)
+
+    /**
+     * @brief Split [begin, end) into at most nBands contiguous bands of (nearly) equal size
+     *
+     * Every band boundary other than end is begin plus a multiple of granularity, so that
+     * e.g. bands of rows can be aligned to an interpolation grid.  If nBands < 1, one band is used;
+     * an empty range yields no bands.
+     */
+    inline std::vector<Band> makeBands(int begin, int end, int nBands, int granularity=1) {
+        std::vector<Band> bands;
+        if (end <= begin) {
+            return bands;
+        }
+        granularity = std::max(1, granularity);
+
+        int const nChunks = (end - begin + granularity - 1)/granularity; // number of indivisible chunks
+        nBands = std::max(1, std::min(nBands, nChunks));
+        for (int i = 0, b = begin; i < nBands; ++i) {
+            int const chunk = (i + 1)*static_cast<long>(nChunks)/nBands; // first chunk of the next band
+            int const e = (i == nBands - 1) ? end : std::min(end, begin + granularity*chunk);
+            bands.push_back(Band(b, e));
+            b = e;
+        }
+
+        return bands;
+    }
+
+    /// The work done by each thread in parallelForBands; an implementation detail
+    template<typename FunctionT>
+    class RunBand {
+    public:
+        RunBand(FunctionT const& func, int i, Band const& band, std::exception_ptr & error) :
+            _func(func), _i(i), _band(band), _error(&error) {}
+
+        void operator()() {
+            try {
+                _func(_i, _band.first, _band.second);
+            } catch(...) {
+                *_error = std::current_exception();
+            }
+        }
+    private:
+        FunctionT _func;
+        int _i;
+        Band _band;
+        std::exception_ptr *_error;
+    };
+
+    /**
+     * @brief Call func(i, bands[i].first, bands[i].second) for every band, each on its own thread
+     *
+     * The calls must be independent (e.g. write to disjoint parts of an output image).  With only one band
+     * the function is called on the current thread.  If any call throws, the exception from the
+     * lowest-numbered band is rethrown once all the threads have finished.
+     */
+    template<typename FunctionT>
+    void parallelForBands(std::vector<Band> const& bands, FunctionT func) {
+        if (bands.size() == 1) {
+            func(0, bands[0].first, bands[0].second);
+            return;
+        }
+
+        std::vector<std::exception_ptr> errors(bands.size());
+        std::vector<std::thread> threads;
+        threads.reserve(bands.size());
+        for (std::size_t i = 0; i < bands.size(); ++i) {
+            threads.push_back(std::thread(RunBand<FunctionT>(func, i, bands[i], errors[i])));
+        }
+        for (std::size_t i = 0; i < threads.size(); ++i) {
+            threads[i].join();
+        }
+
+        for (std::size_t i = 0; i < errors.size(); ++i) {
+            if (errors[i]) {
+                std::rethrow_exception(errors[i]);
+            }
+        }
+    }
+
+}}}} // lsst::afw::math::detail
+
+#endif // LSST_AFW_MATH_DETAIL_PARALLEL_H
@@ -34,6 +34,8 @@
 #ifndef LSST_AFW_MATH_DETAIL_POSITIONFUNCTOR_H
 #define LSST_AFW_MATH_DETAIL_POSITIONFUNCTOR_H
 
+#include <memory>
+
 #include "lsst/afw/geom/Point.h"
 #include "lsst/afw/geom/AffineTransform.h"
 #include "lsst/afw/geom/XYTransform.h"
@@ -64,6 +66,9 @@ namespace detail {
         virtual ~PositionFunctor() {};
 
         virtual lsst::afw::geom::Point2D operator()(int destCol, int destRow) const = 0;
+
+        /// Return a deep copy, which may be used on a different thread than this functor
+        virtual Ptr clone() const = 0;
     };
 
 
@@ -92,6 +97,10 @@ namespace detail {
             return _xyTransformPtr->reverseTransform(destPos);
         }
 
+        virtual PositionFunctor::Ptr clone() const {
+            return std::make_shared<XYTransformPositionFunctor>(_destXY0, *_xyTransformPtr);
+        }
+
     private:
         lsst::afw::geom::Point2D const _destXY0;
         PTR(lsst::afw::geom::XYTransform const) _xyTransformPtr;
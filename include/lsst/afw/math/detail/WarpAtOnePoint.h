@@ -21,9 +21,12 @@
  * the GNU General Public License along with this program.  If not,
  * see <http://www.lsstcorp.org/LegalNotices/>.
  */
+#include <memory>
+#include <utility>
 #include <vector>
 
 #include "lsst/afw/math/Kernel.h"
+#include "lsst/afw/math/detail/WarpingKernelTable.h"
 #include "lsst/afw/image/Image.h"
 #include "lsst/afw/image/MaskedImage.h"
 #include "lsst/afw/geom/Point.h"
@@ -35,6 +38,11 @@ namespace detail {
 
     /**
      * @brief A functor that computes one warped pixel
+     *
+     * Lanczos and bilinear warping kernels (including mask warping kernels) are evaluated from a
+     * WarpingKernelTable, and the warped pixel is computed by a dot product along contiguous source rows
+     * (of the image, mask and variance planes together, for a MaskedImage).  Other kernels are evaluated
+     * through the generic SeparableKernel interface.
      */
     template<typename DestImageT, typename SrcImageT>
     class WarpAtOnePoint {
@@ -48,6 +56,8 @@ namespace detail {
             _kernelPtr(control.getWarpingKernel()),
             _maskKernelPtr(control.getMaskWarpingKernel()),
             _hasMaskKernel(control.getMaskWarpingKernel()),
+            _kernelTablePtr(_makeTable(_kernelPtr)),
+            _maskKernelTablePtr(_makeTable(_maskKernelPtr)),
             _kernelCtr(_kernelPtr->getCtr()),
             _maskKernelCtr(_maskKernelPtr ? _maskKernelPtr->getCtr() : lsst::afw::geom::Point2I(0, 0)),
             _growFullMask(control.getGrowFullMask()),
@@ -92,10 +102,27 @@ namespace detail {
                 // Compute warped pixel
                 double kSum = _setFracIndex(srcIndFracX.second, srcIndFracY.second);
 
-                typename SrcImageT::const_xy_locator srcLoc = _srcImage.xy_at(srcStartX, srcStartY);
+                if (_kernelTablePtr) {
+                    std::pair<int, int> const xRange = _nonzeroRange(_xList);
+                    std::pair<int, int> const yRange = _nonzeroRange(_yList);
+                    double value = 0;
+                    for (int y = yRange.first; y < yRange.second; ++y) {
+                        typename SrcImageT::x_iterator srcIter =
+                            _srcImage.x_at(srcStartX + xRange.first, srcStartY + y);
+                        double valueY = 0;
+                        for (int x = xRange.first; x < xRange.second; ++x, ++srcIter) {
+                            valueY += _xList[x]*(*srcIter);
+                        }
+                        value += _yList[y]*valueY;
+                    }
+                    *destXIter = value*relativeArea/kSum;
+                } else {
+                    typename SrcImageT::const_xy_locator srcLoc = _srcImage.xy_at(srcStartX, srcStartY);
 
-                *destXIter = lsst::afw::math::convolveAtAPoint<DestImageT, SrcImageT>(srcLoc, _xList, _yList);
-                *destXIter *= relativeArea/kSum;
+                    *destXIter = lsst::afw::math::convolveAtAPoint<DestImageT, SrcImageT>(srcLoc, _xList,
+                                                                                         _yList);
+                    *destXIter *= relativeArea/kSum;
+                }
                 return true;
             } else {
                // Edge pixel
@@ -138,10 +165,43 @@ namespace detail {
                 // Compute warped pixel
                 double kSum = _setFracIndex(srcIndFracX.second, srcIndFracY.second);
 
-                typename SrcImageT::const_xy_locator srcLoc = _srcImage.xy_at(srcStartX, srcStartY);
+                if (_kernelTablePtr) {
+                    // Image, mask and variance in one pass over each source row; as for convolveAtAPoint,
+                    // the variance is weighted by the square of the kernel and the mask is the OR of
+                    // the pixels with nonzero weight
+                    std::pair<int, int> const xRange = _nonzeroRange(_xList);
+                    std::pair<int, int> const yRange = _nonzeroRange(_yList);
+                    double image = 0;
+                    double variance = 0;
+                    typename DestImageT::Mask::SinglePixel mask = 0;
+                    for (int y = yRange.first; y < yRange.second; ++y) {
+                        typename SrcImageT::x_iterator srcIter =
+                            _srcImage.x_at(srcStartX + xRange.first, srcStartY + y);
+                        double imageY = 0;
+                        double varianceY = 0;
+                        typename DestImageT::Mask::SinglePixel maskY = 0;
+                        for (int x = xRange.first; x < xRange.second; ++x, ++srcIter) {
+                            double const kValX = _xList[x];
+                            imageY += kValX*srcIter.image();
+                            varianceY += kValX*kValX*srcIter.variance();
+                            maskY |= srcIter.mask();
+                        }
+                        double const kValY = _yList[y];
+                        image += kValY*imageY;
+                        variance += kValY*kValY*varianceY;
+                        mask |= maskY;
+                    }
+                    double const scale = relativeArea/kSum;
+                    destXIter.image() = image*scale;
+                    destXIter.mask() = mask;
+                    destXIter.variance() = variance*scale*scale;
+                } else {
+                    typename SrcImageT::const_xy_locator srcLoc = _srcImage.xy_at(srcStartX, srcStartY);
 
-                *destXIter = lsst::afw::math::convolveAtAPoint<DestImageT, SrcImageT>(srcLoc, _xList, _yList);
-                *destXIter *= relativeArea/kSum;
+                    *destXIter = lsst::afw::math::convolveAtAPoint<DestImageT, SrcImageT>(srcLoc, _xList,
+                                                                                         _yList);
+                    *destXIter *= relativeArea/kSum;
+                }
 
                 if (_hasMaskKernel) {
                     // compute mask value based on the mask kernel (replacing the value computed above)
@@ -191,20 +251,56 @@ namespace detail {
          * @return sum of kernel
          */
         double _setFracIndex(double xFrac, double yFrac) {
-            std::pair<double, double> srcFracInd(xFrac, yFrac);
-            _kernelPtr->setKernelParameters(srcFracInd);
-            double kSum = _kernelPtr->computeVectors(_xList, _yList, false);
-            if (_maskKernelPtr) {
+            double kSum;
+            if (_kernelTablePtr) {
+                kSum = _kernelTablePtr->computeColWeights(xFrac, _xList)
+                    *_kernelTablePtr->computeRowWeights(yFrac, _yList);
+            } else {
+                std::pair<double, double> srcFracInd(xFrac, yFrac);
+                _kernelPtr->setKernelParameters(srcFracInd);
+                kSum = _kernelPtr->computeVectors(_xList, _yList, false);
+            }
+            if (_maskKernelTablePtr) {
+                _maskKernelTablePtr->computeColWeights(xFrac, _maskXList);
+                _maskKernelTablePtr->computeRowWeights(yFrac, _maskYList);
+            } else if (_maskKernelPtr) {
+                std::pair<double, double> srcFracInd(xFrac, yFrac);
                 _maskKernelPtr->setKernelParameters(srcFracInd);
                 _maskKernelPtr->computeVectors(_maskXList, _maskYList, false);
             }
             return kSum;
         }
 
+        /**
+         * Return the range [first, second) of a list of tabulated kernel values outside of which all values
+         * are zero; tabulated kernels have no zeros inside that range, so pixels with zero weight (which may
+         * be NaN) are never used
+         */
+        static std::pair<int, int> _nonzeroRange(std::vector<double> const &kList) {
+            int first = 0;
+            int second = kList.size();
+            while (first < second && kList[first] == 0) {
+                ++first;
+            }
+            while (second > first && kList[second - 1] == 0) {
+                --second;
+            }
+            return std::make_pair(first, second);
+        }
+
+        static PTR(WarpingKernelTable) _makeTable(PTR(lsst::afw::math::SeparableKernel) kernelPtr) {
+            if (kernelPtr && WarpingKernelTable::canTabulate(*kernelPtr)) {
+                return std::make_shared<WarpingKernelTable>(*kernelPtr);
+            }
+            return PTR(WarpingKernelTable)();
+        }
+
         SrcImageT _srcImage;
         PTR(lsst::afw::math::SeparableKernel) _kernelPtr;
         PTR(lsst::afw::math::SeparableKernel) _maskKernelPtr;
         bool _hasMaskKernel;
+        PTR(WarpingKernelTable) _kernelTablePtr;       // null if the kernel cannot be tabulated
+        PTR(WarpingKernelTable) _maskKernelTablePtr;   // null if no mask kernel or it cannot be tabulated
         lsst::afw::geom::Point2I _kernelCtr;
         lsst::afw::geom::Point2I _maskKernelCtr;
         lsst::afw::image::MaskPixel _growFullMask;
@@ -47,6 +47,7 @@
 #include "lsst/afw/math/Function.h"
 #include "lsst/afw/math/FunctionLibrary.h"
 #include "lsst/afw/math/Kernel.h"
+#include "lsst/afw/math/WarpingPlan.h"
 
 namespace lsst {
 namespace afw {
@@ -225,6 +226,35 @@ namespace math {
      */
     PTR(SeparableKernel) makeWarpingKernel(std::string name);
 
+    /**
+     * \brief Compute the parent bounding box of the destination pixels that an image warps onto.
+     *
+     * The outer edges of the pixels along the whole boundary of srcBBox are transformed, at points no
+     * more than sampleSpacing pixels apart, so the result is accurate for distorted WCS (not just affine
+     * ones) without needing to be padded; it contains every destination pixel whose center maps inside
+     * the outer edges of srcBBox, to within the curvature of the boundary between samples.
+     *
+     * \throw lsst::pex::exceptions::InvalidParameterError if sampleSpacing < 1
+     */
+    lsst::afw::geom::Box2I computeWarpedBBox(
+        lsst::afw::image::Wcs const &destWcs,   ///< WCS of the destination %image
+        lsst::afw::geom::Box2I const &srcBBox,  ///< parent bounding box of the source %image
+        lsst::afw::image::Wcs const &srcWcs,    ///< WCS of the source %image
+        int sampleSpacing = 50                  ///< maximum spacing of the points sampled along
+            ///< the edges of srcBBox (pixels)
+    );
+
+    /**
+     * \brief A variant of computeWarpedBBox that uses an XYTransform instead of a pair of WCS.
+     */
+    lsst::afw::geom::Box2I computeWarpedBBox(
+        lsst::afw::geom::Box2I const &srcBBox,  ///< parent bounding box of the source %image
+        lsst::afw::geom::XYTransform const &xyTransform, ///< xy transform mapping source position
+            ///< to destination position in the forward direction (only the forward direction is used)
+        int sampleSpacing = 50                  ///< maximum spacing of the points sampled along
+            ///< the edges of srcBBox (pixels)
+    );
+
     /**
      * \brief Parameters to control convolution
      *
@@ -258,7 +288,8 @@ namespace math {
             _maskWarpingKernelPtr(),
             _cacheSize(cacheSize),
             _interpLength(interpLength),
-            _growFullMask(growFullMask)
+            _growFullMask(growFullMask),
+            _numThreads(1)
         {
             setMaskWarpingKernelName(maskWarpingKernelName);
         }
@@ -278,6 +309,9 @@ namespace math {
          * 10,000 typically results in a warping error of a fraction of a count.
          * 100,000 typically results in a warping error of less than 0.01 count.
          * Note the new cache is not computed until getWarpingKernel or getMaskWarpingKernel is called.
+         *
+         * warpImage does not use the cache of Lanczos and bilinear kernels; it evaluates them from
+         * a finer table of its own (accurate to about one part in 10^6), whatever the cache size.
          */
         void setCacheSize(
             int cacheSize ///< cache size
@@ -360,6 +394,24 @@ namespace math {
             lsst::afw::image::MaskPixel growFullMask  ///< device preference
         ) { _growFullMask = growFullMask; }
 
+        /**
+         * @brief get the number of threads used to warp an image
+         */
+        int getNumThreads() const { return _numThreads; }
+
+        /**
+         * @brief set the number of threads used to warp an image
+         *
+         * The destination image is split into bands of rows (aligned to the interpolation length),
+         * each warped on its own thread with its own copies of the warping kernels.
+         * The result does not depend on the number of threads.
+         *
+         * @throw lsst::pex::exceptions::InvalidParameterError if numThreads < 1
+         */
+        void setNumThreads(
+            int numThreads  ///< number of threads
+        );
+
     private:
         /**
          * @brief Throw an exception if the two kernels are not compatible in shape
@@ -377,6 +429,7 @@ namespace math {
         int _cacheSize;
         int _interpLength;
         lsst::afw::image::MaskPixel _growFullMask;
+        int _numThreads;
     };
 
 
@@ -468,6 +521,72 @@ namespace math {
      );
 
 
+    /**
+     * \brief A variant of warpImage that uses source positions computed in advance by a WarpingPlan,
+     * so that many images can be warped to the same destination without evaluating any WCS.
+     *
+     * The result is identical to that of the other overloads for the same WCS or XYTransform.
+     *
+     * \throw lsst::pex::exceptions::InvalidParameterError if the parent bounding box of destImage
+     * is not plan.getDestBBox(), or if control.getInterpLength() is not plan.getInterpLength()
+     */
+    template<typename DestImageT, typename SrcImageT>
+    int warpImage(
+        DestImageT &destImage,              ///< remapped %image
+        SrcImageT const &srcImage,          ///< source %image
+        WarpingPlan const &plan,            ///< source positions of the destination pixels
+        WarpingControl const &control,      ///< control parameters
+        typename DestImageT::SinglePixel padValue = lsst::afw::math::edgePixel<DestImageT>(
+            typename lsst::afw::image::detail::image_traits<DestImageT>::image_category())
+            ///< use this value for undefined (edge) pixels
+     );
+
+    /**
+     * \brief A variant of warpImage that warps only the pixels of destImage in a SpanSet.
+     *
+     * Pixels of destImage outside destSpans are left untouched, so the cost scales with the area
+     * of destSpans rather than that of destImage; this is intended for warping the pixels of a few
+     * footprints (e.g. for forced photometry or deblending).  The warped pixels are identical to those
+     * of a full warp of destImage when the interpolation length is 0 or 1; otherwise source positions
+     * are interpolated between the same grid of points (anchored on destImage's bounding box) as
+     * a full warp, but may differ by roundoff.  This variant always runs on a single thread.
+     *
+     * \return the number of valid pixels warped (those that are not edge pixels).
+     *
+     * \throw lsst::pex::exceptions::InvalidParameterError if destImage is srcImage
+     */
+    template<typename DestImageT, typename SrcImageT>
+    int warpImage(
+        DestImageT &destImage,                  ///< remapped %image
+        lsst::afw::geom::SpanSet const &destSpans,  ///< pixels of destImage to warp, in parent
+            ///< coordinates; pixels outside destImage are ignored
+        lsst::afw::image::Wcs const &destWcs,   ///< WCS of remapped %image
+        SrcImageT const &srcImage,              ///< source %image
+        lsst::afw::image::Wcs const &srcWcs,    ///< WCS of source %image
+        WarpingControl const &control,          ///< control parameters
+        typename DestImageT::SinglePixel padValue = lsst::afw::math::edgePixel<DestImageT>(
+              typename lsst::afw::image::detail::image_traits<DestImageT>::image_category())
+              ///< use this value for undefined (edge) pixels
+    );
+
+    /**
+     * \brief A variant of warpImage that warps only the pixels of destImage in a SpanSet,
+     * using an XYTransform instead of a pair of WCS.
+     */
+    template<typename DestImageT, typename SrcImageT>
+    int warpImage(
+        DestImageT &destImage,              ///< remapped %image
+        lsst::afw::geom::SpanSet const &destSpans,  ///< pixels of destImage to warp, in parent
+            ///< coordinates; pixels outside destImage are ignored
+        SrcImageT const &srcImage,          ///< source %image
+        lsst::afw::geom::XYTransform const &xyTransform, ///<  xy transform mapping source position
+            ///< to destination position in the forward direction (but only the reverse direction is used)
+        WarpingControl const &control,      ///< control parameters
+        typename DestImageT::SinglePixel padValue = lsst::afw::math::edgePixel<DestImageT>(
+            typename lsst::afw::image::detail::image_traits<DestImageT>::image_category())
+            ///< use this value for undefined (edge) pixels
+     );
+
     /**
      * @brief Warp an image with a LinearTranform about a specified point.
      *        This enables warping an image of e.g. a PSF without translating the centroid.
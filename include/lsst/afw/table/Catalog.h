@@ -353,6 +353,70 @@ public:
         return io::FitsReader::apply<CatalogT>(manager, hdu, flags);
     }
 
+    /**
+     *  @brief Read only the given columns of a FITS binary table from a regular file.
+     *
+     *  The records are always read as BaseRecords (see io::FitsReader::apply), so this is only useful
+     *  for BaseCatalog.
+     *
+     *  @param[in] filename    Name of the file to read.
+     *  @param[in] columns     Names of the fields to read (including Flag fields); aliases are resolved.
+     *  @param[in] hdu         Number of the "header-data unit" to read (where 1 is the Primary HDU).
+     *                         The default value of 0 is interpreted as "the first HDU with NAXIS != 0".
+     */
+    static CatalogT readFits(std::string const & filename, std::vector<std::string> const & columns,
+                             int hdu=0) {
+        return io::FitsReader::apply<CatalogT>(filename, columns, hdu);
+    }
+
+    /**
+     *  @brief Read only the given columns of a FITS binary table from a RAM file.
+     *
+     *  The records are always read as BaseRecords (see io::FitsReader::apply), so this is only useful
+     *  for BaseCatalog.
+     *
+     *  @param[in] manager     Object that manages the memory to be read.
+     *  @param[in] columns     Names of the fields to read (including Flag fields); aliases are resolved.
+     *  @param[in] hdu         Number of the "header-data unit" to read (where 1 is the Primary HDU).
+     *                         The default value of 0 is interpreted as "the first HDU with NAXIS != 0".
+     */
+    static CatalogT readFits(fits::MemFileManager & manager, std::vector<std::string> const & columns,
+                             int hdu=0) {
+        return io::FitsReader::apply<CatalogT>(manager, columns, hdu);
+    }
+
+    /**
+     *  @brief Read some of the rows (and possibly columns) of a FITS binary table from a regular file.
+     *
+     *  @param[in] filename    Name of the file to read.
+     *  @param[in] ctrl        The rows and columns to read; see FitsReadControl.  If ctrl.columns is not
+     *                         empty, the records are read as BaseRecords.
+     *  @param[in] hdu         Number of the "header-data unit" to read (where 1 is the Primary HDU).
+     *                         The default value of 0 is interpreted as "the first HDU with NAXIS != 0".
+     *  @param[in] flags       Table-subclass-dependent bitflags that control the details of how to read
+     *                         the catalog.  See e.g. SourceFitsFlags.
+     */
+    static CatalogT readFits(std::string const & filename, FitsReadControl const & ctrl,
+                             int hdu=0, int flags=0) {
+        return io::FitsReader::apply<CatalogT>(filename, ctrl, hdu, flags);
+    }
+
+    /**
+     *  @brief Read some of the rows (and possibly columns) of a FITS binary table from a RAM file.
+     *
+     *  @param[in] manager     Object that manages the memory to be read.
+     *  @param[in] ctrl        The rows and columns to read; see FitsReadControl.  If ctrl.columns is not
+     *                         empty, the records are read as BaseRecords.
+     *  @param[in] hdu         Number of the "header-data unit" to read (where 1 is the Primary HDU).
+     *                         The default value of 0 is interpreted as "the first HDU with NAXIS != 0".
+     *  @param[in] flags       Table-subclass-dependent bitflags that control the details of how to read
+     *                         the catalog.  See e.g. SourceFitsFlags.
+     */
+    static CatalogT readFits(fits::MemFileManager & manager, FitsReadControl const & ctrl,
+                             int hdu=0, int flags=0) {
+        return io::FitsReader::apply<CatalogT>(manager, ctrl, hdu, flags);
+    }
+
     /**
      *  @brief Read a FITS binary table from a file object already at the correct extension.
      *
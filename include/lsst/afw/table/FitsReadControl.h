@@ -0,0 +1,97 @@
+// -*- lsst-c++ -*-
+#ifndef AFW_TABLE_FitsReadControl_h_INCLUDED
+#define AFW_TABLE_FitsReadControl_h_INCLUDED
+
+#include <cstdint>
+#include <limits>
+#include <memory>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "lsst/base.h"
+#include "lsst/pex/config.h"
+#include "lsst/afw/table/BaseRecord.h"
+#include "lsst/afw/table/Schema.h"
+
+namespace lsst { namespace afw { namespace table {
+
+/**
+ *  @brief Parameters that restrict the rows and columns read from a FITS binary table.
+ *
+ *  Rows outside [rowBegin, rowEnd) are never read.  Rows inside the range are read one at a time
+ *  into a workspace record and only kept if they satisfy all the conditions added with addCondition,
+ *  so the memory used is proportional to the number of records returned (which are contiguous only
+ *  if there are no conditions).
+ */
+class FitsReadControl {
+public:
+
+    FitsReadControl() : rowBegin(0), rowEnd(std::numeric_limits<std::int64_t>::max()), columns() {}
+
+    LSST_CONTROL_FIELD(rowBegin, std::int64_t, "First row to read (0-indexed); negative values count back "
+                       "from the end of the table, as for Python slices (default: 0)");
+    LSST_CONTROL_FIELD(rowEnd, std::int64_t, "One past the last row to read; negative values count back "
+                       "from the end of the table, as for Python slices (default: the end of the table)");
+    LSST_CONTROL_FIELD(columns, std::vector<std::string>, "Names of the fields to read; all fields if "
+                       "empty.  When not empty, the catalog is read as a BaseCatalog (default: empty)");
+
+    /**
+     *  @brief Only keep records whose field with the given name satisfies (value of field) op value.
+     *
+     *  @param[in] name    Name of a scalar numeric, Angle (in radians) or Flag (0 or 1) field; aliases
+     *                     are resolved.  The field must be read, i.e. in columns if that isn't empty.
+     *  @param[in] op      One of "==", "!=", "<", "<=", ">", ">=".
+     *  @param[in] value   Value to compare to.
+     *
+     *  Throws pex::exceptions::InvalidParameterError if op is not recognized; an unknown or non-scalar
+     *  field is only detected when the table is read.
+     */
+    void addCondition(std::string const & name, std::string const & op, double value);
+
+    /// @brief Return true if any conditions have been added.
+    bool hasConditions() const { return !_conditions.empty(); }
+
+    /// @brief Return the rows [first, second) to read from a table with nRows rows.
+    std::pair<std::size_t, std::size_t> getRowRange(std::size_t nRows) const;
+
+#ifndef SWIG
+    /// @brief A test of a record against one condition; an implementation detail.
+    class Test;
+
+    /// @brief A predicate that tests records of a particular schema against all the conditions.
+    class Filter {
+    public:
+
+        /// @brief Return true if the record satisfies all the conditions.
+        bool operator()(BaseRecord const & record) const;
+
+    private:
+        friend class FitsReadControl;
+
+        std::vector< std::shared_ptr<Test const> > _tests;
+    };
+
+    /**
+     *  @brief Look up the fields of all the conditions in the given schema.
+     *
+     *  Throws pex::exceptions::NotFoundError if a field doesn't exist, and
+     *  pex::exceptions::InvalidParameterError if it isn't a scalar.
+     */
+    Filter makeFilter(Schema const & schema) const;
+#endif
+
+private:
+
+    struct Condition {
+        std::string name;
+        int op;
+        double value;
+    };
+
+    std::vector<Condition> _conditions;
+};
+
+}}} // namespace lsst::afw::table
+
+#endif // !AFW_TABLE_FitsReadControl_h_INCLUDED
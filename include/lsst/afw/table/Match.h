@@ -25,6 +25,8 @@
 #ifndef LSST_AFW_TABLE_MATCH_H
 #define LSST_AFW_TABLE_MATCH_H
 
+#include <string>
+#include <utility>
 #include <vector>
 
 #include "lsst/pex/config.h"
@@ -145,6 +147,156 @@ SourceMatchVector matchXy(
  */
 SourceMatchVector matchXy(SourceCatalog const &cat, double radius, bool symmetric);
 
+/**
+ *  @brief A spatial index over the positions of a catalog, used to match other catalogs against it
+ *         in ra, dec space.
+ *
+ *  The index is a balanced k-d tree of the unit vectors of the records' (ra, dec) positions, so
+ *  (unlike a sweep in declination) its performance doesn't depend on where the records lie on the sky.
+ *  It's built once, and may then be used to match any number of catalogs.  Records whose ra or dec
+ *  is NaN are not indexed.
+ *
+ *  The index holds a shallow copy of the catalog; the positions of its records must not be modified
+ *  while the index is in use.
+ *
+ *  This is instantiated for Simple and Source catalogs.
+ */
+template <typename Cat>
+class MatchIndex {
+public:
+
+    /// Build an index of the positions of the records in @a cat
+    explicit MatchIndex(Cat const & cat);
+
+    /**
+     *  @brief Reconstruct an index of @a cat from the table representation returned by pack().
+     *
+     *  This involves no trigonometry or sorting, so it's much cheaper than building the index.
+     *  Throws pex::exceptions::InvalidParameterError if @a packed doesn't describe @a cat (i.e.
+     *  refers to rows that aren't present, or whose IDs have changed).
+     */
+    MatchIndex(Cat const & cat, BaseCatalog const & packed);
+
+    /**
+     *  @brief Return a table representation of the index that can be used to persist it.
+     *
+     *  The schema of the returned object has "row" and "id" (RecordId) fields giving the position and
+     *  ID of each indexed record in the catalog, "x", "y" and "z" (double) fields for the unit vector
+     *  of its position, and an "axis" (int) field used to arrange the tree.
+     */
+    BaseCatalog pack() const;
+
+    /**
+     *  @brief Write the index to a FITS binary table.
+     *
+     *  @param[in] filename    Name of the file to write.
+     *  @param[in] mode        "a" to append a new HDU (e.g. after the indexed catalog), "w" to
+     *                         overwrite any existing file.
+     */
+    void writeFits(std::string const & filename, std::string const & mode="w") const {
+        pack().writeFits(filename, mode);
+    }
+
+    /**
+     *  @brief Read an index of @a cat written by writeFits.
+     *
+     *  @param[in] cat         The indexed catalog.
+     *  @param[in] filename    Name of the file to read.
+     *  @param[in] hdu         Number of the "header-data unit" to read (where 1 is the Primary HDU).
+     *                         The default value of 0 is interpreted as "the first HDU with NAXIS != 0",
+     *                         so must be set if the index was appended to the catalog's file.
+     */
+    static MatchIndex readFits(Cat const & cat, std::string const & filename, int hdu=0) {
+        return MatchIndex(cat, BaseCatalog::readFits(filename, hdu));
+    }
+
+    /// Return the indexed catalog
+    Cat const & getCatalog() const { return _catalog; }
+
+    /// Return the number of indexed records (those whose positions aren't NaN)
+    std::size_t size() const { return _points.size(); }
+
+#ifndef SWIG // swig will be confused by the nested names below; repeated with typedefs in match.i
+    typedef typename Cat::Record Record;
+
+    /**
+     * Compute all tuples (s1,s2,d) where s1 belongs to the indexed catalog, s2 belongs to @a cat2
+     * and d, the distance between s1 and s2, is at most @a radius; the result is the same as that of
+     * @c matchRaDec(getCatalog(),cat2,radius,mc), and is ordered by the position of s1 in the
+     * indexed catalog.
+     *
+     * This is instantiated for Simple and Source catalogs.
+     */
+    template <typename Cat2>
+    std::vector< Match<Record, typename Cat2::Record> > matchRaDec(
+        Cat2 const & cat2,                  ///< catalog to match to the indexed catalog
+        Angle radius,                       ///< match radius
+        MatchControl const& mc=MatchControl() ///< how to do the matching (obeys findOnlyClosest
+                                              ///  and includeMismatches)
+    ) const;
+
+    /**
+     * Match @a cat2 to the indexed catalog exactly as matchRaDec does, but return the matches as a
+     * table rather than a vector of Match objects.
+     *
+     * The schema of the returned object has "first" and "second" (RecordId) fields giving the
+     * positions of the matched records in the indexed catalog and @a cat2 (with second = -1 for a
+     * mismatch), and a "distance" (double, radians) field.  The columns of the table are contiguous,
+     * so may be used directly as arrays in Python.
+     *
+     * This is instantiated for Simple and Source catalogs.
+     */
+    template <typename Cat2>
+    BaseCatalog matchRaDecRows(
+        Cat2 const & cat2,                  ///< catalog to match to the indexed catalog
+        Angle radius,                       ///< match radius
+        MatchControl const& mc=MatchControl() ///< how to do the matching (obeys findOnlyClosest
+                                              ///  and includeMismatches)
+    ) const;
+
+    /// A match between records in the indexed catalog and another catalog, referred to by position
+    struct RowMatch {
+        std::size_t row1;               ///< index of the record in the indexed catalog
+        std::size_t row2;               ///< index of the record in the other catalog, or NO_MATCH
+        double d2;                      ///< squared distance between them, on the unit sphere
+
+        RowMatch(std::size_t row1_, std::size_t row2_, double d2_) : row1(row1_), row2(row2_), d2(d2_) {}
+    };
+
+    static std::size_t const NO_MATCH = static_cast<std::size_t>(-1);
+
+    /**
+     * Match @a cat2 to the indexed catalog exactly as matchRaDec does, appending the matches to
+     * @a result ordered by their rows in the indexed catalog (and then in @a cat2).
+     *
+     * Unlike the other matching methods this creates no tables or records, so several threads may
+     * use it at once.
+     */
+    template <typename Cat2>
+    void matchRaDecRows(Cat2 const & cat2, Angle radius, MatchControl const& mc,
+                        std::vector<RowMatch> & result) const;
+
+private:
+
+    /// A node of the tree: a record's position, and the coordinate that splits its subtrees
+    struct Point {
+        double v[3];                    // unit vector
+        std::size_t row;                // index of the record in _catalog
+        int axis;                       // which of v[] is used to split the subtrees
+    };
+
+    void _build(std::size_t begin, std::size_t end);
+
+    void _findNeighbors(
+        double const * v, double chord, double d2Limit, std::size_t begin, std::size_t end,
+        std::vector< std::pair<std::size_t, double> > & neighbors
+    ) const;
+
+    Cat _catalog;
+    std::vector<Point> _points;         // the nodes of the tree, in the order of an in-order traversal
+#endif // !SWIG
+};
+
 #ifndef SWIG // swig will be confused by the nested names below; repeated with typedefs in match.i
 
 /************************************************************************************************************/
@@ -223,6 +375,34 @@ std::vector< Match< typename Cat::Record, typename Cat::Record> > matchRaDec(
     bool symmetric
 );
 
+/**
+ *  @brief Group the records of several catalogs into objects, exactly as matching them one at a time
+ *         against a growing reference catalog (as MultiMatch.add does in Python) would.
+ *
+ *  Each catalog is matched as matchRaDec does to the reference records, the first record of each object
+ *  found so far, so each reference record is matched to at most its closest record in the catalog (but
+ *  a record may be matched to several objects); the unmatched records start new objects.  The catalogs
+ *  are processed in batches of nThreads: each catalog of a batch is matched to the references found
+ *  before the batch on its own thread, and then, in catalog order, to the objects started earlier in
+ *  the batch.  As the closest match to each reference doesn't depend on the other references, the
+ *  result doesn't depend on nThreads.
+ *
+ *  @param[in] catalogs   the catalogs to match
+ *  @param[in] radius     match radius
+ *  @param[in] nThreads   maximum number of threads to use
+ *
+ *  @return A table with one record for each record of each catalog that was matched to an object or
+ *          started one (so records that were matched to several objects appear several times), in the
+ *          order in which MultiMatch.add adds them to its result.  Its "catalog" (int) and "row"
+ *          (RecordId) fields give the index of the catalog and the position of the record within it,
+ *          and its "object" (RecordId) field gives the object, numbered from 0 in the order in which
+ *          they're started.
+ *
+ *  This is instantiated for Simple and Source catalogs.
+ */
+template <typename Cat>
+BaseCatalog multiMatchRaDec(std::vector<Cat> const & catalogs, Angle radius, int nThreads=1);
+
 /**
  *  @brief Return a table representation of a MatchVector that can be used to persist it.
  *
@@ -2,7 +2,10 @@
 #ifndef AFW_TABLE_IO_FitsReader_h_INCLUDED
 #define AFW_TABLE_IO_FitsReader_h_INCLUDED
 
+#include <algorithm>
+#include <string>
 #include <type_traits>
+#include <vector>
 
 #include "lsst/afw/fits.h"
 #include "lsst/afw/table/Schema.h"
@@ -10,6 +13,7 @@
 #include "lsst/afw/table/io/FitsSchemaInputMapper.h"
 #include "lsst/afw/table/BaseRecord.h"
 #include "lsst/afw/table/BaseTable.h"
+#include "lsst/afw/table/FitsReadControl.h"
 
 namespace lsst { namespace afw { namespace table { namespace io {
 
@@ -68,26 +72,61 @@ public:
         FitsSchemaInputMapper mapper(*metadata, true);
         reader->_setupArchive(fits, mapper, archive, ioFlags);
         PTR(BaseTable) table = reader->makeTable(mapper, metadata, ioFlags, true);
-        ContainerT container(std::dynamic_pointer_cast<typename ContainerT::Table>(table));
-        if (!container.getTable()) {
-            throw LSST_EXCEPT(
-                pex::exceptions::RuntimeError,
-                "Invalid table class for catalog."
-            );
+        return _readRecords<ContainerT>(fits, mapper, table, FitsReadControl());
+    }
+
+    /**
+     *  Create a new Catalog by reading some of the rows and columns of a FITS binary table.
+     *
+     *  If ctrl.columns is not empty, the table is always read as a BaseTable, whatever the tag in the file
+     *  says, since a subset of the columns needn't be a valid schema for any other table class (so
+     *  ContainerT should be BaseCatalog), and objects persisted in other HDUs (e.g. Footprints) are not
+     *  read.  Otherwise this is just like the other overload, except that only the rows selected by ctrl
+     *  are read.
+     *
+     *  @param[in]  fits     An afw::fits::Fits helper that points to a FITS binary table HDU.
+     *  @param[in]  ctrl     The rows and columns to read.  Names of columns that aren't column names are
+     *                       looked up in the aliases saved with the table.  Throws
+     *                       pex::exceptions::NotFoundError if any name doesn't correspond to a column or
+     *                       Flag field.
+     *  @param[in]  ioFlags  A set of subclass-dependent bitflags; see the other overload.
+     *  @param[in]  archive  An archive of Persistables; see the other overload.
+     */
+    template <typename ContainerT>
+    static ContainerT apply(
+        afw::fits::Fits & fits,
+        FitsReadControl const & ctrl,
+        int ioFlags,
+        PTR(InputArchive) archive=PTR(InputArchive)()
+    ) {
+        PTR(daf::base::PropertyList) metadata = std::make_shared<daf::base::PropertyList>();
+        fits.readMetadata(*metadata, true);
+        FitsReader const * reader = 0;
+        if (ctrl.columns.empty()) {
+            reader = _lookupFitsReader(*metadata);
+        } else {
+            reader = _lookupFitsReader("BASE");
+            metadata->remove("AR_HDU");
         }
-        std::size_t nRows = fits.countRows();
-        container.reserve(nRows);
-        for (std::size_t row = 0; row < nRows; ++row) {
-            mapper.readRecord(
-                // We need to be able to support reading Catalog<T const>, since it shares the same template
-                // as Catalog<T> (which invokes this method in readFits).
-                const_cast<typename std::remove_const<typename ContainerT::Record>::type&>(
-                    *container.addNew()
-                ),
-                fits, row
-            );
+        FitsSchemaInputMapper mapper(*metadata, true);
+        if (!ctrl.columns.empty()) {
+            mapper.select(ctrl.columns);
         }
-        return container;
+        reader->_setupArchive(fits, mapper, archive, ioFlags);
+        PTR(BaseTable) table = reader->makeTable(mapper, metadata, ioFlags, true);
+        return _readRecords<ContainerT>(fits, mapper, table, ctrl);
+    }
+
+    /**
+     *  Create a new Catalog by reading only some of the columns of a FITS binary table.
+     *
+     *  This is a shortcut for the FitsReadControl overload with only ctrl.columns set.
+     */
+    template <typename ContainerT>
+    static ContainerT apply(afw::fits::Fits & fits, std::vector<std::string> const & columns) {
+        FitsReadControl ctrl;
+        ctrl.columns = columns;
+        return apply<ContainerT>(fits, ctrl, 0);
     }
 
     /**
@@ -103,6 +142,32 @@ public:
         return apply<ContainerT>(fits, ioFlags, archive);
     }
 
+    /**
+     *  Create a new Catalog by reading some of the columns of a FITS file.
+     *
+     *  This is a simply a convenience function that creates an afw::fits::Fits object from either
+     *  a string filename or a afw::fits::MemFileManager, then calls the other apply() overload.
+     */
+    template <typename ContainerT, typename SourceT>
+    static ContainerT apply(SourceT & source, std::vector<std::string> const & columns, int hdu) {
+        afw::fits::Fits fits(source, "r", afw::fits::Fits::AUTO_CLOSE | afw::fits::Fits::AUTO_CHECK);
+        fits.setHdu(hdu);
+        return apply<ContainerT>(fits, columns);
+    }
+
+    /**
+     *  Create a new Catalog by reading some of the rows and columns of a FITS file.
+     *
+     *  This is a simply a convenience function that creates an afw::fits::Fits object from either
+     *  a string filename or a afw::fits::MemFileManager, then calls the other apply() overload.
+     */
+    template <typename ContainerT, typename SourceT>
+    static ContainerT apply(SourceT & source, FitsReadControl const & ctrl, int hdu, int ioFlags) {
+        afw::fits::Fits fits(source, "r", afw::fits::Fits::AUTO_CLOSE | afw::fits::Fits::AUTO_CHECK);
+        fits.setHdu(hdu);
+        return apply<ContainerT>(fits, ctrl, ioFlags);
+    }
+
     /**
      *  Callback to create a Table object from a FITS binary table schema.
      *
@@ -139,6 +204,58 @@ public:
 
 private:
 
+    // Create a container for the given table and read the rows of the current HDU selected by ctrl into it,
+    // a block of rows at a time.
+    template <typename ContainerT>
+    static ContainerT _readRecords(
+        afw::fits::Fits & fits,
+        FitsSchemaInputMapper & mapper,
+        PTR(BaseTable) const & table,
+        FitsReadControl const & ctrl
+    ) {
+        typedef typename std::remove_const<typename ContainerT::Record>::type Record;
+        ContainerT container(std::dynamic_pointer_cast<typename ContainerT::Table>(table));
+        if (!container.getTable()) {
+            throw LSST_EXCEPT(
+                pex::exceptions::RuntimeError,
+                "Invalid table class for catalog."
+            );
+        }
+        std::pair<std::size_t, std::size_t> const rows = ctrl.getRowRange(fits.countRows());
+        std::size_t const blockSize = mapper.getRowsPerBlock();
+        // If we're selecting rows, each row is read into a workspace record from a separate table (so
+        // rejected rows don't use any of the catalog's memory), and copied into the catalog if it passes.
+        PTR(BaseRecord) workspace;
+        FitsReadControl::Filter filter;
+        if (ctrl.hasConditions()) {
+            filter = ctrl.makeFilter(table->getSchema());
+            workspace = table->clone()->makeRecord();
+        } else {
+            container.reserve(rows.second - rows.first);
+        }
+        for (std::size_t row = rows.first; row < rows.second; ++row) {
+            if ((row - rows.first) % blockSize == 0) {
+                mapper.prepRead(row, std::min(blockSize, rows.second - row), fits);
+            }
+            if (workspace) {
+                mapper.readRecord(*workspace, fits, row);
+                if (filter(*workspace)) {
+                    const_cast<Record&>(*container.addNew()).assign(*workspace);
+                }
+            } else {
+                mapper.readRecord(
+                    // We need to be able to support reading Catalog<T const>, since it shares the same
+                    // template as Catalog<T> (which invokes this method in readFits).
+                    const_cast<Record&>(*container.addNew()),
+                    fits, row
+                );
+            }
+        }
+        return container;
+    }
+
+    static FitsReader const * _lookupFitsReader(std::string const & name);
+
     static FitsReader const * _lookupFitsReader(daf::base::PropertyList const & metadata);
 
     void _setupArchive(
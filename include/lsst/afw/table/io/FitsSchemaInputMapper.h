@@ -2,6 +2,9 @@
 #ifndef AFW_TABLE_IO_FitsSchemaInputMapper_h_INCLUDED
 #define AFW_TABLE_IO_FitsSchemaInputMapper_h_INCLUDED
 
+#include <string>
+#include <vector>
+
 #include "lsst/afw/fits.h"
 #include "lsst/afw/table/Schema.h"
 #include "lsst/afw/table/io/InputArchive.h"
@@ -20,6 +23,15 @@ public:
     FitsColumnReader & operator=(FitsColumnReader const &) = delete;
     FitsColumnReader & operator=(FitsColumnReader &&) = delete;
 
+    /**
+     *  Optionally read the cells of a block of rows in one go, before readCell is called for each of them.
+     *
+     *  Readers that override this should keep the values in a buffer and use them in readCell (which must
+     *  still work for rows outside the last block read).  The default implementation does nothing, so
+     *  readCell reads each cell from the file.
+     */
+    virtual void prepRead(std::size_t firstRow, std::size_t nRows, fits::Fits & fits) {}
+
     virtual void readCell(
         BaseRecord & record,
         std::size_t row,
@@ -126,6 +138,14 @@ public:
      */
     void customize(std::unique_ptr<FitsColumnReader> reader);
 
+    /**
+     *  Remove all items except those with the given column names (ttypes) from the mapping.
+     *
+     *  Names that aren't column names are looked up in the aliases read from the FITS header.  Throws
+     *  pex::exceptions::NotFoundError if a name doesn't correspond to any item.
+     */
+    void select(std::vector<std::string> const & names);
+
     /**
      *  Map any remaining items into regular Schema items, and return the final Schema.
      *
@@ -133,6 +153,23 @@ public:
      */
     Schema finalize();
 
+    /**
+     *  Return the number of rows that should be read in each call to prepRead().
+     *
+     *  This is chosen to keep the buffered data for a block to a few megabytes.  Must not be called
+     *  before finalize().
+     */
+    std::size_t getRowsPerBlock() const;
+
+    /**
+     *  Read a block of rows from each column into buffers, to be used by subsequent calls to readRecord().
+     *
+     *  This is an optimization: reading a block of rows from a column with a single cfitsio call is much
+     *  faster than reading them a cell at a time.  Rows outside the last block read are still read
+     *  (more slowly) by readRecord().
+     */
+    void prepRead(std::size_t firstRow, std::size_t nRows, afw::fits::Fits & fits);
+
     /**
      *  Fill a record from a FITS binary table row.
      */
@@ -73,6 +73,7 @@ public:
         for (typename ContainerT::const_iterator i = container.begin(); i != container.end(); ++i) {
             _writeRecord(*i);
         }
+        _flushRecords();
         _finish();
     }
 
@@ -90,6 +91,14 @@ protected:
     /// @brief Finish writing a catalog.
     virtual void _finish() {}
 
+    /**
+     *  @brief Write any records that _writeRecord has buffered but not yet written to the file.
+     *
+     *  Rows are written a block at a time, a column at a time; write() calls this after the last
+     *  record, before _finish().
+     */
+    void _flushRecords();
+
     Fits * _fits;      // wrapped cfitsio pointer
     int _flags;        // subclass-defined flags to control writing
     std::size_t _row;  // which row we're currently processing
@@ -4,6 +4,7 @@
 #include <cstdint>
 
 #include "lsst/afw/detection/FootprintSet.h"
+#include "lsst/afw/detection/FootprintStream.h"
 #include "lsst/afw/table/Source.h"
 %}
 
@@ -29,6 +30,19 @@
 %footprintSetOperations(double)
 }
 
+%include "lsst/afw/detection/FootprintStream.h"
+
+%define %footprintStreamOperations(PIXEL)
+%template(addStrip) addStrip<PIXEL>;
+%enddef
+
+%extend lsst::afw::detection::FootprintStream {
+%footprintStreamOperations(std::uint16_t)
+%footprintStreamOperations(int)
+%footprintStreamOperations(float)
+%footprintStreamOperations(double)
+}
+
 namespace lsst { namespace afw { namespace table {
      typedef VectorT< lsst::afw::table::SourceRecord, lsst::afw::table::SourceTable > SourceVector;
 }}}
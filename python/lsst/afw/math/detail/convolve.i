@@ -51,6 +51,11 @@ lsst::afw::image::MaskedImage<PIXTYPE, lsst::afw::image::MaskPixel, lsst::afw::i
     %template(basicConvolve) lsst::afw::math::detail::basicConvolve<IMAGE(PIXTYPE1), IMAGE(PIXTYPE2)>;
     %template(convolveWithBruteForce)
         lsst::afw::math::detail::convolveWithBruteForce<IMAGE(PIXTYPE1), IMAGE(PIXTYPE2)>;
+    %template(convolveWithFft) lsst::afw::math::detail::convolveWithFft<IMAGE(PIXTYPE1), IMAGE(PIXTYPE2)>;
+    %template(convolveSeparableWithIterators)
+        lsst::afw::math::detail::convolveSeparableWithIterators<IMAGE(PIXTYPE1), IMAGE(PIXTYPE2)>;
+    %template(convolveWithBasisKernels)
+        lsst::afw::math::detail::convolveWithBasisKernels<IMAGE(PIXTYPE1), IMAGE(PIXTYPE2)>;
     %template(convolveWithInterpolation)
         lsst::afw::math::detail::convolveWithInterpolation<IMAGE(PIXTYPE1), IMAGE(PIXTYPE2)>;
     %template(convolveRegionWithInterpolation)
@@ -60,6 +60,7 @@ Python interface to lsst::afw::math classes
 %template(vectorVectorF) std::vector<std::vector<float> >;
 %template(vectorVectorD) std::vector<std::vector<double> >;
 %template(vectorVectorI) std::vector<std::vector<int> >;
+%template(vectorString) std::vector<std::string>;
 
 %import "lsst/afw/image/imageLib.i"
 
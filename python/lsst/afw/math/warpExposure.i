@@ -25,10 +25,15 @@
 %{
 #include <cstdint>
 
+#include "lsst/afw/math/WarpingPlan.h"
 #include "lsst/afw/math/warpExposure.h"
 #include "lsst/afw/image/Mask.h"
 %}
 
+%declareTablePersistable(WarpingPlan, lsst::afw::math::WarpingPlan)
+
+%include "lsst/afw/math/WarpingPlan.h"
+
 //
 // Additional kernel subclasses
 //
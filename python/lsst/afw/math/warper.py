@@ -21,6 +21,8 @@ from builtins import object
 # the GNU General Public License along with this program.  If not,
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
+import numpy as np
+
 import lsst.pex.config as pexConfig
 import lsst.afw.geom as afwGeom
 import lsst.afw.image as afwImage
@@ -32,6 +34,8 @@ def computeWarpedBBox(destWcs, srcBBox, srcWcs):
     """Compute the bounding box of a warped image
 
     The bounding box includes all warped pixels and it may be a bit oversize.
+    This is a thin wrapper around lsst.afw.math.computeWarpedBBox, which transforms points
+    along the whole boundary of srcBBox, not just its corners.
 
     @param destWcs: WCS of warped exposure
     @param srcBBox: parent bounding box of unwarped image
@@ -39,17 +43,13 @@ def computeWarpedBBox(destWcs, srcBBox, srcWcs):
 
     @return destBBox: bounding box of warped exposure
     """
-    srcPosBox = afwGeom.Box2D(srcBBox)
-    destPosBox = afwGeom.Box2D()
-    for inX in (srcPosBox.getMinX(), srcPosBox.getMaxX()):
-        for inY in (srcPosBox.getMinY(), srcPosBox.getMaxY()):
-            destPos = destWcs.skyToPixel(srcWcs.pixelToSky(afwGeom.Point2D(inX, inY)))
-            destPosBox.include(destPos)
-    destBBox = afwGeom.Box2I(destPosBox, afwGeom.Box2I.EXPAND)
-    return destBBox
+    return mathLib.computeWarpedBBox(destWcs, srcBBox, srcWcs)
 
 _DefaultInterpLength = 10
 _DefaultCacheSize = 1000000
+# grow the bbox computed by computeWarpedBBox by this much when warping into several bboxes at once,
+# in case it misses a few warped pixels along the edges
+_WarpedBBoxMargin = 2
 
 class WarperConfig(pexConfig.Config):
     warpingKernelName = pexConfig.ChoiceField(
@@ -90,6 +90,12 @@ class WarperConfig(pexConfig.Config):
         doc = "mask bits to grow to full width of image/variance kernel,",
         default = afwImage.MaskU.getPlaneBitMask("EDGE"),
     )
+    numThreads = pexConfig.RangeField(
+        dtype = int,
+        doc = "number of threads used to warp each image (the result does not depend on it)",
+        default = 1,
+        min = 1,
+    )
 
 class Warper(object):
     """Warp images
@@ -101,6 +107,7 @@ class Warper(object):
         cacheSize = _DefaultCacheSize,
         maskWarpingKernelName = "",
         growFullMask = afwImage.MaskU.getPlaneBitMask("EDGE"),
+        numThreads = 1,
     ):
         """Create a Warper
 
@@ -110,9 +117,11 @@ class Warper(object):
         - cacheSize: size of computeCache
         - maskWarpingKernelName: name of mask warping kernel (if "" then use warpingKernelName);
             an argument to lsst.afw.math.makeWarpingKernel
+        - numThreads: number of threads used to warp each image
         """
         self._warpingControl = mathLib.WarpingControl(
             warpingKernelName, maskWarpingKernelName, cacheSize, interpLength, growFullMask)
+        self._warpingControl.setNumThreads(numThreads)
 
     @classmethod
     def fromConfig(cls, config):
@@ -126,6 +135,7 @@ class Warper(object):
             interpLength = config.interpLength,
             cacheSize = config.cacheSize,
             growFullMask = config.growFullMask,
+            numThreads = config.numThreads,
         )
 
     def getWarpingKernel(self):
@@ -202,6 +212,90 @@ class Warper(object):
         mathLib.warpImage(destImage, destWcs, srcImage, srcWcs, self._warpingControl)
         return destImage
 
+    def warpExposureToPatches(self, targets, srcExposure):
+        """Warp an exposure into several destination bounding boxes (e.g. the patches of a sky map) at once
+
+        Targets that share a WCS (e.g. patches of one tract) are warped together: the part of the union
+        of their bounding boxes that the source exposure overlaps is warped in a single pass, using the same
+        kernels and WCS evaluations, and each target is then cut out of the result.  Overlapping targets
+        are therefore only warped once.
+
+        @param targets: sequence of (destWcs, destBBox) pairs, where destBBox is the exact parent
+            bounding box of a warped exposure (an afwGeom.Box2I)
+        @param srcExposure: exposure to warp
+
+        @return a list of warped exposures (of the same type as srcExposure), one for each target.
+            Each is equal to warpExposure(destWcs, srcExposure, destBBox=destBBox), except that the
+            WCS is interpolated (see interpLength) over a grid aligned with the union of the targets
+            rather than with destBBox, so the results are identical only if interpLength <= 1.
+        """
+        groups = []  # list of (destWcs, indices of targets with that WCS)
+        for i, (destWcs, destBBox) in enumerate(targets):
+            for wcs, indices in groups:
+                if wcs == destWcs:
+                    indices.append(i)
+                    break
+            else:
+                groups.append((destWcs, [i]))
+
+        srcBBox = srcExposure.getBBox(afwImage.PARENT)
+        results = [None]*len(targets)
+        for destWcs, indices in groups:
+            warpedBBox = computeWarpedBBox(destWcs, srcBBox, srcExposure.getWcs())
+            warpedBBox.grow(_WarpedBBoxMargin)
+            unionBBox = afwGeom.Box2I()
+            for i in indices:
+                overlap = afwGeom.Box2I(targets[i][1])
+                overlap.clip(warpedBBox)
+                unionBBox.include(overlap)
+            if not unionBBox.isEmpty():
+                unionExposure = srcExposure.Factory(unionBBox, destWcs)
+                mathLib.warpExposure(unionExposure, srcExposure, self._warpingControl)
+                unionMaskedImage = unionExposure.getMaskedImage()
+
+            for i in indices:
+                destBBox = targets[i][1]
+                destExposure = srcExposure.Factory(destBBox, destWcs)
+                destMaskedImage = destExposure.getMaskedImage()
+                _setEdgePixels(destMaskedImage)
+                overlap = afwGeom.Box2I(destBBox)
+                overlap.clip(unionBBox)
+                if not overlap.isEmpty():
+                    destMaskedImage.assign(
+                        unionMaskedImage.Factory(unionMaskedImage, overlap, afwImage.PARENT, False),
+                        overlap, afwImage.PARENT)
+                destExposure.setCalib(afwImage.Calib(srcExposure.getCalib()))
+                destExposure.setFilter(srcExposure.getFilter())
+                results[i] = destExposure
+        return results
+
+    def warpFootprints(self, destWcs, srcExposure, footprints):
+        """Warp only the pixels of an exposure that fall in each of a list of destination footprints
+
+        Only the pixels in the footprints are computed (see the SpanSet variant of
+        lsst.afw.math.warpImage), so the cost scales with the total area of the footprints.
+
+        @param destWcs: WCS of the pixel grid the footprints are defined on
+        @param srcExposure: exposure to warp
+        @param footprints: sequence of lsst.afw.detection.Footprint, in the parent pixel coordinates
+            of destWcs
+
+        @return a list of lsst.afw.detection.HeavyFootprintF, one for each footprint, holding the
+            warped pixels; pixels that cannot be computed have the usual edge values
+            (image NaN, mask NO_DATA, variance infinite)
+        """
+        import lsst.afw.detection as afwDetection  # lsst.afw.detection imports lsst.afw.math
+        srcMaskedImage = srcExposure.getMaskedImage()
+        srcWcs = srcExposure.getWcs()
+        heavyFootprints = []
+        for footprint in footprints:
+            spans = afwGeom.SpanSet(afwGeom.SpanVector(
+                [afwGeom.Span(span.getY(), span.getX0(), span.getX1()) for span in footprint.getSpans()]))
+            destMaskedImage = afwImage.MaskedImageF(footprint.getBBox())
+            mathLib.warpImage(destMaskedImage, spans, destWcs, srcMaskedImage, srcWcs, self._warpingControl)
+            heavyFootprints.append(afwDetection.makeHeavyFootprint(footprint, destMaskedImage))
+        return heavyFootprints
+
     def _computeDestBBox(self, destWcs, srcImage, srcWcs, border, maxBBox, destBBox):
         """Process destBBox argument for warpImage and warpExposure
 
@@ -227,3 +321,12 @@ class Warper(object):
             if maxBBox is not None:
                 destBBox.clip(maxBBox)
         return destBBox
+
+
+def _setEdgePixels(maskedImage):
+    """Set all pixels of a masked image to the value warpExposure uses for pixels it cannot compute
+    """
+    imageArray = maskedImage.getImage().getArray()
+    imageArray[:] = np.nan if imageArray.dtype.kind == "f" else 0
+    maskedImage.getMask().set(afwImage.MaskU.getPlaneBitMask("NO_DATA"))
+    maskedImage.getVariance().set(np.inf)
@@ -40,6 +40,7 @@
 #include "lsst/afw/table/BaseTable.h"
 #include "lsst/afw/table/SchemaMapper.h"
 #include "lsst/afw/table/BaseColumnView.h"
+#include "lsst/afw/table/FitsReadControl.h"
 #include "lsst/afw/table/Catalog.h"
 
 // This enables numpy array conversion for Angle, converting it to a regular array of double.
@@ -686,6 +687,9 @@ for _d in (Field, Key, SchemaItem, _suffixes):
 
 // =============== Catalogs =================================================================================
 
+%include "lsst/pex/config.h"            // LSST_CONTROL_FIELD
+%include "lsst/afw/table/FitsReadControl.h"
+
 %include "lsst/afw/table/Catalog.i"
 
 namespace lsst { namespace afw { namespace table {
@@ -704,4 +708,46 @@ namespace lsst { namespace afw { namespace table {
     %}
 }
 
+// SWIG doesn't support keyword arguments for overloaded functions, so we wrap the readFits methods of
+// the catalog classes in Python to add the 'columns', 'rows' and 'where' keywords.
+%pythoncode %{
+def _makeReadFits(impl):
+    def readFits(source, hdu=0, flags=0, columns=None, rows=None, where=None):
+        """Read a catalog from a FITS binary table.
+
+        @param[in]  source   Name of the file to read or a MemFileManager object.
+        @param[in]  hdu      Number of the "header-data unit" to read (where 1 is the Primary HDU);
+                             0 means the first HDU with NAXIS != 0.
+        @param[in]  flags    Table-subclass-dependent flags that control how the catalog is read.
+        @param[in]  columns  Sequence of names of the fields to read (default is all of them).  Flag fields
+                             may be included, and aliases are resolved.  The catalog is then read as a
+                             BaseCatalog whatever type it was saved as and flags are ignored, so this is
+                             only supported by BaseCatalog.readFits.
+        @param[in]  rows     A slice (with no step) selecting the rows to read, e.g. slice(1000, 2000);
+                             rows outside the slice are never read.
+        @param[in]  where    Sequence of (name, op, value) conditions; only records for which all of
+                             them hold are kept.  name must be a scalar numeric, Angle or Flag field,
+                             op one of "==", "!=", "<", "<=", ">", ">=".
+        """
+        if columns is None and rows is None and where is None:
+            return impl(source, hdu, flags)
+        ctrl = FitsReadControl()
+        if columns is not None:
+            ctrl.columns = list(columns)
+        if rows is not None:
+            if rows.step not in (None, 1):
+                raise ValueError("Cannot read rows with a step other than 1")
+            if rows.start is not None:
+                ctrl.rowBegin = rows.start
+            if rows.stop is not None:
+                ctrl.rowEnd = rows.stop
+        if where is not None:
+            for name, op, value in where:
+                ctrl.addCondition(name, op, value)
+        return impl(source, ctrl, hdu, flags)
+    return staticmethod(readFits)
+
+BaseCatalog.readFits = _makeReadFits(BaseCatalog.readFits)
+%}
+
 }}} // namespace lsst::afw::table
@@ -43,6 +43,14 @@ public:
 
     static CatalogT readFits(std::string const & filename, int hdu=0, int flags=0);
     static CatalogT readFits(fits::MemFileManager & manager, int hdu=0, int flags=0);
+    static CatalogT readFits(std::string const & filename, std::vector<std::string> const & columns,
+                             int hdu=0);
+    static CatalogT readFits(fits::MemFileManager & manager, std::vector<std::string> const & columns,
+                             int hdu=0);
+    static CatalogT readFits(std::string const & filename, FitsReadControl const & ctrl,
+                             int hdu=0, int flags=0);
+    static CatalogT readFits(fits::MemFileManager & manager, FitsReadControl const & ctrl,
+                             int hdu=0, int flags=0);
 
     ColumnView getColumnView() const;
 
@@ -182,6 +182,84 @@ SourceMatchVector matchRaDec(
 
 }}} // namespace lsst::afw::table
 
+// MatchIndex::matchRaDec and matchRaDecRows are member templates, so we provide the instantiations by hand.
+
+%extend lsst::afw::table::MatchIndex<lsst::afw::table::SimpleCatalog> {
+    lsst::afw::table::SimpleMatchVector matchRaDec(
+        lsst::afw::table::SimpleCatalog const & cat2,
+        lsst::afw::geom::Angle radius,
+        lsst::afw::table::MatchControl const& mc=lsst::afw::table::MatchControl()
+    ) const {
+        return self->matchRaDec(cat2, radius, mc);
+    }
+    lsst::afw::table::ReferenceMatchVector matchRaDec(
+        lsst::afw::table::SourceCatalog const & cat2,
+        lsst::afw::geom::Angle radius,
+        lsst::afw::table::MatchControl const& mc=lsst::afw::table::MatchControl()
+    ) const {
+        return self->matchRaDec(cat2, radius, mc);
+    }
+    lsst::afw::table::BaseCatalog matchRaDecRows(
+        lsst::afw::table::SimpleCatalog const & cat2,
+        lsst::afw::geom::Angle radius,
+        lsst::afw::table::MatchControl const& mc=lsst::afw::table::MatchControl()
+    ) const {
+        return self->matchRaDecRows(cat2, radius, mc);
+    }
+    lsst::afw::table::BaseCatalog matchRaDecRows(
+        lsst::afw::table::SourceCatalog const & cat2,
+        lsst::afw::geom::Angle radius,
+        lsst::afw::table::MatchControl const& mc=lsst::afw::table::MatchControl()
+    ) const {
+        return self->matchRaDecRows(cat2, radius, mc);
+    }
+}
+
+%extend lsst::afw::table::MatchIndex<lsst::afw::table::SourceCatalog> {
+    lsst::afw::table::SourceMatchVector matchRaDec(
+        lsst::afw::table::SourceCatalog const & cat2,
+        lsst::afw::geom::Angle radius,
+        lsst::afw::table::MatchControl const& mc=lsst::afw::table::MatchControl()
+    ) const {
+        return self->matchRaDec(cat2, radius, mc);
+    }
+    lsst::afw::table::BaseCatalog matchRaDecRows(
+        lsst::afw::table::SourceCatalog const & cat2,
+        lsst::afw::geom::Angle radius,
+        lsst::afw::table::MatchControl const& mc=lsst::afw::table::MatchControl()
+    ) const {
+        return self->matchRaDecRows(cat2, radius, mc);
+    }
+}
+
+%template(SimpleMatchIndex) lsst::afw::table::MatchIndex<lsst::afw::table::SimpleCatalog>;
+%template(SourceMatchIndex) lsst::afw::table::MatchIndex<lsst::afw::table::SourceCatalog>;
+
+%pythoncode %{
+    def makeMatchIndex(catalog):
+        """Build a MatchIndex (SimpleMatchIndex or SourceMatchIndex) over the positions in catalog"""
+        if isinstance(catalog, SourceCatalog):
+            return SourceMatchIndex(catalog)
+        return SimpleMatchIndex(catalog)
+%}
+
+%template(SimpleCatalogVector) std::vector<lsst::afw::table::SimpleCatalog>;
+%template(SourceCatalogVector) std::vector<lsst::afw::table::SourceCatalog>;
+
+namespace lsst { namespace afw { namespace table {
+
+BaseCatalog multiMatchRaDec(
+    std::vector<SimpleCatalog> const & catalogs,
+    Angle radius, int nThreads=1
+);
+
+BaseCatalog multiMatchRaDec(
+    std::vector<SourceCatalog> const & catalogs,
+    Angle radius, int nThreads=1
+);
+
+}}} // namespace lsst::afw::table
+
 // swig can't disambiguate between the different packMatches overloads (which is actually
 // understandable, because they'd all match a Python list), so instead we provide
 // a pure-Python implementation that works on any sequence.
@@ -60,4 +60,8 @@ namespace lsst { namespace afw { namespace table {
 
 %declareSortedCatalog(SortedCatalogT, Simple)
 
+%pythoncode %{
+SimpleCatalog.readFits = _makeReadFits(SimpleCatalog.readFits)
+%}
+
 }}} // namespace lsst::afw::table
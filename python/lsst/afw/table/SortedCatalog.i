@@ -27,6 +27,10 @@ public:
 
     static SortedCatalogT readFits(std::string const & filename, int hdu=0, int flags=0);
     static SortedCatalogT readFits(fits::MemFileManager & manager, int hdu=0, int flags=0);
+    static SortedCatalogT readFits(std::string const & filename, FitsReadControl const & ctrl,
+                                   int hdu=0, int flags=0);
+    static SortedCatalogT readFits(fits::MemFileManager & manager, FitsReadControl const & ctrl,
+                                   int hdu=0, int flags=0);
 
     using CatalogT<RecordT>::isSorted;
     using CatalogT<RecordT>::sort;
@@ -69,6 +69,10 @@ namespace lsst { namespace afw { namespace table {
 
 %declareSortedCatalog(SortedCatalogT, Source)
 
+%pythoncode %{
+SourceCatalog.readFits = _makeReadFits(SourceCatalog.readFits)
+%}
+
 // n.b. can't figure out how to %extend a particular template instantiation,
 // but this works fine
 %pythoncode %{
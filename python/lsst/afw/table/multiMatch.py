@@ -4,7 +4,8 @@ from builtins import object
 import numpy
 import collections
 import lsst.afw.geom
-from .tableLib import SchemaMapper, CoordKey, SourceRecord
+from .tableLib import SchemaMapper, CoordKey, SourceRecord, makeMatchIndex, multiMatchRaDec, \
+    SimpleCatalog, SourceCatalog, SimpleCatalogVector, SourceCatalogVector
 
 class MultiMatch(object):
 
@@ -35,6 +36,9 @@ class MultiMatch(object):
         self.objectKey = outSchema.addField("object", type=numpy.int64, doc="Unique ID for joined sources")
         for name, dataType in dataIdFormat.items():
             self.dataIdKeys[name] = outSchema.addField(name, type=dataType, doc="'%s' data ID component")
+        # Data ID components that can't be set a column at a time
+        self.stringDataIdNames = set(name for name, key in self.dataIdKeys.items()
+                                     if outSchema.find(key).field.getTypeString() == "String")
         # self.result will be a catalog containing the union of all matched records, with an 'object' ID
         # column that can be used to group matches.  Sources that have ambiguous matches may appear
         # multiple times.
@@ -49,6 +53,9 @@ class MultiMatch(object):
         self.table = RecordClass.Table.make(self.mapper.getOutputSchema())
         # Counter used to assign the next object ID
         self.nextObjId = 1
+        # Object IDs of the records in self.reference, and of each block of records added to self.result
+        self.referenceObjIds = None
+        self.resultObjIds = []
 
     def makeRecord(self, inputRecord, dataId, objId):
         """Create a new result record from the given input record, using the given data ID and object ID
@@ -59,47 +66,132 @@ class MultiMatch(object):
         outputRecord.set(self.objectKey, objId)
         return outputRecord
 
+    def makeRecords(self, catalog, dataId, objIds):
+        """Create a new contiguous catalog of result records from all the records in the given catalog,
+        using the given data ID and array of object IDs to fill in additional columns.
+
+        The records are copied in C++ (unless the input records aren't of the output record type or a
+        subclass of it), and the additional columns are set a column at a time.
+        """
+        output = self.table.Catalog(self.table)
+        self.table.preallocate(len(catalog))
+        output.reserve(len(catalog))
+        if not isinstance(catalog, type(output)) and issubclass(catalog.Record, output.Record):
+            catalog = catalog.cast(type(output))
+        output.extend(catalog, mapper=self.mapper)
+        output[self.objectKey] = objIds
+        for name, key in self.dataIdKeys.items():
+            if name in self.stringDataIdNames:
+                for record in output:
+                    record.set(key, dataId[name])
+            else:
+                output[key] = dataId[name]
+        return output
+
+    def makeObjIds(self, n):
+        """Return an array of n new object IDs."""
+        objIds = numpy.arange(self.nextObjId, self.nextObjId + n, dtype=numpy.int64)
+        self.nextObjId += n
+        return objIds
+
     def add(self, catalog, dataId):
         """Add a new catalog to the match, corresponding to the given data ID.
         """
         if self.result is None:
-            self.result = self.table.Catalog(self.table)
-            for record in catalog:
-                self.result.append(self.makeRecord(record, dataId, objId=self.nextObjId))
-                self.nextObjId += 1
+            self.result = self.makeRecords(catalog, dataId, self.makeObjIds(len(catalog)))
             self.reference = self.result.copy(deep=False)
+            self.referenceObjIds = self.result.get(self.objectKey).copy()
+            self.resultObjIds = [self.referenceObjIds]
             return
-        # Temporary dict mapping object ID to reference record
-        # Will remove from this dict as objects are matched.
-        objById = {record.get(self.objectKey): record for record in self.reference}
-        # Temporary dict mapping source ID to new catalog record.
-        # Will remove from this dict as objects are matched.
-        newById = {record.get(self.idKey): record for record in catalog}
-        # Temporary dict mapping new source ID to a set of associated objects.
-        newToObj = {}
-        matches = lsst.afw.table.matchRaDec(self.reference, catalog, self.radius)
-        for refRecord, newRecord, distance in matches:
-            objId = refRecord.get(self.objectKey)
-            if objById.pop(objId, None) is None:
-                # We've already matched this object against another new source,
-                # mark it as ambiguous.
-                self.ambiguous.add(objId)
-            if newById.pop(newRecord.get(self.idKey), None) is None:
-                # We've already matched this new source to one or more other objects
-                # Mark all involved objects as ambiguous
-                self.ambiguous.add(objId)
-                self.ambiguous |= newToObj.get(newRecord.get(self.idKey), set())
-            # Populate the newToObj dict (setdefault trick is an idiom for appending to a dict-of-sets)
-            newToObj.setdefault(newRecord.get(self.idKey), set()).add(objId)
-            # Add a new result record for this match.
-            self.result.append(self.makeRecord(newRecord, dataId, objId))
+        # Positions of the matched records in self.reference and catalog; each reference object is
+        # matched to at most its closest new source, but a new source may be matched to several objects.
+        rows = makeMatchIndex(self.reference).matchRaDecRows(catalog, self.radius)
+        refRows = rows.get("first")
+        newRows = rows.get("second")
+        objIds = self.referenceObjIds[refRows]
+        # An object is ambiguous if its new source was also matched to another object (or if it was matched
+        # to several new sources, which can't happen while only the closest match is kept).
+        refCounts = numpy.bincount(refRows, minlength=len(self.reference))
+        newCounts = numpy.bincount(newRows, minlength=len(catalog))
+        isAmbiguous = numpy.logical_or(refCounts[refRows] > 1, newCounts[newRows] > 1)
+        self.ambiguous.update(numpy.unique(objIds[isAmbiguous]).tolist())
+        # Add a new result record for each match.  We copy the matched sources in row order, once for
+        # their first match, again for those with a second match, and so on; within each pass the
+        # object IDs come from sorting the matches by source row (stably, so repeats stay in match order).
+        order = numpy.argsort(newRows, kind="mergesort")
+        sortedRows = newRows[order]
+        sortedObjIds = objIds[order]
+        repeat = numpy.arange(len(sortedRows)) - numpy.searchsorted(sortedRows, sortedRows, side="left")
+        for n in range(newCounts.max() if len(newCounts) > 0 else 0):
+            matched = self.makeRecords(catalog[newCounts > n], dataId, sortedObjIds[repeat == n])
+            self.result.extend(matched)
+            self.resultObjIds.append(sortedObjIds[repeat == n])
         # Add any unmatched sources from the new catalog as new objects to both the joined result catalog
         # and the reference catalog.
-        for newRecord in newById.values():
-            resultRecord = self.makeRecord(newRecord, dataId, self.nextObjId)
-            self.nextObjId += 1
-            self.result.append(resultRecord)
-            self.reference.append(resultRecord)
+        unmatched = self.makeRecords(catalog[newCounts == 0], dataId,
+                                     self.makeObjIds(numpy.count_nonzero(newCounts == 0)))
+        unmatchedObjIds = unmatched.get(self.objectKey).copy()
+        self.result.extend(unmatched)
+        self.resultObjIds.append(unmatchedObjIds)
+        self.reference.extend(unmatched)
+        self.referenceObjIds = numpy.concatenate([self.referenceObjIds, unmatchedObjIds])
+
+    def addAll(self, catalogs, dataIds, nThreads=1):
+        """Add several catalogs to the match at once, corresponding to the given sequence of data IDs.
+
+        The result, reference and ambiguous objects are the same as those of calling add() for each
+        catalog in turn, and add() may still be called afterwards.  The catalogs are matched in C++ by
+        multiMatchRaDec, which matches up to nThreads catalogs at once to the objects found before them.
+
+        addAll() must be the first call after construction or finish().
+        """
+        if self.result is not None:
+            raise RuntimeError("addAll() must be called before any other catalogs are added")
+        catalogs = list(catalogs)
+        dataIds = list(dataIds)
+        if len(catalogs) != len(dataIds):
+            raise ValueError("Numbers of catalogs (%d) and data IDs (%d) differ" %
+                             (len(catalogs), len(dataIds)))
+        if not catalogs:
+            return
+        if all(isinstance(catalog, SourceCatalog) for catalog in catalogs):
+            vector = SourceCatalogVector(catalogs)
+        else:
+            vector = SimpleCatalogVector([catalog if isinstance(catalog, SimpleCatalog) else
+                                          catalog.cast(SimpleCatalog) for catalog in catalogs])
+        matches = multiMatchRaDec(vector, self.radius, nThreads)
+        catalogIndices = matches.get("catalog")
+        rows = matches.get("row")
+        objIds = matches.get("object") + self.nextObjId
+        if len(objIds) > 0:
+            self.nextObjId = int(objIds.max()) + 1
+        self.result = self.table.Catalog(self.table)
+        self.resultObjIds = []
+        for k, (catalog, dataId) in enumerate(zip(catalogs, dataIds)):
+            isCatalog = catalogIndices == k
+            catalogRows = rows[isCatalog]
+            catalogObjIds = objIds[isCatalog]
+            # An object is ambiguous if its source was also matched to another object
+            counts = numpy.bincount(catalogRows, minlength=len(catalog))
+            self.ambiguous.update(numpy.unique(catalogObjIds[counts[catalogRows] > 1]).tolist())
+            # The records of each catalog are in several runs of increasing rows (the first match of each
+            # matched source, the second match of those with two, ..., and then the unmatched sources),
+            # each of which is a subset of the catalog
+            starts = numpy.flatnonzero(numpy.diff(catalogRows) <= 0) + 1
+            for runRows, runObjIds in zip(numpy.split(catalogRows, starts),
+                                          numpy.split(catalogObjIds, starts)):
+                if len(runRows) == 0:
+                    continue
+                isRun = numpy.zeros(len(catalog), dtype=bool)
+                isRun[runRows] = True
+                self.result.extend(self.makeRecords(catalog[isRun], dataId, runObjIds))
+                self.resultObjIds.append(runObjIds)
+        # The reference record for each object is its first source, as in add()
+        objIds = numpy.concatenate([numpy.zeros(0, dtype=numpy.int64)] + self.resultObjIds)
+        isFirst = numpy.zeros(len(objIds), dtype=bool)
+        isFirst[numpy.unique(objIds, return_index=True)[1]] = True
+        self.reference = self.result.subset(isFirst)
+        self.referenceObjIds = objIds[isFirst]
 
     def finish(self, removeAmbiguous=True):
         """Return the final match catalog, after sorting it by object, copying it to ensure contiguousness,
@@ -108,18 +200,19 @@ class MultiMatch(object):
         After calling finish(), the in-progress state of the matcher is returned to the state it was
         just after construction, with the exception of the object ID counter (which is not reset).
         """
-        if removeAmbiguous:
-            result = self.table.Catalog(self.table)
-            for record in self.result:
-                if record.get(self.objectKey) not in self.ambiguous:
-                    result.append(record)
+        if removeAmbiguous and self.ambiguous:
+            objIds = numpy.concatenate(self.resultObjIds)
+            ambiguous = numpy.fromiter(self.ambiguous, dtype=numpy.int64, count=len(self.ambiguous))
+            result = self.result.subset(numpy.logical_not(numpy.in1d(objIds, ambiguous)))
         else:
-            result = self.result
+            result = self.result.copy(deep=False)
         result.sort(self.objectKey)
         result = result.copy(deep=True)
         self.result = None
         self.reference = None
         self.ambiguous = set()
+        self.referenceObjIds = None
+        self.resultObjIds = []
         return result
 
 
@@ -137,16 +230,28 @@ class GroupView(collections.Mapping):
         """!Construct a GroupView from a concatenated catalog.
 
         @param[in]  catalog     Input catalog, containing records grouped by a field in which all records
-                                in the same group have the same value.  Must be sorted by the group field.
+                                in the same group have the same value.  Should be sorted by the group
+                                field (as catalogs returned by MultiMatch.finish are); if it isn't, the
+                                groups are views into a sorted shallow copy.
         @param[in]  groupField  Name or Key for the field that indicates groups.
         """
         groupKey = catalog.schema.find(groupField).key
-        ids, indices = numpy.unique(catalog.get(groupKey), return_index=True)
+        values = catalog.get(groupKey)
+        order = numpy.argsort(values, kind="mergesort")
+        if (order != numpy.arange(len(order))).any():
+            catalog = catalog.copy(deep=False)
+            catalog.sort(groupKey)  # stable, so the same order as the argsort
+            values = values[order]
+        # Groups start wherever the sorted group field changes value
+        isStart = numpy.ones(len(values), dtype=bool)
+        isStart[1:] = values[1:] != values[:-1]
+        starts = numpy.flatnonzero(isStart)
+        ends = numpy.append(starts[1:], len(catalog))
+        ids = values[starts]
         groups = numpy.zeros(len(ids), dtype=object)
-        ends = list(indices[1:]) + [len(catalog)]
-        for n, (i1, i2) in enumerate(zip(indices, ends)):
-            groups[n] = catalog[int(i1):int(i2)]  # casts are a work-around for DM-8557
-            assert (groups[n].get(groupKey) == ids[n]).all()
+        # tolist() gives Python ints, which are a work-around for DM-8557
+        for n, (i1, i2) in enumerate(zip(starts.tolist(), ends.tolist())):
+            groups[n] = catalog[i1:i2]
         return cls(catalog.schema, ids, groups)
 
     def __init__(self, schema, ids, groups):
@@ -19,7 +19,9 @@
  * the GNU General Public License along with this program.  If not,
  * see <http://www.lsstcorp.org/LegalNotices/>.
  */
+#include <algorithm>
 #include <cstdint>
+#include <unordered_map>
 
 #include "boost/bind.hpp"
 
@@ -44,6 +46,76 @@ FootprintSet mergeFootprintPair(Footprint const &foot1, Footprint const &foot2)
     return fpSet;
 }
 
+/*
+ *  A uniform grid over pixel coordinates, used to find the entries of a list whose bounding boxes
+ *  may overlap a given box without scanning the whole list.
+ *
+ *  Each entry is identified by its position in the list and is recorded in every cell its bounding box
+ *  touches.  Bounding boxes may grow (but not shrink); removed entries are filtered by the caller.
+ */
+class BBoxGrid {
+public:
+
+    explicit BBoxGrid(int cellSize) : _cellSize(cellSize), _cells() {}
+
+    // Record an entry with the given bounding box
+    void insert(std::size_t index, geom::Box2I const & bbox) {
+        for (int cy = _toCell(bbox.getMinY()); cy <= _toCell(bbox.getMaxY()); ++cy) {
+            for (int cx = _toCell(bbox.getMinX()); cx <= _toCell(bbox.getMaxX()); ++cx) {
+                _cells[_makeKey(cx, cy)].push_back(index);
+            }
+        }
+    }
+
+    // Record the cells added to an entry when its bounding box grows from oldBBox to newBBox
+    void grow(std::size_t index, geom::Box2I const & oldBBox, geom::Box2I const & newBBox) {
+        for (int cy = _toCell(newBBox.getMinY()); cy <= _toCell(newBBox.getMaxY()); ++cy) {
+            bool const oldRow = cy >= _toCell(oldBBox.getMinY()) && cy <= _toCell(oldBBox.getMaxY());
+            for (int cx = _toCell(newBBox.getMinX()); cx <= _toCell(newBBox.getMaxX()); ++cx) {
+                if (oldRow && cx >= _toCell(oldBBox.getMinX()) && cx <= _toCell(oldBBox.getMaxX())) {
+                    continue;
+                }
+                _cells[_makeKey(cx, cy)].push_back(index);
+            }
+        }
+    }
+
+    // Return the sorted positions of all entries that share a cell with bbox
+    std::vector<std::size_t> query(geom::Box2I const & bbox) const {
+        std::vector<std::size_t> result;
+        for (int cy = _toCell(bbox.getMinY()); cy <= _toCell(bbox.getMaxY()); ++cy) {
+            for (int cx = _toCell(bbox.getMinX()); cx <= _toCell(bbox.getMaxX()); ++cx) {
+                CellMap::const_iterator cell = _cells.find(_makeKey(cx, cy));
+                if (cell != _cells.end()) {
+                    result.insert(result.end(), cell->second.begin(), cell->second.end());
+                }
+            }
+        }
+        std::sort(result.begin(), result.end());
+        result.erase(std::unique(result.begin(), result.end()), result.end());
+        return result;
+    }
+
+private:
+
+    typedef std::unordered_map<std::int64_t, std::vector<std::size_t> > CellMap;
+
+    int _toCell(int coord) const {
+        // round toward -infinity so negative coordinates get their own cells
+        return (coord >= 0) ? coord/_cellSize : -((-coord - 1)/_cellSize) - 1;
+    }
+
+    static std::int64_t _makeKey(int cx, int cy) {
+        return (static_cast<std::int64_t>(cx) << 32) | static_cast<std::uint32_t>(cy);
+    }
+
+    int _cellSize;
+    CellMap _cells;
+};
+
+// Size (in pixels) of the cells of the grid used to find overlapping merges
+int const MERGE_GRID_CELL_SIZE = 64;
+
 } // anonymous namespace
 
 class FootprintMerge {
@@ -298,6 +370,17 @@ void FootprintMergeList::addCatalog(
     // If list is empty don't check for any matches, just add all the objects
     bool checkForMatches = (_mergeList.size() > 0);
 
+    // Index the merges by bounding box so that only nearby ones are tested for overlaps.
+    // Merges absorbed into another are set to null here and removed from _mergeList at the end,
+    // so positions in _mergeList (and hence the order of the merges) are preserved.
+    BBoxGrid grid(MERGE_GRID_CELL_SIZE);
+    if (checkForMatches) {
+        for (std::size_t i = 0; i < _mergeList.size(); ++i) {
+            grid.insert(i, _mergeList[i]->getBBox());
+        }
+    }
+    bool haveRemoved = false;
+
     for (afw::table::SourceCatalog::const_iterator srcIter = inputCat.begin(); srcIter != inputCat.end();
          ++srcIter) {
 
@@ -311,29 +394,41 @@ void FootprintMergeList::addCatalog(
         PTR(FootprintMerge) first = PTR(FootprintMerge)();
 
         if (checkForMatches) {
-            FootprintMergeVec::iterator iter = _mergeList.begin();
-            while (iter != _mergeList.end()) {
+            // Grow by one pixel to allow for touching
+            geom::Box2I searchBox(foot->getBBox());
+            searchBox.grow(geom::Extent2I(1,1));
+            std::vector<std::size_t> const candidates = grid.query(searchBox);
+            std::size_t firstIndex = 0;
+            geom::Box2I firstBBox;
+            for (std::vector<std::size_t>::const_iterator iter = candidates.begin();
+                 iter != candidates.end(); ++iter) {
+                PTR(FootprintMerge) & merge = _mergeList[*iter];
+                if (!merge) continue;  // already merged into another
                 // Grow by one pixel to allow for touching
-                geom::Box2I box((**iter).getBBox());
+                geom::Box2I box(merge->getBBox());
                 box.grow(geom::Extent2I(1,1));
-                if (box.overlaps(foot->getBBox()) && (**iter).overlaps(*foot)) {
+                if (box.overlaps(foot->getBBox()) && merge->overlaps(*foot)) {
                     if (!first) {
-                        first = *iter;
+                        first = merge;
+                        firstIndex = *iter;
+                        firstBBox = first->getBBox();
                         // Add Footprint to existing merge and set flag for this band
                         if (doMerge) {
                             first->add(foot, _peakSchemaMapper, keyIter->second, minNewPeakDist,
                                        maxSamePeakDist);
+                        } else {
+                            break;
                         }
                     } else {
                         // Add merged Footprint to first
-                        if (doMerge) {
-                            first->add(**iter, _filterMap, minNewPeakDist, maxSamePeakDist);
-                            iter = _mergeList.erase(iter);
-                            continue;
-                        }
+                        first->add(*merge, _filterMap, minNewPeakDist, maxSamePeakDist);
+                        merge.reset();
+                        haveRemoved = true;
                     }
                 }
-                ++iter;
+            }
+            if (first && first->getBBox() != firstBBox) {
+                grid.grow(firstIndex, firstBBox, first->getBBox());
             }
         }
 
@@ -343,8 +438,16 @@ void FootprintMergeList::addCatalog(
                     foot, sourceTable, _peakTable, _peakSchemaMapper, keyIter->second
                 )
             );
+            if (checkForMatches) {
+                grid.insert(_mergeList.size() - 1, _mergeList.back()->getBBox());
+            }
         }
     }
+
+    if (haveRemoved) {
+        _mergeList.erase(std::remove(_mergeList.begin(), _mergeList.end(), PTR(FootprintMerge)()),
+                         _mergeList.end());
+    }
 }
 
 void FootprintMergeList::getFinalSources(afw::table::SourceCatalog &outputCat, bool doNorm)
@@ -48,11 +48,14 @@
 #include <cassert>
 #include <set>
 #include <string>
+#include <thread>
+#include <type_traits>
 #include <typeinfo>
 #include "boost/format.hpp"
 #include "lsst/pex/exceptions.h"
 #include "lsst/afw/image/MaskedImage.h"
 #include "lsst/afw/math/Statistics.h"
+#include "lsst/afw/math/detail/Parallel.h"
 #include "lsst/afw/detection/Peak.h"
 #include "lsst/afw/detection/FootprintFunctor.h"
 #include "lsst/afw/detection/FootprintSet.h"
@@ -507,12 +510,12 @@ namespace {
         double _min, _max;
     };
 
-    template<typename ImageT, typename ThresholdT>
-    void findPeaks(PTR(detection::Footprint) foot, ImageT const& img, bool polarity, ThresholdT)
+    /*
+     * Sort a Footprint's peaks; if it has none, use its maximum (or minimum, if polarity is false) pixel
+     */
+    template<typename ImageT>
+    void sortPeaks(PTR(detection::Footprint) foot, ImageT const& img, bool polarity)
     {
-        FindPeaksInFootprint<ImageT> peakFinder(img, polarity, foot->getPeaks());
-        peakFinder.apply(*foot, 1);
-
         // We use getInternal() here to get the vector of shared_ptr that Catalog uses internally,
         // which causes the STL algorithm to copy pointers instead of PeakRecords (which is what
         // it'd try to do if we passed Catalog's own iterators).
@@ -526,6 +529,15 @@ namespace {
         }
     }
 
+    template<typename ImageT, typename ThresholdT>
+    void findPeaks(PTR(detection::Footprint) foot, ImageT const& img, bool polarity, ThresholdT)
+    {
+        FindPeaksInFootprint<ImageT> peakFinder(img, polarity, foot->getPeaks());
+        peakFinder.apply(*foot, 1);
+
+        sortPeaks(foot, img, polarity);
+    }
+
     // No need to search for peaks when processing a Mask
     template<typename ImageT>
     void findPeaks(PTR(detection::Footprint), ImageT const&, bool, ThresholdBitmask_traits)
@@ -571,9 +583,325 @@ advancePtr(IterT varPtr, ThresholdPixelLevel_traits) {
     return varPtr + 1;
 }
 
+namespace {
+    /*
+     * A run of adjacent pixels in a row that are above the footprint threshold
+     */
+    struct PixelRun {
+        PixelRun(int x0, int x1, bool good) : x0(x0), x1(x1), good(good) {}
+        int x0, x1;                     /* inclusive range of columns */
+        bool good;                      /* includes a value over the desired threshold? */
+    };
+    typedef std::vector<PixelRun> RowRuns;
+
+    /*
+     * Find the runs of pixels above threshold in a band of rows; called for each band by parallelForBands
+     *
+     * Each band writes only to its own rows' entries of the (pre-sized) vector of RowRuns
+     */
+    template<typename ImagePixelT, typename VariancePixelT, typename ThresholdTraitT>
+    class FindRunsInRows {
+    public:
+        FindRunsInRows(image::ImageBase<ImagePixelT> const &img,  // Image to search for objects
+                       image::Image<VariancePixelT> const *var,   // img's variance
+                       double footprintThreshold,                 // threshold value for footprint
+                       double includeThreshold,                   // threshold value for inclusion
+                       bool includeAll,                           // are all spans included?
+                       bool polarity,                             // if false, search _below_ threshold
+                       std::vector<RowRuns> &runs                 // runs for each row of img
+                      ) : _img(&img), _var(var), _footprintThreshold(footprintThreshold),
+                          _includeThreshold(includeThreshold), _includeAll(includeAll),
+                          _polarity(polarity), _runs(&runs) {}
+
+        void operator()(int, int yBegin, int yEnd) const {
+            typedef typename image::Image<ImagePixelT>::x_iterator x_iterator;
+            typedef typename image::Image<VariancePixelT>::x_iterator x_var_iterator;
+
+            int const width = _img->getWidth();
+            for (int y = yBegin; y < yEnd; ++y) {
+                RowRuns &rowRuns = (*_runs)[y];
+                bool inRun = false;
+                int x0 = 0;
+                bool good = _includeAll; /* Span exceeds the threshold? */
+
+                x_iterator pixPtr = _img->row_begin(y);
+                x_var_iterator varPtr = (_var == NULL) ? NULL : _var->row_begin(y);
+                for (int x = 0; x < width; ++x, ++pixPtr, varPtr = advancePtr(varPtr, ThresholdTraitT())) {
+                    ImagePixelT const pixVal = *pixPtr;
+
+                    if (isBadPixel(pixVal) ||
+                        !inFootprint(pixVal, varPtr, _polarity, _footprintThreshold, ThresholdTraitT())) {
+                        if (inRun) {
+                            rowRuns.push_back(PixelRun(x0, x - 1, good));
+                            inRun = false;
+                            good = false;
+                        }
+                    } else {
+                        if (!inRun) {
+                            x0 = x;
+                            inRun = true;
+                        }
+                        if (!good &&
+                            inFootprint(pixVal, varPtr, _polarity, _includeThreshold, ThresholdTraitT())) {
+                            good = true;
+                        }
+                    }
+                }
+
+                if (inRun) {
+                    rowRuns.push_back(PixelRun(x0, width - 1, good));
+                }
+            }
+        }
+
+    private:
+        image::ImageBase<ImagePixelT> const *_img;
+        image::Image<VariancePixelT> const *_var;
+        double _footprintThreshold;
+        double _includeThreshold;
+        bool _includeAll;
+        bool _polarity;
+        std::vector<RowRuns> *_runs;
+    };
+
+    /*
+     * A pixel above threshold that's at least as high as all of its neighbours (or as low, for
+     * negative polarity); the Peaks of a Footprint are the PeakPixels that lie within it
+     */
+    template<typename PixelT>
+    struct PeakPixel {
+        PeakPixel(int x, PixelT value) : x(x), value(value) {}
+        int x;                          /* column */
+        PixelT value;                   /* pixel value */
+    };
+
+    /*
+     * Find the runs of pixels above threshold and the peaks in a band of rows of a floating point image;
+     * called for each band by parallelForBands
+     *
+     * This is equivalent to FindRunsInRows followed by searching each Footprint for peaks, but works on
+     * contiguous rows of pixels: the threshold is applied to a whole row at a time (which the compiler can
+     * vectorize), and the peaks are found in the same pass over the image.
+     */
+    template<typename ImagePixelT, typename VariancePixelT, typename ThresholdTraitT>
+    class FindRunsAndPeaksInRows {
+    public:
+        typedef std::vector<PeakPixel<ImagePixelT> > RowPeaks;
+
+        FindRunsAndPeaksInRows(image::ImageBase<ImagePixelT> const &img,  // Image to search for objects
+                               image::Image<VariancePixelT> const *var,   // img's variance
+                               double footprintThreshold,                 // threshold value for footprint
+                               double includeThreshold,                   // threshold value for inclusion
+                               bool includeAll,                           // are all spans included?
+                               bool polarity,                             // if false, search _below_
+                               bool setPeaks,                             // should I find the peaks?
+                               std::vector<RowRuns> &runs,                // runs for each row of img
+                               std::vector<RowPeaks> &peaks               // peaks for each row of img
+                              ) : _width(img.getWidth()), _height(img.getHeight()),
+                                  _pixels(img.getArray().getData()),
+                                  _stride(img.getArray().template getStride<0>()),
+                                  _variance(var ? var->getArray().getData() : NULL),
+                                  _varianceStride(var ? var->getArray().template getStride<0>() : 0),
+                                  _footprintThreshold(footprintThreshold),
+                                  _includeThreshold(includeThreshold), _includeAll(includeAll),
+                                  _polarity(polarity), _setPeaks(setPeaks), _runs(&runs), _peaks(&peaks) {}
+
+        void operator()(int, int yBegin, int yEnd) const {
+            std::vector<unsigned char> above(_width + 1); // is each pixel in a footprint? n.b. above[width]=0
+            for (int y = yBegin; y < yEnd; ++y) {
+                ImagePixelT const *row = _pixels + y*_stride;
+                VariancePixelT const *varRow = (_variance == NULL) ? NULL : _variance + y*_varianceStride;
+
+                VariancePixelT const *varPtr = varRow;
+                for (int x = 0; x < _width; ++x, varPtr = advancePtr(varPtr, ThresholdTraitT())) {
+                    above[x] = inFootprint(row[x], varPtr, _polarity, _footprintThreshold, ThresholdTraitT());
+                }
+
+                RowRuns &rowRuns = (*_runs)[y];
+                for (int x = 0; x < _width; ++x) {
+                    if (!above[x]) {
+                        continue;
+                    }
+                    int const x0 = x;
+                    while (above[x + 1]) {
+                        ++x;
+                    }
+                    rowRuns.push_back(PixelRun(x0, x, _includeAll || _isIncluded(row, varRow, x0, x)));
+                }
+
+                if (_setPeaks && y > 0 && y < _height - 1) {
+                    _findPeaks(row, rowRuns, (*_peaks)[y]);
+                }
+            }
+        }
+
+    private:
+        // Does any pixel in [x0, x1] pass the inclusion threshold?
+        bool _isIncluded(ImagePixelT const *row, VariancePixelT const *varRow, int x0, int x1) const {
+            for (int x = x0; x <= x1; ++x) {
+                VariancePixelT const *varPtr = (varRow == NULL) ? NULL : varRow + x;
+                if (inFootprint(row[x], varPtr, _polarity, _includeThreshold, ThresholdTraitT())) {
+                    return true;
+                }
+            }
+            return false;
+        }
+
+        // Find the peaks in the runs of a row (which is neither the first nor the last row of the image)
+        void _findPeaks(ImagePixelT const *row, RowRuns const &rowRuns, RowPeaks &rowPeaks) const {
+            ImagePixelT const *below = row - _stride;
+            ImagePixelT const *upper = row + _stride;
+            for (RowRuns::const_iterator run = rowRuns.begin(); run != rowRuns.end(); ++run) {
+                int const x1 = std::min(run->x1, _width - 2); // don't search the edges of the image
+                for (int x = std::max(run->x0, 1); x <= x1; ++x) {
+                    ImagePixelT const val = row[x];
+                    bool const higher = _polarity ?
+                        ((upper[x - 1] > val) | (upper[x] > val) | (upper[x + 1] > val) |
+                         (row[x - 1] > val) |                      (row[x + 1] > val) |
+                         (below[x - 1] > val) | (below[x] > val) | (below[x + 1] > val)) :
+                        ((upper[x - 1] < val) | (upper[x] < val) | (upper[x + 1] < val) |
+                         (row[x - 1] < val) |                      (row[x + 1] < val) |
+                         (below[x - 1] < val) | (below[x] < val) | (below[x + 1] < val));
+                    if (!higher) {
+                        rowPeaks.push_back(PeakPixel<ImagePixelT>(x, val));
+                    }
+                }
+            }
+        }
+
+        int _width;
+        int _height;
+        ImagePixelT const *_pixels;
+        int _stride;
+        VariancePixelT const *_variance;
+        int _varianceStride;
+        double _footprintThreshold;
+        double _includeThreshold;
+        bool _includeAll;
+        bool _polarity;
+        bool _setPeaks;
+        std::vector<RowRuns> *_runs;
+        std::vector<RowPeaks> *_peaks;
+    };
+
+    /*
+     * A range of pixels in a row that carry the same object ID
+     */
+    struct IdSegment {
+        IdSegment(int x0, int x1, int id) : x0(x0), x1(x1), id(id) {}
+        int x0, x1;                     /* inclusive range of columns */
+        int id;                         /* ID for object */
+    };
+
+    /*
+     * Return the ID of pixel x in a row's segments, or 0 if there's none; segments before
+     * segments[i] are known to lie to the left of x
+     */
+    int findSegmentId(std::vector<IdSegment> const &segments, std::size_t i, int x) {
+        for (; i < segments.size() && segments[i].x0 <= x; ++i) {
+            if (segments[i].x1 >= x) {
+                return segments[i].id;
+            }
+        }
+        return 0;
+    }
+
+    /*
+     * Assign object IDs to the runs of pixels in row y, given the IDs of the pixels in the previous row
+     *
+     * This gives exactly the IDs, aliases and IdSpans of a pixel-by-pixel raster scan which, for each pixel,
+     * takes its ID from the first non-zero of the pixels to the left, upper left, above and upper right
+     * (or a new ID), and then aliases that ID to the ID of the pixel to the upper right, taking that ID
+     * in turn if they differ.  As the IDs in the previous row are constant over each segment, the
+     * aliasing only needs to be done where each segment in the previous row begins.
+     */
+    void labelRow(
+        int y,                                          // the row
+        RowRuns const &runs,                            // runs of pixels above threshold in row y
+        std::vector<IdSegment> const &prevSegments,     // IDs of pixels in row y - 1
+        std::vector<IdSegment> &segments,               // set to the IDs of pixels in row y
+        std::vector<int> &aliases,                      // aliases for initially disjoint parts of Footprints
+        int &nobj,                                      // number of objects found
+        std::vector<IdSpan::Ptr> &spans                 // spans of objects
+    ) {
+        segments.clear();
+        std::size_t ip = 0;             // first segment of prevSegments that could touch the current run
+        for (RowRuns::const_iterator run = runs.begin(); run != runs.end(); ++run) {
+            while (ip < prevSegments.size() && prevSegments[ip].x1 < run->x0 - 1) {
+                ++ip;
+            }
+
+            int id = 0;
+            for (int dx = -1; dx <= 1 && id == 0; ++dx) {
+                id = findSegmentId(prevSegments, ip, run->x0 + dx);
+            }
+            if (id == 0) {
+                id = ++nobj;
+                aliases.push_back(id);
+            }
+            spans.push_back(IdSpan::Ptr(new IdSpan(id, y, run->x0, run->x1, run->good)));
+/*
+ * Do we need to merge ID numbers? If so, make suitable entries in aliases[]
+ */
+            int segX0 = run->x0;        // start of the current segment in this row
+            for (std::size_t i = ip; i < prevSegments.size() && prevSegments[i].x0 <= run->x1 + 1; ++i) {
+                IdSegment const &above = prevSegments[i];
+                if (above.x1 <= run->x0 || above.id == id) {
+                    continue;           // not upper right of any pixel in the run, or no new ID
+                }
+                int const x = std::max(run->x0, above.x0 - 1); // first pixel with above to its upper right
+                aliases[resolve_alias(aliases, above.id)] = resolve_alias(aliases, id);
+                if (x > segX0) {
+                    segments.push_back(IdSegment(segX0, x - 1, id));
+                }
+                segX0 = x;
+                id = above.id;
+            }
+            segments.push_back(IdSegment(segX0, run->x1, id));
+        }
+    }
+
+    /*
+     * Find the peaks in a band of Footprints; called for each band by parallelForBands
+     *
+     * If the Footprints already hold their peaks (found by FindRunsAndPeaksInRows), just sort them
+     */
+    template<typename ImageT, typename ThresholdTraitT>
+    class FindPeaksInFootprints {
+    public:
+        FindPeaksInFootprints(detection::FootprintSet::FootprintList &footprints, ///< Footprints to search
+                              ImageT const &img,                                 ///< image they live in
+                              bool polarity,                  ///< true if we're looking for -ve "peaks"
+                              bool havePeaks                  ///< are the peaks already set?
+                             ) : _footprints(&footprints), _img(&img), _polarity(polarity),
+                                 _havePeaks(havePeaks) {}
+
+        void operator()(int, int begin, int end) const {
+            for (int i = begin; i < end; ++i) {
+                if (_havePeaks) {
+                    sortPeaks((*_footprints)[i], *_img, _polarity);
+                } else {
+                    findPeaks((*_footprints)[i], *_img, _polarity, ThresholdTraitT());
+                }
+            }
+        }
+
+    private:
+        detection::FootprintSet::FootprintList *_footprints;
+        ImageT const *_img;
+        bool _polarity;
+        bool _havePeaks;
+    };
+}
+
 /*
  * Here's the working routine for the FootprintSet constructors; see documentation
  * of the constructors themselves
+ *
+ * The rows of the image are searched for runs of pixels above threshold in nThreads bands in parallel
+ * (using one thread per core if nThreads is 0); the runs are then labelled as objects in a single
+ * pass, which joins runs across the bands' boundaries.  Finally the peaks are found, again in parallel.
+ * The result does not depend on the number of threads.
  */
 template<typename ImagePixelT, typename MaskPixelT, typename VariancePixelT, typename ThresholdTraitT>
 static void findFootprints(
@@ -585,31 +913,50 @@ static void findFootprints(
         double const includeThresholdMultiplier,  // threshold (relative to footprintThreshold) for inclusion
         bool const polarity,                      // if false, search _below_ thresholdVal
         int const npixMin,                        // minimum number of pixels in an object
-        bool const setPeaks                       // should I set the Peaks list?
+        bool const setPeaks,                      // should I set the Peaks list?
+        int nThreads=1                            // number of threads to use; 0 means one per core
 )
 {
     int id;                             /* object ID */
-    int in_span;                        /* object ID of current IdSpan */
     int nobj = 0;                       /* number of objects found */
-    int x0 = 0;                         /* unpacked from a IdSpan */
 
-    typedef typename image::Image<ImagePixelT> ImageT;
     double includeThreshold = footprintThreshold * includeThresholdMultiplier; // Threshold for inclusion
 
     int const row0 = img.getY0();
     int const col0 = img.getX0();
     int const height = img.getHeight();
-    int const width = img.getWidth();
+
+    if (nThreads < 0) {
+        throw LSST_EXCEPT(lsst::pex::exceptions::InvalidParameterError,
+                          (boost::format("nThreads = %d must not be negative") % nThreads).str());
+    } else if (nThreads == 0) {
+        nThreads = std::max(1u, std::thread::hardware_concurrency());
+    }
 /*
- * Storage for arrays that identify objects by ID. We want to be able to
- * refer to idp[-1] and idp[width], hence the (width + 2)
+ * Find the runs of pixels above threshold in each row
  */
-    std::vector<int> id1(width + 2);
-    std::fill(id1.begin(), id1.end(), 0);
-    std::vector<int> id2(width + 2);
-    std::fill(id2.begin(), id2.end(), 0);
-    std::vector<int>::iterator idc = id1.begin() + 1; // object IDs in current/
-    std::vector<int>::iterator idp = id2.begin() + 1; //                       previous row
+    std::vector<RowRuns> runs(height);
+    typedef FindRunsAndPeaksInRows<ImagePixelT, VariancePixelT, ThresholdTraitT> FastFinder;
+    std::vector<typename FastFinder::RowPeaks> rowPeaks; // Peaks in each row (if found with the runs)
+    // Floating point images are searched a row at a time, finding the peaks at the same time
+    bool const searchRows = std::is_floating_point<ImagePixelT>::value &&
+        !std::is_same<ThresholdTraitT, ThresholdBitmask_traits>::value;
+    std::vector<math::detail::Band> const rowBands = math::detail::makeBands(0, height, nThreads);
+    if (searchRows) {
+        rowPeaks.resize(height);
+        math::detail::parallelForBands(
+            rowBands,
+            FastFinder(img, var, footprintThreshold, includeThreshold,
+                       (includeThresholdMultiplier == 1.0), polarity, setPeaks, runs, rowPeaks)
+        );
+    } else {
+        math::detail::parallelForBands(
+            rowBands,
+            FindRunsInRows<ImagePixelT, VariancePixelT, ThresholdTraitT>(
+                img, var, footprintThreshold, includeThreshold,
+                (includeThresholdMultiplier == 1.0), polarity, runs)
+        );
+    }
 
     std::vector<int> aliases;           // aliases for initially disjoint parts of Footprints
     aliases.reserve(1 + height/20);     // initial size of aliases
@@ -619,78 +966,16 @@ static void findFootprints(
 
     aliases.push_back(0);               // 0 --> 0
 /*
- * Go through image identifying objects
+ * Go through the runs identifying objects
  */
-    typedef typename image::Image<ImagePixelT>::x_iterator x_iterator;
-    typedef typename image::Image<VariancePixelT>::x_iterator x_var_iterator;
-
-    in_span = 0;                        // not in a span
+    std::vector<IdSegment> prevSegments, segments; // IDs of the pixels in the previous/current row
+    std::vector<std::size_t> firstSpans(height);   // index in spans of each row's first span
     for (int y = 0; y != height; ++y) {
-        if (idc == id1.begin() + 1) {
-            idc = id2.begin() + 1;
-            idp = id1.begin() + 1;
-        } else {
-            idc = id1.begin() + 1;
-            idp = id2.begin() + 1;
-        }
-        std::fill_n(idc - 1, width + 2, 0);
-
-        in_span = 0;                    /* not in a span */
-        bool good = (includeThresholdMultiplier == 1.0); /* Span exceeds the threshold? */
-
-        x_iterator pixPtr = img.row_begin(y);
-        x_var_iterator varPtr = (var == NULL) ? NULL : var->row_begin(y);
-        for (int x = 0; x < width; ++x, ++pixPtr, varPtr = advancePtr(varPtr, ThresholdTraitT())) {
-            ImagePixelT const pixVal = *pixPtr;
-
-            if (isBadPixel(pixVal) ||
-                !inFootprint(pixVal, varPtr, polarity, footprintThreshold, ThresholdTraitT())) {
-                if (in_span) {
-                    IdSpan::Ptr sp(new IdSpan(in_span, y, x0, x - 1, good));
-                    spans.push_back(sp);
-
-                    in_span = 0;
-                    good = false;
-                }
-            } else {                    /* a pixel to fix */
-                if (idc[x - 1] != 0) {
-                    id = idc[x - 1];
-                } else if (idp[x - 1] != 0) {
-                    id = idp[x - 1];
-                } else if (idp[x] != 0) {
-                    id = idp[x];
-                } else if (idp[x + 1] != 0) {
-                    id = idp[x + 1];
-                } else {
-                    id = ++nobj;
-                    aliases.push_back(id);
-                }
-
-                idc[x] = id;
-                if (!in_span) {
-                    x0 = x;
-                    in_span = id;
-                }
-/*
- * Do we need to merge ID numbers? If so, make suitable entries in aliases[]
- */
-                if (idp[x + 1] != 0 && idp[x + 1] != id) {
-                    aliases[resolve_alias(aliases, idp[x + 1])] = resolve_alias(aliases, id);
-
-                    idc[x] = id = idp[x + 1];
-                }
-
-                if (!good && inFootprint(pixVal, varPtr, polarity, includeThreshold, ThresholdTraitT())) {
-                    good = true;
-                }
-            }
-        }
-
-        if (in_span) {
-            IdSpan::Ptr sp(new IdSpan(in_span, y, x0, width - 1, good));
-            spans.push_back(sp);
-        }
+        firstSpans[y] = spans.size();
+        labelRow(y, runs[y], prevSegments, segments, aliases, nobj, spans);
+        prevSegments.swap(segments);
     }
+    std::vector<IdSpan::Ptr> const rowSpans = spans; // spans in order of rows, as firstSpans
 /*
  * Resolve aliases; first alias chains, then the IDs in the spans
  */
@@ -706,6 +991,7 @@ static void findFootprints(
 /*
  * Build Footprints from spans
  */
+    std::vector<detection::Footprint *> idFootprints(nobj + 1); // the Footprint for each resolved ID
     unsigned int i0;                    // initial value of i
     if (spans.size() > 0) {
         id = spans[0]->id;
@@ -722,6 +1008,7 @@ static void findFootprints(
 
                 if (good && fp->getNpix() >= static_cast<std::size_t>(npixMin)) {
                     _footprints->push_back(fp);
+                    idFootprints[id] = fp.get();
                 }
             }
 
@@ -734,10 +1021,35 @@ static void findFootprints(
  * Find all peaks within those Footprints
  */
     if (setPeaks) {
-        typedef detection::FootprintSet::FootprintList::iterator fiterator;
-        for (fiterator ptr = _footprints->begin(), end = _footprints->end(); ptr != end; ++ptr) {
-            findPeaks(*ptr, img, polarity, ThresholdTraitT());
+        if (searchRows) {
+            // Add the peaks found in each row to the Footprints containing them
+            for (int y = 0; y != height; ++y) {
+                RowRuns const &rowRuns = runs[y];
+                RowRuns::const_iterator run = rowRuns.begin();
+                for (typename FastFinder::RowPeaks::const_iterator peak = rowPeaks[y].begin();
+                     peak != rowPeaks[y].end(); ++peak) {
+                    while (run->x1 < peak->x) {
+                        ++run;
+                    }
+                    IdSpan::Ptr const span = rowSpans[firstSpans[y] + (run - rowRuns.begin())];
+                    detection::Footprint *fp = idFootprints[span->id];
+                    if (fp == NULL) {
+                        continue;       // not in an accepted Footprint
+                    }
+                    PTR(detection::PeakRecord) newPeak = fp->getPeaks().addNew();
+                    newPeak->setIx(peak->x + col0);
+                    newPeak->setIy(y + row0);
+                    newPeak->setFx(peak->x + col0);
+                    newPeak->setFy(y + row0);
+                    newPeak->setPeakValue(peak->value);
+                }
+            }
         }
+        math::detail::parallelForBands(
+            math::detail::makeBands(0, static_cast<int>(_footprints->size()), nThreads),
+            FindPeaksInFootprints<image::ImageBase<ImagePixelT>, ThresholdTraitT>(
+                *_footprints, img, polarity, searchRows)
+        );
     }
 }
 
@@ -750,7 +1062,8 @@ detection::FootprintSet::FootprintSet(
     image::Image<ImagePixelT> const &img, //!< Image to search for objects
     Threshold const &threshold,     //!< threshold to find objects
     int const npixMin,              //!< minimum number of pixels in an object
-    bool const setPeaks            //!< should I set the Peaks list?
+    bool const setPeaks,           //!< should I set the Peaks list?
+    int const nThreads             //!< number of threads to use (0: one per core)
 ) : lsst::daf::base::Citizen(typeid(this)),
     _footprints(new FootprintList()),
     _region(img.getBBox())
@@ -764,7 +1077,8 @@ detection::FootprintSet::FootprintSet(
         NULL,
         threshold.getValue(img), threshold.getIncludeMultiplier(), threshold.getPolarity(),
         npixMin,
-        setPeaks
+        setPeaks,
+        nThreads
     );
 }
 
@@ -813,6 +1127,9 @@ detection::FootprintSet::FootprintSet(
  * assembled into Footprints; if it's false, then pixels \e below Threshold
  * are processed (Threshold will probably have to be below the background level
  * for this to make sense, e.g. for difference imaging)
+ *
+ * The image is searched in bands of rows on nThreads threads; the Footprints (and their Peaks)
+ * are the same whatever the number of threads.
  */
 template<typename ImagePixelT, typename MaskPixelT>
 detection::FootprintSet::FootprintSet(
@@ -820,7 +1137,8 @@ detection::FootprintSet::FootprintSet(
     Threshold const &threshold,     //!< threshold for footprints (controls size)
     std::string const &planeName,   //!< mask plane to set (if != "")
     int const npixMin,              //!< minimum number of pixels in an object
-    bool const setPeaks            //!< should I set the Peaks list?
+    bool const setPeaks,           //!< should I set the Peaks list?
+    int const nThreads             //!< number of threads to use (0: one per core)
 ) : lsst::daf::base::Citizen(typeid(this)),
     _footprints(new FootprintList()),
     _region(
@@ -841,7 +1159,8 @@ detection::FootprintSet::FootprintSet(
             threshold.getIncludeMultiplier(),
             threshold.getPolarity(),
             npixMin,
-            setPeaks
+            setPeaks,
+            nThreads
                                                                                   );
         break;
       default:
@@ -854,7 +1173,8 @@ detection::FootprintSet::FootprintSet(
             threshold.getIncludeMultiplier(),
             threshold.getPolarity(),
             npixMin,
-            setPeaks
+            setPeaks,
+            nThreads
                                                                                   );
         break;
     }
@@ -1503,10 +1823,10 @@ void detection::FootprintSet::makeSources(
 
 #define INSTANTIATE(PIXEL)                      \
     template detection::FootprintSet::FootprintSet(                     \
-        image::Image<PIXEL> const &, Threshold const &, int const, bool const); \
+        image::Image<PIXEL> const &, Threshold const &, int const, bool const, int const); \
     template detection::FootprintSet::FootprintSet(                     \
         image::MaskedImage<PIXEL,image::MaskPixel> const &, Threshold const &, \
-        std::string const &, int const, bool const);\
+        std::string const &, int const, bool const, int const);\
     template void detection::FootprintSet::makeHeavy(image::MaskedImage<PIXEL,image::MaskPixel> const &, \
                                                      HeavyFootprintCtrl const *)
 
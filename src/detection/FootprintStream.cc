@@ -0,0 +1,440 @@
+// -*- lsst-c++ -*-
+/*
+ * LSST Data Management System
+ * Copyright 2016 LSST Corporation.
+ *
+ * This product includes software developed by the
+ * LSST Project (http://www.lsstcorp.org/).
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the LSST License Statement and
+ * the GNU General Public License along with this program.  If not,
+ * see <http://www.lsstcorp.org/LegalNotices/>.
+ */
+
+/*
+ * Detect Footprints in an image that is supplied a strip of rows at a time
+ *
+ * The runs of pixels above threshold in each row are labelled using the segments of the previous row,
+ * joining objects (with a union-find over the objects that are still open) when a run touches several
+ * of them.  At the end of each row all the segments are relabelled with their objects' final IDs, so
+ * the aliases never outlive a row, and any object that has no segment in the new row is finished.
+ *
+ * The peaks of row y are found when row y + 1 arrives, before row y + 1 is labelled, so an object's
+ * peaks are all known by the time that it's finished.
+ */
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <memory>
+#include <set>
+
+#include "boost/format.hpp"
+#include "lsst/pex/exceptions.h"
+#include "lsst/afw/detection/Peak.h"
+#include "lsst/afw/detection/FootprintStream.h"
+
+namespace lsst { namespace afw { namespace detection {
+
+namespace {
+    /*
+     * A run of pixels above threshold in a row of an object, relative to the region's origin
+     */
+    struct RowSpan {
+        RowSpan(int y_, int x0_, int x1_) : y(y_), x0(x0_), x1(x1_) {}
+        int y;
+        int x0, x1;                     /* inclusive range of columns */
+    };
+
+    bool operator<(RowSpan const &a, RowSpan const &b) {
+        return (a.y < b.y) || (a.y == b.y && a.x0 < b.x0);
+    }
+
+    /*
+     * A peak (or an object's extreme pixel), relative to the region's origin
+     */
+    struct PeakPixel {
+        PeakPixel(int x_, int y_, double value_) : x(x_), y(y_), value(value_) {}
+        int x, y;
+        double value;
+    };
+
+    /*
+     * Sort peaks by decreasing pixel value, as FootprintSet does.  N.b. -ve peaks are sorted the same way
+     */
+    struct SortPeaks {
+        bool operator()(PeakPixel const &a, PeakPixel const &b) const {
+            if (a.value != b.value) {
+                return (a.value > b.value);
+            }
+            if (a.x != b.x) {
+                return (a.x < b.x);
+            }
+            return (a.y < b.y);
+        }
+    };
+
+    /*
+     * Is pixel a more extreme than pixel b?  Ties go to the first pixel in raster order
+     */
+    bool isMoreExtreme(PeakPixel const &a, PeakPixel const &b, bool polarity) {
+        if (a.value != b.value) {
+            return polarity ? (a.value > b.value) : (a.value < b.value);
+        }
+        return (a.y < b.y) || (a.y == b.y && a.x < b.x);
+    }
+}
+
+/*
+ * An object that may still grow
+ */
+struct FootprintStream::Object {
+    Object() : good(false), npix(0), extreme(0, 0, 0.0), haveExtreme(false) {}
+
+    // Absorb another object's pixels and peaks
+    void absorb(Object &other, bool polarity) {
+        spans.insert(spans.end(), other.spans.begin(), other.spans.end());
+        peaks.insert(peaks.end(), other.peaks.begin(), other.peaks.end());
+        good |= other.good;
+        npix += other.npix;
+        if (other.haveExtreme && (!haveExtreme || isMoreExtreme(other.extreme, extreme, polarity))) {
+            extreme = other.extreme;
+            haveExtreme = true;
+        }
+    }
+
+    std::vector<RowSpan> spans;
+    std::vector<PeakPixel> peaks;
+    bool good;                          // does some pixel pass the inclusion threshold?
+    std::size_t npix;
+    PeakPixel extreme;                  // the object's maximum (or minimum) pixel, used if it has no peaks
+    bool haveExtreme;
+};
+
+FootprintStream::FootprintStream(
+    geom::Box2I const & region,
+    Threshold const & threshold,
+    int npixMin,
+    bool setPeaks
+) : _region(region),
+    _footprintThreshold(threshold.getValue()),
+    _includeThreshold(threshold.getValue()*threshold.getIncludeMultiplier()),
+    _polarity(threshold.getPolarity()),
+    _pixelStdev(threshold.getType() == Threshold::PIXEL_STDEV),
+    _npixMin(npixMin),
+    _setPeaks(setPeaks),
+    _finished(false),
+    _y(0),
+    _nextId(1),
+    _segments(),
+    _aliases(),
+    _objects(),
+    _footprints(new FootprintList())
+{
+    if (threshold.getType() != Threshold::VALUE && threshold.getType() != Threshold::PIXEL_STDEV) {
+        throw LSST_EXCEPT(
+            pex::exceptions::InvalidParameterError,
+            (boost::format("Threshold type %s is not supported when detecting in strips; "
+                           "use a value or pixel_stdev threshold") %
+             Threshold::getTypeString(threshold.getType())).str()
+        );
+    }
+    if (region.isEmpty()) {
+        throw LSST_EXCEPT(pex::exceptions::InvalidParameterError, "The region to search is empty");
+    }
+    for (int i = 0; i != 3; ++i) {
+        _rows[i].resize(region.getWidth());
+    }
+}
+
+FootprintStream::~FootprintStream() {}
+
+template <typename ImagePixelT>
+void FootprintStream::addStrip(image::Image<ImagePixelT> const & strip) {
+    if (_pixelStdev) {
+        throw LSST_EXCEPT(pex::exceptions::InvalidParameterError,
+                          "A pixel_stdev threshold needs a MaskedImage, to provide the variance");
+    }
+    _addRows(strip, static_cast<image::ImageBase<image::VariancePixel> const *>(NULL));
+}
+
+template <typename ImagePixelT>
+void FootprintStream::addStrip(image::MaskedImage<ImagePixelT> const & strip) {
+    _addRows(*strip.getImage(), _pixelStdev ? strip.getVariance().get() : NULL);
+}
+
+template <typename ImagePixelT, typename VariancePixelT>
+void FootprintStream::_addRows(
+    image::ImageBase<ImagePixelT> const & img,
+    image::ImageBase<VariancePixelT> const * var
+) {
+    if (_finished) {
+        throw LSST_EXCEPT(pex::exceptions::LogicError, "Strips may not be added after finish() is called");
+    }
+    if (img.getX0() != _region.getMinX() || img.getWidth() != _region.getWidth()) {
+        throw LSST_EXCEPT(
+            pex::exceptions::InvalidParameterError,
+            (boost::format("Strip covers columns %d..%d, but the region covers %d..%d") %
+             img.getX0() % (img.getX0() + img.getWidth() - 1) %
+             _region.getMinX() % _region.getMaxX()).str()
+        );
+    }
+    if (img.getY0() != getNextRow() || img.getY0() + img.getHeight() - 1 > _region.getMaxY()) {
+        throw LSST_EXCEPT(
+            pex::exceptions::InvalidParameterError,
+            (boost::format("Strip covers rows %d..%d, but the next strip must start at row %d and end "
+                           "by row %d") % img.getY0() % (img.getY0() + img.getHeight() - 1) %
+             getNextRow() % _region.getMaxY()).str()
+        );
+    }
+
+    int const width = img.getWidth();
+    double const sign = _polarity ? 1.0 : -1.0;
+    std::vector<unsigned char> above(width + 1); // is each pixel in a footprint? n.b. above[width]=0
+    std::vector<unsigned char> included(width);  // does each pixel pass the inclusion threshold?
+    for (int y = 0; y != img.getHeight(); ++y) {
+        std::swap(_rows[0], _rows[1]);
+        std::swap(_rows[1], _rows[2]);
+        std::vector<double> &row = _rows[2];
+
+        typename image::ImageBase<ImagePixelT>::x_iterator ptr = img.row_begin(y);
+        for (int x = 0; x < width; ++x, ++ptr) {
+            row[x] = *ptr;
+        }
+        if (var == NULL) {
+            for (int x = 0; x < width; ++x) {
+                double const val = sign*row[x];
+                above[x] = (val >= _footprintThreshold);
+                included[x] = (val >= _includeThreshold);
+            }
+        } else {
+            typename image::ImageBase<VariancePixelT>::x_iterator varPtr = var->row_begin(y);
+            for (int x = 0; x < width; ++x, ++varPtr) {
+                double const val = sign*row[x];
+                double const sigma = std::sqrt(*varPtr);
+                above[x] = (val >= _footprintThreshold*sigma);
+                included[x] = (val >= _includeThreshold*sigma);
+            }
+        }
+
+        if (_setPeaks && _y >= 2) {
+            _findPeaks();
+        }
+        _addRow(above, included);
+    }
+}
+
+/*
+ * Find the peaks in the last row processed (_rows[1]), now that the row after it (_rows[2]) is known
+ */
+void FootprintStream::_findPeaks() {
+    int const width = _region.getWidth();
+    std::vector<double> const &below = _rows[0];
+    std::vector<double> const &row = _rows[1];
+    std::vector<double> const &upper = _rows[2];
+    for (std::vector<Segment>::const_iterator seg = _segments.begin(); seg != _segments.end(); ++seg) {
+        Object &obj = *_objects[seg->id];
+        int const x1 = std::min(seg->x1, width - 2); // don't search the edges of the image
+        for (int x = std::max(seg->x0, 1); x <= x1; ++x) {
+            double const val = row[x];
+            bool const higher = _polarity ?
+                ((upper[x - 1] > val) | (upper[x] > val) | (upper[x + 1] > val) |
+                 (row[x - 1] > val) |                      (row[x + 1] > val) |
+                 (below[x - 1] > val) | (below[x] > val) | (below[x + 1] > val)) :
+                ((upper[x - 1] < val) | (upper[x] < val) | (upper[x + 1] < val) |
+                 (row[x - 1] < val) |                      (row[x + 1] < val) |
+                 (below[x - 1] < val) | (below[x] < val) | (below[x + 1] < val));
+            if (!higher) {
+                obj.peaks.push_back(PeakPixel(x, _y - 1, val));
+            }
+        }
+    }
+}
+
+/*
+ * Label the runs of pixels above threshold in a new row (whose values are in _rows[2]), and finish
+ * the objects that don't reach it
+ */
+void FootprintStream::_addRow(std::vector<unsigned char> const & above,
+                              std::vector<unsigned char> const & included) {
+    int const width = _region.getWidth();
+    std::vector<double> const &row = _rows[2];
+    std::vector<Segment> segments;      // segments of the new row
+
+    std::size_t ip = 0;                 // first segment of _segments that could touch the current run
+    for (int x = 0; x < width; ++x) {
+        if (!above[x]) {
+            continue;
+        }
+        int const x0 = x;
+        while (above[x + 1]) {
+            ++x;
+        }
+        int const x1 = x;
+
+        while (ip < _segments.size() && _segments[ip].x1 < x0 - 1) {
+            ++ip;
+        }
+        int id = 0;
+        for (std::size_t i = ip; i < _segments.size() && _segments[i].x0 <= x1 + 1; ++i) {
+            int const prevId = _resolve(_segments[i].id);
+            id = (id == 0) ? prevId : _join(id, prevId);
+        }
+        if (id == 0) {
+            id = _nextId++;
+            _objects[id] = std::make_shared<Object>();
+        }
+
+        Object &obj = *_objects[id];
+        obj.spans.push_back(RowSpan(_y, x0, x1));
+        obj.npix += x1 - x0 + 1;
+        for (int i = x0; i <= x1; ++i) {
+            obj.good |= static_cast<bool>(included[i]);
+            PeakPixel const pix(i, _y, row[i]);
+            if (!obj.haveExtreme || isMoreExtreme(pix, obj.extreme, _polarity)) {
+                obj.extreme = pix;
+                obj.haveExtreme = true;
+            }
+        }
+        segments.push_back(Segment(x0, x1, id));
+    }
+/*
+ * Relabel the segments with their objects' final IDs, and finish the objects that didn't reach this row
+ */
+    std::set<int> open;                 // objects that reach this row
+    for (std::vector<Segment>::iterator seg = segments.begin(); seg != segments.end(); ++seg) {
+        seg->id = _resolve(seg->id);
+        open.insert(seg->id);
+    }
+    for (std::vector<Segment>::const_iterator seg = _segments.begin(); seg != _segments.end(); ++seg) {
+        int const id = _resolve(seg->id);
+        if (open.find(id) == open.end() && _objects.find(id) != _objects.end()) {
+            _emit(id);
+        }
+    }
+    _aliases.clear();
+    _segments.swap(segments);
+    ++_y;
+}
+
+/*
+ * Return the ID of the object that the given ID has been joined to
+ */
+int FootprintStream::_resolve(int id) {
+    for (std::map<int, int>::const_iterator alias = _aliases.find(id); alias != _aliases.end();
+         alias = _aliases.find(id)) {
+        id = alias->second;
+    }
+    return id;
+}
+
+/*
+ * Join two objects, absorbing the smaller into the larger; return the ID of the combined object
+ */
+int FootprintStream::_join(int id1, int id2) {
+    if (id1 == id2) {
+        return id1;
+    }
+    if (_objects[id1]->npix < _objects[id2]->npix) {
+        std::swap(id1, id2);
+    }
+    _objects[id1]->absorb(*_objects[id2], _polarity);
+    _objects.erase(id2);
+    _aliases[id2] = id1;
+    return id1;
+}
+
+/*
+ * Make a Footprint from an object that can no longer grow, and forget the object
+ */
+void FootprintStream::_emit(int id) {
+    std::map<int, PTR(Object)>::iterator ptr = _objects.find(id);
+    PTR(Object) obj = ptr->second;
+    _objects.erase(ptr);
+
+    if (!obj->good || obj->npix < static_cast<std::size_t>(_npixMin)) {
+        return;
+    }
+
+    int const x0 = _region.getMinX();
+    int const y0 = _region.getMinY();
+
+    std::sort(obj->spans.begin(), obj->spans.end());
+    PTR(Footprint) fp(new Footprint(obj->spans.size(), _region));
+    for (std::vector<RowSpan>::const_iterator span = obj->spans.begin(); span != obj->spans.end(); ++span) {
+        fp->addSpan(span->y + y0, span->x0 + x0, span->x1 + x0);
+    }
+
+    if (_setPeaks) {
+        std::vector<PeakPixel> &peaks = obj->peaks;
+        if (peaks.empty()) {
+            peaks.push_back(obj->extreme);
+        } else {
+            std::sort(peaks.begin(), peaks.end(), SortPeaks());
+        }
+        for (std::vector<PeakPixel>::const_iterator peak = peaks.begin(); peak != peaks.end(); ++peak) {
+            PTR(PeakRecord) newPeak = fp->getPeaks().addNew();
+            newPeak->setIx(peak->x + x0);
+            newPeak->setIy(peak->y + y0);
+            newPeak->setFx(peak->x + x0);
+            newPeak->setFy(peak->y + y0);
+            newPeak->setPeakValue(peak->value);
+        }
+    }
+
+    _footprints->push_back(fp);
+}
+
+void FootprintStream::finish() {
+    if (_finished) {
+        return;
+    }
+    if (_y != _region.getHeight()) {
+        throw LSST_EXCEPT(
+            pex::exceptions::LogicError,
+            (boost::format("Only %d of the region's %d rows have been added") %
+             _y % _region.getHeight()).str()
+        );
+    }
+    for (std::vector<Segment>::const_iterator seg = _segments.begin(); seg != _segments.end(); ++seg) {
+        if (_objects.find(seg->id) != _objects.end()) {
+            _emit(seg->id);
+        }
+    }
+    _segments.clear();
+    _finished = true;
+}
+
+PTR(FootprintStream::FootprintList) FootprintStream::takeFootprints() {
+    PTR(FootprintList) footprints(new FootprintList());
+    footprints.swap(_footprints);
+    return footprints;
+}
+
+/************************************************************************************************************/
+//
+// Explicit instantiations
+//
+#ifndef DOXYGEN
+
+#define INSTANTIATE(PIXEL) \
+    template void FootprintStream::addStrip(image::Image<PIXEL> const &); \
+    template void FootprintStream::addStrip(image::MaskedImage<PIXEL> const &);
+
+INSTANTIATE(std::uint16_t)
+INSTANTIATE(int)
+INSTANTIATE(float)
+INSTANTIATE(double)
+
+#endif // !DOXYGEN
+
+}}} // namespace lsst::afw::detection
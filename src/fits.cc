@@ -875,6 +875,28 @@ void Fits::writeTableScalar(std::size_t row, int col, std::string const & value)
     }
 }
 
+void Fits::writeTableArray(std::size_t row, int col, int nElements, std::string const * value) {
+    // See writeTableScalar: cfitsio wants an array of null-terminated strings.
+    std::vector<char const *> tmp(nElements);
+    for (int i = 0; i < nElements; ++i) {
+        tmp[i] = value[i].c_str();
+    }
+    fits_write_col(
+        reinterpret_cast<fitsfile*>(fptr),
+        TSTRING,
+        col + 1, row + 1,
+        1, nElements,
+        const_cast<char const**>(tmp.data()),
+        &status
+    );
+    if (behavior & AUTO_CHECK) {
+        LSST_FITS_CHECK_STATUS(
+            *this,
+            boost::format("Writing %d strings starting at table cell (%d, %d)") % nElements % row % col
+        );
+    }
+}
+
 template <typename T>
 void Fits::readTableArray(std::size_t row, int col, int nElements, T * value) {
     int anynul = false;
@@ -917,6 +939,36 @@ void Fits::readTableScalar(std::size_t row, int col, std::string & value) {
     value = std::string(tmp);
 }
 
+void Fits::readTableArray(std::size_t row, int col, int nElements, std::string * value) {
+    int anynul = false;
+    long size = getTableArraySize(col);
+    // One null-terminated buffer for each string, as in readTableScalar.
+    std::vector<char> buf((size + 1)*nElements, 0);
+    std::vector<char *> tmp(nElements);
+    for (int i = 0; i < nElements; ++i) {
+        tmp[i] = &buf[i*(size + 1)];
+    }
+    fits_read_col(
+        reinterpret_cast<fitsfile*>(fptr),
+        TSTRING,
+        col + 1, row + 1,
+        1, nElements,
+        0,
+        tmp.data(),
+        &anynul,
+        &status
+    );
+    if (behavior & AUTO_CHECK) {
+        LSST_FITS_CHECK_STATUS(
+            *this,
+            boost::format("Reading %d strings starting at table cell (%d, %d)") % nElements % row % col
+        );
+    }
+    for (int i = 0; i < nElements; ++i) {
+        value[i] = std::string(tmp[i]);
+    }
+}
+
 long Fits::getTableArraySize(int col) {
     int typecode = 0;
     long result = 0;
@@ -120,13 +120,15 @@ BackgroundMI::BackgroundMI(ImageT const& img, ///< ImageT (or MaskedImage) whose
     image::MaskedImage<InternalPixelT>::Image &im = *_statsImage.getImage();
     image::MaskedImage<InternalPixelT>::Variance &var = *_statsImage.getVariance();
 
+    StatisticsBuffer buffer;            // reused by all the cells, to save reallocating it for each one
     for (int iX = 0; iX < nxSample; ++iX) {
         for (int iY = 0; iY < nySample; ++iY) {
             ImageT subimg = ImageT(img, geom::Box2I(geom::Point2I(_xorig[iX], _yorig[iY]),
                                                     geom::Extent2I(_xsize[iX], _ysize[iY])), image::LOCAL);
 
             std::pair<double, double> res = makeStatistics(subimg, bgCtrl.getStatisticsProperty() | ERRORS,
-                                                           *bgCtrl.getStatisticsControl()).getResult();
+                                                           *bgCtrl.getStatisticsControl(),
+                                                           &buffer).getResult();
             im(iX, iY) = res.first;
             var(iX, iY) = res.second;
         }
@@ -29,15 +29,22 @@
  * @author Steve Bickerton
  *
  */
+#include <algorithm>
+#include <string>
 #include <vector>
 #include <cassert>
+#include <cmath>
+#include <limits>
 #include <memory>
 
 #include "lsst/base.h"
 #include "lsst/pex/exceptions.h"
+#include "lsst/afw/geom/Angle.h"
 #include "lsst/afw/math/Stack.h"
 #include "lsst/afw/math/MaskedVector.h"
+#include "lsst/afw/math/detail/Parallel.h"
 
+namespace afwFits = lsst::afw::fits;
 namespace afwGeom = lsst::afw::geom;
 namespace afwImage = lsst::afw::image;
 namespace afwMath  = lsst::afw::math;
@@ -107,24 +114,404 @@ void checkOnlyOneFlag(unsigned int flags) {
 
 /****************************************************************************
  *
- * stack MaskedImages
+ * Specialised stacking kernels
  *
  ****************************************************************************/
 /*
- * A function to handle MaskedImage stacking
+ * Building a Statistics object for every output pixel is expensive, and almost all stacks ask for one
+ * of a handful of statistics.  For those we copy a tile of each input row into pixel-major buffers (so
+ * that the values contributing to an output pixel are adjacent in memory) and compute the statistic
+ * directly:  the moments in a single (weighted) Welford pass, medians with nth_element, and each
+ * sigma-clipping iteration over the whole tile at once.
  *
- * A boolean template variable has been used to allow the compiler to generate the different instantiations
- *   to handle cases when we are, or are not, weighting
+ * The estimators, errors, NPOINT and the OR of the input masks (including the propagation of rejected
+ * mask bits) are the same as those of Statistics; other statistics use the generic per-pixel code.
+ */
+double const NaN = std::numeric_limits<double>::quiet_NaN();
+double const IQ_TO_STDEV = 0.741301109252802;   // 1 sigma in units of iqrange (assume Gaussian)
+int const STACK_TILE_SIZE = 1 << 15;            // number of (pixel, input) pairs in a tile
+
+/*
+ * Can the specialised kernels compute the requested statistic?
+ */
+bool isFastStackStatistic(afwMath::Property flags)
+{
+    switch (flags & ~afwMath::ERRORS) {
+      case afwMath::MEAN:
+      case afwMath::MEANCLIP:
+      case afwMath::MEDIAN:
+      case afwMath::SUM:
+      case afwMath::VARIANCE:
+      case afwMath::STDEV:
+        return true;
+      default:
+        return false;
+    }
+}
+
+/*
+ * Return the linearly-interpolated fraction-th quantile of [begin, end), reordering the values
  *
- * Additionally, we may or may not want to weight based on the variance -- another template boolean
+ * This is the interpolation used by Statistics' percentile()
+ */
+template<typename PixelT>
+double quantile(PixelT *begin, PixelT *end, double const fraction)
+{
+    int const n = end - begin;
+    if (n == 0) {
+        return NaN;
+    } else if (n == 1) {
+        return *begin;
+    }
+
+    double const idx = fraction*(n - 1);
+    int const q1 = static_cast<int>(idx);
+    int const q2 = q1 + 1;
+    PixelT *mid1 = begin + q1;
+    PixelT *mid2 = begin + q2;
+    if (fraction > 0.5) {
+        std::nth_element(begin, mid1, end);
+        std::nth_element(mid1, mid2, end);
+    } else {
+        std::nth_element(begin, mid2, end);
+        std::nth_element(begin, mid1, mid2);
+    }
+
+    return (q2 - idx)*static_cast<double>(*mid1) + (idx - q1)*static_cast<double>(*mid2);
+}
+
+/*
+ * Per-tile stacking engine
+ *
+ * The caller copies nx pixels from a row of each input into the tile with setInput(), calls combine(nx),
+ * and reads the results back with getValue(), getMask() and getVariance() (the square of the
+ * error in the requested statistic).
+ */
+template<typename PixelT>
+class StackTile {
+public:
+    StackTile(int nImages,                          // number of images being stacked
+              int width,                            // width of the images being stacked
+              afwMath::Property flags,              // desired statistic
+              afwMath::StatisticsControl const& sctrl, // control structure
+              WeightVector const& wvector,          // per-image weights (if !useVariance)
+              bool isWeighted,                      // weight the inputs?
+              bool useVariance                      // use the inverse variance as the weight
+             ) :
+        _nImages(nImages),
+        _width(std::max(1, std::min(width, STACK_TILE_SIZE/nImages))),
+        _flags(static_cast<afwMath::Property>(flags & ~afwMath::ERRORS)),
+        _isWeighted(isWeighted),
+        _useVariance(useVariance),
+        _nanSafe(sctrl.getNanSafe()),
+        _calcErrorFromInputVariance(sctrl.getCalcErrorFromInputVariance()),
+        _andMask(sctrl.getAndMask()),
+        _numSigmaClip(sctrl.getNumSigmaClip()),
+        _numIter(sctrl.getNumIter()),
+        _weights(wvector),
+        _values(_width*nImages), _masks(_width*nImages, 0x0), _variances(_width*nImages, 0.0),
+        _scratch(nImages),
+        _outValue(_width), _outMask(_width), _outVariance(_width),
+        _n(_width), _center(_width), _iqrange(_width), _varianceClip(_width)
+    {
+        int const nBits = 8*sizeof(afwImage::MaskPixel);
+        for (int bit = 0; bit < nBits; ++bit) {
+            double const threshold = sctrl.getMaskPropagationThreshold(bit);
+            if (threshold < 1.0) {      // a fraction can never exceed 1
+                _propagatedBits.push_back(1 << bit);
+                _propagationThresholds.push_back(threshold);
+            }
+        }
+        _rejectedWeights.resize(_propagatedBits.size());
+    }
+
+    int getWidth() const { return _width; }
+
+    /// Copy nx pixels of the i-th input MaskedImage into the tile
+    template<typename ImageIterT, typename MaskIterT, typename VarianceIterT>
+    void setInput(int i, int nx, ImageIterT iptr, MaskIterT mptr, VarianceIterT vptr) {
+        for (int x = 0, j = i; x < nx; ++x, j += _nImages, ++iptr, ++mptr, ++vptr) {
+            _values[j] = *iptr;
+            _masks[j] = *mptr;
+            _variances[j] = *vptr;
+        }
+    }
+
+    /// Copy nx pixels of the i-th input Image into the tile
+    template<typename ImageIterT>
+    void setInput(int i, int nx, ImageIterT iptr) {
+        for (int x = 0, j = i; x < nx; ++x, j += _nImages, ++iptr) {
+            _values[j] = *iptr;
+        }
+    }
+
+    /// Compute the desired statistic for the first nx pixels in the tile
+    void combine(int nx) {
+        if (_isWeighted) {
+            _combine<true>(nx);
+        } else {
+            _combine<false>(nx);
+        }
+    }
+
+    int getN(int x) const { return _n[x]; }
+    PixelT getValue(int x) const { return _outValue[x]; }
+    afwImage::MaskPixel getMask(int x) const { return _outMask[x]; }
+    afwImage::VariancePixel getVariance(int x) const { return _outVariance[x]; }
+
+private:
+    // The results of accumulating the (unclipped or clipped) values for one pixel
+    struct Moments {
+        Moments() : n(0), sumw(0), sumw2(0), sum(0), mean(0), m2(0), sumvw2(0), orMask(0x0) {}
+
+        int n;                          // number of values used
+        double sumw;                    // sum(weight)
+        double sumw2;                   // sum(weight^2)
+        double sum;                     // sum(weight*value)
+        double mean;                    // running (weighted) mean
+        double m2;                      // sum(weight*(value - mean)^2)
+        double sumvw2;                  // sum(variance*weight^2)
+        afwImage::MaskPixel orMask;     // OR of the masks of the values used
+
+        double getMean() const { return (sumw == 0) ? NaN : mean; }
+        double getVariance() const { return m2*sumw/(sumw*sumw - sumw2); } // unbiased, as in Statistics
+        double getMeanVariance(bool calcErrorFromInputVariance) const {
+            return calcErrorFromInputVariance ? sumvw2/(sumw*sumw) : getVariance()*sumw2/(sumw*sumw);
+        }
+    };
+
+    bool _isGood(PixelT value, afwImage::MaskPixel mask) const {
+        return (!_nanSafe || std::isfinite(static_cast<float>(value))) && !(mask & _andMask);
+    }
+
+    /*
+     * Accumulate the moments of pixel x's good values, optionally only those within hwidth of center;
+     * the weights of rejected values are added to _rejectedWeights if propagate is true
+     */
+    template<bool isWeighted, bool doClip>
+    Moments _accumulate(int x, double center, double hwidth, bool propagate) {
+        Moments m;
+        PixelT const *val = &_values[x*_nImages];
+        afwImage::MaskPixel const *msk = &_masks[x*_nImages];
+        afwImage::VariancePixel const *var = &_variances[x*_nImages];
+
+        for (int i = 0; i != _nImages; ++i) {
+            double const value = val[i];
+            double weight = 1.0;
+            if (isWeighted) {
+                weight = _useVariance ? static_cast<afwMath::WeightPixel>(1.0/var[i]) : _weights[i];
+            }
+
+            if (_isGood(val[i], msk[i]) && (!doClip || std::fabs(value - center) <= hwidth)) {
+                ++m.n;
+                m.sumw += weight;
+                m.sumw2 += weight*weight;
+                m.sum += weight*value;
+                if (!isWeighted || weight != 0.0) {
+                    double const delta = value - m.mean;
+                    m.mean += delta*weight/m.sumw;
+                    m.m2 += weight*delta*(value - m.mean);
+                }
+                if (_calcErrorFromInputVariance) {
+                    m.sumvw2 += var[i]*weight*weight;
+                }
+                m.orMask |= msk[i];
+            } else if (propagate) {
+                for (std::size_t j = 0; j != _propagatedBits.size(); ++j) {
+                    if (msk[i] & _propagatedBits[j]) {
+                        _rejectedWeights[j] += weight;
+                    }
+                }
+            }
+        }
+
+        return m;
+    }
+
+    /*
+     * Copy pixel x's good values into _scratch, returning the end of the copied values
+     */
+    PixelT *_copyGood(int x) {
+        PixelT const *val = &_values[x*_nImages];
+        afwImage::MaskPixel const *msk = &_masks[x*_nImages];
+        PixelT *end = &_scratch[0];
+        for (int i = 0; i != _nImages; ++i) {
+            if (_isGood(val[i], msk[i])) {
+                *end++ = val[i];
+            }
+        }
+        return end;
+    }
+
+    template<bool isWeighted>
+    void _combine(int nx) {
+        for (int x = 0; x < nx; ++x) {
+            std::fill(_rejectedWeights.begin(), _rejectedWeights.end(), 0.0);
+            Moments const m = _accumulate<isWeighted, false>(x, 0.0, 0.0, true);
+            int const n = m.n;
+            double const variance = m.getVariance();
+
+            afwImage::MaskPixel orMask = m.orMask;
+            for (std::size_t j = 0; j != _propagatedBits.size(); ++j) {
+                if (_rejectedWeights[j]/(m.sumw + _rejectedWeights[j]) > _propagationThresholds[j]) {
+                    orMask |= _propagatedBits[j];
+                }
+            }
+
+            _n[x] = n;
+            _outMask[x] = orMask;
+
+            switch (_flags) {
+              case afwMath::MEAN:
+                _outValue[x] = m.getMean();
+                _outVariance[x] = m.getMeanVariance(_calcErrorFromInputVariance);
+                break;
+              case afwMath::SUM:
+                _outValue[x] = m.sum;
+                _outVariance[x] = 0.0;
+                break;
+              case afwMath::VARIANCE:
+                _outValue[x] = variance;
+                _outVariance[x] = 2*(n - 1)*variance*variance/static_cast<double>(n*n);
+                break;
+              case afwMath::STDEV:
+                _outValue[x] = std::sqrt(variance);
+                _outVariance[x] = 0.5*(n - 1)*variance/static_cast<double>(n*n);
+                break;
+              case afwMath::MEDIAN:
+                _outValue[x] = quantile(&_scratch[0], _copyGood(x), 0.5);
+                _outVariance[x] = afwGeom::HALFPI*variance/n;
+                break;
+              case afwMath::MEANCLIP:
+                {
+                    PixelT *begin = &_scratch[0];
+                    PixelT *end = _copyGood(x);
+                    _center[x] = quantile(begin, end, 0.5);
+                    double const q1 = quantile(begin, end, 0.25);
+                    double const q3 = quantile(begin, end, 0.75);
+                    _iqrange[x] = q3 - q1;
+                }
+                break;
+              default:
+                assert(false);
+            }
+        }
+
+        if (_flags == afwMath::MEANCLIP) {
+            _clip<isWeighted>(nx);
+        }
+    }
+
+    /*
+     * Iteratively sigma-clip each pixel in the tile, starting at the median +- numSigmaClip*iqrange
+     */
+    template<bool isWeighted>
+    void _clip(int nx) {
+        for (int iter = 0; iter < _numIter; ++iter) {
+            for (int x = 0; x < nx; ++x) {
+                double const center = _center[x];
+                double const hwidth = (iter > 0 && _n[x] > 1) ?
+                    _numSigmaClip*std::sqrt(_varianceClip[x]) : _numSigmaClip*IQ_TO_STDEV*_iqrange[x];
+
+                if (std::isnan(center) || std::isnan(hwidth)) {
+                    _center[x] = _varianceClip[x] = NaN;
+                    _outValue[x] = _outVariance[x] = NaN;
+                    continue;
+                }
+
+                Moments const m = _accumulate<isWeighted, true>(x, center, hwidth, false);
+                _center[x] = m.getMean();
+                _varianceClip[x] = m.getVariance();
+                _outValue[x] = _center[x];
+                _outVariance[x] = m.getMeanVariance(_calcErrorFromInputVariance);
+            }
+        }
+    }
+
+    int const _nImages;
+    int const _width;                   // number of pixels in a tile
+    afwMath::Property const _flags;     // the desired statistic (without ERRORS)
+    bool const _isWeighted;
+    bool const _useVariance;
+    bool const _nanSafe;
+    bool const _calcErrorFromInputVariance;
+    int const _andMask;
+    double const _numSigmaClip;
+    int const _numIter;
+    WeightVector const _weights;
+    std::vector<afwImage::MaskPixel> _propagatedBits;  // mask bits to propagate from rejected values
+    std::vector<double> _propagationThresholds;         // and the corresponding thresholds
+    std::vector<double> _rejectedWeights;               // total weight of rejected values with each bit
+
+    std::vector<PixelT> _values;        // input values, pixel-major
+    std::vector<afwImage::MaskPixel> _masks;            // input masks, pixel-major
+    std::vector<afwImage::VariancePixel> _variances;    // input variances, pixel-major
+    std::vector<PixelT> _scratch;       // workspace for quantiles
+
+    std::vector<PixelT> _outValue;
+    std::vector<afwImage::MaskPixel> _outMask;
+    std::vector<afwImage::VariancePixel> _outVariance;
+
+    std::vector<int> _n;                // number of good values (before clipping)
+    std::vector<double> _center;        // median, then the clipped mean
+    std::vector<double> _iqrange;       // interquartile range
+    std::vector<double> _varianceClip;  // clipped variance
+};
+
+/****************************************************************************
+ *
+ * stack MaskedImages
+ *
+ ****************************************************************************/
+/*
+ * Stack rows [y0, y1) of MaskedImages using the specialised kernels
  */
 template<typename PixelT, bool isWeighted, bool useVariance>
-void computeMaskedImageStack(
+void computeMaskedImageStackFast(
     afwImage::MaskedImage<PixelT> & imgStack,
     std::vector<typename afwImage::MaskedImage<PixelT>::Ptr > const &images,
     afwMath::Property flags,
     afwMath::StatisticsControl const& sctrl,
-    WeightVector const &wvector=WeightVector()
+    WeightVector const &wvector,
+    int y0, int y1
+    )
+{
+    int const width = imgStack.getWidth();
+    int const noGoodPixelsMask = sctrl.getNoGoodPixelsMask();
+    StackTile<PixelT> tile(images.size(), width, flags, sctrl, wvector, isWeighted, useVariance);
+
+    for (int y = y0; y != y1; ++y) {
+        for (int x0 = 0; x0 < width; x0 += tile.getWidth()) {
+            int const nx = std::min(tile.getWidth(), width - x0);
+
+            for (unsigned int i = 0; i < images.size(); ++i) {
+                tile.setInput(i, nx, images[i]->getImage()->x_at(x0, y), images[i]->getMask()->x_at(x0, y),
+                              images[i]->getVariance()->x_at(x0, y));
+            }
+            tile.combine(nx);
+
+            typename afwImage::MaskedImage<PixelT>::x_iterator ptr = imgStack.x_at(x0, y);
+            for (int x = 0; x < nx; ++x, ++ptr) {
+                afwImage::MaskPixel const msk = (tile.getN(x) == 0) ? noGoodPixelsMask : tile.getMask(x);
+                *ptr = typename afwImage::MaskedImage<PixelT>::Pixel(tile.getValue(x), msk,
+                                                                     tile.getVariance(x));
+            }
+        }
+    }
+}
+
+/*
+ * Stack rows [y0, y1) of MaskedImages by calculating a Statistics object for each pixel
+ */
+template<typename PixelT, bool isWeighted, bool useVariance>
+void computeMaskedImageStackGeneric(
+    afwImage::MaskedImage<PixelT> & imgStack,
+    std::vector<typename afwImage::MaskedImage<PixelT>::Ptr > const &images,
+    afwMath::Property flags,
+    afwMath::StatisticsControl const& sctrl,
+    WeightVector const &wvector,
+    afwMath::MaskedVector<PixelT> & pixelSet, // workspace for a pixel from x,y for each image
+    int y0, int y1
     )
 {
     // get a list of row_begin iterators
@@ -132,7 +519,6 @@ void computeMaskedImageStack(
     std::vector<x_iterator> rows;
     rows.reserve(images.size());
 
-    afwMath::MaskedVector<PixelT> pixelSet(images.size()); // a pixel from x,y for each image
     WeightVector weights;                                  // weights; non-const version
     //
     afwMath::StatisticsControl sctrlTmp(sctrl);
@@ -153,11 +539,11 @@ void computeMaskedImageStack(
 
     // loop over x,y ... the loop over the stack to fill pixelSet
     // - get the stats on pixelSet and put the value in the output image at x,y
-    for (int y = 0; y != imgStack.getHeight(); ++y) {
+    for (int y = y0; y != y1; ++y) {
 
         for (unsigned int i = 0; i < images.size(); ++i) {
             x_iterator ptr = images[i]->row_begin(y);
-            if (y == 0) {
+            if (y == y0) {
                 rows.push_back(ptr);
             } else {
                 rows[i] = ptr;
@@ -197,6 +583,78 @@ void computeMaskedImageStack(
     }
 }
 
+/*
+ * Stack one band of rows of MaskedImages; called by parallelForBands
+ */
+template<typename PixelT, bool isWeighted, bool useVariance>
+class MaskedImageStackBand {
+public:
+    typedef std::vector<PTR(afwMath::MaskedVector<PixelT>)> PixelSets;
+
+    MaskedImageStackBand(
+        afwImage::MaskedImage<PixelT> & imgStack,
+        std::vector<typename afwImage::MaskedImage<PixelT>::Ptr > const &images,
+        afwMath::Property flags,
+        afwMath::StatisticsControl const& sctrl,
+        WeightVector const &wvector,
+        PixelSets const& pixelSets      // per-band workspace for the generic code; empty for the fast kernels
+    ) : _imgStack(&imgStack), _images(&images), _flags(flags), _sctrl(&sctrl), _wvector(&wvector),
+        _pixelSets(&pixelSets) {}
+
+    void operator()(int band, int y0, int y1) const {
+        if (_pixelSets->empty()) {
+            computeMaskedImageStackFast<PixelT, isWeighted, useVariance>(
+                *_imgStack, *_images, _flags, *_sctrl, *_wvector, y0, y1);
+        } else {
+            computeMaskedImageStackGeneric<PixelT, isWeighted, useVariance>(
+                *_imgStack, *_images, _flags, *_sctrl, *_wvector, *(*_pixelSets)[band], y0, y1);
+        }
+    }
+private:
+    afwImage::MaskedImage<PixelT> *_imgStack;
+    std::vector<typename afwImage::MaskedImage<PixelT>::Ptr > const *_images;
+    afwMath::Property _flags;
+    afwMath::StatisticsControl const *_sctrl;
+    WeightVector const *_wvector;
+    PixelSets const *_pixelSets;
+};
+
+/*
+ * A function to handle MaskedImage stacking
+ *
+ * A boolean template variable has been used to allow the compiler to generate the different instantiations
+ *   to handle cases when we are, or are not, weighting
+ *
+ * Additionally, we may or may not want to weight based on the variance -- another template boolean
+ *
+ * The output rows are split into sctrl.getNumThreads() bands which are stacked in parallel; as each
+ * output pixel only depends on the corresponding input pixels the result doesn't depend on the
+ * number of threads.
+ */
+template<typename PixelT, bool isWeighted, bool useVariance>
+void computeMaskedImageStack(
+    afwImage::MaskedImage<PixelT> & imgStack,
+    std::vector<typename afwImage::MaskedImage<PixelT>::Ptr > const &images,
+    afwMath::Property flags,
+    afwMath::StatisticsControl const& sctrl,
+    WeightVector const &wvector=WeightVector()
+    )
+{
+    std::vector<afwMath::detail::Band> const bands =
+        afwMath::detail::makeBands(0, imgStack.getHeight(), sctrl.getNumThreads());
+
+    // Images (and thus MaskedVectors) should be constructed on the main thread
+    typename MaskedImageStackBand<PixelT, isWeighted, useVariance>::PixelSets pixelSets;
+    if (!isFastStackStatistic(flags)) {
+        for (std::size_t i = 0; i < bands.size(); ++i) {
+            pixelSets.push_back(std::make_shared<afwMath::MaskedVector<PixelT> >(images.size()));
+        }
+    }
+
+    afwMath::detail::parallelForBands(bands, MaskedImageStackBand<PixelT, isWeighted, useVariance>(
+                                          imgStack, images, flags, sctrl, wvector, pixelSets));
+}
+
 } // end anonymous namespace
 
 
@@ -250,6 +708,99 @@ void afwMath::statisticsStack(
 }
 
 
+/****************************************************************************
+ *
+ * stack MaskedImages read from FITS files
+ *
+ ****************************************************************************/
+
+namespace {
+    PTR(afwFits::Fits) openFits(std::string const& fileName) {
+        return std::make_shared<afwFits::Fits>(fileName, "r",
+                                               afwFits::Fits::AUTO_CLOSE | afwFits::Fits::AUTO_CHECK);
+    }
+
+    PTR(afwFits::Fits) openFits(PTR(afwFits::MemFileManager) const& manager) {
+        return std::make_shared<afwFits::Fits>(*manager, "r",
+                                               afwFits::Fits::AUTO_CLOSE | afwFits::Fits::AUTO_CHECK);
+    }
+
+/*
+ * Stack the MaskedImages in a set of FITS files, stripHeight rows at a time
+ *
+ * The files are kept open, and each strip is read as a subimage and stacked with the in-memory
+ * statisticsStack; so at most one strip of each input is resident.
+ */
+template<typename PixelT, typename SourceT>
+void computeFitsStack(
+    afwImage::MaskedImage<PixelT>& out,
+    std::vector<SourceT> const& sources,
+    afwMath::Property flags,
+    afwMath::StatisticsControl const& sctrl,
+    WeightVector const &wvector,
+    int stripHeight
+    )
+{
+    checkObjectsAndWeights(sources, wvector);
+    checkOnlyOneFlag(flags);
+    if (stripHeight <= 0) {
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError,
+                          str(boost::format("stripHeight must be positive, not %d") % stripHeight));
+    }
+
+    std::vector<PTR(afwFits::Fits)> fitsFiles;
+    fitsFiles.reserve(sources.size());
+    for (typename std::vector<SourceT>::const_iterator ptr = sources.begin(); ptr != sources.end(); ++ptr) {
+        fitsFiles.push_back(openFits(*ptr));
+    }
+
+    afwGeom::Box2I const bbox = out.getBBox(afwImage::PARENT);
+    std::vector<typename afwImage::MaskedImage<PixelT>::Ptr> strips(sources.size());
+    for (int y0 = bbox.getMinY(); y0 <= bbox.getMaxY(); y0 += stripHeight) {
+        afwGeom::Box2I const stripBBox(afwGeom::Point2I(bbox.getMinX(), y0),
+                                       afwGeom::Extent2I(bbox.getWidth(),
+                                                         std::min(stripHeight, bbox.getMaxY() - y0 + 1)));
+        for (unsigned int i = 0; i < fitsFiles.size(); ++i) {
+            strips[i].reset();          // release the previous strip before reading the next
+            fitsFiles[i]->setHdu(1);    // the MaskedImage constructor starts from the primary HDU
+            strips[i] = std::make_shared<afwImage::MaskedImage<PixelT> >(
+                *fitsFiles[i], PTR(lsst::daf::base::PropertySet)(), stripBBox, afwImage::PARENT);
+        }
+
+        afwImage::MaskedImage<PixelT> outStrip(out, stripBBox, afwImage::PARENT);
+        afwMath::statisticsStack(outStrip, strips, flags, sctrl, wvector);
+    }
+}
+
+} // end anonymous namespace
+
+template<typename PixelT>
+void afwMath::statisticsStack(
+    afwImage::MaskedImage<PixelT>& out,
+    std::vector<std::string> const& fileNames,
+    afwMath::Property flags,
+    afwMath::StatisticsControl const& sctrl,
+    WeightVector const &wvector,
+    int stripHeight
+    )
+{
+    computeFitsStack(out, fileNames, flags, sctrl, wvector, stripHeight);
+}
+
+template<typename PixelT>
+void afwMath::statisticsStack(
+    afwImage::MaskedImage<PixelT>& out,
+    std::vector<PTR(afwFits::MemFileManager)> const& managers,
+    afwMath::Property flags,
+    afwMath::StatisticsControl const& sctrl,
+    WeightVector const &wvector,
+    int stripHeight
+    )
+{
+    computeFitsStack(out, managers, flags, sctrl, wvector, stripHeight);
+}
+
+
 namespace {
 /****************************************************************************
  *
@@ -269,13 +820,37 @@ namespace {
 template<typename PixelT, bool isWeighted>
 void computeImageStack(
     afwImage::Image<PixelT> & imgStack,
-        std::vector<typename afwImage::Image<PixelT>::Ptr > &images,
+        std::vector<typename afwImage::Image<PixelT>::Ptr > const &images,
         afwMath::Property flags,
         afwMath::StatisticsControl const& sctrl,
-        WeightVector const &weights=WeightVector()
+        WeightVector const &weights,
+        afwMath::MaskedVector<PixelT> *pixelSetPtr, // workspace for the generic code; NULL for fast kernels
+        int y0, int y1                              // the rows to stack
     )
 {
-    afwMath::MaskedVector<PixelT> pixelSet(images.size()); // a pixel from x,y for each image
+    if (!pixelSetPtr) {
+        int const width = imgStack.getWidth();
+        StackTile<PixelT> tile(images.size(), width, flags, sctrl, weights, isWeighted, false);
+
+        for (int y = y0; y != y1; ++y) {
+            for (int x0 = 0; x0 < width; x0 += tile.getWidth()) {
+                int const nx = std::min(tile.getWidth(), width - x0);
+
+                for (unsigned int i = 0; i < images.size(); ++i) {
+                    tile.setInput(i, nx, images[i]->x_at(x0, y));
+                }
+                tile.combine(nx);
+
+                typename afwImage::Image<PixelT>::x_iterator ptr = imgStack.x_at(x0, y);
+                for (int x = 0; x < nx; ++x, ++ptr) {
+                    *ptr = tile.getValue(x);
+                }
+            }
+        }
+        return;
+    }
+
+    afwMath::MaskedVector<PixelT> & pixelSet = *pixelSetPtr; // a pixel from x,y for each image
     afwMath::StatisticsControl sctrlTmp(sctrl);
 
     // set the mask to be an infinite iterator
@@ -286,7 +861,7 @@ void computeImageStack(
     }
 
     // get the desired statistic
-    for (int y = 0; y != imgStack.getHeight(); ++y) {
+    for (int y = y0; y != y1; ++y) {
         for (int x = 0; x != imgStack.getWidth(); ++x) {
             for (unsigned int i = 0; i != images.size(); ++i) {
                 (*pixelSet.getImage())(i, 0) = (*images[i])(x, y);
@@ -301,6 +876,64 @@ void computeImageStack(
     }
 }
 
+/*
+ * Stack one band of rows of Images; called by parallelForBands
+ */
+template<typename PixelT, bool isWeighted>
+class ImageStackBand {
+public:
+    typedef std::vector<PTR(afwMath::MaskedVector<PixelT>)> PixelSets;
+
+    ImageStackBand(
+        afwImage::Image<PixelT> & imgStack,
+        std::vector<typename afwImage::Image<PixelT>::Ptr > const &images,
+        afwMath::Property flags,
+        afwMath::StatisticsControl const& sctrl,
+        WeightVector const &weights,
+        PixelSets const& pixelSets      // per-band workspace for the generic code; empty for the fast kernels
+    ) : _imgStack(&imgStack), _images(&images), _flags(flags), _sctrl(&sctrl), _weights(&weights),
+        _pixelSets(&pixelSets) {}
+
+    void operator()(int band, int y0, int y1) const {
+        computeImageStack<PixelT, isWeighted>(*_imgStack, *_images, _flags, *_sctrl, *_weights,
+                                              _pixelSets->empty() ? NULL : (*_pixelSets)[band].get(), y0, y1);
+    }
+private:
+    afwImage::Image<PixelT> *_imgStack;
+    std::vector<typename afwImage::Image<PixelT>::Ptr > const *_images;
+    afwMath::Property _flags;
+    afwMath::StatisticsControl const *_sctrl;
+    WeightVector const *_weights;
+    PixelSets const *_pixelSets;
+};
+
+/*
+ * Stack Images, splitting the rows into sctrl.getNumThreads() bands which are stacked in parallel
+ */
+template<typename PixelT, bool isWeighted>
+void computeImageStack(
+    afwImage::Image<PixelT> & imgStack,
+        std::vector<typename afwImage::Image<PixelT>::Ptr > const &images,
+        afwMath::Property flags,
+        afwMath::StatisticsControl const& sctrl,
+        WeightVector const &weights=WeightVector()
+    )
+{
+    std::vector<afwMath::detail::Band> const bands =
+        afwMath::detail::makeBands(0, imgStack.getHeight(), sctrl.getNumThreads());
+
+    // Images (and thus MaskedVectors) should be constructed on the main thread
+    typename ImageStackBand<PixelT, isWeighted>::PixelSets pixelSets;
+    if (!isFastStackStatistic(flags)) {
+        for (std::size_t i = 0; i < bands.size(); ++i) {
+            pixelSets.push_back(std::make_shared<afwMath::MaskedVector<PixelT> >(images.size()));
+        }
+    }
+
+    afwMath::detail::parallelForBands(bands, ImageStackBand<PixelT, isWeighted>(
+                                          imgStack, images, flags, sctrl, weights, pixelSets));
+}
+
 } // end anonymous namespace
 
 
@@ -556,6 +1189,20 @@ typename afwImage::MaskedImage<PixelT>::Ptr afwMath::statisticsStack(
             afwMath::Property flags, \
             afwMath::StatisticsControl const& sctrl,    \
             WeightVector const &wvector);                          \
+    template void afwMath::statisticsStack<TYPE>( \
+            afwImage::MaskedImage<TYPE> &out, \
+            std::vector<std::string> const& fileNames, \
+            afwMath::Property flags, \
+            afwMath::StatisticsControl const& sctrl,    \
+            WeightVector const &wvector,                \
+            int stripHeight);                           \
+    template void afwMath::statisticsStack<TYPE>( \
+            afwImage::MaskedImage<TYPE> &out, \
+            std::vector<PTR(afwFits::MemFileManager)> const& managers, \
+            afwMath::Property flags, \
+            afwMath::StatisticsControl const& sctrl,    \
+            WeightVector const &wvector,                \
+            int stripHeight);                           \
     template std::shared_ptr<std::vector<TYPE> > afwMath::statisticsStack<TYPE>( \
             std::vector<std::shared_ptr<std::vector<TYPE> > > &vectors, \
             afwMath::Property flags, \
@@ -194,7 +194,8 @@ namespace {
                                 bool const weightsAreMultiplicative,
                                 int const andMask,
                                 bool const calcErrorFromInputVariance,
-                                std::vector<double> const & maskPropagationThresholds
+                                std::vector<double> const & maskPropagationThresholds,
+                                std::vector<double> *goodPixels // if non-NULL, append the good pixels
                                )
     {
         int n = 0;
@@ -224,6 +225,9 @@ namespace {
                 if (IsFinite()(*ptr) && !(*mptr & andMask) &&
                     InClipRange()(*ptr, meanCrude, cliplimit) ) { // clip
 
+                    if (goodPixels) {
+                        goodPixels->push_back(*ptr);
+                    }
                     double const delta = (*ptr - meanCrude);
 
                     if (useWeights) {
@@ -344,19 +348,22 @@ namespace {
                                 int const andMask,
                                 bool const calcErrorFromInputVariance,
                                 bool doGetWeighted,
-                                std::vector<double> const & maskPropagationThresholds
+                                std::vector<double> const & maskPropagationThresholds,
+                                std::vector<double> *goodPixels // if non-NULL, append the good pixels
                                )
     {
         if (doGetWeighted) {
             return processPixels<IsFinite, HasValueLtMin, HasValueGtMax, InClipRange, true>(
                                  img, msk, var, weights,
-                                 flags, nCrude, 1, meanCrude, cliplimit, weightsAreMultiplicative, andMask,
-                                 calcErrorFromInputVariance, maskPropagationThresholds);
+                                 flags, nCrude, stride, meanCrude, cliplimit,
+                                 weightsAreMultiplicative, andMask,
+                                 calcErrorFromInputVariance, maskPropagationThresholds, goodPixels);
         } else {
             return processPixels<IsFinite, HasValueLtMin, HasValueGtMax, InClipRange, false>(
                                  img, msk, var, weights,
-                                 flags, nCrude, 1, meanCrude, cliplimit, weightsAreMultiplicative, andMask,
-                                 calcErrorFromInputVariance, maskPropagationThresholds);
+                                 flags, nCrude, stride, meanCrude, cliplimit,
+                                 weightsAreMultiplicative, andMask,
+                                 calcErrorFromInputVariance, maskPropagationThresholds, goodPixels);
         }
     }
 
@@ -380,21 +387,22 @@ namespace {
                                 bool const calcErrorFromInputVariance,
                                 bool doCheckFinite,
                                 bool doGetWeighted,
-                                std::vector<double> const & maskPropagationThresholds
+                                std::vector<double> const & maskPropagationThresholds,
+                                std::vector<double> *goodPixels // if non-NULL, append the good pixels
                                )
     {
         if (doCheckFinite) {
             return processPixels<CheckFinite, HasValueLtMin, HasValueGtMax, InClipRange, useWeights>(
                                  img, msk, var, weights,
-                                 flags, nCrude, 1, meanCrude, cliplimit,
+                                 flags, nCrude, stride, meanCrude, cliplimit,
                                  weightsAreMultiplicative, andMask, calcErrorFromInputVariance,
-                                 doGetWeighted, maskPropagationThresholds);
+                                 doGetWeighted, maskPropagationThresholds, goodPixels);
         } else {
             return processPixels<AlwaysTrue, HasValueLtMin, HasValueGtMax, InClipRange, useWeights>(
                                  img, msk, var, weights,
-                                 flags, nCrude, 1, meanCrude, cliplimit,
+                                 flags, nCrude, stride, meanCrude, cliplimit,
                                  weightsAreMultiplicative, andMask, calcErrorFromInputVariance,
-                                 doGetWeighted, maskPropagationThresholds);
+                                 doGetWeighted, maskPropagationThresholds, goodPixels);
         }
     }
 
@@ -417,7 +425,8 @@ namespace {
                                bool const calcErrorFromInputVariance, // estimate errors from variance
                                bool doCheckFinite,             // check for NaN/Inf
                                bool doGetWeighted,             // use the weights
-                               std::vector<double> const & maskPropagationThresholds
+                               std::vector<double> const & maskPropagationThresholds,
+                               std::vector<double> *goodPixels // if non-NULL, append the good pixels
                               )
     {
         // =====================================================
@@ -441,7 +450,7 @@ namespace {
                                               cliplimit,
                                               weightsAreMultiplicative, andMask, calcErrorFromInputVariance,
                                               doCheckFinite, doGetWeighted,
-                                              maskPropagationThresholds);
+                                              maskPropagationThresholds, NULL);
         nCrude = std::get<0>(values);
         double sumCrude = std::get<1>(values);
 
@@ -452,7 +461,7 @@ namespace {
 
         // =======================================================
         // Estimate the full precision variance using that crude mean
-        // - get the min and max as well
+        // - get the min and max as well, and copy the good pixels if requested
 
         if (flags & (afwMath::MIN | afwMath::MAX)) {
             return processPixels<ChkFin, ChkMin, ChkMax, AlwaysT, true>(
@@ -460,14 +469,14 @@ namespace {
                                  flags, nCrude, 1, meanCrude,
                                  cliplimit,
                                  weightsAreMultiplicative, andMask, calcErrorFromInputVariance,
-                                 true, doGetWeighted, maskPropagationThresholds);
+                                 true, doGetWeighted, maskPropagationThresholds, goodPixels);
         } else {
             return processPixels<ChkFin, AlwaysF, AlwaysF, AlwaysT,true>(
                                  img, msk, var, weights,
                                  flags, nCrude, 1, meanCrude,
                                  cliplimit,
                                  weightsAreMultiplicative, andMask, calcErrorFromInputVariance,
-                                 doCheckFinite, doGetWeighted, maskPropagationThresholds);
+                                 doCheckFinite, doGetWeighted, maskPropagationThresholds, goodPixels);
         }
     }
 
@@ -512,14 +521,14 @@ namespace {
                                  flags, nCrude, stride,
                                  center, cliplimit,
                                  weightsAreMultiplicative, andMask, calcErrorFromInputVariance,
-                                 true, doGetWeighted, maskPropagationThresholds);
+                                 true, doGetWeighted, maskPropagationThresholds, NULL);
         } else {                            // fast loop ... just the mean & variance
             return processPixels<ChkFin, AlwaysF, AlwaysF, ChkClip, true>(
                                  img, msk, var, weights,
                                  flags, nCrude, stride,
                                  center, cliplimit,
                                  weightsAreMultiplicative, andMask, calcErrorFromInputVariance,
-                                 doCheckFinite, doGetWeighted, maskPropagationThresholds);
+                                 doCheckFinite, doGetWeighted, maskPropagationThresholds, NULL);
         }
     }
 
@@ -653,46 +662,13 @@ namespace {
         }
     }
 
-    /*********************************************************************************************************/
-    /**
-     * A function to copy an image into a vector
-     *
-     * This is used for percentile and iq_range as these must reorder the values.
-     * Because it loops over the pixels, it's been templated over the NaN test to avoid
-     * code repetition of the loops.
-     */
-    template<typename IsFinite, typename ImageT, typename MaskT, typename VarianceT>
-    std::shared_ptr<std::vector<typename ImageT::Pixel> > makeVectorCopy(ImageT const &img,
-                                                                           MaskT const &msk,
-                                                                           VarianceT const &,
-                                                                           int const andMask
-                                                                          )
-    {
-        // Note need to keep track of allPixelOrMask here ... processPixels() does that
-        // and it always gets called
-        std::shared_ptr<std::vector<typename ImageT::Pixel> >
-            imgcp(new std::vector<typename ImageT::Pixel>(0));
-
-        for (int i_y = 0; i_y < img.getHeight(); ++i_y) {
-            typename MaskT::x_iterator mptr = msk.row_begin(i_y);
-            for (typename ImageT::x_iterator ptr = img.row_begin(i_y), end = img.row_end(i_y);
-                 ptr != end; ++ptr) {
-                if (IsFinite()(*ptr) && !(*mptr & andMask)) {
-                    imgcp->push_back(*ptr);
-                }
-                ++mptr;
-            }
-        }
-
-        return imgcp;
-    }
 }
 
 
 
 double afwMath::StatisticsControl::getMaskPropagationThreshold(int bit) const {
     int oldSize = _maskPropagationThresholds.size();
-    if (oldSize < bit) {
+    if (oldSize <= bit) {
         return 1.0;
     }
     return _maskPropagationThresholds[bit];
@@ -750,13 +726,14 @@ afwMath::Statistics::Statistics(
         MaskT const &msk,                       ///< Mask to control which pixels are included
         VarianceT const &var,                   ///< Variances corresponding to values in Image
         int const flags,                        ///< Describe what we want to calculate
-        afwMath::StatisticsControl const& sctrl ///< Control how things are calculated
+        afwMath::StatisticsControl const& sctrl, ///< Control how things are calculated
+        afwMath::StatisticsBuffer *buffer       ///< Working space to reuse for the median and quantiles
                                         ) :
     _flags(flags), _mean(NaN, NaN), _variance(NaN, NaN), _min(NaN), _max(NaN), _sum(NaN),
     _meanclip(NaN, NaN), _varianceclip(NaN, NaN), _median(NaN, NaN), _iqrange(NaN),
     _sctrl(sctrl), _weightsAreMultiplicative(false)
 {
-    doStatistics(img, msk, var, var, _flags, _sctrl);
+    doStatistics(img, msk, var, var, _flags, _sctrl, buffer);
 }
 
 namespace {
@@ -792,7 +769,8 @@ afwMath::Statistics::Statistics(
         VarianceT const &var,                   ///< Variances corresponding to values in Image
         WeightT const &weights,                 ///< Weights to use corresponding to values in Image
         int const flags,                        ///< Describe what we want to calculate
-        afwMath::StatisticsControl const& sctrl ///< Control how things are calculated
+        afwMath::StatisticsControl const& sctrl, ///< Control how things are calculated
+        afwMath::StatisticsBuffer *buffer       ///< Working space to reuse for the median and quantiles
                                         ) :
     _flags(flags), _mean(NaN, NaN), _variance(NaN, NaN), _min(NaN), _max(NaN), _sum(NaN),
     _meanclip(NaN, NaN), _varianceclip(NaN, NaN), _median(NaN, NaN), _iqrange(NaN),
@@ -806,7 +784,7 @@ afwMath::Statistics::Statistics(
 
         _sctrl.setWeighted(true);
     }
-    doStatistics(img, msk, var, weights, _flags, _sctrl);
+    doStatistics(img, msk, var, weights, _flags, _sctrl, buffer);
 }
 
 template<typename ImageT, typename MaskT, typename VarianceT, typename WeightT>
@@ -816,7 +794,8 @@ void afwMath::Statistics::doStatistics(
     VarianceT const &var,          ///< Variances corresponding to values in Image
     WeightT const &weights,        ///< Weights to use corresponding to values in Image
     int const flags,               ///< Describe what we want to calculate
-    afwMath::StatisticsControl const& sctrl ///< Control how things are calculated
+    afwMath::StatisticsControl const& sctrl, ///< Control how things are calculated
+    afwMath::StatisticsBuffer *buffer ///< Working space for the median and quantiles, or NULL
                                )
 {
     _n = img.getWidth()*img.getHeight();
@@ -832,13 +811,24 @@ void afwMath::Statistics::doStatistics(
     // Check that an int's large enough to hold the number of pixels
     assert(img.getWidth()*static_cast<double>(img.getHeight()) < std::numeric_limits<int>::max());
 
+    // the median and quantiles need a copy of the good pixels (which they reorder); it's made while
+    // calculating the standard statistics, in the caller's buffer if provided
+    bool const needValues = (flags & (MEDIAN | IQRANGE | MEANCLIP | STDEVCLIP | VARIANCECLIP));
+    std::vector<double> localValues;
+    std::vector<double> &values = (buffer == NULL) ? localValues : buffer->_values;
+    values.clear();
+    if (needValues) {
+        values.reserve(_n);
+    }
+
     // get the standard statistics
     StandardReturn standard = getStandard(img, msk, var, weights, flags,
                                           _weightsAreMultiplicative,
                                           _sctrl.getAndMask(),
                                           _sctrl.getCalcErrorFromInputVariance(),
                                           _sctrl.getNanSafe(), _sctrl.getWeighted(),
-                                          _sctrl._maskPropagationThresholds);
+                                          _sctrl._maskPropagationThresholds,
+                                          needValues ? &values : NULL);
 
     _n = std::get<0>(standard);
     _sum = std::get<1>(standard);
@@ -851,22 +841,14 @@ void afwMath::Statistics::doStatistics(
     // ==========================================================
     // now only calculate it if it's specifically requested - these all cost more!
 
-    // copy the image for any routines that will use median or quantiles
-    if (flags & (MEDIAN | IQRANGE | MEANCLIP | STDEVCLIP | VARIANCECLIP)) {
-
-        // make a vector copy of the image to get the median and quartiles (will move values)
-        std::shared_ptr<std::vector<typename ImageT::Pixel> > imgcp;
-        if (_sctrl.getNanSafe()) {
-            imgcp = makeVectorCopy<ChkFin>(img, msk, var, _sctrl.getAndMask());
-        } else {
-            imgcp = makeVectorCopy<AlwaysT>(img, msk, var, _sctrl.getAndMask());
-        }
+    // routines that use the median or quantiles work on the copy of the good pixels
+    if (needValues) {
 
         // if we *only* want the median, just use percentile(), otherwise use medianAndQuartiles()
         if ( (flags & (MEDIAN)) && !(flags & (IQRANGE | MEANCLIP | STDEVCLIP | VARIANCECLIP)) ) {
-            _median = Value(percentile(*imgcp, 0.5), NaN);
+            _median = Value(percentile(values, 0.5), NaN);
         } else {
-            MedianQuartileReturn mq = medianAndQuartiles(*imgcp);
+            MedianQuartileReturn mq = medianAndQuartiles(values);
             _median = Value(std::get<0>(mq), NaN);
             _iqrange = std::get<2>(mq) - std::get<1>(mq);
         }
@@ -1067,7 +1049,8 @@ Statistics::Statistics(
     afwImage::Mask<afwImage::MaskPixel> const&,     ///< A mask to control which pixels
     afwImage::Mask<afwImage::MaskPixel> const&,     ///< A variance
     int const flags,                                ///< Describe what we want to calculate
-    StatisticsControl const& sctrl                  ///< Control how things are calculated
+    StatisticsControl const& sctrl,                 ///< Control how things are calculated
+    StatisticsBuffer *                              ///< Unused
                       ) :
     _flags(flags),
     _mean(NaN, NaN), _variance(NaN, NaN), _min(NaN), _max(NaN),
@@ -1131,61 +1114,72 @@ typedef afwImage::VariancePixel VPixel;
     template STAT::Statistics(afwImage::Image<TYPE> const &img,            \
                               afwImage::Mask<afwImage::MaskPixel> const &msk, \
                               afwImage::Image<VPixel> const &var,               \
-                              int const flags, StatisticsControl const& sctrl); \
+                              int const flags, StatisticsControl const& sctrl, \
+                              StatisticsBuffer *buffer); \
     template STAT::Statistics(afwImage::Image<TYPE> const &img,            \
                               afwImage::Mask<afwImage::MaskPixel> const &msk, \
                               afwImage::Image<VPixel> const &var,               \
                               afwImage::Image<VPixel> const &weights,   \
-                              int const flags, StatisticsControl const& sctrl); \
+                              int const flags, StatisticsControl const& sctrl, \
+                              StatisticsBuffer *buffer); \
     template STAT::Statistics(afwImage::Image<TYPE> const &img,            \
                               afwImage::Mask<afwImage::MaskPixel> const &msk, \
                               afwImage::Image<VPixel> const &var,               \
                               afwMath::ImageImposter<VPixel> const &weights,   \
-                              int const flags, StatisticsControl const& sctrl)
+                              int const flags, StatisticsControl const& sctrl, \
+                              StatisticsBuffer *buffer)
 
 #define INSTANTIATE_MASKEDIMAGE_STATISTICS_NO_MASK(TYPE)                       \
     template STAT::Statistics(afwImage::Image<TYPE> const &img,            \
                               afwMath::MaskImposter<afwImage::MaskPixel> const &msk, \
                               afwImage::Image<VPixel> const &var,               \
-                              int const flags, StatisticsControl const& sctrl); \
+                              int const flags, StatisticsControl const& sctrl, \
+                              StatisticsBuffer *buffer); \
     template STAT::Statistics(afwImage::Image<TYPE> const &img,            \
                               afwMath::MaskImposter<afwImage::MaskPixel> const &msk, \
                               afwImage::Image<VPixel> const &var,               \
                               afwImage::Image<VPixel> const &weights,   \
-                              int const flags, StatisticsControl const& sctrl)
+                              int const flags, StatisticsControl const& sctrl, \
+                              StatisticsBuffer *buffer)
 
 #define INSTANTIATE_MASKEDIMAGE_STATISTICS_NO_VAR(TYPE)                       \
     template STAT::Statistics(afwImage::Image<TYPE> const &img,            \
                               afwImage::Mask<afwImage::MaskPixel> const &msk, \
                               afwMath::MaskImposter<VPixel> const &var,          \
-                              int const flags, StatisticsControl const& sctrl); \
+                              int const flags, StatisticsControl const& sctrl, \
+                              StatisticsBuffer *buffer); \
     template STAT::Statistics(afwImage::Image<TYPE> const &img,            \
                               afwImage::Mask<afwImage::MaskPixel> const &msk, \
                               afwMath::MaskImposter<VPixel> const &var,          \
                               afwImage::Image<VPixel> const &weights,   \
-                              int const flags, StatisticsControl const& sctrl); \
+                              int const flags, StatisticsControl const& sctrl, \
+                              StatisticsBuffer *buffer); \
     template STAT::Statistics(afwImage::Image<TYPE> const &img,            \
                               afwImage::Mask<afwImage::MaskPixel> const &msk, \
                               afwMath::MaskImposter<VPixel> const &var,          \
                               afwMath::ImageImposter<VPixel> const &weights,   \
-                              int const flags, StatisticsControl const& sctrl)
+                              int const flags, StatisticsControl const& sctrl, \
+                              StatisticsBuffer *buffer)
 
 #define INSTANTIATE_REGULARIMAGE_STATISTICS(TYPE)                      \
     template STAT::Statistics(afwImage::Image<TYPE> const &img,            \
                               afwMath::MaskImposter<afwImage::MaskPixel> const &msk, \
                               afwMath::MaskImposter<VPixel> const &var, \
-                              int const flags, StatisticsControl const& sctrl)
+                              int const flags, StatisticsControl const& sctrl, \
+                              StatisticsBuffer *buffer)
 
 #define INSTANTIATE_VECTOR_STATISTICS(TYPE)                         \
     template STAT::Statistics(afwMath::ImageImposter<TYPE> const &img,     \
                               afwMath::MaskImposter<afwImage::MaskPixel> const &msk, \
                               afwMath::MaskImposter<VPixel> const &var,      \
-                              int const flags, StatisticsControl const& sctrl); \
+                              int const flags, StatisticsControl const& sctrl, \
+                              StatisticsBuffer *buffer); \
     template STAT::Statistics(afwMath::ImageImposter<TYPE> const &img,     \
                               afwMath::MaskImposter<afwImage::MaskPixel> const &msk, \
                               afwMath::MaskImposter<VPixel> const &var,      \
                               afwMath::ImageImposter<VPixel> const &weights,   \
-                              int const flags, StatisticsControl const& sctrl)
+                              int const flags, StatisticsControl const& sctrl, \
+                              StatisticsBuffer *buffer)
 
 #define INSTANTIATE_IMAGE_STATISTICS(T)            \
     INSTANTIATE_MASKEDIMAGE_STATISTICS(T);         \
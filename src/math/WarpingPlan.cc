@@ -0,0 +1,247 @@
+// -*- LSST-C++ -*-
+/*
+ * LSST Data Management System
+ * Copyright 2016 LSST Corporation.
+ *
+ * This product includes software developed by the
+ * LSST Project (http://www.lsst.org/).
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the LSST License Statement and
+ * the GNU General Public License along with this program.  If not,
+ * see <http://www.lsstcorp.org/LegalNotices/>.
+ */
+
+#include <algorithm>
+#include <memory>
+#include <sstream>
+
+#include "lsst/pex/exceptions.h"
+#include "lsst/afw/image/Wcs.h"
+#include "lsst/afw/math/WarpingPlan.h"
+#include "lsst/afw/math/detail/PositionFunctor.h"
+#include "lsst/afw/table/io/InputArchive.h"
+#include "lsst/afw/table/io/OutputArchive.h"
+#include "lsst/afw/table/io/CatalogVector.h"
+#include "lsst/afw/table/aggregates.h"
+
+namespace lsst { namespace afw { namespace math {
+
+namespace {
+
+// The indices of the nodes along an axis of the given size: -1, step-1, 2*step-1, ..., size-1.
+// These are the edges of the interpolation bands used by warpImage.
+std::vector<int> makeNodes(int size, int interpLength) {
+    int const step = std::max(1, interpLength);
+    std::vector<int> nodes;
+    nodes.reserve(2 + (size - 1)/step);
+    for (int i = -1; i < size - 1; i += step) {
+        nodes.push_back(i);
+    }
+    nodes.push_back(size - 1);
+    return nodes;
+}
+
+// The position of index in nodes, or -1 if it is not a node
+int findNode(std::vector<int> const & nodes, int index, int interpLength) {
+    int const step = std::max(1, interpLength);
+    if (index < -1) {
+        return -1;
+    }
+    std::size_t const n = (index + step)/step;
+    return (n < nodes.size() && nodes[n] == index) ? n : -1;
+}
+
+} // anonymous
+
+WarpingPlan::WarpingPlan(geom::Box2I const & destBBox, int interpLength) :
+    _destBBox(destBBox),
+    _interpLength(interpLength),
+    _colNodes(),
+    _rowNodes(),
+    _srcPos()
+{
+    if (destBBox.isEmpty()) {
+        throw LSST_EXCEPT(pex::exceptions::InvalidParameterError, "destBBox is empty");
+    }
+    if (interpLength < 0) {
+        throw LSST_EXCEPT(pex::exceptions::InvalidParameterError, "interpLength must not be negative");
+    }
+    _colNodes = makeNodes(destBBox.getWidth(), interpLength);
+    _rowNodes = makeNodes(destBBox.getHeight(), interpLength);
+}
+
+WarpingPlan::WarpingPlan(
+    image::Wcs const & destWcs,
+    geom::Box2I const & destBBox,
+    image::Wcs const & srcWcs,
+    int interpLength
+) : WarpingPlan(destBBox, interpLength) {
+    image::XYTransformFromWcsPair xyTransform{destWcs.clone(), srcWcs.clone()};
+    _computeSrcPositions(xyTransform);
+}
+
+WarpingPlan::WarpingPlan(
+    geom::Box2I const & destBBox,
+    geom::XYTransform const & xyTransform,
+    int interpLength
+) : WarpingPlan(destBBox, interpLength) {
+    _computeSrcPositions(xyTransform);
+}
+
+void WarpingPlan::_computeSrcPositions(geom::XYTransform const & xyTransform) {
+    detail::XYTransformPositionFunctor const computeSrcPos{geom::Point2D(_destBBox.getMin()), xyTransform};
+    _srcPos.reserve(_rowNodes.size()*_colNodes.size());
+    for (std::vector<int>::const_iterator row = _rowNodes.begin(); row != _rowNodes.end(); ++row) {
+        for (std::vector<int>::const_iterator col = _colNodes.begin(); col != _colNodes.end(); ++col) {
+            _srcPos.push_back(computeSrcPos(*col, *row));
+        }
+    }
+}
+
+geom::Point2D WarpingPlan::getSrcPosition(int destCol, int destRow) const {
+    int const i = findNode(_colNodes, destCol, _interpLength);
+    int const j = findNode(_rowNodes, destRow, _interpLength);
+    if (i < 0 || j < 0) {
+        std::ostringstream os;
+        os << "(" << destCol << ", " << destRow << ") is not a node of this WarpingPlan";
+        throw LSST_EXCEPT(pex::exceptions::InvalidParameterError, os.str());
+    }
+    return _srcPos[j*_colNodes.size() + i];
+}
+
+// ------------------ persistence ---------------------------------------------------------------------------
+
+namespace {
+
+struct PlanPersistenceHelper {
+    table::Schema schema;
+    table::PointKey<int> bboxMin;
+    table::PointKey<int> bboxMax;
+    table::Key<int> interpLength;
+
+    static PlanPersistenceHelper const & get() {
+        static PlanPersistenceHelper instance;
+        return instance;
+    }
+
+private:
+    PlanPersistenceHelper() :
+        schema(),
+        bboxMin(table::PointKey<int>::addFields(
+            schema, "bbox_min", "lower-left corner of destination bounding box", "pixel")),
+        bboxMax(table::PointKey<int>::addFields(
+            schema, "bbox_max", "upper-right corner of destination bounding box", "pixel")),
+        interpLength(schema.addField<int>("interp_length", "interpolation length", "pixel"))
+    {
+        schema.getCitizen().markPersistent();
+    }
+};
+
+// One record for each row of nodes
+struct GridPersistenceHelper {
+    table::Schema schema;
+    table::Key< table::Array<double> > x;
+    table::Key< table::Array<double> > y;
+
+    explicit GridPersistenceHelper(int nCols) :
+        schema(),
+        x(schema.addField< table::Array<double> >("x", "source x positions of a row of nodes", "pixel",
+                                                  nCols)),
+        y(schema.addField< table::Array<double> >("y", "source y positions of a row of nodes", "pixel",
+                                                  nCols))
+    {}
+
+    explicit GridPersistenceHelper(table::Schema const & s) :
+        schema(s),
+        x(s["x"]),
+        y(s["y"])
+    {}
+};
+
+} // anonymous
+
+class WarpingPlanFactory : public table::io::PersistableFactory {
+public:
+
+    virtual PTR(table::io::Persistable)
+    read(InputArchive const & archive, CatalogVector const & catalogs) const {
+        PlanPersistenceHelper const & keys = PlanPersistenceHelper::get();
+        LSST_ARCHIVE_ASSERT(catalogs.size() == 2u);
+        LSST_ARCHIVE_ASSERT(catalogs.front().size() == 1u);
+        LSST_ARCHIVE_ASSERT(catalogs.front().getSchema() == keys.schema);
+        table::BaseRecord const & record = catalogs.front().front();
+        PTR(WarpingPlan) result(new WarpingPlan(
+            geom::Box2I(record.get(keys.bboxMin), record.get(keys.bboxMax)),
+            record.get(keys.interpLength)));
+        GridPersistenceHelper const gridKeys(catalogs.back().getSchema());
+        LSST_ARCHIVE_ASSERT(catalogs.back().size() == result->_rowNodes.size());
+        LSST_ARCHIVE_ASSERT(gridKeys.x.getSize() == static_cast<int>(result->_colNodes.size()));
+        result->_srcPos.reserve(result->_rowNodes.size()*result->_colNodes.size());
+        for (table::BaseCatalog::const_iterator i = catalogs.back().begin(); i != catalogs.back().end();
+             ++i) {
+            ndarray::Array<double const,1,1> x = i->get(gridKeys.x);
+            ndarray::Array<double const,1,1> y = i->get(gridKeys.y);
+            for (int j = 0; j < gridKeys.x.getSize(); ++j) {
+                result->_srcPos.push_back(geom::Point2D(x[j], y[j]));
+            }
+        }
+        return result;
+    }
+
+    explicit WarpingPlanFactory(std::string const & name) : table::io::PersistableFactory(name) {}
+
+};
+
+namespace {
+
+std::string getWarpingPlanPersistenceName() { return "WarpingPlan"; }
+
+WarpingPlanFactory registration(getWarpingPlanPersistenceName());
+
+} // anonymous
+
+std::string WarpingPlan::getPersistenceName() const {
+    return getWarpingPlanPersistenceName();
+}
+
+std::string WarpingPlan::getPythonModule() const {
+    return "lsst.afw.math";
+}
+
+void WarpingPlan::write(OutputArchiveHandle & handle) const {
+    PlanPersistenceHelper const & keys = PlanPersistenceHelper::get();
+    table::BaseCatalog catalog = handle.makeCatalog(keys.schema);
+    PTR(table::BaseRecord) record = catalog.addNew();
+    record->set(keys.bboxMin, _destBBox.getMin());
+    record->set(keys.bboxMax, _destBBox.getMax());
+    record->set(keys.interpLength, _interpLength);
+    handle.saveCatalog(catalog);
+
+    int const nCols = _colNodes.size();
+    GridPersistenceHelper const gridKeys(nCols);
+    table::BaseCatalog grid = handle.makeCatalog(gridKeys.schema);
+    grid.reserve(_rowNodes.size());
+    for (std::size_t j = 0; j < _rowNodes.size(); ++j) {
+        PTR(table::BaseRecord) row = grid.addNew();
+        ndarray::ArrayRef<double,1,1> x = (*row)[gridKeys.x];
+        ndarray::ArrayRef<double,1,1> y = (*row)[gridKeys.y];
+        for (int i = 0; i < nCols; ++i) {
+            geom::Point2D const & pos = _srcPos[j*nCols + i];
+            x[i] = pos.getX();
+            y[i] = pos.getY();
+        }
+    }
+    handle.saveCatalog(grid);
+}
+
+}}} // namespace lsst::afw::math
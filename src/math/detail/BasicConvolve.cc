@@ -34,7 +34,9 @@
 #include <algorithm>
 #include <cmath>
 #include <cstdint>
+#include <limits>
 #include <sstream>
+#include <type_traits>
 #include <vector>
 
 #include "lsst/pex/exceptions.h"
@@ -128,6 +130,208 @@ include/lsst/afw/image/Pixel.h:212: error: no type named ‘VariancePixelT’ in
         }
         return outPixel;
     }
+
+    /*
+     * The nonzero taps of a kernel vector (optionally squared), as offsets and values
+     */
+    struct KernelTaps {
+        KernelTaps(std::vector<afwMath::Kernel::Pixel> const &kernelVec, bool square) : offsets(), values() {
+            for (std::size_t i = 0; i < kernelVec.size(); ++i) {
+                if (kernelVec[i] != 0) {
+                    offsets.push_back(i);
+                    values.push_back(square ? kernelVec[i]*kernelVec[i] : kernelVec[i]);
+                }
+            }
+        }
+
+        std::vector<int> offsets;
+        std::vector<double> values;
+    };
+
+    /*
+     * One plane of an image convolved with a spatially invariant separable kernel, one input row at a time
+     *
+     * Each input row is convolved with the kernel x vector into a circular buffer of kernel-height rows;
+     * once the buffer is full each new row completes one output row: the dot product of the buffered rows
+     * with the kernel y vector. The buffers are allocated once and reused for every row, and the inner
+     * loops run over contiguous rows so they can be vectorized.
+     *
+     * Zero kernel values are skipped, as in kernelDotProduct, so non-finite pixels propagate the same way.
+     */
+    template <typename OutPixelT, typename InPixelT>
+    class SeparablePlaneConvolver {
+    public:
+        SeparablePlaneConvolver(
+            afwImage::Image<OutPixelT> &outImage,
+            afwImage::Image<InPixelT> const &inImage,
+            afwMath::SeparableKernel const &kernel,
+            KernelTaps const &xTaps,
+            KernelTaps const &yTaps
+        ) :
+            _outArray(outImage.getArray()),
+            _inArray(inImage.getArray()),
+            _xTaps(xTaps),
+            _yTaps(yTaps),
+            _kHeight(kernel.getHeight()),
+            _ctr(kernel.getCtr()),
+            _cnvWidth(inImage.getWidth() + 1 - kernel.getWidth()),
+            _buffer(_kHeight*_cnvWidth),
+            _outRow(_cnvWidth)
+        {}
+
+        /// Convolve input row inY with the x vector; if that completes an output row, set it
+        void processRow(int inY) {
+            double *bufPtr = &_buffer[(inY % _kHeight)*_cnvWidth];
+            std::fill(bufPtr, bufPtr + _cnvWidth, 0.0);
+            InPixelT const *inPtr = _inArray[inY].getData();
+            for (std::size_t t = 0; t < _xTaps.offsets.size(); ++t) {
+                double const value = _xTaps.values[t];
+                InPixelT const *tapPtr = inPtr + _xTaps.offsets[t];
+                for (int x = 0; x < _cnvWidth; ++x) {
+                    bufPtr[x] += tapPtr[x]*value;
+                }
+            }
+
+            int const startY = inY + 1 - _kHeight;  // first input row that contributes to the output row
+            if (startY < 0) {
+                return;
+            }
+            std::fill(_outRow.begin(), _outRow.end(), 0.0);
+            for (std::size_t t = 0; t < _yTaps.offsets.size(); ++t) {
+                double const value = _yTaps.values[t];
+                double const *rowPtr = &_buffer[((startY + _yTaps.offsets[t]) % _kHeight)*_cnvWidth];
+                for (int x = 0; x < _cnvWidth; ++x) {
+                    _outRow[x] += rowPtr[x]*value;
+                }
+            }
+            OutPixelT *outPtr = _outArray[startY + _ctr.getY()].getData() + _ctr.getX();
+            for (int x = 0; x < _cnvWidth; ++x) {
+                outPtr[x] = static_cast<OutPixelT>(_outRow[x]);
+            }
+        }
+
+    private:
+        typename afwImage::Image<OutPixelT>::Array _outArray;
+        typename afwImage::Image<InPixelT>::ConstArray _inArray;
+        KernelTaps const &_xTaps;
+        KernelTaps const &_yTaps;
+        int _kHeight;
+        afwGeom::Point2I _ctr;
+        int _cnvWidth;
+        std::vector<double> _buffer;
+        std::vector<double> _outRow;
+    };
+
+    /*
+     * The mask plane of a MaskedImage convolved with a spatially invariant separable kernel:
+     * the OR over the nonzero taps in x, then in y, using the same scheme as SeparablePlaneConvolver
+     */
+    class SeparableMaskConvolver {
+    public:
+        typedef afwImage::Mask<afwImage::MaskPixel> Mask;
+
+        SeparableMaskConvolver(
+            Mask &outMask,
+            Mask const &inMask,
+            afwMath::SeparableKernel const &kernel,
+            KernelTaps const &xTaps,
+            KernelTaps const &yTaps
+        ) :
+            _outArray(outMask.getArray()),
+            _inArray(inMask.getArray()),
+            _xTaps(xTaps),
+            _yTaps(yTaps),
+            _kHeight(kernel.getHeight()),
+            _ctr(kernel.getCtr()),
+            _cnvWidth(inMask.getWidth() + 1 - kernel.getWidth()),
+            _buffer(_kHeight*_cnvWidth)
+        {}
+
+        void processRow(int inY) {
+            afwImage::MaskPixel *bufPtr = &_buffer[(inY % _kHeight)*_cnvWidth];
+            std::fill(bufPtr, bufPtr + _cnvWidth, 0);
+            afwImage::MaskPixel const *inPtr = _inArray[inY].getData();
+            for (std::size_t t = 0; t < _xTaps.offsets.size(); ++t) {
+                afwImage::MaskPixel const *tapPtr = inPtr + _xTaps.offsets[t];
+                for (int x = 0; x < _cnvWidth; ++x) {
+                    bufPtr[x] |= tapPtr[x];
+                }
+            }
+
+            int const startY = inY + 1 - _kHeight;
+            if (startY < 0) {
+                return;
+            }
+            afwImage::MaskPixel *outPtr = _outArray[startY + _ctr.getY()].getData() + _ctr.getX();
+            std::fill(outPtr, outPtr + _cnvWidth, 0);
+            for (std::size_t t = 0; t < _yTaps.offsets.size(); ++t) {
+                afwImage::MaskPixel const *rowPtr =
+                    &_buffer[((startY + _yTaps.offsets[t]) % _kHeight)*_cnvWidth];
+                for (int x = 0; x < _cnvWidth; ++x) {
+                    outPtr[x] |= rowPtr[x];
+                }
+            }
+        }
+
+    private:
+        Mask::Array _outArray;
+        Mask::ConstArray _inArray;
+        KernelTaps const &_xTaps;
+        KernelTaps const &_yTaps;
+        int _kHeight;
+        afwGeom::Point2I _ctr;
+        int _cnvWidth;
+        std::vector<afwImage::MaskPixel> _buffer;
+    };
+
+    /*
+     * Convolve an Image with a spatially invariant separable kernel using row buffers
+     */
+    template <typename OutPixelT, typename InPixelT>
+    void convolveSeparableRows(
+            afwImage::Image<OutPixelT> &convolvedImage,
+            afwImage::Image<InPixelT> const &inImage,
+            afwMath::SeparableKernel const &kernel,
+            std::vector<afwMath::Kernel::Pixel> const &kernelXVec,
+            std::vector<afwMath::Kernel::Pixel> const &kernelYVec)
+    {
+        KernelTaps const xTaps(kernelXVec, false);
+        KernelTaps const yTaps(kernelYVec, false);
+        SeparablePlaneConvolver<OutPixelT, InPixelT> image(convolvedImage, inImage, kernel, xTaps, yTaps);
+        for (int inY = 0; inY < inImage.getHeight(); ++inY) {
+            image.processRow(inY);
+        }
+    }
+
+    /*
+     * Convolve a MaskedImage with a spatially invariant separable kernel using row buffers,
+     * processing all three planes in a single sweep over the rows
+     *
+     * The variance is convolved with the squares of the kernel vectors.
+     */
+    template <typename OutPixelT, typename InPixelT>
+    void convolveSeparableRows(
+            afwImage::MaskedImage<OutPixelT, afwImage::MaskPixel, afwImage::VariancePixel> &convolvedImage,
+            afwImage::MaskedImage<InPixelT, afwImage::MaskPixel, afwImage::VariancePixel> const &inImage,
+            afwMath::SeparableKernel const &kernel,
+            std::vector<afwMath::Kernel::Pixel> const &kernelXVec,
+            std::vector<afwMath::Kernel::Pixel> const &kernelYVec)
+    {
+        KernelTaps const xTaps(kernelXVec, false);
+        KernelTaps const yTaps(kernelYVec, false);
+        KernelTaps const xTaps2(kernelXVec, true);
+        KernelTaps const yTaps2(kernelYVec, true);
+        SeparablePlaneConvolver<OutPixelT, InPixelT> image(
+            *convolvedImage.getImage(), *inImage.getImage(), kernel, xTaps, yTaps);
+        SeparablePlaneConvolver<afwImage::VariancePixel, afwImage::VariancePixel> variance(
+            *convolvedImage.getVariance(), *inImage.getVariance(), kernel, xTaps2, yTaps2);
+        SeparableMaskConvolver mask(*convolvedImage.getMask(), *inImage.getMask(), kernel, xTaps, yTaps);
+        for (int inY = 0; inY < inImage.getHeight(); ++inY) {
+            image.processRow(inY);
+            variance.processRow(inY);
+            mask.processRow(inY);
+        }
+    }
 }   // anonymous namespace
 
 /**
@@ -179,6 +383,14 @@ void mathDetail::basicConvolve(
             convolutionControl);
         return;
     }
+    int const fftMinKernelSize = convolutionControl.getFftMinKernelSize();
+    if (!kernel.isSpatiallyVarying() && (fftMinKernelSize > 0)
+        && (kernel.getWidth() >= fftMinKernelSize) && (kernel.getHeight() >= fftMinKernelSize)) {
+        LOGL_DEBUG("TRACE2.afw.math.convolve.basicConvolve",
+                   "generic basicConvolve: using FFTs");
+        mathDetail::convolveWithFft(convolvedImage, inImage, kernel, convolutionControl);
+        return;
+    }
     // OK, use general (and slower) form
     if (kernel.isSpatiallyVarying() && (convolutionControl.getMaxInterpolationDistance() > 1)) {
         // use linear interpolation
@@ -258,6 +470,19 @@ void mathDetail::basicConvolve(
             "basicConvolve for LinearCombinationKernel: spatially invariant; using brute force");
         return mathDetail::convolveWithBruteForce(convolvedImage, inImage, kernel,
             convolutionControl.getDoNormalize());
+    }
+
+    // convolving the image with each basis kernel and combining the results may be faster
+    // than computing kernel images; it only applies to floating-point images
+    typedef typename afwImage::GetImage<OutImageT>::type::Pixel OutImagePixel;
+    bool const hasVariance = std::is_same<typename afwImage::detail::image_traits<InImageT>::image_category,
+                                          afwImage::detail::MaskedImage_tag>::value;
+    if (!std::numeric_limits<OutImagePixel>::is_integer
+        && mathDetail::isBasisConvolutionFaster(kernel, inImage.getDimensions(), hasVariance,
+                                                convolutionControl)) {
+        LOGL_DEBUG("TRACE2.afw.math.convolve.basicConvolve",
+            "basicConvolve for LinearCombinationKernel: convolving with basis kernels");
+        return mathDetail::convolveWithBasisKernels(convolvedImage, inImage, kernel, convolutionControl);
     } else {
         // refactor the kernel if this is reasonable and possible;
         // then use the standard algorithm for the spatially varying case
@@ -299,12 +524,8 @@ void mathDetail::basicConvolve(
 {
     typedef typename afwMath::Kernel::Pixel KernelPixel;
     typedef typename std::vector<KernelPixel> KernelVector;
-    typedef KernelVector::const_iterator KernelIterator;
-    typedef typename InImageT::const_x_iterator InXIterator;
     typedef typename InImageT::const_xy_locator InXYLocator;
     typedef typename OutImageT::x_iterator OutXIterator;
-    typedef typename OutImageT::y_iterator OutYIterator;
-    typedef typename OutImageT::SinglePixel OutPixel;
 
     assertDimensionsOK(convolvedImage, inImage, kernel);
 
@@ -337,69 +558,119 @@ void mathDetail::basicConvolve(
                 }
             }
         }
+    } else if (std::numeric_limits<typename afwImage::GetImage<OutImageT>::type::Pixel>::is_integer) {
+        LOGL_DEBUG("TRACE2.afw.math.convolve.basicConvolve",
+            "SeparableKernel basicConvolve: kernel is spatially invariant; integer output");
+        mathDetail::convolveSeparableWithIterators(convolvedImage, inImage, kernel, convolutionControl);
     } else {
-        // kernel is spatially invariant
-        // The basic sequence:
-        // - For each output row:
-        // - Compute x-convolved data: a kernel height's strip of input image convolved with kernel x vector
-        // - Compute one row of output by dotting each column of x-convolved data with the kernel y vector
-        // The x-convolved data is stored in a kernel-height by good-width buffer.
-        // This is circular buffer along y (to avoid shifting pixels before setting each new row);
-        // so for each new row the kernel y vector is rotated to match the order of the x-convolved data.
-
+        // kernel is spatially invariant and the output is floating point:
+        // convolve contiguous rows of each plane through reusable row buffers
         LOGL_DEBUG("TRACE2.afw.math.convolve.basicConvolve",
-            "SeparableKernel basicConvolve: kernel is spatially invariant");
+            "SeparableKernel basicConvolve: kernel is spatially invariant; using row buffers");
 
         kernel.computeVectors(kernelXVec, kernelYVec, convolutionControl.getDoNormalize());
-        KernelIterator const kernelXVecBegin = kernelXVec.begin();
-        KernelIterator const kernelYVecBegin = kernelYVec.begin();
-
-        // buffer for x-convolved data
-        OutImageT buffer(afwGeom::Extent2I(goodBBox.getWidth(), kernel.getHeight()));
-
-        // pre-fill x-convolved data buffer with all but one row of data
-        int yInd = 0; // during initial fill bufY = inImageY
-        int const yPrefillEnd = buffer.getHeight() - 1;
-        for (; yInd < yPrefillEnd; ++yInd) {
-            OutXIterator bufXIter = buffer.x_at(0, yInd);
-            OutXIterator const bufXEnd = buffer.x_at(goodBBox.getWidth(), yInd);
-            InXIterator inXIter = inImage.x_at(0, yInd);
-            for ( ; bufXIter != bufXEnd; ++bufXIter, ++inXIter) {
-                *bufXIter = kernelDotProduct<OutPixel, InXIterator, KernelIterator, KernelPixel>(
-                    inXIter, kernelXVecBegin, kernel.getWidth());
-            }
-        }
+        convolveSeparableRows(convolvedImage, inImage, kernel, kernelXVec, kernelYVec);
+    }
+}
 
-        // compute output pixels using the sequence described above
-        int inY = yPrefillEnd;
-        int bufY = yPrefillEnd;
-        int cnvY = goodBBox.getMinY();
-        while (true) {
-            // fill next buffer row and compute output row
-            InXIterator inXIter = inImage.x_at(0, inY);
-            OutXIterator bufXIter = buffer.x_at(0, bufY);
-            OutXIterator cnvXIter = convolvedImage.x_at(goodBBox.getMinX(), cnvY);
-            for (int bufX = 0; bufX < goodBBox.getWidth(); ++bufX, ++cnvXIter, ++bufXIter, ++inXIter) {
-                // note: bufXIter points to the row of the buffer that is being updated,
-                // whereas bufYIter points to row 0 of the buffer
-                *bufXIter = kernelDotProduct<OutPixel, InXIterator, KernelIterator, KernelPixel>(
-                    inXIter, kernelXVecBegin, kernel.getWidth());
-
-                OutYIterator bufYIter = buffer.y_at(bufX, 0);
-                *cnvXIter = kernelDotProduct<OutPixel, OutYIterator, KernelIterator, KernelPixel>(
-                    bufYIter, kernelYVecBegin, kernel.getHeight());
-            }
+/**
+ * @brief Convolve an Image or MaskedImage with a spatially invariant separable kernel
+ * using pixel iterators and a circular buffer of x-convolved rows
+ *
+ * This is the general implementation used by basicConvolve for integer output pixels;
+ * floating point outputs use faster contiguous row buffers.
+ *
+ * @warning Low-level convolution function that does not set edge pixels.
+ *
+ * @throw lsst::pex::exceptions::InvalidParameterError if convolvedImage dimensions != inImage dimensions
+ * @throw lsst::pex::exceptions::InvalidParameterError if inImage smaller than kernel in width or height
+ * @throw lsst::pex::exceptions::InvalidParameterError if the kernel is spatially varying
+ *
+ * @ingroup afw
+ */
+template <typename OutImageT, typename InImageT>
+void mathDetail::convolveSeparableWithIterators(
+        OutImageT& convolvedImage,      ///< convolved %image
+        InImageT const& inImage,        ///< %image to convolve
+        afwMath::SeparableKernel const &kernel, ///< convolution kernel
+        afwMath::ConvolutionControl const & convolutionControl) ///< convolution control parameters
+{
+    typedef typename afwMath::Kernel::Pixel KernelPixel;
+    typedef typename std::vector<KernelPixel> KernelVector;
+    typedef KernelVector::const_iterator KernelIterator;
+    typedef typename InImageT::const_x_iterator InXIterator;
+    typedef typename OutImageT::x_iterator OutXIterator;
+    typedef typename OutImageT::y_iterator OutYIterator;
+    typedef typename OutImageT::SinglePixel OutPixel;
 
-            // test for done now, instead of the start of the loop,
-            // to avoid an unnecessary extra rotation of the kernel Y vector
-            if (cnvY >= goodBBox.getMaxY()) break;
+    assertDimensionsOK(convolvedImage, inImage, kernel);
+    if (kernel.isSpatiallyVarying()) {
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError, "kernel must be spatially invariant");
+    }
 
-            // update y indices, including bufY, and rotate the kernel y vector to match
-            ++inY;
-            bufY = (bufY + 1) % kernel.getHeight();
-            ++cnvY;
-            std::rotate(kernelYVec.begin(), kernelYVec.end()-1, kernelYVec.end());
+    afwGeom::Box2I const fullBBox = inImage.getBBox(image::LOCAL);
+    afwGeom::Box2I const goodBBox = kernel.shrinkBBox(fullBBox);
+
+    KernelVector kernelXVec(kernel.getWidth());
+    KernelVector kernelYVec(kernel.getHeight());
+
+    // The basic sequence:
+    // - For each output row:
+    // - Compute x-convolved data: a kernel height's strip of input image convolved with kernel x vector
+    // - Compute one row of output by dotting each column of x-convolved data with the kernel y vector
+    // The x-convolved data is stored in a kernel-height by good-width buffer.
+    // This is circular buffer along y (to avoid shifting pixels before setting each new row);
+    // so for each new row the kernel y vector is rotated to match the order of the x-convolved data.
+
+    kernel.computeVectors(kernelXVec, kernelYVec, convolutionControl.getDoNormalize());
+    KernelIterator const kernelXVecBegin = kernelXVec.begin();
+    KernelIterator const kernelYVecBegin = kernelYVec.begin();
+
+    // buffer for x-convolved data
+    OutImageT buffer(afwGeom::Extent2I(goodBBox.getWidth(), kernel.getHeight()));
+
+    // pre-fill x-convolved data buffer with all but one row of data
+    int yInd = 0; // during initial fill bufY = inImageY
+    int const yPrefillEnd = buffer.getHeight() - 1;
+    for (; yInd < yPrefillEnd; ++yInd) {
+        OutXIterator bufXIter = buffer.x_at(0, yInd);
+        OutXIterator const bufXEnd = buffer.x_at(goodBBox.getWidth(), yInd);
+        InXIterator inXIter = inImage.x_at(0, yInd);
+        for ( ; bufXIter != bufXEnd; ++bufXIter, ++inXIter) {
+            *bufXIter = kernelDotProduct<OutPixel, InXIterator, KernelIterator, KernelPixel>(
+                inXIter, kernelXVecBegin, kernel.getWidth());
+        }
+    }
+
+    // compute output pixels using the sequence described above
+    int inY = yPrefillEnd;
+    int bufY = yPrefillEnd;
+    int cnvY = goodBBox.getMinY();
+    while (true) {
+        // fill next buffer row and compute output row
+        InXIterator inXIter = inImage.x_at(0, inY);
+        OutXIterator bufXIter = buffer.x_at(0, bufY);
+        OutXIterator cnvXIter = convolvedImage.x_at(goodBBox.getMinX(), cnvY);
+        for (int bufX = 0; bufX < goodBBox.getWidth(); ++bufX, ++cnvXIter, ++bufXIter, ++inXIter) {
+            // note: bufXIter points to the row of the buffer that is being updated,
+            // whereas bufYIter points to row 0 of the buffer
+            *bufXIter = kernelDotProduct<OutPixel, InXIterator, KernelIterator, KernelPixel>(
+                inXIter, kernelXVecBegin, kernel.getWidth());
+
+            OutYIterator bufYIter = buffer.y_at(bufX, 0);
+            *cnvXIter = kernelDotProduct<OutPixel, OutYIterator, KernelIterator, KernelPixel>(
+                bufYIter, kernelYVecBegin, kernel.getHeight());
         }
+
+        // test for done now, instead of the start of the loop,
+        // to avoid an unnecessary extra rotation of the kernel Y vector
+        if (cnvY >= goodBBox.getMaxY()) break;
+
+        // update y indices, including bufY, and rotate the kernel y vector to match
+        ++inY;
+        bufY = (bufY + 1) % kernel.getHeight();
+        ++cnvY;
+        std::rotate(kernelYVec.begin(), kernelYVec.end()-1, kernelYVec.end());
     }
 }
 
@@ -526,6 +797,9 @@ void mathDetail::convolveWithBruteForce(
     template void mathDetail::basicConvolve( \
         IMGMACRO(OUTPIXTYPE)&, IMGMACRO(INPIXTYPE) const&, afwMath::SeparableKernel const&, \
             afwMath::ConvolutionControl const&); NL \
+    template void mathDetail::convolveSeparableWithIterators( \
+        IMGMACRO(OUTPIXTYPE)&, IMGMACRO(INPIXTYPE) const&, afwMath::SeparableKernel const&, \
+            afwMath::ConvolutionControl const&); NL \
     template void mathDetail::convolveWithBruteForce( \
         IMGMACRO(OUTPIXTYPE)&, IMGMACRO(INPIXTYPE) const&, afwMath::Kernel const&, \
             afwMath::ConvolutionControl const&);
@@ -0,0 +1,468 @@
+// -*- LSST-C++ -*-
+
+/*
+ * LSST Data Management System
+ * Copyright 2016 LSST Corporation.
+ *
+ * This product includes software developed by the
+ * LSST Project (http://www.lsst.org/).
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the LSST License Statement and
+ * the GNU General Public License along with this program.  If not,
+ * see <http://www.lsstcorp.org/LegalNotices/>.
+ */
+
+/**
+ * @file
+ *
+ * @brief Definition of convolveWithBasisKernels and isBasisConvolutionFaster declared in detail/Convolve.h
+ *
+ * @ingroup afw
+ */
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <limits>
+#include <memory>
+#include <sstream>
+#include <vector>
+
+#include "lsst/pex/exceptions.h"
+#include "lsst/log/Log.h"
+#include "lsst/afw/image/MaskedImage.h"
+#include "lsst/afw/math/ConvolveImage.h"
+#include "lsst/afw/math/Kernel.h"
+#include "lsst/afw/geom.h"
+#include "lsst/afw/math/detail/Convolve.h"
+
+namespace pexExcept = lsst::pex::exceptions;
+namespace afwGeom = lsst::afw::geom;
+namespace afwImage = lsst::afw::image;
+namespace afwMath = lsst::afw::math;
+namespace mathDetail = lsst::afw::math::detail;
+
+namespace {
+
+    typedef afwImage::Image<afwMath::Kernel::Pixel> KernelImage;
+    typedef afwImage::Image<double> DoubleImage;
+
+    /*
+     * One term of a convolution with a LinearCombinationKernel written as a sum of convolutions
+     * with spatially invariant kernels:
+     * factor * c_i(x, y) [* c_j(x, y)] * (plane convolved with kernel)
+     * where c_i is the spatial function of basis kernel i.
+     */
+    struct BasisTerm {
+        BasisTerm(PTR(afwMath::Kernel) kernelPtr_, int i_, int j_, double factor_) :
+            kernelPtr(kernelPtr_), i(i_), j(j_), factor(factor_) {}
+
+        PTR(afwMath::Kernel) kernelPtr;
+        int i;
+        int j;          ///< index of second coefficient, or -1 if there is only one
+        double factor;
+    };
+
+    /*
+     * Return a fixed kernel with the given image and center
+     */
+    PTR(afwMath::Kernel) makeFixedKernel(KernelImage const &image, afwGeom::Point2I const &ctr) {
+        PTR(afwMath::Kernel) kernelPtr = std::make_shared<afwMath::FixedKernel>(image);
+        kernelPtr->setCtr(ctr);
+        return kernelPtr;
+    }
+
+    /*
+     * Return the terms for the image plane: each basis kernel (centered like the linear combination)
+     */
+    std::vector<BasisTerm> makeImageTerms(afwMath::LinearCombinationKernel const &kernel) {
+        afwMath::KernelList const &basisList = kernel.getKernelList();
+        std::vector<BasisTerm> terms;
+        for (std::size_t i = 0; i < basisList.size(); ++i) {
+            PTR(afwMath::Kernel) basisPtr;
+            if (basisList[i]->getCtr() == kernel.getCtr()) {
+                basisPtr = basisList[i]->clone();
+            } else {
+                KernelImage basisImage(kernel.getDimensions());
+                basisList[i]->computeImage(basisImage, false);
+                basisPtr = makeFixedKernel(basisImage, kernel.getCtr());
+            }
+            terms.push_back(BasisTerm(basisPtr, i, -1, 1.0));
+        }
+        return terms;
+    }
+
+    /*
+     * Return the terms for the variance plane, which is convolved with the square of the kernel:
+     * c_i^2 B_i^2 and 2 c_i c_j B_i B_j for i < j, omitting products that are zero
+     */
+    std::vector<BasisTerm> makeVarianceTerms(afwMath::LinearCombinationKernel const &kernel) {
+        afwMath::KernelList const &basisList = kernel.getKernelList();
+        std::vector<PTR(KernelImage)> basisImages;
+        for (std::size_t i = 0; i < basisList.size(); ++i) {
+            basisImages.push_back(std::make_shared<KernelImage>(kernel.getDimensions()));
+            basisList[i]->computeImage(*basisImages.back(), false);
+        }
+
+        std::vector<BasisTerm> terms;
+        KernelImage product(kernel.getDimensions());
+        for (std::size_t i = 0; i < basisList.size(); ++i) {
+            std::size_t j = i;
+            if (IS_INSTANCE(*basisList[i], afwMath::DeltaFunctionKernel)
+                && basisList[i]->getCtr() == kernel.getCtr()) {
+                // the square of a delta function is itself; its cross terms are computed below
+                terms.push_back(BasisTerm(basisList[i]->clone(), i, i, 1.0));
+                ++j;
+            }
+            for (; j < basisList.size(); ++j) {
+                bool isZero = true;
+                for (int y = 0; y < product.getHeight(); ++y) {
+                    KernelImage::x_iterator prodIter = product.row_begin(y);
+                    KernelImage::const_x_iterator iIter = basisImages[i]->row_begin(y);
+                    KernelImage::const_x_iterator jIter = basisImages[j]->row_begin(y);
+                    for (int x = 0; x < product.getWidth(); ++x, ++prodIter, ++iIter, ++jIter) {
+                        *prodIter = (*iIter)*(*jIter);
+                        isZero = isZero && (*prodIter == 0);
+                    }
+                }
+                if (!isZero) {
+                    terms.push_back(BasisTerm(makeFixedKernel(product, kernel.getCtr()), i, j,
+                                              (i == j) ? 1.0 : 2.0));
+                }
+            }
+        }
+        return terms;
+    }
+
+    /*
+     * Return an image that is 1 wherever any basis kernel is nonzero, and 0 elsewhere
+     */
+    KernelImage makeSupportImage(afwMath::LinearCombinationKernel const &kernel) {
+        afwMath::KernelList const &basisList = kernel.getKernelList();
+        KernelImage support(kernel.getDimensions());
+        support = 0.0;
+        KernelImage basisImage(kernel.getDimensions());
+        for (afwMath::KernelList::const_iterator basis = basisList.begin(); basis != basisList.end();
+             ++basis) {
+            (*basis)->computeImage(basisImage, false);
+            for (int y = 0; y < support.getHeight(); ++y) {
+                KernelImage::x_iterator supportIter = support.row_begin(y);
+                KernelImage::const_x_iterator basisIter = basisImage.row_begin(y);
+                for (int x = 0; x < support.getWidth(); ++x, ++supportIter, ++basisIter) {
+                    if (*basisIter != 0) {
+                        *supportIter = 1.0;
+                    }
+                }
+            }
+        }
+        return support;
+    }
+
+    /*
+     * Approximate cost (in multiply-adds per output pixel) of convolving one plane with a spatially
+     * invariant kernel using basicConvolve
+     */
+    double estimateConvolutionCost(
+            afwMath::Kernel const &kernel,
+            afwGeom::Extent2I const &imageDimensions,
+            afwMath::ConvolutionControl const &convolutionControl)
+    {
+        int const kWidth = kernel.getWidth();
+        int const kHeight = kernel.getHeight();
+        if (IS_INSTANCE(kernel, afwMath::DeltaFunctionKernel)) {
+            return 1.0;
+        } else if (IS_INSTANCE(kernel, afwMath::SeparableKernel)) {
+            return kWidth + kHeight;
+        }
+        int const fftMinKernelSize = convolutionControl.getFftMinKernelSize();
+        if ((fftMinKernelSize > 0) && (kWidth >= fftMinKernelSize) && (kHeight >= fftMinKernelSize)) {
+            // forward and inverse transforms of overlapping tiles (see convolveWithFft)
+            double const tileWidth = std::min(imageDimensions.getX(), std::max(4*kWidth, 256));
+            double const tileHeight = std::min(imageDimensions.getY(), std::max(4*kHeight, 256));
+            double const overlap =
+                (tileWidth*tileHeight)/((tileWidth + 1 - kWidth)*(tileHeight + 1 - kHeight));
+            return 5.0*overlap*std::log2(tileWidth*tileHeight);
+        }
+        return static_cast<double>(kWidth)*kHeight;
+    }
+
+    /*
+     * Set sum (over the good region) to the sum of the terms applied to a plane
+     */
+    template <typename InPixelT>
+    void sumTerms(
+            DoubleImage &sum,
+            afwImage::Image<InPixelT> const &inPlane,
+            std::vector<BasisTerm> const &terms,
+            afwMath::LinearCombinationKernel const &kernel,
+            afwMath::ConvolutionControl const &basisControl)
+    {
+        afwGeom::Box2I const goodBBox = kernel.shrinkBBox(inPlane.getBBox(afwImage::LOCAL));
+        std::vector<afwMath::Kernel::SpatialFunctionPtr> const functions = kernel.getSpatialFunctionList();
+        DoubleImage convolved(inPlane.getDimensions());
+        sum = 0.0;
+        for (std::vector<BasisTerm>::const_iterator term = terms.begin(); term != terms.end(); ++term) {
+            mathDetail::basicConvolve(convolved, inPlane, *term->kernelPtr, basisControl);
+            for (int y = goodBBox.getMinY(); y <= goodBBox.getMaxY(); ++y) {
+                double const rowPos = inPlane.indexToPosition(y, afwImage::Y);
+                DoubleImage::x_iterator sumIter = sum.x_at(goodBBox.getMinX(), y);
+                DoubleImage::const_x_iterator cnvIter = convolved.x_at(goodBBox.getMinX(), y);
+                for (int x = goodBBox.getMinX(); x <= goodBBox.getMaxX(); ++x, ++sumIter, ++cnvIter) {
+                    double const colPos = inPlane.indexToPosition(x, afwImage::X);
+                    double coeff = term->factor*(*functions[term->i])(colPos, rowPos);
+                    if (term->j >= 0) {
+                        coeff *= (*functions[term->j])(colPos, rowPos);
+                    }
+                    // skip zero coefficients so that non-finite pixels in an unused term do not propagate
+                    if (coeff != 0) {
+                        *sumIter += coeff*(*cnvIter);
+                    }
+                }
+            }
+        }
+    }
+
+    /*
+     * Set the good region of a plane of the convolved image to sum/kernelSum^power
+     * (or just sum if kernelSumPtr is null)
+     */
+    template <typename OutPixelT>
+    void setPlane(
+            afwImage::Image<OutPixelT> &outPlane,
+            DoubleImage const &sum,
+            DoubleImage const *kernelSumPtr,
+            int power,
+            afwGeom::Box2I const &goodBBox)
+    {
+        for (int y = goodBBox.getMinY(); y <= goodBBox.getMaxY(); ++y) {
+            typename afwImage::Image<OutPixelT>::x_iterator outIter = outPlane.x_at(goodBBox.getMinX(), y);
+            DoubleImage::const_x_iterator sumIter = sum.x_at(goodBBox.getMinX(), y);
+            for (int x = goodBBox.getMinX(); x <= goodBBox.getMaxX(); ++x, ++outIter, ++sumIter) {
+                double value = *sumIter;
+                if (kernelSumPtr) {
+                    double const kernelSum = kernelSumPtr->get0(x, y);
+                    value /= (power == 1) ? kernelSum : kernelSum*kernelSum;
+                }
+                *outIter = static_cast<OutPixelT>(value);
+            }
+        }
+    }
+
+    template <typename OutImageT, typename InImageT>
+    void convolvePlanes(
+            OutImageT &convolvedImage,
+            InImageT const &inImage,
+            afwMath::LinearCombinationKernel const &kernel,
+            DoubleImage const *kernelSumPtr,
+            afwMath::ConvolutionControl const &basisControl,
+            afwImage::detail::Image_tag)
+    {
+        afwGeom::Box2I const goodBBox = kernel.shrinkBBox(inImage.getBBox(afwImage::LOCAL));
+        DoubleImage sum(inImage.getDimensions());
+        sumTerms(sum, inImage, makeImageTerms(kernel), kernel, basisControl);
+        setPlane(convolvedImage, sum, kernelSumPtr, 1, goodBBox);
+    }
+
+    template <typename OutImageT, typename InImageT>
+    void convolvePlanes(
+            OutImageT &convolvedImage,
+            InImageT const &inImage,
+            afwMath::LinearCombinationKernel const &kernel,
+            DoubleImage const *kernelSumPtr,
+            afwMath::ConvolutionControl const &basisControl,
+            afwImage::detail::MaskedImage_tag)
+    {
+        afwGeom::Box2I const goodBBox = kernel.shrinkBBox(inImage.getBBox(afwImage::LOCAL));
+        DoubleImage sum(inImage.getDimensions());
+        sumTerms(sum, *inImage.getImage(), makeImageTerms(kernel), kernel, basisControl);
+        setPlane(*convolvedImage.getImage(), sum, kernelSumPtr, 1, goodBBox);
+        sumTerms(sum, *inImage.getVariance(), makeVarianceTerms(kernel), kernel, basisControl);
+        setPlane(*convolvedImage.getVariance(), sum, kernelSumPtr, 2, goodBBox);
+        mathDetail::convolveMask(*convolvedImage.getMask(), *inImage.getMask(), makeSupportImage(kernel),
+                                 kernel.getCtr());
+    }
+}   // anonymous namespace
+
+/**
+ * @brief Is convolveWithBasisKernels expected to be faster than convolving with kernel images?
+ *
+ * Compares rough estimates of the cost per output pixel of convolving with each basis kernel
+ * (and, for the variance, each nonzero product of two basis kernels) and combining the results,
+ * against that of convolveWithInterpolation (or convolveWithBruteForce if
+ * convolutionControl.getMaxInterpolationDistance() <= 1). The basis convolution wins for a few basis kernels
+ * that are cheap to convolve with: delta function kernels, separable kernels and kernels large enough
+ * to be convolved using FFTs.
+ *
+ * @return false if the kernel is not spatially varying
+ *
+ * @ingroup afw
+ */
+bool mathDetail::isBasisConvolutionFaster(
+        afwMath::LinearCombinationKernel const& kernel, ///< convolution kernel
+        afwGeom::Extent2I const& imageDimensions,       ///< dimensions of image to convolve
+        bool hasVariance,   ///< is there a variance plane (i.e. is the image a MaskedImage)?
+        afwMath::ConvolutionControl const& convolutionControl)  ///< convolution control parameters
+{
+    if (!kernel.isSpatiallyVarying()) {
+        return false;
+    }
+    int const nPlanes = hasVariance ? 2 : 1;
+    double const nBasisKernels = kernel.getNBasisKernels();
+    double const kernelArea = static_cast<double>(kernel.getWidth())*kernel.getHeight();
+    int const maxInterpDist = convolutionControl.getMaxInterpolationDistance();
+    double kernelImageCost;
+    if (maxInterpDist > 1) {
+        // apply the kernel image to each plane, update it by interpolation,
+        // and compute it at the corners of each region
+        kernelImageCost = kernelArea*(nPlanes + 1)
+            + nBasisKernels*kernelArea/(static_cast<double>(maxInterpDist)*maxInterpDist);
+    } else {
+        kernelImageCost = kernelArea*(nPlanes + nBasisKernels);
+    }
+
+    std::vector<BasisTerm> terms = makeImageTerms(kernel);
+    if (hasVariance) {
+        std::vector<BasisTerm> const varianceTerms = makeVarianceTerms(kernel);
+        terms.insert(terms.end(), varianceTerms.begin(), varianceTerms.end());
+    }
+    double basisCost = 0;
+    for (std::vector<BasisTerm>::const_iterator term = terms.begin(); term != terms.end(); ++term) {
+        // the convolution, plus evaluating the coefficient and accumulating the result
+        basisCost += estimateConvolutionCost(*term->kernelPtr, imageDimensions, convolutionControl)
+            + kernel.getNSpatialParameters() + 1;
+    }
+    LOGL_DEBUG("TRACE4.afw.math.convolve.isBasisConvolutionFaster",
+        "isBasisConvolutionFaster: basis cost=%g; kernel image cost=%g", basisCost, kernelImageCost);
+    return basisCost < kernelImageCost;
+}
+
+/**
+ * @brief Convolve an Image or MaskedImage with a spatially varying LinearCombinationKernel by convolving
+ * with each basis kernel and combining the results using the spatial functions.
+ *
+ * The result is the exact convolution (as computed by convolveWithBruteForce) to roundoff:
+ * - The variance plane is convolved with the square of the kernel, which is the sum of
+ *   c_i c_j B_i B_j over all pairs of basis kernels B_i, B_j with spatial functions c_i, c_j
+ * - The mask plane is the OR of the input mask over all pixels where any basis kernel is nonzero
+ *   (this differs from convolveWithBruteForce only where the basis kernels exactly cancel)
+ *
+ * Memory use is a few double-precision images the size of inImage.
+ * Images with integer pixels are convolved by convolveWithBruteForce,
+ * as are spatially invariant kernels.
+ *
+ * @warning Low-level convolution function that does not set edge pixels.
+ *
+ * convolvedImage must be the same size as inImage.
+ * convolvedImage has a border in which the output pixels are not set. This border has size:
+ * - kernel.getCtrX() along the left edge
+ * - kernel.getCtrY() along the bottom edge
+ * - kernel.getWidth()  - 1 - kernel.getCtrX() along the right edge
+ * - kernel.getHeight() - 1 - kernel.getCtrY() along the top edge
+ *
+ * @throw lsst::pex::exceptions::InvalidParameterError if convolvedImage dimensions != inImage dimensions
+ * @throw lsst::pex::exceptions::InvalidParameterError if inImage smaller than kernel in width or height
+ * @throw lsst::pex::exceptions::OverflowError if doNormalize is true and the kernel sum is 0 at some pixel
+ *
+ * @ingroup afw
+ */
+template <typename OutImageT, typename InImageT>
+void mathDetail::convolveWithBasisKernels(
+        OutImageT &convolvedImage,      ///< convolved %image
+        InImageT const& inImage,        ///< %image to convolve
+        afwMath::LinearCombinationKernel const& kernel, ///< convolution kernel
+        afwMath::ConvolutionControl const& convolutionControl)  ///< convolution control parameters
+{
+    typedef typename afwImage::GetImage<OutImageT>::type::Pixel OutImagePixel;
+
+    if (!kernel.isSpatiallyVarying() || std::numeric_limits<OutImagePixel>::is_integer) {
+        LOGL_DEBUG("TRACE4.afw.math.convolve.convolveWithBasisKernels",
+            "convolveWithBasisKernels: spatially invariant kernel or integer pixels; using brute force");
+        mathDetail::convolveWithBruteForce(convolvedImage, inImage, kernel, convolutionControl);
+        return;
+    }
+    if (convolvedImage.getDimensions() != inImage.getDimensions()) {
+        std::ostringstream os;
+        os << "convolvedImage dimensions = ( "
+        << convolvedImage.getWidth() << ", " << convolvedImage.getHeight()
+        << ") != (" << inImage.getWidth() << ", " << inImage.getHeight() << ") = inImage dimensions";
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError, os.str());
+    }
+    if (inImage.getWidth() < kernel.getWidth() || inImage.getHeight() < kernel.getHeight()) {
+        std::ostringstream os;
+        os << "inImage dimensions = ( "
+        << inImage.getWidth() << ", " << inImage.getHeight()
+        << ") smaller than (" << kernel.getWidth() << ", " << kernel.getHeight()
+        << ") = kernel dimensions in width and/or height";
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError, os.str());
+    }
+
+    LOGL_DEBUG("TRACE4.afw.math.convolve.convolveWithBasisKernels",
+        "convolveWithBasisKernels: %d basis kernels", kernel.getNBasisKernels());
+
+    afwGeom::Box2I const goodBBox = kernel.shrinkBBox(inImage.getBBox(afwImage::LOCAL));
+
+    // the sum of the kernel at each good pixel, if normalizing
+    std::shared_ptr<DoubleImage> kernelSumPtr;
+    if (convolutionControl.getDoNormalize()) {
+        kernelSumPtr = std::make_shared<DoubleImage>(inImage.getDimensions());
+        std::vector<afwMath::Kernel::SpatialFunctionPtr> const functions = kernel.getSpatialFunctionList();
+        std::vector<double> const basisSums = kernel.getKernelSumList();
+        for (int y = goodBBox.getMinY(); y <= goodBBox.getMaxY(); ++y) {
+            double const rowPos = inImage.indexToPosition(y, afwImage::Y);
+            DoubleImage::x_iterator sumIter = kernelSumPtr->x_at(goodBBox.getMinX(), y);
+            for (int x = goodBBox.getMinX(); x <= goodBBox.getMaxX(); ++x, ++sumIter) {
+                double const colPos = inImage.indexToPosition(x, afwImage::X);
+                double kernelSum = 0;
+                for (std::size_t i = 0; i < functions.size(); ++i) {
+                    kernelSum += (*functions[i])(colPos, rowPos)*basisSums[i];
+                }
+                if (kernelSum == 0) {
+                    throw LSST_EXCEPT(pexExcept::OverflowError, "Cannot normalize; kernel sum is 0");
+                }
+                *sumIter = kernelSum;
+            }
+        }
+    }
+
+    afwMath::ConvolutionControl basisControl(convolutionControl);
+    basisControl.setDoNormalize(false);
+    convolvePlanes(convolvedImage, inImage, kernel, kernelSumPtr.get(), basisControl,
+                   typename afwImage::detail::image_traits<OutImageT>::image_category());
+}
+
+/*
+ * Explicit instantiation
+ */
+/// \cond
+#define IMAGE(PIXTYPE) afwImage::Image<PIXTYPE>
+#define MASKEDIMAGE(PIXTYPE) afwImage::MaskedImage<PIXTYPE, afwImage::MaskPixel, afwImage::VariancePixel>
+#define NL /* */
+// Instantiate Image or MaskedImage versions
+#define INSTANTIATE_IM_OR_MI(IMGMACRO, OUTPIXTYPE, INPIXTYPE) \
+    template void mathDetail::convolveWithBasisKernels( \
+        IMGMACRO(OUTPIXTYPE)&, IMGMACRO(INPIXTYPE) const&, afwMath::LinearCombinationKernel const&, \
+            afwMath::ConvolutionControl const&); NL
+// Instantiate both Image and MaskedImage versions
+#define INSTANTIATE(OUTPIXTYPE, INPIXTYPE) \
+    INSTANTIATE_IM_OR_MI(IMAGE,       OUTPIXTYPE, INPIXTYPE) \
+    INSTANTIATE_IM_OR_MI(MASKEDIMAGE, OUTPIXTYPE, INPIXTYPE)
+
+INSTANTIATE(double, double)
+INSTANTIATE(double, float)
+INSTANTIATE(double, int)
+INSTANTIATE(double, std::uint16_t)
+INSTANTIATE(float, float)
+INSTANTIATE(float, int)
+INSTANTIATE(float, std::uint16_t)
+INSTANTIATE(int, int)
+INSTANTIATE(std::uint16_t, std::uint16_t)
+/// \endcond
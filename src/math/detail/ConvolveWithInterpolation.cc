@@ -34,6 +34,7 @@
 #include <algorithm>
 #include <cmath>
 #include <cstdint>
+#include <memory>
 #include <sstream>
 #include <vector>
 #include <iostream>
@@ -44,6 +45,7 @@
 #include "lsst/afw/math/Kernel.h"
 #include "lsst/afw/geom.h"
 #include "lsst/afw/math/detail/Convolve.h"
+#include "lsst/afw/math/detail/Parallel.h"
 
 namespace pexExcept = lsst::pex::exceptions;
 namespace afwGeom = lsst::afw::geom;
@@ -51,6 +53,56 @@ namespace afwImage = lsst::afw::image;
 namespace afwMath = lsst::afw::math;
 namespace mathDetail = lsst::afw::math::detail;
 
+namespace {
+
+    /*
+     * Convolve one band of rows of subregions; called by parallelForBands
+     *
+     * Each band has its own KernelImagesForRegion (with its own copy of the kernel, which holds state),
+     * row of subregions (whose first row has already been computed) and working images.
+     */
+    template <typename OutImageT, typename InImageT>
+    class ConvolveRegionRows {
+    public:
+        ConvolveRegionRows(
+            OutImageT &outImage,
+            InImageT const &inImage,
+            std::vector<PTR(mathDetail::KernelImagesForRegion)> const &bandRegions,
+            std::vector<PTR(mathDetail::RowOfKernelImagesForRegion)> const &regionRows,
+            std::vector<PTR(mathDetail::ConvolveWithInterpolationWorkingImages)> const &workingImages
+        ) :
+            _outImage(outImage),
+            _inImage(inImage),
+            _bandRegions(bandRegions),
+            _regionRows(regionRows),
+            _workingImages(workingImages)
+        {}
+
+        void operator()(int i, int yIndBegin, int yIndEnd) const {
+            mathDetail::RowOfKernelImagesForRegion &regionRow = *_regionRows[i];
+            for (int yInd = yIndBegin; ; ) {
+                for (mathDetail::RowOfKernelImagesForRegion::ConstIterator rgnIter = regionRow.begin(),
+                    rgnEnd = regionRow.end(); rgnIter != rgnEnd; ++rgnIter) {
+                    mathDetail::convolveRegionWithInterpolation(_outImage, _inImage, **rgnIter,
+                                                                *_workingImages[i]);
+                }
+                if (++yInd >= yIndEnd) {
+                    break;
+                }
+                _bandRegions[i]->computeNextRow(regionRow);
+            }
+        }
+
+    private:
+        OutImageT &_outImage;
+        InImageT const &_inImage;
+        std::vector<PTR(mathDetail::KernelImagesForRegion)> const &_bandRegions;
+        std::vector<PTR(mathDetail::RowOfKernelImagesForRegion)> const &_regionRows;
+        std::vector<PTR(mathDetail::ConvolveWithInterpolationWorkingImages)> const &_workingImages;
+    };
+
+}   // anonymous namespace
+
 /**
  * @brief Convolve an Image or MaskedImage with a spatially varying Kernel using linear interpolation.
  *
@@ -61,6 +113,9 @@ namespace mathDetail = lsst::afw::math::detail;
  * - for each region:
  *   - convolve it using convolveRegionWithInterpolation (which see)
  *
+ * If convolutionControl.getNumThreads() > 1 then the rows of regions are split into that many bands,
+ * which are convolved in parallel; the result does not depend on the number of threads.
+ *
  * Note that this routine will also work with spatially invariant kernels, but not efficiently.
  *
  * @throw lsst::pex::exceptions::InvalidParameterError if outImage is not the same size as inImage
@@ -105,18 +160,52 @@ void mathDetail::convolveWithInterpolation(
     LOGL_DEBUG("TRACE3.afw.math.convolve.convolveWithInterpolation",
         "convolveWithInterpolation: divide into %d x %d subregions", nx, ny);
 
-    ConvolveWithInterpolationWorkingImages workingImages(kernel.getDimensions());
-    RowOfKernelImagesForRegion regionRow(nx, ny);
-    while (goodRegion.computeNextRow(regionRow)) {
-        for (RowOfKernelImagesForRegion::ConstIterator rgnIter = regionRow.begin(), rgnEnd = regionRow.end();
-            rgnIter != rgnEnd; ++rgnIter) {
-            LOGL_DEBUG("TRACE5.afw.math.convolve.convolveWithInterpolation",
-                "convolveWithInterpolation: bbox minimum=(%d, %d), extent=(%d, %d)",
-                    (*rgnIter)->getBBox().getMinX(), (*rgnIter)->getBBox().getMinY(),
-                    (*rgnIter)->getBBox().getWidth(), (*rgnIter)->getBBox().getHeight());
-            convolveRegionWithInterpolation(outImage, inImage, **rgnIter, workingImages);
+    std::vector<Band> const bands = makeBands(0, ny, convolutionControl.getNumThreads());
+    if (bands.size() == 1) {
+        ConvolveWithInterpolationWorkingImages workingImages(kernel.getDimensions());
+        RowOfKernelImagesForRegion regionRow(nx, ny);
+        while (goodRegion.computeNextRow(regionRow)) {
+            for (RowOfKernelImagesForRegion::ConstIterator rgnIter = regionRow.begin(),
+                rgnEnd = regionRow.end(); rgnIter != rgnEnd; ++rgnIter) {
+                LOGL_DEBUG("TRACE5.afw.math.convolve.convolveWithInterpolation",
+                    "convolveWithInterpolation: bbox minimum=(%d, %d), extent=(%d, %d)",
+                        (*rgnIter)->getBBox().getMinX(), (*rgnIter)->getBBox().getMinY(),
+                        (*rgnIter)->getBBox().getWidth(), (*rgnIter)->getBBox().getHeight());
+                convolveRegionWithInterpolation(outImage, inImage, **rgnIter, workingImages);
+            }
+        }
+        return;
+    }
+
+    LOGL_DEBUG("TRACE3.afw.math.convolve.convolveWithInterpolation",
+        "convolveWithInterpolation: convolve %d bands of rows in parallel", static_cast<int>(bands.size()));
+
+    // Each band divides the region from its first row to the top of goodBBox, starting at the same
+    // row index, so its subregions (and thus the result) are exactly those of the serial convolution.
+    // Everything that holds state or is a Citizen is made here rather than in the threads,
+    // including the first row of subregions of each band.
+    std::vector<int> const heights = KernelImagesForRegion::computeSubregionLengths(goodBBox.getHeight(), ny);
+    std::vector<PTR(KernelImagesForRegion)> bandRegions;
+    std::vector<PTR(RowOfKernelImagesForRegion)> regionRows;
+    std::vector<PTR(ConvolveWithInterpolationWorkingImages)> workingImages;
+    int bandMinY = goodBBox.getMinY();
+    for (std::size_t i = 0; i < bands.size(); ++i) {
+        if (i > 0) {
+            for (int yInd = bands[i - 1].first; yInd < bands[i - 1].second; ++yInd) {
+                bandMinY += heights[yInd];
+            }
         }
+        afwGeom::Box2I const bandBBox(afwGeom::Point2I(goodBBox.getMinX(), bandMinY), goodBBox.getMax());
+        bandRegions.push_back(std::make_shared<KernelImagesForRegion>(
+            kernel.clone(), bandBBox, inImage.getXY0(), convolutionControl.getDoNormalize()));
+        regionRows.push_back(std::make_shared<RowOfKernelImagesForRegion>(nx, ny, bands[i].first));
+        bandRegions.back()->computeNextRow(*regionRows.back());
+        workingImages.push_back(
+            std::make_shared<ConvolveWithInterpolationWorkingImages>(kernel.getDimensions()));
     }
+
+    parallelForBands(bands, ConvolveRegionRows<OutImageT, InImageT>(
+        outImage, inImage, bandRegions, regionRows, workingImages));
 }
 
 /**
@@ -0,0 +1,544 @@
+// -*- LSST-C++ -*-
+
+/*
+ * LSST Data Management System
+ * Copyright 2016 LSST Corporation.
+ *
+ * This product includes software developed by the
+ * LSST Project (http://www.lsst.org/).
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the LSST License Statement and
+ * the GNU General Public License along with this program.  If not,
+ * see <http://www.lsstcorp.org/LegalNotices/>.
+ */
+
+/**
+ * @file
+ *
+ * @brief Definition of convolveWithFft and convolveMask declared in detail/Convolve.h
+ *
+ * @ingroup afw
+ */
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <initializer_list>
+#include <limits>
+#include <sstream>
+#include <vector>
+
+#include "fftw3.h"
+
+#include "lsst/pex/exceptions.h"
+#include "lsst/log/Log.h"
+#include "lsst/afw/image/MaskedImage.h"
+#include "lsst/afw/math/ConvolveImage.h"
+#include "lsst/afw/math/Kernel.h"
+#include "lsst/afw/geom.h"
+#include "lsst/afw/math/detail/Convolve.h"
+
+namespace pexExcept = lsst::pex::exceptions;
+namespace afwGeom = lsst::afw::geom;
+namespace afwImage = lsst::afw::image;
+namespace afwMath = lsst::afw::math;
+namespace mathDetail = lsst::afw::math::detail;
+
+namespace {
+
+    typedef afwImage::Image<afwMath::Kernel::Pixel> KernelImage;
+
+    /*
+     * Return the smallest integer >= n whose only prime factors are 2, 3 and 5;
+     * FFTW is fastest for such sizes.
+     */
+    int fftSize(int n) {
+        for (int size = std::max(n, 1); ; ++size) {
+            int m = size;
+            for (int factor : {2, 3, 5}) {
+                while (m % factor == 0) {
+                    m /= factor;
+                }
+            }
+            if (m == 1) {
+                return size;
+            }
+        }
+    }
+
+    /*
+     * Buffers and FFTW plans for transforming one tile of an image.
+     *
+     * The real buffer holds tile rows contiguously (width doubles per row), the spectrum buffers hold
+     * height x (width/2 + 1) complex values, as for fftw_plan_dft_r2c_2d.
+     * Plan creation is not thread safe, so a TileTransform must be constructed in the calling thread.
+     */
+    class TileTransform {
+    public:
+        TileTransform(int width, int height) :
+            _width(width),
+            _height(height),
+            _nSpectrum(height*(width/2 + 1)),
+            _real(static_cast<double*>(fftw_malloc(sizeof(double)*width*height))),
+            _spectrum(static_cast<fftw_complex*>(fftw_malloc(sizeof(fftw_complex)*_nSpectrum))),
+            _kernelSpectrum(static_cast<fftw_complex*>(fftw_malloc(sizeof(fftw_complex)*_nSpectrum))),
+            _forwardPlan(0),
+            _inversePlan(0)
+        {
+            if (!_real || !_spectrum || !_kernelSpectrum) {
+                _free();
+                throw LSST_EXCEPT(pexExcept::MemoryError, "Could not allocate FFT buffers");
+            }
+            _forwardPlan = fftw_plan_dft_r2c_2d(height, width, _real, _spectrum, FFTW_ESTIMATE);
+            _inversePlan = fftw_plan_dft_c2r_2d(height, width, _spectrum, _real, FFTW_ESTIMATE);
+            if (!_forwardPlan || !_inversePlan) {
+                _free();
+                throw LSST_EXCEPT(pexExcept::RuntimeError, "Could not create FFTW plans");
+            }
+        }
+
+        ~TileTransform() { _free(); }
+
+        int getWidth() const { return _width; }
+        int getHeight() const { return _height; }
+
+        /// Pixel (x, y) of the real buffer
+        double & at(int x, int y) { return _real[y*_width + x]; }
+
+        /*
+         * Set the kernel spectrum to that of kernelImage, with each pixel optionally squared.
+         *
+         * The spectrum is scaled so that the inverse transform of a product is correctly normalized.
+         */
+        void setKernel(KernelImage const &kernelImage, bool square) {
+            std::fill(_real, _real + _width*_height, 0.0);
+            double const scale = 1.0/(static_cast<double>(_width)*_height);
+            for (int y = 0; y < kernelImage.getHeight(); ++y) {
+                KernelImage::const_x_iterator kIter = kernelImage.row_begin(y);
+                for (int x = 0; x < kernelImage.getWidth(); ++x, ++kIter) {
+                    double const kVal = *kIter;
+                    at(x, y) = (square ? kVal*kVal : kVal)*scale;
+                }
+            }
+            fftw_execute_dft_r2c(_forwardPlan, _real, _kernelSpectrum);
+        }
+
+        /*
+         * Replace the contents of the real buffer by its circular correlation with the kernel.
+         *
+         * Pixel (x, y) of the result is the sum over the kernel of tile(x + kx, y + ky)*kernel(kx, ky),
+         * which matches the direct convolution wherever x + kx and y + ky do not wrap around.
+         */
+        void correlate() {
+            fftw_execute(_forwardPlan);
+            for (int i = 0; i < _nSpectrum; ++i) {
+                // multiply by the complex conjugate of the kernel spectrum
+                double const re = _spectrum[i][0];
+                double const im = _spectrum[i][1];
+                double const kRe = _kernelSpectrum[i][0];
+                double const kIm = _kernelSpectrum[i][1];
+                _spectrum[i][0] = re*kRe + im*kIm;
+                _spectrum[i][1] = im*kRe - re*kIm;
+            }
+            fftw_execute(_inversePlan);
+        }
+
+    private:
+        TileTransform(TileTransform const &);
+        TileTransform & operator=(TileTransform const &);
+
+        void _free() {
+            if (_inversePlan) fftw_destroy_plan(_inversePlan);
+            if (_forwardPlan) fftw_destroy_plan(_forwardPlan);
+            if (_kernelSpectrum) fftw_free(_kernelSpectrum);
+            if (_spectrum) fftw_free(_spectrum);
+            if (_real) fftw_free(_real);
+            _inversePlan = _forwardPlan = 0;
+            _kernelSpectrum = _spectrum = 0;
+            _real = 0;
+        }
+
+        int _width;
+        int _height;
+        int _nSpectrum;
+        double *_real;
+        fftw_complex *_spectrum;
+        fftw_complex *_kernelSpectrum;
+        fftw_plan _forwardPlan;
+        fftw_plan _inversePlan;
+    };
+
+    /*
+     * Convolve one image plane with the kernel whose spectrum is held by transform, using overlap-save.
+     *
+     * Only the pixels that convolveWithBruteForce would set are set.
+     * Non-finite input pixels are treated as 0; the caller must fix the outputs they affect.
+     */
+    template <typename OutPixelT, typename InPixelT>
+    void correlatePlane(
+            afwImage::Image<OutPixelT> &outImage,
+            afwImage::Image<InPixelT> const &inImage,
+            TileTransform &transform,
+            int kWidth,
+            int kHeight,
+            int kCtrX,
+            int kCtrY)
+    {
+        int const tileWidth = transform.getWidth();
+        int const tileHeight = transform.getHeight();
+        int const cnvWidth = inImage.getWidth() + 1 - kWidth;
+        int const cnvHeight = inImage.getHeight() + 1 - kHeight;
+        int const strideX = tileWidth + 1 - kWidth;
+        int const strideY = tileHeight + 1 - kHeight;
+
+        for (int y0 = 0; y0 < cnvHeight; y0 += strideY) {
+            int const inHeight = std::min(tileHeight, inImage.getHeight() - y0);
+            int const outHeight = std::min(strideY, cnvHeight - y0);
+            for (int x0 = 0; x0 < cnvWidth; x0 += strideX) {
+                int const inWidth = std::min(tileWidth, inImage.getWidth() - x0);
+                int const outWidth = std::min(strideX, cnvWidth - x0);
+
+                for (int y = 0; y < tileHeight; ++y) {
+                    int x = 0;
+                    if (y < inHeight) {
+                        typename afwImage::Image<InPixelT>::const_x_iterator inIter =
+                            inImage.x_at(x0, y0 + y);
+                        for (; x < inWidth; ++x, ++inIter) {
+                            double const value = *inIter;
+                            transform.at(x, y) = std::isfinite(value) ? value : 0.0;
+                        }
+                    }
+                    for (; x < tileWidth; ++x) {
+                        transform.at(x, y) = 0.0;
+                    }
+                }
+
+                transform.correlate();
+
+                for (int y = 0; y < outHeight; ++y) {
+                    typename afwImage::Image<OutPixelT>::x_iterator outIter =
+                        outImage.x_at(x0 + kCtrX, y0 + y + kCtrY);
+                    for (int x = 0; x < outWidth; ++x, ++outIter) {
+                        *outIter = static_cast<OutPixelT>(transform.at(x, y));
+                    }
+                }
+            }
+        }
+    }
+
+    /*
+     * Convolve the planes of an Image or MaskedImage using FFTs
+     */
+    template <typename OutImageT, typename InImageT>
+    void convolvePlanes(
+            OutImageT &convolvedImage,
+            InImageT const &inImage,
+            KernelImage const &kernelImage,
+            int kCtrX,
+            int kCtrY,
+            TileTransform &transform,
+            afwImage::detail::Image_tag)
+    {
+        transform.setKernel(kernelImage, false);
+        correlatePlane(convolvedImage, inImage, transform,
+                       kernelImage.getWidth(), kernelImage.getHeight(), kCtrX, kCtrY);
+    }
+
+    template <typename OutImageT, typename InImageT>
+    void convolvePlanes(
+            OutImageT &convolvedImage,
+            InImageT const &inImage,
+            KernelImage const &kernelImage,
+            int kCtrX,
+            int kCtrY,
+            TileTransform &transform,
+            afwImage::detail::MaskedImage_tag)
+    {
+        int const kWidth = kernelImage.getWidth();
+        int const kHeight = kernelImage.getHeight();
+        transform.setKernel(kernelImage, false);
+        correlatePlane(*convolvedImage.getImage(), *inImage.getImage(), transform,
+                       kWidth, kHeight, kCtrX, kCtrY);
+        // variance is propagated with the square of the kernel
+        transform.setKernel(kernelImage, true);
+        correlatePlane(*convolvedImage.getVariance(), *inImage.getVariance(), transform,
+                       kWidth, kHeight, kCtrX, kCtrY);
+        mathDetail::convolveMask(*convolvedImage.getMask(), *inImage.getMask(), kernelImage,
+                                 afwGeom::Point2I(kCtrX, kCtrY));
+    }
+
+    /*
+     * Append the positions of input pixels whose image (or variance) is not finite
+     */
+    template <typename ImageT>
+    void findNonfinite(ImageT const &image, std::vector<afwGeom::Point2I> &badList,
+                       afwImage::detail::Image_tag)
+    {
+        for (int y = 0; y < image.getHeight(); ++y) {
+            typename ImageT::const_x_iterator iter = image.row_begin(y);
+            for (int x = 0; x < image.getWidth(); ++x, ++iter) {
+                if (!std::isfinite(static_cast<double>(*iter))) {
+                    badList.push_back(afwGeom::Point2I(x, y));
+                }
+            }
+        }
+    }
+
+    template <typename ImageT>
+    void findNonfinite(ImageT const &image, std::vector<afwGeom::Point2I> &badList,
+                       afwImage::detail::MaskedImage_tag)
+    {
+        for (int y = 0; y < image.getHeight(); ++y) {
+            typename ImageT::const_x_iterator iter = image.row_begin(y);
+            for (int x = 0; x < image.getWidth(); ++x, ++iter) {
+                if (!std::isfinite(static_cast<double>(iter.image())) ||
+                    !std::isfinite(static_cast<double>(iter.variance()))) {
+                    badList.push_back(afwGeom::Point2I(x, y));
+                }
+            }
+        }
+    }
+}   // anonymous namespace
+
+/**
+ * @brief Convolve a Mask with a kernel image: set each pixel to the OR of the input mask over all
+ * nonzero pixels of the kernel, as the convolution of a MaskedImage does.
+ *
+ * @warning Low-level function that does not set edge pixels (see convolveWithBruteForce)
+ * and does no bounds checking.
+ *
+ * @ingroup afw
+ */
+void mathDetail::convolveMask(
+        afwImage::Mask<afwImage::MaskPixel> &outMask,   ///< convolved mask
+        afwImage::Mask<afwImage::MaskPixel> const& inMask,  ///< mask to convolve
+        KernelImage const& kernelImage,         ///< kernel image
+        afwGeom::Point2I const& kernelCtr)      ///< center of kernel
+{
+    int const kCtrX = kernelCtr.getX();
+    int const kCtrY = kernelCtr.getY();
+    typedef afwImage::MaskPixel MaskPixel;
+    int const kWidth = kernelImage.getWidth();
+    int const kHeight = kernelImage.getHeight();
+    int const cnvWidth = inMask.getWidth() + 1 - kWidth;
+    int const cnvHeight = inMask.getHeight() + 1 - kHeight;
+
+    std::vector<afwGeom::Extent2I> nonzero;
+    for (int ky = 0; ky < kHeight; ++ky) {
+        KernelImage::const_x_iterator kIter = kernelImage.row_begin(ky);
+        for (int kx = 0; kx < kWidth; ++kx, ++kIter) {
+            if (*kIter != 0) {
+                nonzero.push_back(afwGeom::Extent2I(kx, ky));
+            }
+        }
+    }
+
+    if (nonzero.size() == static_cast<std::size_t>(kWidth*kHeight)) {
+        // every kernel pixel counts, so the OR is separable: first along rows, then along columns
+        std::vector<MaskPixel> rowOr(cnvWidth*inMask.getHeight());
+        for (int y = 0; y < inMask.getHeight(); ++y) {
+            afwImage::Mask<MaskPixel>::const_x_iterator const inBegin = inMask.row_begin(y);
+            for (int x = 0; x < cnvWidth; ++x) {
+                MaskPixel value = 0;
+                for (afwImage::Mask<MaskPixel>::const_x_iterator inIter = inBegin + x,
+                         inEnd = inBegin + x + kWidth; inIter != inEnd; ++inIter) {
+                    value |= *inIter;
+                }
+                rowOr[y*cnvWidth + x] = value;
+            }
+        }
+        for (int y = 0; y < cnvHeight; ++y) {
+            afwImage::Mask<MaskPixel>::x_iterator outIter = outMask.x_at(kCtrX, y + kCtrY);
+            for (int x = 0; x < cnvWidth; ++x, ++outIter) {
+                MaskPixel value = 0;
+                for (int ky = 0; ky < kHeight; ++ky) {
+                    value |= rowOr[(y + ky)*cnvWidth + x];
+                }
+                *outIter = value;
+            }
+        }
+        return;
+    }
+
+    // scatter each nonzero input mask pixel to the outputs whose kernel footprint includes it
+    for (int y = 0; y < cnvHeight; ++y) {
+        afwImage::Mask<MaskPixel>::x_iterator outIter = outMask.x_at(kCtrX, y + kCtrY);
+        for (int x = 0; x < cnvWidth; ++x, ++outIter) {
+            *outIter = 0;
+        }
+    }
+    for (int iy = 0; iy < inMask.getHeight(); ++iy) {
+        afwImage::Mask<MaskPixel>::const_x_iterator inIter = inMask.row_begin(iy);
+        for (int ix = 0; ix < inMask.getWidth(); ++ix, ++inIter) {
+            MaskPixel const value = *inIter;
+            if (value == 0) {
+                continue;
+            }
+            for (std::vector<afwGeom::Extent2I>::const_iterator k = nonzero.begin();
+                 k != nonzero.end(); ++k) {
+                int const x = ix - k->getX();
+                int const y = iy - k->getY();
+                if (x >= 0 && x < cnvWidth && y >= 0 && y < cnvHeight) {
+                    outMask(x + kCtrX, y + kCtrY) |= value;
+                }
+            }
+        }
+    }
+}
+
+/**
+ * @brief Convolve an Image or MaskedImage with a spatially invariant Kernel using FFTs.
+ *
+ * The image is processed in tiles using the overlap-save method, so memory use is bounded
+ * by the tile size rather than the image size. The results match convolveWithBruteForce to roundoff:
+ * - The variance plane (if any) is convolved with the square of the kernel
+ * - The mask plane (if any) is the OR of the input mask over the nonzero kernel pixels
+ * - Output pixels that depend on a non-finite input pixel (image or variance) are computed directly,
+ *   so NaNs propagate exactly as they do for the direct convolution; if there are so many that this
+ *   would be slower than the direct convolution of the whole image, convolveWithBruteForce is used instead
+ *
+ * Images with integer pixels are always convolved directly by convolveWithBruteForce.
+ *
+ * @warning Low-level convolution function that does not set edge pixels.
+ *
+ * convolvedImage must be the same size as inImage.
+ * convolvedImage has a border in which the output pixels are not set. This border has size:
+ * - kernel.getCtrX() along the left edge
+ * - kernel.getCtrY() along the bottom edge
+ * - kernel.getWidth()  - 1 - kernel.getCtrX() along the right edge
+ * - kernel.getHeight() - 1 - kernel.getCtrY() along the top edge
+ *
+ * @throw lsst::pex::exceptions::InvalidParameterError if kernel is spatially varying
+ * @throw lsst::pex::exceptions::InvalidParameterError if convolvedImage dimensions != inImage dimensions
+ * @throw lsst::pex::exceptions::InvalidParameterError if inImage smaller than kernel in width or height
+ * @throw lsst::pex::exceptions::InvalidParameterError if kernel width or height < 1
+ * @throw lsst::pex::exceptions::MemoryError when allocation of CPU memory fails
+ *
+ * @ingroup afw
+ */
+template <typename OutImageT, typename InImageT>
+void mathDetail::convolveWithFft(
+        OutImageT &convolvedImage,      ///< convolved %image
+        InImageT const& inImage,        ///< %image to convolve
+        afwMath::Kernel const& kernel,  ///< convolution kernel
+        afwMath::ConvolutionControl const & convolutionControl) ///< convolution control parameters
+{
+    typedef typename afwImage::GetImage<OutImageT>::type::Pixel OutImagePixel;
+
+    if (kernel.isSpatiallyVarying()) {
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError,
+                          "convolveWithFft does not support spatially varying kernels");
+    }
+    if (std::numeric_limits<OutImagePixel>::is_integer) {
+        LOGL_DEBUG("TRACE4.afw.math.convolve.convolveWithFft",
+            "convolveWithFft: integer output pixels; using brute force");
+        mathDetail::convolveWithBruteForce(convolvedImage, inImage, kernel, convolutionControl);
+        return;
+    }
+    if (convolvedImage.getDimensions() != inImage.getDimensions()) {
+        std::ostringstream os;
+        os << "convolvedImage dimensions = ( "
+        << convolvedImage.getWidth() << ", " << convolvedImage.getHeight()
+        << ") != (" << inImage.getWidth() << ", " << inImage.getHeight() << ") = inImage dimensions";
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError, os.str());
+    }
+    int const kWidth = kernel.getWidth();
+    int const kHeight = kernel.getHeight();
+    if (kWidth < 1 || kHeight < 1 || inImage.getWidth() < kWidth || inImage.getHeight() < kHeight) {
+        // let convolveWithBruteForce report the problem
+        mathDetail::convolveWithBruteForce(convolvedImage, inImage, kernel, convolutionControl);
+        return;
+    }
+
+    int const cnvWidth = inImage.getWidth() + 1 - kWidth;
+    int const cnvHeight = inImage.getHeight() + 1 - kHeight;
+    int const kCtrX = kernel.getCtrX();
+    int const kCtrY = kernel.getCtrY();
+
+    // find the outputs that depend on non-finite inputs
+    std::vector<afwGeom::Point2I> badList;
+    findNonfinite(inImage, badList, typename afwImage::detail::image_traits<InImageT>::image_category());
+    if (static_cast<double>(badList.size())*kWidth*kHeight > static_cast<double>(cnvWidth)*cnvHeight) {
+        LOGL_DEBUG("TRACE4.afw.math.convolve.convolveWithFft",
+            "convolveWithFft: too many non-finite pixels; using brute force");
+        mathDetail::convolveWithBruteForce(convolvedImage, inImage, kernel, convolutionControl);
+        return;
+    }
+
+    LOGL_DEBUG("TRACE4.afw.math.convolve.convolveWithFft",
+        "convolveWithFft: %d non-finite input pixels", static_cast<int>(badList.size()));
+
+    KernelImage kernelImage(kernel.getDimensions());
+    (void)kernel.computeImage(kernelImage, convolutionControl.getDoNormalize());
+
+    // Tiles several times larger than the kernel waste little work on the overlap,
+    // while staying small enough to remain in cache
+    int const tileWidth = fftSize(std::min(inImage.getWidth(), std::max(4*kWidth, 256)));
+    int const tileHeight = fftSize(std::min(inImage.getHeight(), std::max(4*kHeight, 256)));
+    TileTransform transform(tileWidth, tileHeight);
+
+    convolvePlanes(convolvedImage, inImage, kernelImage, kCtrX, kCtrY, transform,
+                   typename afwImage::detail::image_traits<OutImageT>::image_category());
+
+    if (badList.empty()) {
+        return;
+    }
+    std::vector<bool> isAffected(cnvWidth*cnvHeight, false);
+    for (std::vector<afwGeom::Point2I>::const_iterator bad = badList.begin(); bad != badList.end(); ++bad) {
+        int const xMin = std::max(0, bad->getX() + 1 - kWidth);
+        int const xMax = std::min(cnvWidth - 1, bad->getX());
+        int const yMin = std::max(0, bad->getY() + 1 - kHeight);
+        int const yMax = std::min(cnvHeight - 1, bad->getY());
+        for (int y = yMin; y <= yMax; ++y) {
+            for (int x = xMin; x <= xMax; ++x) {
+                isAffected[y*cnvWidth + x] = true;
+            }
+        }
+    }
+    KernelImage::const_xy_locator const kernelLoc = kernelImage.xy_at(0, 0);
+    for (int y = 0; y < cnvHeight; ++y) {
+        for (int x = 0; x < cnvWidth; ++x) {
+            if (isAffected[y*cnvWidth + x]) {
+                *convolvedImage.x_at(x + kCtrX, y + kCtrY) = afwMath::convolveAtAPoint<OutImageT, InImageT>(
+                    inImage.xy_at(x, y), kernelLoc, kWidth, kHeight);
+            }
+        }
+    }
+}
+
+/*
+ * Explicit instantiation
+ */
+/// \cond
+#define IMAGE(PIXTYPE) afwImage::Image<PIXTYPE>
+#define MASKEDIMAGE(PIXTYPE) afwImage::MaskedImage<PIXTYPE, afwImage::MaskPixel, afwImage::VariancePixel>
+#define NL /* */
+// Instantiate Image or MaskedImage versions
+#define INSTANTIATE_IM_OR_MI(IMGMACRO, OUTPIXTYPE, INPIXTYPE) \
+    template void mathDetail::convolveWithFft( \
+        IMGMACRO(OUTPIXTYPE)&, IMGMACRO(INPIXTYPE) const&, afwMath::Kernel const&, \
+            afwMath::ConvolutionControl const&); NL
+// Instantiate both Image and MaskedImage versions
+#define INSTANTIATE(OUTPIXTYPE, INPIXTYPE) \
+    INSTANTIATE_IM_OR_MI(IMAGE,       OUTPIXTYPE, INPIXTYPE) \
+    INSTANTIATE_IM_OR_MI(MASKEDIMAGE, OUTPIXTYPE, INPIXTYPE)
+
+INSTANTIATE(double, double)
+INSTANTIATE(double, float)
+INSTANTIATE(double, int)
+INSTANTIATE(double, std::uint16_t)
+INSTANTIATE(float, float)
+INSTANTIATE(float, int)
+INSTANTIATE(float, std::uint16_t)
+INSTANTIATE(int, int)
+INSTANTIATE(std::uint16_t, std::uint16_t)
+/// \endcond
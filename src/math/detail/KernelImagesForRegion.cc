@@ -266,11 +266,14 @@ void mathDetail::KernelImagesForRegion::_computeImage(Location location) const {
  * Compute length of each subregion for a region divided into nDivisions pieces of approximately equal
  * length.
  *
+ * These are the heights of the successive rows of subregions computed by computeNextRow
+ * (and the widths of the subregions in each row).
+ *
  * @return a list of subspan lengths
  *
  * @throw lsst::pex::exceptions::InvalidParameterError if nDivisions >= length
  */
-std::vector<int> mathDetail::KernelImagesForRegion::_computeSubregionLengths(
+std::vector<int> mathDetail::KernelImagesForRegion::computeSubregionLengths(
     int length,     ///< length of region
     int nDivisions) ///< number of divisions of region
 {
@@ -285,7 +288,7 @@ std::vector<int> mathDetail::KernelImagesForRegion::_computeSubregionLengths(
         int subLength = _computeNextSubregionLength(remLength, remNDiv);
         if (subLength < 1) {
             std::ostringstream os;
-            os << "Bug! _computeSubregionLengths(length=" << length << ", nDivisions=" << nDivisions <<
+            os << "Bug! computeSubregionLengths(length=" << length << ", nDivisions=" << nDivisions <<
                 ") computed sublength = " << subLength << " < 0; remLength = " << remLength;
             throw LSST_EXCEPT(pexExcept::RuntimeError, os.str());
         }
@@ -333,11 +336,14 @@ int const mathDetail::KernelImagesForRegion::_MinInterpolationSize = 10;
  */
 mathDetail::RowOfKernelImagesForRegion::RowOfKernelImagesForRegion(
         int nx, ///< number of columns
-        int ny) ///< number of rows
+        int ny, ///< number of rows
+        int firstYInd)  ///< index of the first row that computeNextRow will compute;
+            ///< if nonzero, the KernelImagesForRegion passed to computeNextRow must start at that row
+            ///< (but still extend to the top of the region that is divided into ny rows)
 :
     _nx(nx),
     _ny(ny),
-    _yInd(-1),
+    _yInd(firstYInd - 1),
     _regionList(nx)
 {
     if ((nx < 1) || (ny < 1)) {
@@ -345,4 +351,9 @@ mathDetail::RowOfKernelImagesForRegion::RowOfKernelImagesForRegion(
         os << "nx = " << nx << " and/or ny = " << ny << " < 1";
         throw LSST_EXCEPT(pexExcept::InvalidParameterError, os.str());
     };
+    if ((firstYInd < 0) || (firstYInd >= ny)) {
+        std::ostringstream os;
+        os << "firstYInd = " << firstYInd << " not in range [0, " << ny << ")";
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError, os.str());
+    }
 }
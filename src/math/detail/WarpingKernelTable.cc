@@ -0,0 +1,64 @@
+// -*- LSST-C++ -*-
+/*
+ * LSST Data Management System
+ * Copyright 2016 LSST Corporation.
+ *
+ * This product includes software developed by the
+ * LSST Project (http://www.lsst.org/).
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the LSST License Statement and
+ * the GNU General Public License along with this program.  If not,
+ * see <http://www.lsstcorp.org/LegalNotices/>.
+ */
+
+
+#include "lsst/pex/exceptions.h"
+#include "lsst/afw/math/warpExposure.h"
+#include "lsst/afw/math/detail/WarpingKernelTable.h"
+
+namespace lsst { namespace afw { namespace math { namespace detail {
+
+namespace {
+
+// Tabulate func(i - ctr) for i in [0, size), at each sampled value of the function's parameter
+void tabulate(SeparableKernel::KernelFunctionPtr func, int size, int ctr, std::vector<double> & table) {
+    table.resize((WarpingKernelTable::SAMPLES_PER_PIXEL + 1)*size);
+    std::vector<double>::iterator tableIter = table.begin();
+    for (int sample = 0; sample <= WarpingKernelTable::SAMPLES_PER_PIXEL; ++sample) {
+        func->setParameter(0, sample/static_cast<double>(WarpingKernelTable::SAMPLES_PER_PIXEL));
+        for (int i = 0; i < size; ++i, ++tableIter) {
+            *tableIter = (*func)(i - ctr);
+        }
+    }
+}
+
+} // anonymous
+
+bool WarpingKernelTable::canTabulate(SeparableKernel const & kernel) {
+    return dynamic_cast<LanczosWarpingKernel const *>(&kernel)
+        || dynamic_cast<BilinearWarpingKernel const *>(&kernel);
+}
+
+WarpingKernelTable::WarpingKernelTable(SeparableKernel const & kernel) :
+    _colTable(),
+    _rowTable()
+{
+    if (!canTabulate(kernel)) {
+        throw LSST_EXCEPT(pex::exceptions::InvalidParameterError,
+                          "Only Lanczos and bilinear warping kernels can be tabulated");
+    }
+    tabulate(kernel.getKernelColFunction(), kernel.getWidth(), kernel.getCtr().getX(), _colTable);
+    tabulate(kernel.getKernelRowFunction(), kernel.getHeight(), kernel.getCtr().getY(), _rowTable);
+}
+
+}}}} // namespace lsst::afw::math::detail
@@ -33,6 +33,8 @@
 #include <cmath>
 #include <cstdint>
 #include <limits>
+#include <map>
+#include <numeric>
 #include <sstream>
 #include <string>
 #include <vector>
@@ -51,6 +53,7 @@
 #include "lsst/afw/coord/Coord.h"
 #include "lsst/afw/image/Calib.h"
 #include "lsst/afw/image/Wcs.h"
+#include "lsst/afw/math/detail/Parallel.h"
 #include "lsst/afw/math/detail/PositionFunctor.h"
 #include "lsst/afw/math/detail/WarpAtOnePoint.h"
 
@@ -207,6 +210,50 @@ std::shared_ptr<afwMath::SeparableKernel> afwMath::makeWarpingKernel(std::string
     }
 }
 
+afwGeom::Box2I afwMath::computeWarpedBBox(
+    afwImage::Wcs const &destWcs,
+    afwGeom::Box2I const &srcBBox,
+    afwImage::Wcs const &srcWcs,
+    int sampleSpacing
+) {
+    afwImage::XYTransformFromWcsPair const xyTransform{destWcs.clone(), srcWcs.clone()};
+    return computeWarpedBBox(srcBBox, xyTransform, sampleSpacing);
+}
+
+afwGeom::Box2I afwMath::computeWarpedBBox(
+    afwGeom::Box2I const &srcBBox,
+    afwGeom::XYTransform const &xyTransform,
+    int sampleSpacing
+) {
+    if (sampleSpacing < 1) {
+        std::ostringstream os;
+        os << "sampleSpacing = " << sampleSpacing << "; must be at least 1";
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError, os.str());
+    }
+    if (srcBBox.isEmpty()) {
+        return afwGeom::Box2I();
+    }
+    // The outer edges of the boundary pixels, divided into intervals of at most sampleSpacing pixels
+    afwGeom::Box2D const srcPosBox(srcBBox);
+    int const numXIntervals = (srcBBox.getWidth() + sampleSpacing - 1)/sampleSpacing;
+    int const numYIntervals = (srcBBox.getHeight() + sampleSpacing - 1)/sampleSpacing;
+    double const xStep = srcPosBox.getWidth()/numXIntervals;
+    double const yStep = srcPosBox.getHeight()/numYIntervals;
+
+    afwGeom::Box2D destPosBox;
+    for (int i = 0; i <= numXIntervals; ++i) {
+        double const x = (i == numXIntervals) ? srcPosBox.getMaxX() : srcPosBox.getMinX() + i*xStep;
+        destPosBox.include(xyTransform.forwardTransform(afwGeom::Point2D(x, srcPosBox.getMinY())));
+        destPosBox.include(xyTransform.forwardTransform(afwGeom::Point2D(x, srcPosBox.getMaxY())));
+    }
+    for (int j = 1; j < numYIntervals; ++j) {
+        double const y = srcPosBox.getMinY() + j*yStep;
+        destPosBox.include(xyTransform.forwardTransform(afwGeom::Point2D(srcPosBox.getMinX(), y)));
+        destPosBox.include(xyTransform.forwardTransform(afwGeom::Point2D(srcPosBox.getMaxX(), y)));
+    }
+    return afwGeom::Box2I(destPosBox, afwGeom::Box2I::EXPAND);
+}
+
 PTR(afwMath::SeparableKernel) afwMath::WarpingControl::getWarpingKernel() const {
     if (_warpingKernelPtr->getCacheSize() != _cacheSize) {
         _warpingKernelPtr->computeCache(_cacheSize);
@@ -259,6 +306,13 @@ void afwMath::WarpingControl::setMaskWarpingKernel(
     _maskWarpingKernelPtr = std::static_pointer_cast<SeparableKernel>(maskWarpingKernel.clone());
 }
 
+void afwMath::WarpingControl::setNumThreads(int numThreads) {
+    if (numThreads < 1) {
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError, "numThreads must be at least 1");
+    }
+    _numThreads = numThreads;
+}
+
 
 void afwMath::WarpingControl::_testWarpingKernels(
     SeparableKernel const &warpingKernel,
@@ -330,56 +384,55 @@ namespace {
         return std::abs(dSrcA.getX()*dSrcB.getY() - dSrcA.getY()*dSrcB.getX());
     }
 
+    // A PositionFunctor that looks up the source positions in a WarpingPlan
+    class WarpingPlanPositionFunctor : public afwMath::detail::PositionFunctor {
+    public:
+        explicit WarpingPlanPositionFunctor(afwMath::WarpingPlan const &plan) : _plan(plan) {}
+
+        virtual afwGeom::Point2D operator()(int destCol, int destRow) const {
+            return _plan.getSrcPosition(destCol, destRow);
+        }
+
+        // The plan is never modified, so it may be shared between threads
+        virtual afwMath::detail::PositionFunctor::Ptr clone() const {
+            return std::make_shared<WarpingPlanPositionFunctor>(_plan);
+        }
+
+    private:
+        afwMath::WarpingPlan const &_plan;
+    };
+
+    // Return a copy of control with its own copies of the warping kernels, so it can be used on another
+    // thread
+    PTR(afwMath::WarpingControl) copyWarpingControl(afwMath::WarpingControl const &control) {
+        PTR(afwMath::WarpingControl) copy = std::make_shared<afwMath::WarpingControl>(control);
+        copy->setWarpingKernel(*control.getWarpingKernel());
+        if (control.hasMaskWarpingKernel()) {
+            copy->setMaskWarpingKernel(*control.getMaskWarpingKernel());
+        }
+        return copy;
+    }
+
+    /*
+     * Warp the destination rows [bandBegin, bandEnd), returning the number of good pixels
+     *
+     * bandBegin must be a multiple of the interpolation length, if any: the source positions are linearly
+     * interpolated within blocks of interpLength rows, starting from positions that depend only on
+     * the edges of the block, so every band of rows can be warped independently of the others.
+     */
     template<typename DestImageT, typename SrcImageT>
-    int doWarpImage(
+    int warpRows(
         DestImageT &destImage,                      ///< remapped %image
-        SrcImageT const &srcImage,                  ///< source %image
+        afwMath::detail::WarpAtOnePoint<DestImageT, SrcImageT> &warpAtOnePoint, ///< computes one pixel
         afwMath::detail::PositionFunctor const &computeSrcPos,   ///< Functor to compute source position
             ///< called with dest row, column; returns source position (as a Point2D)
-        afwMath::WarpingControl const &control,     ///< warping parameters
-        typename DestImageT::SinglePixel padValue   ///< value to use for undefined pixels
+        int interpLength,                           ///< interpolation length
+        int bandBegin,                              ///< first row to warp
+        int bandEnd                                 ///< one past the last row to warp
     ) {
-        if (afwMath::details::isSameObject(destImage, srcImage)) {
-            throw LSST_EXCEPT(pexExcept::InvalidParameterError,
-                "destImage is srcImage; cannot warp in place");
-        }
-        if (destImage.getBBox(afwImage::LOCAL).isEmpty()) {
-            return 0;
-        }
-        // if src image is too small then don't try to warp
-        try {
-            PTR(afwMath::SeparableKernel) warpingKernelPtr = control.getWarpingKernel();
-            warpingKernelPtr->shrinkBBox(srcImage.getBBox(afwImage::LOCAL));
-        } catch(...) {
-            for (int y = 0, height = destImage.getHeight(); y < height; ++y) {
-                for (typename DestImageT::x_iterator destPtr = destImage.row_begin(y), end = destImage.row_end(y);
-                    destPtr != end; ++destPtr) {
-                    *destPtr = padValue;
-                }
-            }
-            return 0;
-        }
-        PTR(afwMath::SeparableKernel) warpingKernelPtr = control.getWarpingKernel();
-        int interpLength = control.getInterpLength();
-
-        std::shared_ptr<afwMath::LanczosWarpingKernel const> const lanczosKernelPtr =
-            std::dynamic_pointer_cast<afwMath::LanczosWarpingKernel>(warpingKernelPtr);
-
-
         int numGoodPixels = 0;
 
-        // Get the source MaskedImage and a pixel accessor to it.
-        int const srcWidth = srcImage.getWidth();
-        int const srcHeight = srcImage.getHeight();
-        LOGL_DEBUG("TRACE2.afw.math.warp", "source image width=%d; height=%d", srcWidth, srcHeight);
-
         int const destWidth = destImage.getWidth();
-        int const destHeight = destImage.getHeight();
-
-        LOGL_DEBUG("TRACE2.afw.math.warp", "remap image width=%d; height=%d", destWidth, destHeight);
-
-        // Set each pixel of destExposure's MaskedImage
-        LOGL_DEBUG("TRACE3.afw.math.warp", "Remapping masked image");
 
         // A cache of pixel positions on the source corresponding to the previous or current row
         // of the destination image.
@@ -392,9 +445,7 @@ namespace {
         std::vector<afwGeom::Point2D>::iterator const srcPosView = _srcPosList.begin() + 1;
 
         int const maxCol = destWidth - 1;
-        int const maxRow = destHeight - 1;
-
-        afwMath::detail::WarpAtOnePoint<DestImageT, SrcImageT> warpAtOnePoint(srcImage, control, padValue);
+        int const maxRow = bandEnd - 1;
 
         if (interpLength > 0) {
             // Use interpolation. Note that 1 produces the same result as no interpolation
@@ -430,22 +481,14 @@ namespace {
             // A list of delta source positions along the edge columns of the horizontal interpolation bands
             std::vector<afwGeom::Extent2D> yDeltaSrcPosList(edgeColList.size());
 
-            // Initialize _srcPosList for row -1
-            //srcPosView[-1] = computeSrcPos(-1, -1, destXY0, destWcs, srcWcs);
-            srcPosView[-1] = computeSrcPos(-1, -1);
-            for (int colBand = 1, endBand = edgeColList.size(); colBand < endBand; ++colBand) {
-                int const prevEndCol = edgeColList[colBand-1];
-                int const endCol = edgeColList[colBand];
-                afwGeom::Point2D leftSrcPos = srcPosView[prevEndCol];
-                afwGeom::Point2D rightSrcPos = computeSrcPos(endCol, -1);
-                afwGeom::Extent2D xDeltaSrcPos = (rightSrcPos - leftSrcPos) * invWidthList[colBand];
-
-                for (int col = prevEndCol + 1; col <= endCol; ++col) {
-                    srcPosView[col] = srcPosView[col-1] + xDeltaSrcPos;
-                }
+            // Source positions along the edge columns of the row before the current horizontal
+            // interpolation band (computed exactly, rather than interpolated)
+            std::vector<afwGeom::Point2D> edgeSrcPosList(edgeColList.size());
+            for (int colBand = 0, endBand = edgeColList.size(); colBand < endBand; ++colBand) {
+                edgeSrcPosList[colBand] = computeSrcPos(edgeColList[colBand], bandBegin - 1);
             }
 
-            int endRow = -1;
+            int endRow = bandBegin - 1;
             while (endRow < maxRow) {
                 // Next horizontal interpolation band
 
@@ -457,11 +500,26 @@ namespace {
                 assert(endRow - prevEndRow > 0);
                 double interpInvHeight = 1.0 / static_cast<double>(endRow - prevEndRow);
 
+                // Initialize _srcPosList for row prevEndRow by interpolating between the edge columns
+                srcPosView[-1] = edgeSrcPosList[0];
+                for (int colBand = 1, endBand = edgeColList.size(); colBand < endBand; ++colBand) {
+                    int const prevEndCol = edgeColList[colBand-1];
+                    int const endCol = edgeColList[colBand];
+                    afwGeom::Point2D leftSrcPos = srcPosView[prevEndCol];
+                    afwGeom::Extent2D xDeltaSrcPos =
+                        (edgeSrcPosList[colBand] - leftSrcPos) * invWidthList[colBand];
+
+                    for (int col = prevEndCol + 1; col <= endCol; ++col) {
+                        srcPosView[col] = srcPosView[col-1] + xDeltaSrcPos;
+                    }
+                }
+
                 // Set yDeltaSrcPosList for this horizontal interpolation band
                 for (int colBand = 0, endBand = edgeColList.size(); colBand < endBand; ++colBand) {
                     int endCol = edgeColList[colBand];
                     afwGeom::Point2D bottomSrcPos = computeSrcPos(endCol, endRow);
                     yDeltaSrcPosList[colBand] = (bottomSrcPos - srcPosView[endCol]) * interpInvHeight;
+                    edgeSrcPosList[colBand] = bottomSrcPos;
                 }
 
                 for (int row = prevEndRow + 1; row <= endRow; ++row) {
@@ -500,14 +558,13 @@ namespace {
         } else {
             // No interpolation
 
-            // initialize _srcPosList for row -1;
+            // initialize _srcPosList for row bandBegin - 1;
             // the first value is not needed, but it's safer to compute it
-            std::vector<afwGeom::Point2D>::iterator srcPosView = _srcPosList.begin() + 1;
             for (int col = -1; col < destWidth; ++col) {
-                srcPosView[col] = computeSrcPos(col, -1);
+                srcPosView[col] = computeSrcPos(col, bandBegin - 1);
             }
 
-            for (int row = 0; row < destHeight; ++row) {
+            for (int row = bandBegin; row < bandEnd; ++row) {
                 typename DestImageT::x_iterator destXIter = destImage.row_begin(row);
 
                 srcPosView[-1] = computeSrcPos(-1, row);
@@ -528,6 +585,241 @@ namespace {
         return numGoodPixels;
     }
 
+    // Warp one band of rows on its own thread, using that band's WarpAtOnePoint and position functor
+    template<typename DestImageT, typename SrcImageT>
+    class WarpBand {
+    public:
+        typedef afwMath::detail::WarpAtOnePoint<DestImageT, SrcImageT> WarpAtOnePoint;
+
+        WarpBand(
+            DestImageT &destImage,
+            std::vector<PTR(WarpAtOnePoint)> const &warpAtOnePoints,
+            std::vector<afwMath::detail::PositionFunctor::Ptr> const &positionFunctors,
+            int interpLength,
+            std::vector<int> &numGoodPixels
+        ) : _destImage(&destImage), _warpAtOnePoints(&warpAtOnePoints), _positionFunctors(&positionFunctors),
+            _interpLength(interpLength), _numGoodPixels(&numGoodPixels)
+        {}
+
+        void operator()(int i, int beginRow, int endRow) const {
+            (*_numGoodPixels)[i] = warpRows(*_destImage, *(*_warpAtOnePoints)[i], *(*_positionFunctors)[i],
+                                            _interpLength, beginRow, endRow);
+        }
+
+    private:
+        DestImageT *_destImage;
+        std::vector<PTR(WarpAtOnePoint)> const *_warpAtOnePoints;
+        std::vector<afwMath::detail::PositionFunctor::Ptr> const *_positionFunctors;
+        int _interpLength;
+        std::vector<int> *_numGoodPixels;
+    };
+
+    template<typename DestImageT, typename SrcImageT>
+    int doWarpImage(
+        DestImageT &destImage,                      ///< remapped %image
+        SrcImageT const &srcImage,                  ///< source %image
+        afwMath::detail::PositionFunctor const &computeSrcPos,   ///< Functor to compute source position
+            ///< called with dest row, column; returns source position (as a Point2D)
+        afwMath::WarpingControl const &control,     ///< warping parameters
+        typename DestImageT::SinglePixel padValue   ///< value to use for undefined pixels
+    ) {
+        if (afwMath::details::isSameObject(destImage, srcImage)) {
+            throw LSST_EXCEPT(pexExcept::InvalidParameterError,
+                "destImage is srcImage; cannot warp in place");
+        }
+        if (destImage.getBBox(afwImage::LOCAL).isEmpty()) {
+            return 0;
+        }
+        // if src image is too small then don't try to warp
+        try {
+            PTR(afwMath::SeparableKernel) warpingKernelPtr = control.getWarpingKernel();
+            warpingKernelPtr->shrinkBBox(srcImage.getBBox(afwImage::LOCAL));
+        } catch(...) {
+            for (int y = 0, height = destImage.getHeight(); y < height; ++y) {
+                for (typename DestImageT::x_iterator destPtr = destImage.row_begin(y), end = destImage.row_end(y);
+                    destPtr != end; ++destPtr) {
+                    *destPtr = padValue;
+                }
+            }
+            return 0;
+        }
+        int interpLength = control.getInterpLength();
+
+        // Get the source MaskedImage and a pixel accessor to it.
+        int const srcWidth = srcImage.getWidth();
+        int const srcHeight = srcImage.getHeight();
+        LOGL_DEBUG("TRACE2.afw.math.warp", "source image width=%d; height=%d", srcWidth, srcHeight);
+
+        int const destWidth = destImage.getWidth();
+        int const destHeight = destImage.getHeight();
+
+        LOGL_DEBUG("TRACE2.afw.math.warp", "remap image width=%d; height=%d", destWidth, destHeight);
+
+        // Set each pixel of destExposure's MaskedImage
+        LOGL_DEBUG("TRACE3.afw.math.warp", "Remapping masked image");
+
+        typedef afwMath::detail::WarpAtOnePoint<DestImageT, SrcImageT> WarpAtOnePoint;
+
+        std::vector<afwMath::detail::Band> const bands =
+            afwMath::detail::makeBands(0, destHeight, control.getNumThreads(), interpLength);
+        if (bands.size() == 1) {
+            WarpAtOnePoint warpAtOnePoint(srcImage, control, padValue);
+            return warpRows(destImage, warpAtOnePoint, computeSrcPos, interpLength, 0, destHeight);
+        }
+
+        // Every band gets its own warping kernels (which hold state) and position functor (Wcs need not be
+        // thread-safe); these are all made here, since they are Citizens
+        std::vector<PTR(WarpAtOnePoint)> warpAtOnePoints;
+        std::vector<afwMath::detail::PositionFunctor::Ptr> positionFunctors;
+        for (std::size_t i = 0; i < bands.size(); ++i) {
+            PTR(afwMath::WarpingControl) bandControl = copyWarpingControl(control);
+            warpAtOnePoints.push_back(std::make_shared<WarpAtOnePoint>(srcImage, *bandControl, padValue));
+            positionFunctors.push_back(computeSrcPos.clone());
+        }
+        std::vector<int> numGoodPixels(bands.size(), 0);
+        afwMath::detail::parallelForBands(
+            bands,
+            WarpBand<DestImageT, SrcImageT>(destImage, warpAtOnePoints, positionFunctors, interpLength,
+                                            numGoodPixels)
+        );
+
+        return std::accumulate(numGoodPixels.begin(), numGoodPixels.end(), 0);
+    }
+
+
+    /*
+     * Source positions of single destination pixels, consistent with those used by warpRows
+     *
+     * Without interpolation the positions are computed exactly. With interpolation they are interpolated
+     * (bilinearly) between the same grid of nodes that warpRows uses for the whole destination image;
+     * the positions of the nodes are computed exactly when first needed and cached, so the cost of
+     * a sparse warp scales with the number of pixels and nodes actually used.
+     */
+    class SparsePositions {
+    public:
+        SparsePositions(
+            afwMath::detail::PositionFunctor const &computeSrcPos,
+            int interpLength,
+            int destWidth,
+            int destHeight
+        ) : _computeSrcPos(computeSrcPos), _interpLength(interpLength),
+            _maxCol(destWidth - 1), _maxRow(destHeight - 1), _nodes()
+        {}
+
+        /// Return the source position of destination pixel (col, row); col and row must be >= -1
+        afwGeom::Point2D operator()(int col, int row) {
+            if (_interpLength <= 0) {
+                return _computeSrcPos(col, row);
+            }
+            int col0, col1, row0, row1;
+            double const xFrac = _bracket(col, _maxCol, col0, col1);
+            double const yFrac = _bracket(row, _maxRow, row0, row1);
+            afwGeom::Point2D const left = _interpolate(_node(col0, row0), _node(col0, row1), yFrac);
+            if (col0 == col1) {
+                return left;
+            }
+            return _interpolate(left, _interpolate(_node(col1, row0), _node(col1, row1), yFrac), xFrac);
+        }
+
+    private:
+        // Find the nodes bracketing index: -1, interpLength-1, 2*interpLength-1, ... and maxIndex;
+        // return the fractional position of index between them
+        double _bracket(int index, int maxIndex, int &lower, int &upper) const {
+            lower = ((index + 1)/_interpLength)*_interpLength - 1;
+            upper = std::min(lower + _interpLength, maxIndex);
+            if (index == lower || index == upper) {
+                upper = lower = index;
+                return 0.0;
+            }
+            return (index - lower)/static_cast<double>(upper - lower);
+        }
+
+        static afwGeom::Point2D _interpolate(afwGeom::Point2D const &a, afwGeom::Point2D const &b,
+                                             double frac) {
+            return frac == 0.0 ? a : a + (b - a)*frac;
+        }
+
+        afwGeom::Point2D const &_node(int col, int row) {
+            std::pair<int, int> const key(col, row);
+            std::map<std::pair<int, int>, afwGeom::Point2D>::iterator i = _nodes.find(key);
+            if (i == _nodes.end()) {
+                i = _nodes.insert(std::make_pair(key, _computeSrcPos(col, row))).first;
+            }
+            return i->second;
+        }
+
+        afwMath::detail::PositionFunctor const &_computeSrcPos;
+        int _interpLength;
+        int _maxCol;
+        int _maxRow;
+        std::map<std::pair<int, int>, afwGeom::Point2D> _nodes;
+    };
+
+    template<typename DestImageT, typename SrcImageT>
+    int doWarpSpans(
+        DestImageT &destImage,                      ///< remapped %image
+        afwGeom::SpanSet const &destSpans,          ///< pixels of destImage to warp (parent coordinates)
+        SrcImageT const &srcImage,                  ///< source %image
+        afwMath::detail::PositionFunctor const &computeSrcPos,   ///< Functor to compute source position
+            ///< called with dest row, column; returns source position (as a Point2D)
+        afwMath::WarpingControl const &control,     ///< warping parameters
+        typename DestImageT::SinglePixel padValue   ///< value to use for undefined pixels
+    ) {
+        if (afwMath::details::isSameObject(destImage, srcImage)) {
+            throw LSST_EXCEPT(pexExcept::InvalidParameterError,
+                "destImage is srcImage; cannot warp in place");
+        }
+        afwGeom::Box2I const destBBox = destImage.getBBox(afwImage::PARENT);
+        if (destBBox.isEmpty() || destSpans.empty()) {
+            return 0;
+        }
+        std::shared_ptr<afwGeom::SpanSet> const spans = destSpans.clippedTo(destBBox);
+
+        bool srcTooSmall = false;
+        try {
+            PTR(afwMath::SeparableKernel) warpingKernelPtr = control.getWarpingKernel();
+            warpingKernelPtr->shrinkBBox(srcImage.getBBox(afwImage::LOCAL));
+        } catch(...) {
+            srcTooSmall = true;
+        }
+
+        afwMath::detail::WarpAtOnePoint<DestImageT, SrcImageT> warpAtOnePoint(srcImage, control, padValue);
+        SparsePositions positions(computeSrcPos, control.getInterpLength(),
+                                  destImage.getWidth(), destImage.getHeight());
+
+        int numGoodPixels = 0;
+        // source positions one row above the span, for computing relative area
+        std::vector<afwGeom::Point2D> upSrcPosList;
+        for (afwGeom::SpanSet::const_iterator span = spans->begin(); span != spans->end(); ++span) {
+            int const row = span->getY() - destBBox.getMinY();
+            int const beginCol = span->getMinX() - destBBox.getMinX();
+            int const endCol = span->getMaxX() - destBBox.getMinX() + 1;
+            typename DestImageT::x_iterator destXIter = destImage.x_at(beginCol, row);
+            if (srcTooSmall) {
+                for (int col = beginCol; col < endCol; ++col, ++destXIter) {
+                    *destXIter = padValue;
+                }
+                continue;
+            }
+            upSrcPosList.resize(endCol - beginCol);
+            for (int col = beginCol; col < endCol; ++col) {
+                upSrcPosList[col - beginCol] = positions(col, row - 1);
+            }
+            afwGeom::Point2D leftSrcPos = positions(beginCol - 1, row);
+            for (int col = beginCol; col < endCol; ++col, ++destXIter) {
+                afwGeom::Point2D const srcPos = positions(col, row);
+                double const relativeArea = computeRelativeArea(srcPos, leftSrcPos,
+                                                                upSrcPosList[col - beginCol]);
+                leftSrcPos = srcPos;
+                if (warpAtOnePoint(destXIter, srcPos, relativeArea,
+                    typename lsst::afw::image::detail::image_traits<DestImageT>::image_category())) {
+                    ++numGoodPixels;
+                }
+            }
+        }
+        return numGoodPixels;
+    }
+
 } // namespace
 
 template<typename DestImageT, typename SrcImageT>
@@ -560,6 +852,56 @@ int afwMath::warpImage(
 }
 
 
+template<typename DestImageT, typename SrcImageT>
+int afwMath::warpImage(
+    DestImageT &destImage,
+    SrcImageT const &srcImage,
+    afwMath::WarpingPlan const &plan,
+    afwMath::WarpingControl const &control,
+    typename DestImageT::SinglePixel padValue
+) {
+    if (destImage.getBBox(afwImage::PARENT) != plan.getDestBBox()) {
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError,
+            "destImage does not have the bounding box of the WarpingPlan");
+    }
+    if (control.getInterpLength() != plan.getInterpLength()) {
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError,
+            "control and WarpingPlan have different interpolation lengths");
+    }
+    WarpingPlanPositionFunctor const computeSrcPos(plan);
+    return doWarpImage(destImage, srcImage, computeSrcPos, control, padValue);
+}
+
+template<typename DestImageT, typename SrcImageT>
+int afwMath::warpImage(
+    DestImageT &destImage,
+    lsst::afw::geom::SpanSet const &destSpans,
+    lsst::afw::image::Wcs const &destWcs,
+    SrcImageT const &srcImage,
+    lsst::afw::image::Wcs const &srcWcs,
+    afwMath::WarpingControl const &control,
+    typename DestImageT::SinglePixel padValue
+) {
+    afwGeom::Point2D const destXY0(destImage.getXY0());
+    afwImage::XYTransformFromWcsPair xyTransform{destWcs.clone(), srcWcs.clone()};
+    afwMath::detail::XYTransformPositionFunctor const computeSrcPos{destXY0, xyTransform};
+    return doWarpSpans(destImage, destSpans, srcImage, computeSrcPos, control, padValue);
+}
+
+template<typename DestImageT, typename SrcImageT>
+int afwMath::warpImage(
+    DestImageT &destImage,
+    lsst::afw::geom::SpanSet const &destSpans,
+    SrcImageT const &srcImage,
+    afwGeom::XYTransform const &xyTransform,
+    afwMath::WarpingControl const &control,
+    typename DestImageT::SinglePixel padValue
+) {
+    afwGeom::Point2D const destXY0(destImage.getXY0());
+    afwMath::detail::XYTransformPositionFunctor const computeSrcPos(destXY0, xyTransform);
+    return doWarpSpans(destImage, destSpans, srcImage, computeSrcPos, control, padValue);
+}
+
 template<typename DestImageT, typename SrcImageT>
 int afwMath::warpCenteredImage(
     DestImageT &destImage,
@@ -651,6 +993,33 @@ int afwMath::warpCenteredImage(
         MASKEDIMAGE(DESTIMAGEPIXELT)::SinglePixel padValue); NL \
     template int afwMath::warpImage( \
         IMAGE(DESTIMAGEPIXELT) &destImage, \
+        IMAGE(SRCIMAGEPIXELT) const &srcImage, \
+        afwMath::WarpingPlan const &plan, \
+        afwMath::WarpingControl const &control, \
+        IMAGE(DESTIMAGEPIXELT)::SinglePixel padValue); NL \
+    template int afwMath::warpImage( \
+        MASKEDIMAGE(DESTIMAGEPIXELT) &destImage, \
+        MASKEDIMAGE(SRCIMAGEPIXELT) const &srcImage, \
+        afwMath::WarpingPlan const &plan, \
+        afwMath::WarpingControl const &control, \
+        MASKEDIMAGE(DESTIMAGEPIXELT)::SinglePixel padValue); NL \
+    template int afwMath::warpImage( \
+        IMAGE(DESTIMAGEPIXELT) &destImage, \
+        afwImage::Wcs const &destWcs, \
+        IMAGE(SRCIMAGEPIXELT) const &srcImage, \
+        afwImage::Wcs const &srcWcs, \
+        afwMath::WarpingControl const &control, \
+        IMAGE(DESTIMAGEPIXELT)::SinglePixel padValue); NL \
+    template int afwMath::warpImage( \
+        MASKEDIMAGE(DESTIMAGEPIXELT) &destImage, \
+        afwImage::Wcs const &destWcs, \
+        MASKEDIMAGE(SRCIMAGEPIXELT) const &srcImage, \
+        afwImage::Wcs const &srcWcs, \
+        afwMath::WarpingControl const &control, \
+        MASKEDIMAGE(DESTIMAGEPIXELT)::SinglePixel padValue); NL \
+    template int afwMath::warpImage( \
+        IMAGE(DESTIMAGEPIXELT) &destImage, \
+        afwGeom::SpanSet const &destSpans, \
         afwImage::Wcs const &destWcs, \
         IMAGE(SRCIMAGEPIXELT) const &srcImage, \
         afwImage::Wcs const &srcWcs, \
@@ -658,11 +1027,26 @@ int afwMath::warpCenteredImage(
         IMAGE(DESTIMAGEPIXELT)::SinglePixel padValue); NL \
     template int afwMath::warpImage( \
         MASKEDIMAGE(DESTIMAGEPIXELT) &destImage, \
+        afwGeom::SpanSet const &destSpans, \
         afwImage::Wcs const &destWcs, \
         MASKEDIMAGE(SRCIMAGEPIXELT) const &srcImage, \
         afwImage::Wcs const &srcWcs, \
         afwMath::WarpingControl const &control, \
         MASKEDIMAGE(DESTIMAGEPIXELT)::SinglePixel padValue); NL \
+    template int afwMath::warpImage( \
+        IMAGE(DESTIMAGEPIXELT) &destImage, \
+        afwGeom::SpanSet const &destSpans, \
+        IMAGE(SRCIMAGEPIXELT) const &srcImage, \
+        afwGeom::XYTransform const &xyTransform, \
+        afwMath::WarpingControl const &control, \
+        IMAGE(DESTIMAGEPIXELT)::SinglePixel padValue); NL \
+    template int afwMath::warpImage( \
+        MASKEDIMAGE(DESTIMAGEPIXELT) &destImage, \
+        afwGeom::SpanSet const &destSpans, \
+        MASKEDIMAGE(SRCIMAGEPIXELT) const &srcImage, \
+        afwGeom::XYTransform const &xyTransform, \
+        afwMath::WarpingControl const &control, \
+        MASKEDIMAGE(DESTIMAGEPIXELT)::SinglePixel padValue); NL \
     template int afwMath::warpExposure( \
         EXPOSURE(DESTIMAGEPIXELT) &destExposure, \
         EXPOSURE(SRCIMAGEPIXELT) const &srcExposure, \
@@ -0,0 +1,139 @@
+// -*- lsst-c++ -*-
+
+#include <algorithm>
+
+#include "boost/format.hpp"
+
+#include "lsst/pex/exceptions.h"
+#include "lsst/afw/table/FitsReadControl.h"
+
+namespace lsst { namespace afw { namespace table {
+
+namespace {
+
+enum Comparison { EQUAL, NOT_EQUAL, LESS, LESS_EQUAL, GREATER, GREATER_EQUAL };
+
+char const * const OPERATORS[] = { "==", "!=", "<", "<=", ">", ">=" };
+
+bool compare(double a, int op, double b) {
+    switch (op) {
+    case EQUAL: return a == b;
+    case NOT_EQUAL: return a != b;
+    case LESS: return a < b;
+    case LESS_EQUAL: return a <= b;
+    case GREATER: return a > b;
+    case GREATER_EQUAL: return a >= b;
+    }
+    return false;
+}
+
+} // anonymous
+
+class FitsReadControl::Test {
+public:
+    virtual bool operator()(BaseRecord const & record) const = 0;
+    virtual ~Test() {}
+};
+
+namespace {
+
+template <typename T>
+class FieldTest : public FitsReadControl::Test {
+public:
+
+    FieldTest(Key<T> const & key, int op, double value) : _key(key), _op(op), _value(value) {}
+
+    virtual bool operator()(BaseRecord const & record) const {
+        return compare(static_cast<double>(record.get(_key)), _op, _value);
+    }
+
+private:
+    Key<T> _key;
+    int _op;
+    double _value;
+};
+
+// A Schema::forEach functor that makes a FieldTest for the field with the given name.
+struct MakeTest {
+
+    template <typename T>
+    void operator()(SchemaItem<T> const & item) const {
+        if (item.field.getName() == name) {
+            result = std::make_shared< FieldTest<T> >(item.key, op, value);
+        }
+    }
+
+    template <typename T>
+    void operator()(SchemaItem< Array<T> > const & item) const {
+        fail(item.field.getName());
+    }
+
+    void operator()(SchemaItem<std::string> const & item) const {
+        fail(item.field.getName());
+    }
+
+    void fail(std::string const & fieldName) const {
+        if (fieldName == name) {
+            throw LSST_EXCEPT(
+                pex::exceptions::InvalidParameterError,
+                (boost::format("Cannot select rows using non-scalar field '%s'") % name).str()
+            );
+        }
+    }
+
+    std::string name;
+    int op;
+    double value;
+    mutable std::shared_ptr<FitsReadControl::Test const> result;
+};
+
+} // anonymous
+
+void FitsReadControl::addCondition(std::string const & name, std::string const & op, double value) {
+    int const nOperators = sizeof(OPERATORS)/sizeof(OPERATORS[0]);
+    int const i = std::find(OPERATORS, OPERATORS + nOperators, op) - OPERATORS;
+    if (i == nOperators) {
+        throw LSST_EXCEPT(
+            pex::exceptions::InvalidParameterError,
+            (boost::format("Unknown comparison operator '%s'") % op).str()
+        );
+    }
+    Condition condition = { name, i, value };
+    _conditions.push_back(condition);
+}
+
+std::pair<std::size_t, std::size_t> FitsReadControl::getRowRange(std::size_t nRows) const {
+    std::int64_t const n = nRows;
+    std::int64_t begin = (rowBegin < 0) ? rowBegin + n : rowBegin;
+    std::int64_t end = (rowEnd < 0) ? rowEnd + n : rowEnd;
+    begin = std::min(std::max(begin, std::int64_t(0)), n);
+    end = std::min(std::max(end, begin), n);
+    return std::make_pair(std::size_t(begin), std::size_t(end));
+}
+
+FitsReadControl::Filter FitsReadControl::makeFilter(Schema const & schema) const {
+    Filter filter;
+    for (std::vector<Condition>::const_iterator i = _conditions.begin(); i != _conditions.end(); ++i) {
+        MakeTest f = { schema.getAliasMap()->apply(i->name), i->op, i->value };
+        schema.forEach(f);
+        if (!f.result) {
+            throw LSST_EXCEPT(
+                pex::exceptions::NotFoundError,
+                (boost::format("Field '%s' not found") % i->name).str()
+            );
+        }
+        filter._tests.push_back(f.result);
+    }
+    return filter;
+}
+
+bool FitsReadControl::Filter::operator()(BaseRecord const & record) const {
+    for (auto i = _tests.begin(); i != _tests.end(); ++i) {
+        if (!(**i)(record)) {
+            return false;
+        }
+    }
+    return true;
+}
+
+}}} // namespace lsst::afw::table
@@ -26,10 +26,13 @@
 #include <cmath>
 #include <memory>
 
+#include "boost/format.hpp"
+
 #include "lsst/pex/exceptions.h"
 #include "lsst/log/Log.h"
 #include "lsst/afw/table/Match.h"
 #include "lsst/afw/geom/Angle.h"
+#include "lsst/afw/math/detail/Parallel.h"
 
 namespace lsst { namespace afw { namespace table { namespace {
 
@@ -100,6 +103,75 @@ size_t makeRecordPositions(
 template size_t makeRecordPositions(SimpleCatalog const &, RecordPos<SimpleRecord> *);
 template size_t makeRecordPositions(SourceCatalog const &, RecordPos<SourceRecord> *);
 
+/**
+ * Set @a v to the unit vector of the position of @a record (computed exactly as in
+ * makeRecordPositions), returning false if its ra or dec is NaN
+ */
+template <typename Record>
+bool getUnitVector(Record const & record, Key<Angle> const & raKey, Key<Angle> const & decKey,
+                   double v[3]) {
+    geom::Angle ra = record.get(raKey);
+    geom::Angle dec = record.get(decKey);
+    if (std::isnan(ra.asRadians()) || std::isnan(dec.asRadians())) {
+        return false;
+    }
+    double cosDec = std::cos(dec);
+    v[0] = std::cos(ra)*cosDec;
+    v[1] = std::sin(ra)*cosDec;
+    v[2] = std::sin(dec);
+    return true;
+}
+
+/// Order the nodes of a MatchIndex by one coordinate of their unit vectors
+template <typename PointT>
+struct CmpPointAxis {
+    explicit CmpPointAxis(int axis_) : axis(axis_) {}
+
+    bool operator()(PointT const & p1, PointT const & p2) const {
+        return p1.v[axis] < p2.v[axis];
+    }
+
+    int axis;
+};
+
+/// Order the matches found by MatchIndex by the positions of the indexed and then the other records
+template <typename RowMatchT>
+struct CmpRowMatch {
+    bool operator()(RowMatchT const & m1, RowMatchT const & m2) const {
+        return (m1.row1 < m2.row1) || (m1.row1 == m2.row1 && m1.row2 < m2.row2);
+    }
+};
+
+/// Schema and keys of the table representation of a MatchIndex
+struct MatchIndexKeys {
+    Schema schema;
+    Key<RecordId> row;
+    Key<RecordId> id;
+    Key<double> x;
+    Key<double> y;
+    Key<double> z;
+    Key<int> axis;
+
+    /// Construct a new schema for MatchIndex::pack
+    MatchIndexKeys() :
+        schema(),
+        row(schema.addField<RecordId>("row", "Index of the record in the catalog.")),
+        id(schema.addField<RecordId>("id", "ID of the record.")),
+        x(schema.addField<double>("x", "x component of the unit vector of the record's position.")),
+        y(schema.addField<double>("y", "y component of the unit vector of the record's position.")),
+        z(schema.addField<double>("z", "z component of the unit vector of the record's position.")),
+        axis(schema.addField<int>("axis", "Component used to split the subtrees of this node."))
+    {}
+
+    /// Look up the keys in the schema of a packed MatchIndex
+    explicit MatchIndexKeys(Schema const & schema_) :
+        schema(schema_),
+        row(schema["row"]), id(schema["id"]),
+        x(schema["x"]), y(schema["y"]), z(schema["z"]),
+        axis(schema["axis"])
+    {}
+};
+
 template <typename Cat1, typename Cat2>
 bool doSelfMatchIfSame(
     std::vector< Match< typename Cat1::Record, typename Cat2::Record> > & result,
@@ -123,91 +195,457 @@ bool doSelfMatchIfSame(
 
 } // anonymous
 
+template <typename Cat>
+MatchIndex<Cat>::MatchIndex(Cat const & cat) : _catalog(cat), _points() {
+    Key<Angle> raKey = Cat::Table::getCoordKey().getRa();
+    Key<Angle> decKey = Cat::Table::getCoordKey().getDec();
+    _points.reserve(cat.size());
+    size_t row = 0;
+    for (typename Cat::const_iterator i(cat.begin()), e(cat.end()); i != e; ++i, ++row) {
+        Point p;
+        if (!getUnitVector(*i, raKey, decKey, p.v)) {
+            continue;
+        }
+        p.row = row;
+        p.axis = 0;
+        _points.push_back(p);
+    }
+    if (_points.size() < cat.size()) {
+        LOGLS_WARN("afw.table.matchRaDec", "At least one source had ra or dec equal to NaN");
+    }
+    _build(0, _points.size());
+}
 
-template <typename Cat1, typename Cat2>
-std::vector< Match< typename Cat1::Record, typename Cat2::Record> >
-matchRaDec(Cat1 const & cat1, Cat2 const & cat2, Angle radius, bool closest)
-{
-    MatchControl mc;
-    mc.findOnlyClosest = closest;
+template <typename Cat>
+MatchIndex<Cat>::MatchIndex(Cat const & cat, BaseCatalog const & packed) : _catalog(cat), _points() {
+    MatchIndexKeys const keys(packed.getSchema());
+    _points.reserve(packed.size());
+    for (BaseCatalog::const_iterator i = packed.begin(); i != packed.end(); ++i) {
+        RecordId const row = i->get(keys.row);
+        if (row < 0 || static_cast<size_t>(row) >= cat.size() || cat[row].getId() != i->get(keys.id)) {
+            throw LSST_EXCEPT(
+                pex::exceptions::InvalidParameterError,
+                (boost::format("Index entry for record %d (ID %d) doesn't match the catalog")
+                 % row % i->get(keys.id)).str()
+            );
+        }
+        Point p;
+        p.v[0] = i->get(keys.x);
+        p.v[1] = i->get(keys.y);
+        p.v[2] = i->get(keys.z);
+        p.row = row;
+        p.axis = i->get(keys.axis);
+        if (p.axis < 0 || p.axis > 2) {
+            throw LSST_EXCEPT(
+                pex::exceptions::InvalidParameterError,
+                (boost::format("Invalid axis %d in index entry for record %d") % p.axis % row).str()
+            );
+        }
+        _points.push_back(p);
+    }
+}
 
-    return matchRaDec(cat1, cat2, radius, mc);
+template <typename Cat>
+BaseCatalog MatchIndex<Cat>::pack() const {
+    MatchIndexKeys const keys;
+    BaseCatalog result(keys.schema);
+    result.getTable()->preallocate(_points.size());
+    result.reserve(_points.size());
+    for (typename std::vector<Point>::const_iterator i = _points.begin(); i != _points.end(); ++i) {
+        PTR(BaseRecord) record = result.addNew();
+        record->set(keys.row, i->row);
+        record->set(keys.id, _catalog[i->row].getId());
+        record->set(keys.x, i->v[0]);
+        record->set(keys.y, i->v[1]);
+        record->set(keys.z, i->v[2]);
+        record->set(keys.axis, i->axis);
+    }
+    return result;
 }
 
-template <typename Cat1, typename Cat2>
-std::vector< Match< typename Cat1::Record, typename Cat2::Record> >
-matchRaDec(Cat1 const & cat1, Cat2 const & cat2, Angle radius,
-           MatchControl const& mc)
-{
-    typedef Match< typename Cat1::Record, typename Cat2::Record> MatchT;
-    std::vector<MatchT> matches;
+/*
+ * Arrange _points[begin, end) as a balanced k-d tree: the root is the middle element, which splits
+ * the subtree along the coordinate of greatest extent; the points before it have values of that
+ * coordinate no larger than the root's, and those after it no smaller.
+ */
+template <typename Cat>
+void MatchIndex<Cat>::_build(size_t begin, size_t end) {
+    while (begin < end) {
+        double lo[3], hi[3];
+        for (int k = 0; k < 3; ++k) {
+            lo[k] = hi[k] = _points[begin].v[k];
+        }
+        for (size_t i = begin + 1; i < end; ++i) {
+            for (int k = 0; k < 3; ++k) {
+                lo[k] = std::min(lo[k], _points[i].v[k]);
+                hi[k] = std::max(hi[k], _points[i].v[k]);
+            }
+        }
+        int axis = 0;
+        for (int k = 1; k < 3; ++k) {
+            if (hi[k] - lo[k] > hi[axis] - lo[axis]) {
+                axis = k;
+            }
+        }
 
-    if (doSelfMatchIfSame(matches, cat1, cat2, radius)) return matches;
+        size_t const mid = begin + (end - begin)/2;
+        std::nth_element(_points.begin() + begin, _points.begin() + mid, _points.begin() + end,
+                         CmpPointAxis<Point>(axis));
+        _points[mid].axis = axis;
 
+        _build(begin, mid);
+        begin = mid + 1;
+    }
+}
+
+/*
+ * Append (row, squared distance) to neighbors for every point in the subtree _points[begin, end) that
+ * lies strictly within d2Limit of v; chord is a (generous) sqrt(d2Limit), used to prune subtrees
+ */
+template <typename Cat>
+void MatchIndex<Cat>::_findNeighbors(
+    double const * v, double chord, double d2Limit, size_t begin, size_t end,
+    std::vector< std::pair<size_t, double> > & neighbors
+) const {
+    while (begin < end) {
+        size_t const mid = begin + (end - begin)/2;
+        Point const & p = _points[mid];
+        double dx = p.v[0] - v[0];
+        double dy = p.v[1] - v[1];
+        double dz = p.v[2] - v[2];
+        double d2 = dx*dx + dy*dy + dz*dz;
+        if (d2 < d2Limit) {
+            neighbors.push_back(std::make_pair(p.row, d2));
+        }
+
+        double const offset = v[p.axis] - p.v[p.axis];
+        bool const searchBelow = (offset <= chord);
+        bool const searchAbove = (offset >= -chord);
+        if (searchBelow && searchAbove) {
+            _findNeighbors(v, chord, d2Limit, begin, mid, neighbors);
+            begin = mid + 1;
+        } else if (searchBelow) {
+            end = mid;
+        } else {
+            begin = mid + 1;
+        }
+    }
+}
+
+template <typename Cat>
+template <typename Cat2>
+void MatchIndex<Cat>::matchRaDecRows(Cat2 const & cat2, Angle radius, MatchControl const& mc,
+                                     std::vector<RowMatch> & result) const
+{
     if (radius < 0.0 || (radius > (45. * geom::degrees))) {
         throw LSST_EXCEPT(pex::exceptions::RangeError,
                           "match radius out of range (0 to 45 degrees)");
     }
-    if (cat1.size() == 0 || cat2.size() == 0) {
-        return matches;
+    if (_catalog.size() == 0 || cat2.size() == 0) {
+        return;
     }
-    // setup match parameters
     double const d2Limit = radius.toUnitSphereDistanceSquared();
+    double const chord = (1.0 + 1e-9)*std::sqrt(d2Limit); // allow for roundoff when pruning the tree
+
+    // Look up each record of cat2 in the index
+    Key<Angle> raKey = Cat2::Table::getCoordKey().getRa();
+    Key<Angle> decKey = Cat2::Table::getCoordKey().getDec();
+    std::vector<RowMatch> candidates;
+    std::vector< std::pair<size_t, double> > neighbors;
+    bool foundNaN = false;
+    size_t row2 = 0;
+    for (typename Cat2::const_iterator i(cat2.begin()), e(cat2.end()); i != e; ++i, ++row2) {
+        double v[3];
+        if (!getUnitVector(*i, raKey, decKey, v)) {
+            foundNaN = true;
+            continue;
+        }
+        neighbors.clear();
+        _findNeighbors(v, chord, d2Limit, 0, _points.size(), neighbors);
+        for (size_t j = 0; j < neighbors.size(); ++j) {
+            candidates.push_back(RowMatch(neighbors[j].first, row2, neighbors[j].second));
+        }
+    }
+    if (foundNaN) {
+        LOGLS_WARN("afw.table.matchRaDec", "At least one source had ra or dec equal to NaN");
+    }
+    std::sort(candidates.begin(), candidates.end(), CmpRowMatch<RowMatch>());
+
+    // Records in the indexed catalog with a valid position but no match
+    std::vector<bool> unmatched;
+    if (mc.includeMismatches) {
+        unmatched.assign(_catalog.size(), false);
+        for (size_t i = 0; i < _points.size(); ++i) {
+            unmatched[_points[i].row] = true;
+        }
+        for (size_t i = 0; i < candidates.size(); ++i) {
+            unmatched[candidates[i].row1] = false;
+        }
+    }
 
-    // Build position lists
-    size_t len1 = cat1.size();
-    size_t len2 = cat2.size();
-
-    typedef RecordPos<typename Cat1::Record> Pos1;
-    typedef RecordPos<typename Cat2::Record> Pos2;
-    std::unique_ptr<Pos1[]> pos1(new Pos1[len1]);
-    std::unique_ptr<Pos2[]> pos2(new Pos2[len2]);
-    len1 = makeRecordPositions(cat1, pos1.get());
-    len2 = makeRecordPositions(cat2, pos2.get());
-    PTR(typename Cat2::Record) nullRecord = std::shared_ptr<typename Cat2::Record>();
+    size_t row1 = 0;                    // next indexed record that might be a mismatch
+    for (size_t i = 0; i < candidates.size(); ) {
+        size_t const row = candidates[i].row1;
+        size_t end = i + 1;             // end of the candidates for this indexed record
+        while (end < candidates.size() && candidates[end].row1 == row) { ++end; }
 
-    for (size_t i = 0, start = 0; i < len1; ++i) {
-        double minDec = pos1[i].dec - radius.asRadians();
-        while (start < len2 && pos2[start].dec < minDec) { ++start; }
-        if (start == len2) {
-            break;
+        for (; mc.includeMismatches && row1 < row; ++row1) {
+            if (unmatched[row1]) {
+                result.push_back(RowMatch(row1, NO_MATCH, NAN));
+            }
         }
-        double maxDec = pos1[i].dec + radius.asRadians();
-        size_t closestIndex = -1;          // Index of closest match (if any)
-        double d2Include = d2Limit;     // Squared distance for inclusion of match
-        bool found = false;             // Found anything?
-        size_t nMatches = 0;            // Number of matches
-        for (size_t j = start; j < len2 && pos2[j].dec <= maxDec; ++j) {
-            double dx = pos1[i].x - pos2[j].x;
-            double dy = pos1[i].y - pos2[j].y;
-            double dz = pos1[i].z - pos2[j].z;
-            double d2 = dx*dx + dy*dy + dz*dz;
-            if (d2 < d2Include) {
-                if (mc.findOnlyClosest) {
-                    d2Include = d2;
-                    closestIndex = j;
-                    found = true;
-                } else {
-                    matches.push_back(
-                        MatchT(pos1[i].src, pos2[j].src, geom::Angle::fromUnitSphereDistanceSquared(d2))
-                    );
+        if (mc.findOnlyClosest) {
+            size_t closest = i;         // the first of equally-close candidates wins
+            for (size_t j = i + 1; j < end; ++j) {
+                if (candidates[j].d2 < candidates[closest].d2) {
+                    closest = j;
                 }
-                ++nMatches;
             }
+            result.push_back(candidates[closest]);
+        } else {
+            result.insert(result.end(), candidates.begin() + i, candidates.begin() + end);
         }
-        if (mc.includeMismatches && nMatches == 0) {
-            matches.push_back(MatchT(pos1[i].src, nullRecord, NAN));
+        i = end;
+    }
+    for (; mc.includeMismatches && row1 < _catalog.size(); ++row1) {
+        if (unmatched[row1]) {
+            result.push_back(RowMatch(row1, NO_MATCH, NAN));
         }
-        if (mc.findOnlyClosest && found) {
+    }
+}
+
+template <typename Cat>
+template <typename Cat2>
+std::vector< Match<typename Cat::Record, typename Cat2::Record> >
+MatchIndex<Cat>::matchRaDec(Cat2 const & cat2, Angle radius, MatchControl const& mc) const
+{
+    typedef Match<Record, typename Cat2::Record> MatchT;
+    std::vector<RowMatch> rows;
+    matchRaDecRows(cat2, radius, mc, rows);
+
+    PTR(typename Cat2::Record) nullRecord = std::shared_ptr<typename Cat2::Record>();
+    std::vector<MatchT> matches;
+    matches.reserve(rows.size());
+    for (typename std::vector<RowMatch>::const_iterator i = rows.begin(); i != rows.end(); ++i) {
+        if (i->row2 == NO_MATCH) {
+            matches.push_back(MatchT(_catalog.get(i->row1), nullRecord, NAN));
+        } else {
             matches.push_back(
-                MatchT(pos1[i].src, pos2[closestIndex].src,
-                       geom::Angle::fromUnitSphereDistanceSquared(d2Include))
+                MatchT(_catalog.get(i->row1), cat2.get(i->row2),
+                       geom::Angle::fromUnitSphereDistanceSquared(i->d2))
             );
         }
     }
     return matches;
 }
 
+template <typename Cat>
+template <typename Cat2>
+BaseCatalog MatchIndex<Cat>::matchRaDecRows(Cat2 const & cat2, Angle radius, MatchControl const& mc) const
+{
+    std::vector<RowMatch> rows;
+    matchRaDecRows(cat2, radius, mc, rows);
+
+    Schema schema;
+    Key<RecordId> key1 = schema.addField<RecordId>("first", "Index of the record in the indexed catalog.");
+    Key<RecordId> key2 = schema.addField<RecordId>("second", "Index of the record in the other catalog.");
+    Key<double> keyD = schema.addField<double>("distance", "Distance between matched records (radians).");
+    BaseCatalog result(schema);
+    result.getTable()->preallocate(rows.size());
+    result.reserve(rows.size());
+    for (typename std::vector<RowMatch>::const_iterator i = rows.begin(); i != rows.end(); ++i) {
+        PTR(BaseRecord) record = result.addNew();
+        record->set(key1, i->row1);
+        if (i->row2 == NO_MATCH) {
+            record->set(key2, -1);
+            record->set(keyD, NAN);
+        } else {
+            record->set(key2, i->row2);
+            record->set(keyD, geom::Angle::fromUnitSphereDistanceSquared(i->d2).asRadians());
+        }
+    }
+    return result;
+}
+
+template class MatchIndex<SimpleCatalog>;
+template class MatchIndex<SourceCatalog>;
+
+template SimpleMatchVector MatchIndex<SimpleCatalog>::matchRaDec(
+    SimpleCatalog const &, Angle, MatchControl const&) const;
+template ReferenceMatchVector MatchIndex<SimpleCatalog>::matchRaDec(
+    SourceCatalog const &, Angle, MatchControl const&) const;
+template SourceMatchVector MatchIndex<SourceCatalog>::matchRaDec(
+    SourceCatalog const &, Angle, MatchControl const&) const;
+template BaseCatalog MatchIndex<SimpleCatalog>::matchRaDecRows(
+    SimpleCatalog const &, Angle, MatchControl const&) const;
+template BaseCatalog MatchIndex<SimpleCatalog>::matchRaDecRows(
+    SourceCatalog const &, Angle, MatchControl const&) const;
+template BaseCatalog MatchIndex<SourceCatalog>::matchRaDecRows(
+    SourceCatalog const &, Angle, MatchControl const&) const;
+
+namespace {
+
+/*
+ * Match each catalog in a band of a batch to the references fixed at the start of the batch; the work
+ * done by each thread in multiMatchRaDec.  Each thread writes only the matches of its own catalogs.
+ */
+template <typename Cat>
+class MatchToReferences {
+public:
+    typedef typename MatchIndex<Cat>::RowMatch RowMatch;
+
+    MatchToReferences(MatchIndex<Cat> const & index, std::vector<Cat> const & catalogs, int batchBegin,
+                      Angle radius, std::vector< std::vector<RowMatch> > & matches) :
+        _index(&index), _catalogs(&catalogs), _batchBegin(batchBegin), _radius(radius), _matches(&matches)
+    {}
+
+    void operator()(int, int begin, int end) const {
+        for (int k = begin; k < end; ++k) {
+            (*_matches)[k - _batchBegin].clear();
+            _index->matchRaDecRows((*_catalogs)[k], _radius, MatchControl(), (*_matches)[k - _batchBegin]);
+        }
+    }
+
+private:
+    MatchIndex<Cat> const * _index;
+    std::vector<Cat> const * _catalogs;
+    int _batchBegin;
+    Angle _radius;
+    std::vector< std::vector<RowMatch> > * _matches;
+};
+
+/// Order (row, object) pairs by row alone, for a stable sort
+struct CmpFirst {
+    bool operator()(std::pair<size_t, RecordId> const & a, std::pair<size_t, RecordId> const & b) const {
+        return a.first < b.first;
+    }
+};
+
+} // anonymous
+
+template <typename Cat>
+BaseCatalog multiMatchRaDec(std::vector<Cat> const & catalogs, Angle radius, int nThreads)
+{
+    typedef typename MatchIndex<Cat>::RowMatch RowMatch;
+
+    if (radius < 0.0 || (radius > (45. * geom::degrees))) {
+        throw LSST_EXCEPT(pex::exceptions::RangeError,
+                          "match radius out of range (0 to 45 degrees)");
+    }
+
+    Schema schema;
+    Key<int> catalogKey = schema.addField<int>("catalog", "Index of the record's catalog.");
+    Key<RecordId> rowKey = schema.addField<RecordId>("row", "Index of the record in its catalog.");
+    Key<RecordId> objectKey = schema.addField<RecordId>("object", "Index of the record's object.");
+    BaseCatalog result(schema);
+
+    int const nCatalogs = catalogs.size();
+    int const batchSize = std::max(nThreads, 1);
+    Cat refs;                           // the first record of each object found before this batch
+    std::vector<RecordId> refObjects;   // the object of each record in refs
+    RecordId nObjects = 0;
+    std::vector< std::vector<RowMatch> > batchMatches(batchSize);
+    std::vector<RowMatch> newMatches;
+    std::vector< std::pair<size_t, RecordId> > rowObjects; // (row, object) for each match to a catalog
+    for (int batchBegin = 0; batchBegin < nCatalogs; batchBegin += batchSize) {
+        int const batchEnd = std::min(batchBegin + batchSize, nCatalogs);
+        if (!refs.empty()) {
+            MatchIndex<Cat> index(refs);
+            math::detail::parallelForBands(
+                math::detail::makeBands(batchBegin, batchEnd, batchSize),
+                MatchToReferences<Cat>(index, catalogs, batchBegin, radius, batchMatches)
+            );
+        }
+        Cat newRefs;                    // the first record of each object found in this batch
+        std::vector<RecordId> newRefObjects;
+        for (int k = batchBegin; k < batchEnd; ++k) {
+            Cat const & catalog = catalogs[k];
+            // The objects matched to each record, ordered by record and then (as the matches to refs
+            // precede those to newRefs) by object
+            rowObjects.clear();
+            if (!refs.empty()) {
+                std::vector<RowMatch> const & matches = batchMatches[k - batchBegin];
+                for (typename std::vector<RowMatch>::const_iterator i = matches.begin();
+                     i != matches.end(); ++i) {
+                    rowObjects.push_back(std::make_pair(i->row2, refObjects[i->row1]));
+                }
+            }
+            if (!newRefs.empty()) {
+                newMatches.clear();
+                MatchIndex<Cat>(newRefs).matchRaDecRows(catalog, radius, MatchControl(), newMatches);
+                for (typename std::vector<RowMatch>::const_iterator i = newMatches.begin();
+                     i != newMatches.end(); ++i) {
+                    rowObjects.push_back(std::make_pair(i->row2, newRefObjects[i->row1]));
+                }
+            }
+            std::stable_sort(rowObjects.begin(), rowObjects.end(), CmpFirst());
+
+            // As MultiMatch.add does: the first match of each matched record in row order, then the
+            // second match of those with two or more, and so on; then the unmatched records as new objects
+            std::vector<size_t> nMatches(catalog.size(), 0);
+            std::vector<size_t> firstMatch(catalog.size(), 0); // index in rowObjects
+            for (size_t i = 0; i < rowObjects.size(); ++i) {
+                if (nMatches[rowObjects[i].first]++ == 0) {
+                    firstMatch[rowObjects[i].first] = i;
+                }
+            }
+            size_t const maxMatches = nMatches.empty() ? 0 :
+                *std::max_element(nMatches.begin(), nMatches.end());
+            for (size_t n = 0; n < maxMatches; ++n) {
+                for (size_t row = 0; row < catalog.size(); ++row) {
+                    if (nMatches[row] > n) {
+                        PTR(BaseRecord) record = result.addNew();
+                        record->set(catalogKey, k);
+                        record->set(rowKey, row);
+                        record->set(objectKey, rowObjects[firstMatch[row] + n].second);
+                    }
+                }
+            }
+            for (size_t row = 0; row < catalog.size(); ++row) {
+                if (nMatches[row] == 0) {
+                    PTR(BaseRecord) record = result.addNew();
+                    record->set(catalogKey, k);
+                    record->set(rowKey, row);
+                    record->set(objectKey, nObjects);
+                    newRefs.push_back(catalog.get(row));
+                    newRefObjects.push_back(nObjects++);
+                }
+            }
+        }
+        for (size_t i = 0; i < newRefs.size(); ++i) {
+            refs.push_back(newRefs.get(i));
+        }
+        refObjects.insert(refObjects.end(), newRefObjects.begin(), newRefObjects.end());
+    }
+    return result;
+}
+
+template BaseCatalog multiMatchRaDec(std::vector<SimpleCatalog> const &, Angle, int);
+template BaseCatalog multiMatchRaDec(std::vector<SourceCatalog> const &, Angle, int);
+
+template <typename Cat1, typename Cat2>
+std::vector< Match< typename Cat1::Record, typename Cat2::Record> >
+matchRaDec(Cat1 const & cat1, Cat2 const & cat2, Angle radius, bool closest)
+{
+    MatchControl mc;
+    mc.findOnlyClosest = closest;
+
+    return matchRaDec(cat1, cat2, radius, mc);
+}
+
+template <typename Cat1, typename Cat2>
+std::vector< Match< typename Cat1::Record, typename Cat2::Record> >
+matchRaDec(Cat1 const & cat1, Cat2 const & cat2, Angle radius,
+           MatchControl const& mc)
+{
+    typedef Match< typename Cat1::Record, typename Cat2::Record> MatchT;
+    std::vector<MatchT> matches;
+
+    if (doSelfMatchIfSame(matches, cat1, cat2, radius)) return matches;
+
+    return MatchIndex<Cat1>(cat1).matchRaDec(cat2, radius, mc);
+}
+
 #define LSST_MATCH_RADEC(RTYPE, C1, C2)                                  \
             template RTYPE matchRaDec(C1 const &, C2 const &, Angle, bool); \
             template RTYPE matchRaDec(C1 const &, C2 const &, Angle, MatchControl const&)
@@ -33,7 +33,10 @@ FitsReader::FitsReader(std::string const & name) {
 }
 
 FitsReader const * FitsReader::_lookupFitsReader(daf::base::PropertyList const & metadata) {
-    std::string name = metadata.get(std::string("AFW_TYPE"), std::string("BASE"));
+    return _lookupFitsReader(metadata.get(std::string("AFW_TYPE"), std::string("BASE")));
+}
+
+FitsReader const * FitsReader::_lookupFitsReader(std::string const & name) {
     Registry::iterator i = getRegistry().find(name);
     if (i == getRegistry().end()) {
         throw LSST_EXCEPT(
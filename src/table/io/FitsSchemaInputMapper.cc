@@ -1,9 +1,12 @@
 // -*- lsst-c++ -*-
 
+#include <algorithm>
 #include <array>
 #include <cmath>
 #include <cstdint>
 #include <cstdio>
+#include <memory>
+#include <set>
 #include <string>
 
 #include "boost/regex.hpp"
@@ -36,6 +39,66 @@ private:
     std::string const & _v;
 };
 
+// Read nElements values per row from the given rows of a column into a contiguous array.
+template <typename T>
+void readBlock(afw::fits::Fits & fits, int column, std::size_t firstRow, std::size_t nRows, int nElements,
+               T * data) {
+    fits.readTableArray(firstRow, column, nRows*nElements, data);
+}
+
+// cfitsio only advances to the next row at a byte boundary when reading bits, so bit (flag) columns
+// must be read a row at a time unless each row holds a whole number of bytes.
+void readBlock(afw::fits::Fits & fits, int column, std::size_t firstRow, std::size_t nRows, int nElements,
+               bool * data) {
+    if (nElements % 8 == 0) {
+        fits.readTableArray(firstRow, column, nRows*nElements, data);
+        return;
+    }
+    for (std::size_t i = 0; i != nRows; ++i) {
+        fits.readTableArray(firstRow + i, column, nElements, data + i*nElements);
+    }
+}
+
+// A buffer for the values of a block of consecutive rows of a FITS binary table column.
+template <typename T>
+class ColumnBuffer {
+public:
+
+    ColumnBuffer() : _firstRow(0), _nRows(0), _nElements(0), _capacity(0) {}
+
+    // Read nElements values per row from the given rows of a column.
+    void read(afw::fits::Fits & fits, int column, std::size_t firstRow, std::size_t nRows, int nElements) {
+        std::size_t const size = nRows*nElements;
+        if (size > _capacity) {
+            _data.reset(new T[size]);
+            _capacity = size;
+        }
+        _nRows = 0; // in case the read throws
+        readBlock(fits, column, firstRow, nRows, nElements, _data.get());
+        _firstRow = firstRow;
+        _nRows = nRows;
+        _nElements = nElements;
+    }
+
+    // Return the values for the given row, or null if it isn't in the buffer.
+    T const * get(std::size_t row) const {
+        if (row < _firstRow || row - _firstRow >= _nRows) {
+            return 0;
+        }
+        return _data.get() + (row - _firstRow)*_nElements;
+    }
+
+private:
+    std::size_t _firstRow;
+    std::size_t _nRows;
+    int _nElements;
+    std::size_t _capacity;
+    std::unique_ptr<T[]> _data;
+};
+
+// The maximum number of bytes of record data to read from each block of rows in FitsSchemaInputMapper
+std::size_t const BLOCK_BYTES = 1 << 22;
+
 } // anonymous
 
 class FitsSchemaInputMapper::Impl {
@@ -80,15 +143,17 @@ public:
     ByName & byName() { return inputs.get<2>(); }
     AsList & asList() { return inputs.get<3>(); }
 
-    Impl() : version(0), flagColumn(0), archiveHdu(-1) {}
+    Impl() : version(0), flagColumn(0), archiveHdu(-1), nFlagsRead(0) {}
 
     int version;
     int flagColumn;
     int archiveHdu;
     Schema schema;
     std::vector<std::unique_ptr<FitsColumnReader>> readers;
-    std::vector<Key<Flag>> flagKeys;
+    std::vector<Key<Flag>> flagKeys;    // invalid for bits that aren't being read
+    int nFlagsRead;
     std::unique_ptr<bool[]> flagWorkspace;
+    ColumnBuffer<bool> flagBuffer;
     PTR(io::InputArchive) archive;
     InputContainer inputs;
 };
@@ -358,6 +423,30 @@ void FitsSchemaInputMapper::erase(int column) {
 
 void erase(int column);
 
+void FitsSchemaInputMapper::select(std::vector<std::string> const & names) {
+    std::set<std::string> ttypes;
+    for (auto name = names.begin(); name != names.end(); ++name) {
+        std::string ttype = *name;
+        if (_impl->byName().find(ttype) == _impl->byName().end()) {
+            ttype = _impl->schema.getAliasMap()->apply(ttype);
+        }
+        if (_impl->byName().find(ttype) == _impl->byName().end()) {
+            throw LSST_EXCEPT(
+                pex::exceptions::NotFoundError,
+                (boost::format("Column '%s' not found in FITS table") % (*name)).str()
+            );
+        }
+        ttypes.insert(ttype);
+    }
+    for (auto iter = _impl->asList().begin(); iter != _impl->asList().end();) {
+        if (ttypes.count(iter->ttype)) {
+            ++iter;
+        } else {
+            iter = _impl->asList().erase(iter);
+        }
+    }
+}
+
 void FitsSchemaInputMapper::customize(std::unique_ptr<FitsColumnReader> reader) {
     _impl->readers.push_back(std::move(reader));
 }
@@ -380,17 +469,27 @@ public:
         _column(item.column), _key(schema.addField<T>(item.ttype, item.doc, item.tunit, base))
     {}
 
+    virtual void prepRead(std::size_t firstRow, std::size_t nRows, afw::fits::Fits & fits) {
+        _buffer.read(fits, _column, firstRow, nRows, _key.getElementCount());
+    }
+
     virtual void readCell(
         BaseRecord & record, std::size_t row,
         afw::fits::Fits & fits,
         PTR(InputArchive) const & archive
     ) const {
-        fits.readTableArray(row, _column, _key.getElementCount(), record.getElement(_key));
+        typename Field<T>::Element const * values = _buffer.get(row);
+        if (values) {
+            std::copy(values, values + _key.getElementCount(), record.getElement(_key));
+        } else {
+            fits.readTableArray(row, _column, _key.getElementCount(), record.getElement(_key));
+        }
     }
 
 private:
     int _column;
     Key<T> _key;
+    ColumnBuffer<typename Field<T>::Element> _buffer;
 };
 
 class AngleReader : public FitsColumnReader {
@@ -424,19 +523,29 @@ public:
         }
     }
 
+    virtual void prepRead(std::size_t firstRow, std::size_t nRows, afw::fits::Fits & fits) {
+        _buffer.read(fits, _column, firstRow, nRows, 1);
+    }
+
     virtual void readCell(
         BaseRecord & record, std::size_t row,
         afw::fits::Fits & fits,
         PTR(InputArchive) const & archive
     ) const {
         double tmp = 0;
-        fits.readTableScalar(row, _column, tmp);
+        double const * value = _buffer.get(row);
+        if (value) {
+            tmp = *value;
+        } else {
+            fits.readTableScalar(row, _column, tmp);
+        }
         record.set(_key, tmp * afw::geom::radians);
     }
 
 private:
     int _column;
     Key<afw::geom::Angle> _key;
+    ColumnBuffer<double> _buffer;
 };
 
 class StringReader : public FitsColumnReader {
@@ -454,20 +563,30 @@ public:
         _column(item.column), _key(schema.addField<std::string>(item.ttype, item.doc, item.tunit, size))
     {}
 
+    virtual void prepRead(std::size_t firstRow, std::size_t nRows, afw::fits::Fits & fits) {
+        _buffer.read(fits, _column, firstRow, nRows, 1);
+    }
+
     virtual void readCell(
         BaseRecord & record,
         std::size_t row,
         afw::fits::Fits & fits,
         PTR(InputArchive) const & archive
     ) const {
-        std::string s;
-        fits.readTableScalar(row, _column, s);
-        record.set(_key, s);
+        std::string const * value = _buffer.get(row);
+        if (value) {
+            record.set(_key, *value);
+        } else {
+            std::string s;
+            fits.readTableScalar(row, _column, s);
+            record.set(_key, s);
+        }
     }
 
 private:
     int _column;
     Key<std::string> _key;
+    ColumnBuffer<std::string> _buffer;
 };
 
 template <typename T>
@@ -857,23 +976,43 @@ Schema FitsSchemaInputMapper::finalize() {
                 );
             }
             _impl->flagKeys[iter->bit] = _impl->schema.addField<Flag>(iter->ttype, iter->doc);
+            ++_impl->nFlagsRead;
         }
     }
     _impl->asList().clear();
     return _impl->schema;
 }
 
+std::size_t FitsSchemaInputMapper::getRowsPerBlock() const {
+    return std::max(BLOCK_BYTES/std::max(_impl->schema.getRecordSize(), 1), std::size_t(1));
+}
+
+void FitsSchemaInputMapper::prepRead(std::size_t firstRow, std::size_t nRows, afw::fits::Fits & fits) {
+    if (_impl->nFlagsRead > 0) {
+        _impl->flagBuffer.read(fits, _impl->flagColumn, firstRow, nRows, _impl->flagKeys.size());
+    }
+    for (auto iter = _impl->readers.begin(); iter != _impl->readers.end(); ++iter) {
+        (**iter).prepRead(firstRow, nRows, fits);
+    }
+}
+
 void FitsSchemaInputMapper::readRecord(
     BaseRecord & record,
     afw::fits::Fits & fits,
     std::size_t row
 ) {
-    if (!_impl->flagKeys.empty()) {
-        fits.readTableArray<bool>(
-            row, _impl->flagColumn, _impl->flagKeys.size(), _impl->flagWorkspace.get()
-        );
+    if (_impl->nFlagsRead > 0) {
+        bool const * flags = _impl->flagBuffer.get(row);
+        if (!flags) {
+            fits.readTableArray<bool>(
+                row, _impl->flagColumn, _impl->flagKeys.size(), _impl->flagWorkspace.get()
+            );
+            flags = _impl->flagWorkspace.get();
+        }
         for (std::size_t bit = 0; bit < _impl->flagKeys.size(); ++bit) {
-            record.set(_impl->flagKeys[bit], _impl->flagWorkspace[bit]);
+            if (_impl->flagKeys[bit].isValid()) {
+                record.set(_impl->flagKeys[bit], flags[bit]);
+            }
         }
     }
     for (auto iter = _impl->readers.begin(); iter != _impl->readers.end(); ++iter) {
@@ -1,6 +1,9 @@
 // -*- lsst-c++ -*-
 
+#include <algorithm>
 #include <memory>
+#include <string>
+#include <vector>
 
 #include "lsst/afw/table/io/FitsWriter.h"
 #include "lsst/afw/table/BaseTable.h"
@@ -136,60 +139,183 @@ void FitsWriter::_writeTable(CONST_PTR(BaseTable) const & table, std::size_t nRo
 // The driver code is at the bottom of this section; it's easier to understand if you start there
 // and work your way up.
 
-// A Schema::forEach functor that writes table data for a single record when it is called.
-// We instantiate one of these, then reuse it on all the records after updating the data
-// members that tell it which record and row number it's on.
+// Writing each cell with its own cfitsio call is very slow for large tables, so instead we copy the
+// records into a buffer for each column as they're written, and write a whole block of rows to each
+// column with a single call whenever the buffers are full.  Variable-length arrays aren't buffered;
+// they're written a cell at a time as before.
 struct FitsWriter::ProcessRecords {
 
-    template <typename T>
-    void operator()(SchemaItem<T> const & item) const {
-        fits->writeTableArray(row, col, item.key.getElementCount(), record->getElement(item.key));
-        ++col;
-    }
+    // The maximum number of bytes of record data to buffer before writing them to the file.
+    static std::size_t const BUFFER_BYTES = 1 << 22;
 
-    template <typename T>
-    void operator()(SchemaItem< Array<T> > const & item) const {
-        if (item.key.isVariableLength()) {
-            ndarray::Array<T const,1,1> array = record->get(item.key);
-            fits->writeTableArray(row, col, array.template getSize<0>(), array.getData());
-        } else {
-            fits->writeTableArray(row, col, item.key.getElementCount(), record->getElement(item.key));
-        }
-        ++col;
-    }
+    // A Schema::forEach functor that copies the fields of a record into the column buffers.
+    struct Gather {
 
-    void operator()(SchemaItem<std::string> const & item) const {
-        fits->writeTableScalar(row, col, record->get(item.key));
-        ++col;
-    }
+        template <typename T>
+        void operator()(SchemaItem<T> const & item) const {
+            copy(item.key.getElementCount(), record->getElement(item.key));
+        }
 
-    void operator()(SchemaItem<Flag> const & item) const {
-        flags[bit] = record->get(item.key);
-        ++bit;
-    }
+        template <typename T>
+        void operator()(SchemaItem< Array<T> > const & item) const {
+            if (item.key.isVariableLength()) {
+                ndarray::Array<T const,1,1> array = record->get(item.key);
+                self->fits->writeTableArray(
+                    self->getRow(), self->col, array.template getSize<0>(), array.getData()
+                );
+                ++self->col;
+            } else {
+                copy(item.key.getElementCount(), record->getElement(item.key));
+            }
+        }
+
+        void operator()(SchemaItem<std::string> const & item) const {
+            self->strings[self->col][self->nBuffered] = record->get(item.key);
+            ++self->col;
+        }
+
+        void operator()(SchemaItem<Flag> const & item) const {
+            self->flags[self->nBuffered*self->nFlags + self->bit] = record->get(item.key);
+            ++self->bit;
+        }
+
+        template <typename T>
+        void copy(int nElements, T const * value) const {
+            std::copy(
+                value, value + nElements,
+                reinterpret_cast<T*>(self->buffers[self->col].get()) + self->nBuffered*nElements
+            );
+            ++self->col;
+        }
+
+        ProcessRecords * self;
+        BaseRecord const * record;
+    };
+
+    // A Schema::forEach functor that writes the buffered rows of each column.
+    struct Flush {
+
+        template <typename T>
+        void operator()(SchemaItem<T> const & item) const {
+            write(item.key.getElementCount(), static_cast<typename Field<T>::Element*>(0));
+        }
+
+        template <typename T>
+        void operator()(SchemaItem< Array<T> > const & item) const {
+            if (!item.key.isVariableLength()) {
+                write(item.key.getElementCount(), static_cast<T*>(0));
+            } else {
+                ++self->col;
+            }
+        }
+
+        void operator()(SchemaItem<std::string> const & item) const {
+            self->fits->writeTableArray(
+                self->firstRow, self->col, self->nBuffered, &self->strings[self->col].front()
+            );
+            ++self->col;
+        }
+
+        void operator()(SchemaItem<Flag> const & item) const {}
+
+        // The null pointer argument just tells us the element type.
+        template <typename T>
+        void write(int nElements, T *) const {
+            self->fits->writeTableArray(
+                self->firstRow, self->col, self->nBuffered*nElements,
+                reinterpret_cast<T const *>(self->buffers[self->col].get())
+            );
+            ++self->col;
+        }
+
+        ProcessRecords * self;
+    };
+
+    // A Schema::forEach functor that allocates the column buffers.
+    struct Allocate {
+
+        template <typename T>
+        void operator()(SchemaItem<T> const & item) const {
+            allocate(item.key.getElementCount()*sizeof(typename Field<T>::Element));
+        }
+
+        template <typename T>
+        void operator()(SchemaItem< Array<T> > const & item) const {
+            allocate(item.key.isVariableLength() ? 0 : item.key.getElementCount()*sizeof(T));
+        }
+
+        void operator()(SchemaItem<std::string> const & item) const {
+            allocate(0);
+            self->strings.back().resize(self->nRowsPerBlock);
+        }
+
+        void operator()(SchemaItem<Flag> const & item) const {}
+
+        void allocate(std::size_t rowBytes) const {
+            self->buffers.push_back(std::unique_ptr<char[]>());
+            self->strings.push_back(std::vector<std::string>());
+            if (rowBytes) self->buffers.back().reset(new char[rowBytes*self->nRowsPerBlock]);
+        }
+
+        ProcessRecords * self;
+    };
 
     ProcessRecords(Fits * fits_, Schema const & schema_, int nFlags_, std::size_t const & row_) :
-        row(row_), col(0), bit(0), nFlags(nFlags_), fits(fits_), schema(schema_)
+        row(row_), firstRow(0), nBuffered(0), col(0), bit(0), nFlags(nFlags_), fits(fits_), schema(schema_)
     {
-        if (nFlags) flags.reset(new bool[nFlags]);
+        nRowsPerBlock = std::max(BUFFER_BYTES/std::max(schema.getRecordSize(), 1), std::size_t(1));
+        Allocate f = { this };
+        if (nFlags) {
+            flags.reset(new bool[nFlags*nRowsPerBlock]);
+            f.allocate(0); // the flag column has its own buffer
+        }
+        schema.forEach(f);
     }
 
+    // The row the next record will be written to
+    std::size_t getRow() const { return firstRow + nBuffered; }
+
     void apply(BaseRecord const * r) {
-        record = r;
-        col = 0;
+        if (nBuffered == 0) firstRow = row;
+        Gather f = { this, r };
+        col = (nFlags ? 1 : 0);
         bit = 0;
-        if (nFlags) ++col;
-        schema.forEach(*this);
-        if (nFlags) fits->writeTableArray(row, 0, nFlags, flags.get());
+        schema.forEach(f);
+        ++nBuffered;
+        if (nBuffered == nRowsPerBlock) flush();
+    }
+
+    void flush() {
+        if (nBuffered == 0) return;
+        Flush f = { this };
+        col = 0;
+        if (nFlags) {
+            // cfitsio only advances to the next row at a byte boundary when writing bits, so each row's
+            // flags must be written separately unless nFlags is a multiple of 8
+            if (nFlags % 8 == 0) {
+                fits->writeTableArray(firstRow, col, nBuffered*nFlags, flags.get());
+            } else {
+                for (std::size_t i = 0; i != nBuffered; ++i) {
+                    fits->writeTableArray(firstRow + i, col, nFlags, flags.get() + i*nFlags);
+                }
+            }
+            ++col;
+        }
+        schema.forEach(f);
+        nBuffered = 0;
     }
 
     std::size_t const & row;
-    mutable int col;
-    mutable int bit;
+    std::size_t firstRow;       // row of the first buffered record
+    std::size_t nBuffered;      // number of buffered records
+    std::size_t nRowsPerBlock;  // maximum number of buffered records
+    int col;
+    int bit;
     int nFlags;
     Fits * fits;
+    std::vector< std::unique_ptr<char[]> > buffers;  // indexed by column; null for unbuffered columns
+    std::vector< std::vector<std::string> > strings; // indexed by column; empty for non-string columns
     std::unique_ptr<bool[]> flags;
-    BaseRecord const * record;
     Schema schema;
 };
 
@@ -198,4 +324,8 @@ void FitsWriter::_writeRecord(BaseRecord const & record) {
     _processor->apply(&record);
 }
 
+void FitsWriter::_flushRecords() {
+    if (_processor) _processor->flush();
+}
+
 }}}} // namespace lsst::afw::table::io
@@ -352,6 +352,63 @@ class ConvolveTestCase(lsst.utils.tests.TestCase):
             convControl.setMaxInterpolationDistance(maxInterpDist)
             self.assertEqual(convControl.getMaxInterpolationDistance(), maxInterpDist)
 
+        self.assertEqual(convControl.getFftMinKernelSize(), 41)
+        for fftMinKernelSize in (0, 1, 41, 100):
+            convControl.setFftMinKernelSize(fftMinKernelSize)
+            self.assertEqual(convControl.getFftMinKernelSize(), fftMinKernelSize)
+
+        self.assertEqual(convControl.getNumThreads(), 1)
+        for numThreads in (1, 2, 8):
+            convControl.setNumThreads(numThreads)
+            self.assertEqual(convControl.getNumThreads(), numThreads)
+        with self.assertRaises(pexExcept.InvalidParameterError):
+            convControl.setNumThreads(0)
+
+    def testFftConvolve(self):
+        """Test that convolving with FFTs matches direct convolution, including NaNs and mask bits
+        """
+        numpy.random.seed(5)
+        inMaskedImage = afwImage.MaskedImageF(afwGeom.Extent2I(310, 290))
+        inMaskedImage.setXY0(300, 200)
+        imArr, maskArr, varArr = inMaskedImage.getArrays()
+        imArr[:] = numpy.random.normal(100.0, 10.0, imArr.shape)
+        varArr[:] = numpy.random.uniform(50.0, 150.0, varArr.shape)
+        maskArr[:] = 0
+        maskArr[100, 120] = 0x1
+        maskArr[200:203, 50:60] = 0x4
+        imArr[150, 160] = numpy.nan
+        varArr[20, 250] = numpy.nan
+
+        gaussianKernel = afwMath.AnalyticKernel(45, 43, afwMath.GaussianFunction2D(6.0, 5.0, 0.3))
+        # a kernel with zero pixels, so only some pixels of the input mask are ORed into the output
+        ringImage = afwImage.ImageD(afwGeom.Extent2I(41, 41))
+        ringArr = ringImage.getArray()
+        yArr, xArr = numpy.indices(ringArr.shape)
+        radius = numpy.hypot(xArr - 20, yArr - 20)
+        ringArr[:] = numpy.where((radius > 10) & (radius < 18), 1.0/(1.0 + radius), 0.0)
+        ringKernel = afwMath.FixedKernel(ringImage)
+
+        fftControl = afwMath.ConvolutionControl()
+        directControl = afwMath.ConvolutionControl()
+        directControl.setFftMinKernelSize(0)
+        for kernel in (gaussianKernel, ringKernel):
+            for doNormalize in (False, True):
+                fftControl.setDoNormalize(doNormalize)
+                directControl.setDoNormalize(doNormalize)
+                directMaskedImage = afwImage.MaskedImageF(inMaskedImage.getBBox())
+                afwMath.convolve(directMaskedImage, inMaskedImage, kernel, directControl)
+                fftMaskedImage = afwImage.MaskedImageF(inMaskedImage.getBBox())
+                afwMath.convolve(fftMaskedImage, inMaskedImage, kernel, fftControl)
+                self.assertMaskedImagesNearlyEqual(fftMaskedImage, directMaskedImage, rtol=1e-5, atol=1e-3)
+                self.assertEqual(numpy.isnan(fftMaskedImage.getImage().getArray()).sum(),
+                                 numpy.isnan(directMaskedImage.getImage().getArray()).sum())
+
+                directImage = afwImage.ImageF(inMaskedImage.getBBox())
+                afwMath.convolve(directImage, inMaskedImage.getImage(), kernel, directControl)
+                fftImage = afwImage.ImageF(inMaskedImage.getBBox())
+                afwMath.convolve(fftImage, inMaskedImage.getImage(), kernel, fftControl)
+                self.assertImagesNearlyEqual(fftImage, directImage, rtol=1e-5, atol=1e-3)
+
     @unittest.skipIf(dataDir is None, "afwdata not setup")
     def testUnityConvolution(self):
         """Verify that convolution with a centered delta function reproduces the original.
@@ -407,6 +464,39 @@ class ConvolveTestCase(lsst.utils.tests.TestCase):
             refKernel=analyticKernel,
             kernelDescr="Gaussian Separable Kernel (compared to AnalyticKernel equivalent)")
 
+    def testSeparableRowBufferConvolve(self):
+        """Test that convolving with a spatially invariant separable kernel using row buffers
+        matches the pixel iterator implementation
+        """
+        numpy.random.seed(5)
+        inMaskedImage = afwImage.MaskedImageF(afwGeom.Extent2I(83, 71))
+        imArr, maskArr, varArr = inMaskedImage.getArrays()
+        imArr[:] = numpy.random.normal(100.0, 10.0, imArr.shape)
+        varArr[:] = numpy.random.uniform(50.0, 150.0, varArr.shape)
+        maskArr[:] = 0
+        maskArr[30, 40] = 0x1
+        maskArr[50:52, 10:20] = 0x4
+        imArr[20, 25] = numpy.nan
+
+        convControl = afwMath.ConvolutionControl()
+        for kWidth, kHeight in ((5, 5), (9, 4), (51, 51)):
+            gaussFunc = afwMath.GaussianFunction1D(kWidth/6.0)
+            kernel = afwMath.SeparableKernel(kWidth, kHeight, gaussFunc, gaussFunc)
+            for doNormalize in (False, True):
+                convControl.setDoNormalize(doNormalize)
+                refMaskedImage = afwImage.MaskedImageF(inMaskedImage.getDimensions())
+                mathDetail.convolveSeparableWithIterators(refMaskedImage, inMaskedImage, kernel, convControl)
+                cnvMaskedImage = afwImage.MaskedImageF(inMaskedImage.getDimensions())
+                mathDetail.basicConvolve(cnvMaskedImage, inMaskedImage, kernel, convControl)
+                self.assertMaskedImagesNearlyEqual(cnvMaskedImage, refMaskedImage, rtol=1e-6)
+
+                refImage = afwImage.ImageD(inMaskedImage.getDimensions())
+                mathDetail.convolveSeparableWithIterators(refImage, inMaskedImage.getImage(), kernel,
+                                                          convControl)
+                cnvImage = afwImage.ImageD(inMaskedImage.getDimensions())
+                mathDetail.basicConvolve(cnvImage, inMaskedImage.getImage(), kernel, convControl)
+                self.assertImagesNearlyEqual(cnvImage, refImage, rtol=1e-6)
+
     @unittest.skipIf(dataDir is None, "afwdata not setup")
     def testSpatiallyInvariantConvolve(self):
         """Test convolution with a spatially invariant Gaussian function
@@ -544,6 +634,106 @@ class ConvolveTestCase(lsst.utils.tests.TestCase):
                     maxInterpDist=maxInterpDist,
                     rtol=rtol)
 
+    def testNumThreads(self):
+        """Test that convolving with interpolation on several threads gives exactly the serial result
+        """
+        numpy.random.seed(3)
+        inMaskedImage = afwImage.MaskedImageF(afwGeom.Extent2I(95, 127))
+        inMaskedImage.setXY0(300, 200)
+        imArr, maskArr, varArr = inMaskedImage.getArrays()
+        imArr[:] = numpy.random.normal(100.0, 10.0, imArr.shape)
+        varArr[:] = 100.0
+        maskArr[:] = 0
+        maskArr[60, 40] = 0x2
+
+        sFunc = afwMath.PolynomialFunction2D(1)
+        basisKernelList = makeGaussianKernelList(5, 5, ((1.5, 1.5, 0.0), (2.5, 1.5, 0.0), (2.5, 2.5, 0.0)))
+        kernel = afwMath.LinearCombinationKernel(basisKernelList, sFunc)
+        kernel.setSpatialParameters((
+            (1.0, -0.01/95, -0.01/127),
+            (0.0, 0.01/95, 0.0),
+            (0.5, 0.005/95, -0.005/127),
+        ))
+
+        convControl = afwMath.ConvolutionControl()
+        convControl.setMaxInterpolationDistance(7)
+        serialMaskedImage = afwImage.MaskedImageF(inMaskedImage.getBBox())
+        afwMath.convolve(serialMaskedImage, inMaskedImage, kernel, convControl)
+        for numThreads in (2, 3, 100):
+            convControl.setNumThreads(numThreads)
+            cnvMaskedImage = afwImage.MaskedImageF(inMaskedImage.getBBox())
+            afwMath.convolve(cnvMaskedImage, inMaskedImage, kernel, convControl)
+            self.assertMaskedImagesNearlyEqual(cnvMaskedImage, serialMaskedImage, rtol=0, atol=0)
+
+    def testBasisKernelConvolve(self):
+        """Test convolving with each basis kernel of a LinearCombinationKernel and combining the results
+        """
+        numpy.random.seed(7)
+        width, height = 83, 71
+        inMaskedImage = afwImage.MaskedImageF(afwGeom.Extent2I(width, height))
+        inMaskedImage.setXY0(300, 200)
+        imArr, maskArr, varArr = inMaskedImage.getArrays()
+        imArr[:] = numpy.random.normal(100.0, 10.0, imArr.shape)
+        varArr[:] = numpy.random.uniform(50.0, 150.0, varArr.shape)
+        maskArr[:] = 0
+        maskArr[30, 40] = 0x1
+        maskArr[50:52, 10:20] = 0x4
+
+        sFunc = afwMath.PolynomialFunction2D(1)
+        sParams = (
+            (1.0, -0.1/width, -0.1/height),
+            (0.2, 0.1/width, 0.0),
+            (0.1, 0.0, 0.1/height),
+            (0.3, 0.05/width, -0.05/height),
+        )
+        deltaKernel = afwMath.LinearCombinationKernel(makeDeltaFunctionKernelList(2, 2), sFunc)
+        deltaKernel.setSpatialParameters(sParams)
+        gaussianKernel = afwMath.LinearCombinationKernel(
+            makeGaussianKernelList(7, 7, ((1.5, 1.5, 0.0), (2.5, 1.5, 0.0), (2.5, 1.5, math.pi/2.0))),
+            sFunc)
+        gaussianKernel.setSpatialParameters(sParams[:3])
+        # a centred delta function with Gaussians that are nonzero at its centre, so the variance plane
+        # needs the cross terms between the delta function and the Gaussians
+        mixedBasisList = afwMath.KernelList()
+        mixedBasisList.append(afwMath.DeltaFunctionKernel(7, 7, afwGeom.Point2I(3, 3)))
+        for basisKernel in makeGaussianKernelList(7, 7, ((1.5, 1.5, 0.0), (2.5, 1.5, 0.0))):
+            mixedBasisList.append(basisKernel)
+        mixedKernel = afwMath.LinearCombinationKernel(mixedBasisList, sFunc)
+        mixedKernel.setSpatialParameters(sParams[:3])
+        # large enough that the basis kernels are convolved using FFTs
+        largeKernel = afwMath.LinearCombinationKernel(
+            makeGaussianKernelList(45, 45, ((4.0, 4.0, 0.0), (6.0, 3.0, 0.0), (6.0, 3.0, math.pi/2.0))),
+            sFunc)
+        largeKernel.setSpatialParameters(sParams[:3])
+        separableBasisList = afwMath.KernelList()
+        for sigma in (1.0, 2.0, 3.0):
+            gaussFunc = afwMath.GaussianFunction1D(sigma)
+            separableBasisList.append(afwMath.SeparableKernel(15, 15, gaussFunc, gaussFunc))
+        separableKernel = afwMath.LinearCombinationKernel(separableBasisList, sFunc)
+        separableKernel.setSpatialParameters(sParams[:3])
+
+        convControl = afwMath.ConvolutionControl()
+        dimensions = inMaskedImage.getDimensions()
+        self.assertTrue(mathDetail.isBasisConvolutionFaster(largeKernel, dimensions, True, convControl))
+        self.assertTrue(mathDetail.isBasisConvolutionFaster(separableKernel, dimensions, False, convControl))
+        self.assertFalse(mathDetail.isBasisConvolutionFaster(gaussianKernel, dimensions, True, convControl))
+        self.assertFalse(mathDetail.isBasisConvolutionFaster(deltaKernel, dimensions, True, convControl))
+
+        for kernel in (deltaKernel, gaussianKernel, mixedKernel, largeKernel, separableKernel):
+            for doNormalize in (False, True):
+                convControl.setDoNormalize(doNormalize)
+                refMaskedImage = afwImage.MaskedImageF(inMaskedImage.getBBox())
+                mathDetail.convolveWithBruteForce(refMaskedImage, inMaskedImage, kernel, convControl)
+                cnvMaskedImage = afwImage.MaskedImageF(inMaskedImage.getBBox())
+                mathDetail.convolveWithBasisKernels(cnvMaskedImage, inMaskedImage, kernel, convControl)
+                self.assertMaskedImagesNearlyEqual(cnvMaskedImage, refMaskedImage, rtol=1e-5, atol=1e-5)
+
+                refImage = afwImage.ImageF(inMaskedImage.getBBox())
+                mathDetail.convolveWithBruteForce(refImage, inMaskedImage.getImage(), kernel, convControl)
+                cnvImage = afwImage.ImageF(inMaskedImage.getBBox())
+                mathDetail.convolveWithBasisKernels(cnvImage, inMaskedImage.getImage(), kernel, convControl)
+                self.assertImagesNearlyEqual(cnvImage, refImage, rtol=1e-5, atol=1e-5)
+
     @unittest.skipIf(dataDir is None, "afwdata not setup")
     def testSpatiallyVaryingDeltaFunctionLinearCombination(self):
         """Test convolution with a spatially varying LinearCombinationKernel of delta function basis kernels.
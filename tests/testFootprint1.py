@@ -43,6 +43,7 @@ from builtins import object
 import numpy as np
 
 import lsst.utils.tests
+import lsst.pex.exceptions
 import lsst.afw.geom as afwGeom
 import lsst.afw.geom.ellipses as afwGeomEllipses
 import lsst.afw.coord as afwCoord
@@ -1255,6 +1256,144 @@ class FootprintSetTestCase(unittest.TestCase):
 
         self.assertEqual(len(foot.getPeaks()), 5)
 
+    def testNumThreads(self):
+        """Test that searching an image on several threads finds the same Footprints and Peaks"""
+        np.random.seed(1)
+        mi = afwImage.MaskedImageF(afwGeom.Extent2I(97, 113))
+        mi.setXY0(10, -20)
+        imArr, maskArr, varArr = mi.getArrays()
+        imArr[:] = np.random.normal(0.0, 1.0, imArr.shape)
+        imArr[::7, ::5] += 10.0         # sources that touch across rows
+        imArr[50:60, 30:40] = 5.0       # a large flat source
+        imArr[30, :] = np.nan
+        varArr[:] = np.random.uniform(0.5, 2.0, varArr.shape)
+
+        def getSpansAndPeaks(fs):
+            return [([(s.getY(), s.getX0(), s.getX1()) for s in foot.getSpans()],
+                     [(p.getIx(), p.getIy(), p.getPeakValue()) for p in foot.getPeaks()])
+                    for foot in fs.getFootprints()]
+
+        for threshold in (afwDetect.Threshold(2.0),
+                          afwDetect.Threshold(1.5, afwDetect.Threshold.VALUE, True, 2.0),
+                          afwDetect.Threshold(1.5, afwDetect.Threshold.VALUE, False),
+                          afwDetect.Threshold(2.0, afwDetect.Threshold.PIXEL_STDEV)):
+            ref = getSpansAndPeaks(afwDetect.FootprintSet(mi, threshold, "", 2))
+            self.assertGreater(len(ref), 10)
+            for nThreads in (2, 5, 200, 0):
+                fs = afwDetect.FootprintSet(mi, threshold, "", 2, True, nThreads)
+                self.assertEqual(getSpansAndPeaks(fs), ref)
+
+        ref = getSpansAndPeaks(afwDetect.FootprintSet(mi.getImage(), afwDetect.Threshold(2.0)))
+        fs = afwDetect.FootprintSet(mi.getImage(), afwDetect.Threshold(2.0), 1, True, 3)
+        self.assertEqual(getSpansAndPeaks(fs), ref)
+
+        with self.assertRaises(lsst.pex.exceptions.InvalidParameterError):
+            afwDetect.FootprintSet(mi.getImage(), afwDetect.Threshold(2.0), 1, True, -1)
+
+    def testFloatAndIntegerImages(self):
+        """Test that floating point images (searched a row at a time) and integer images (searched with
+        pixel iterators) give the same Footprints and Peaks"""
+        np.random.seed(2)
+        mi = afwImage.MaskedImageI(afwGeom.Extent2I(61, 53))
+        mi.setXY0(-5, 7)
+        imArr, maskArr, varArr = mi.getArrays()
+        imArr[:] = np.random.poisson(3.0, imArr.shape) - 3
+        imArr[::6, ::4] += 20
+        imArr[20:30, 10:20] = 9         # a flat-topped source
+        imArr[40:43, 40:43] = -15       # a hole
+        varArr[:] = np.random.uniform(1.0, 4.0, varArr.shape)
+
+        def getSpansAndPeaks(fs):
+            return [([(s.getY(), s.getX0(), s.getX1()) for s in foot.getSpans()],
+                     [(p.getIx(), p.getIy(), p.getFx(), p.getFy(), p.getPeakValue())
+                      for p in foot.getPeaks()])
+                    for foot in fs.getFootprints()]
+
+        miF = afwImage.MaskedImageF(mi.getBBox())
+        miF.getImage().getArray()[:] = imArr
+        miF.getVariance().getArray()[:] = varArr
+        miD = afwImage.MaskedImageD(mi.getBBox())
+        miD.getImage().getArray()[:] = imArr
+        miD.getVariance().getArray()[:] = varArr
+
+        for threshold in (afwDetect.Threshold(4),
+                          afwDetect.Threshold(4, afwDetect.Threshold.VALUE, True, 3.0),
+                          afwDetect.Threshold(5, afwDetect.Threshold.VALUE, False),
+                          afwDetect.Threshold(3.0, afwDetect.Threshold.PIXEL_STDEV)):
+            ref = getSpansAndPeaks(afwDetect.FootprintSet(mi, threshold))
+            self.assertGreater(len(ref), 10)
+            for image in (miF, miD):
+                self.assertEqual(getSpansAndPeaks(afwDetect.FootprintSet(image, threshold)), ref)
+            if threshold.getType() == afwDetect.Threshold.VALUE:
+                self.assertEqual(getSpansAndPeaks(afwDetect.FootprintSet(miF.getImage(), threshold)),
+                                 getSpansAndPeaks(afwDetect.FootprintSet(mi.getImage(), threshold)))
+
+    def testFootprintStream(self):
+        """Test that detecting in strips of rows read from disk gives the same Footprints and Peaks
+        as FootprintSet"""
+        np.random.seed(3)
+        mi = afwImage.MaskedImageF(afwGeom.Extent2I(83, 71))
+        mi.setXY0(12, -9)
+        imArr, maskArr, varArr = mi.getArrays()
+        imArr[:] = np.random.normal(0.0, 1.0, imArr.shape)
+        imArr[::9, ::6] += 10.0         # sources that touch across rows
+        imArr[20:45, 30:33] = 8.0       # a tall source, spanning several strips
+        imArr[20, 50:60] = 8.0          # a U-shaped source, joined in its last row
+        imArr[20:30, 50] = 8.0
+        imArr[20:30, 59] = 8.0
+        imArr[50, :] = np.nan
+        varArr[:] = np.random.uniform(0.5, 2.0, varArr.shape)
+
+        def getSpansAndPeaks(footprints):
+            return sorted((sorted((s.getY(), s.getX0(), s.getX1()) for s in foot.getSpans()),
+                           [(p.getIx(), p.getIy(), p.getPeakValue()) for p in foot.getPeaks()])
+                          for foot in footprints)
+
+        bbox = mi.getBBox()
+        with lsst.utils.tests.getTempFilePath(".fits") as fileName:
+            mi.writeFits(fileName)
+            for threshold in (afwDetect.Threshold(2.0),
+                              afwDetect.Threshold(1.5, afwDetect.Threshold.VALUE, True, 2.0),
+                              afwDetect.Threshold(1.5, afwDetect.Threshold.VALUE, False),
+                              afwDetect.Threshold(2.0, afwDetect.Threshold.PIXEL_STDEV)):
+                ref = getSpansAndPeaks(afwDetect.FootprintSet(mi, threshold, "", 2).getFootprints())
+                self.assertGreater(len(ref), 10)
+                for stripHeight in (1, 2, 7, 100):
+                    stream = afwDetect.FootprintStream(bbox, threshold, 2)
+                    footprints = []
+                    while stream.getNextRow() <= bbox.getMaxY():
+                        y0 = stream.getNextRow()
+                        y1 = min(y0 + stripHeight - 1, bbox.getMaxY())
+                        strip = afwImage.MaskedImageF(fileName, None,
+                                                      afwGeom.Box2I(afwGeom.Point2I(bbox.getMinX(), y0),
+                                                                    afwGeom.Point2I(bbox.getMaxX(), y1)))
+                        stream.addStrip(strip)
+                        footprints.extend(stream.takeFootprints())
+                    stream.finish()
+                    self.assertTrue(stream.isFinished())
+                    footprints.extend(stream.takeFootprints())
+                    self.assertEqual(getSpansAndPeaks(footprints), ref)
+
+        fs = afwDetect.FootprintSet(mi.getImage(), afwDetect.Threshold(2.0))
+        ref = getSpansAndPeaks(fs.getFootprints())
+        stream = afwDetect.FootprintStream(bbox, afwDetect.Threshold(2.0))
+        stream.addStrip(mi.getImage())
+        stream.finish()
+        self.assertEqual(getSpansAndPeaks(stream.takeFootprints()), ref)
+
+        stream = afwDetect.FootprintStream(bbox, afwDetect.Threshold(2.0, afwDetect.Threshold.PIXEL_STDEV))
+        with self.assertRaises(lsst.pex.exceptions.InvalidParameterError):
+            stream.addStrip(mi.getImage())  # no variance
+        strip = afwImage.MaskedImageF(mi, afwGeom.Box2I(afwGeom.Point2I(bbox.getMinX(), bbox.getMinY() + 1),
+                                                        afwGeom.Extent2I(bbox.getWidth(), 3)),
+                                      afwImage.PARENT)
+        with self.assertRaises(lsst.pex.exceptions.InvalidParameterError):
+            stream.addStrip(strip)          # doesn't start at the next row
+        with self.assertRaises(lsst.pex.exceptions.LogicError):
+            stream.finish()                 # rows are missing
+        with self.assertRaises(lsst.pex.exceptions.InvalidParameterError):
+            afwDetect.FootprintStream(bbox, afwDetect.Threshold(2.0, afwDetect.Threshold.STDEV))
+
 
 class MaskFootprintSetTestCase(unittest.TestCase):
     """A test case for generating FootprintSet from Masks"""
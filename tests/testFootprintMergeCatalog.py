@@ -288,6 +288,34 @@ class FootprintMergeCatalogTestCase(lsst.utils.tests.TestCase):
                 peakIndex += 1
 
 
+    def testMergeDistant(self):
+        """Test merging Footprints that are far apart, at negative coordinates, or span a large area
+        """
+        def makeCatalog(boxes):
+            catalog = afwTable.SourceCatalog(self.table)
+            for box in boxes:
+                record = catalog.addNew()
+                record.setFootprint(afwDetect.Footprint(box))
+            return catalog
+
+        left = afwGeom.Box2I(afwGeom.Point2I(-200, -10), afwGeom.Point2I(-150, 10))
+        right = afwGeom.Box2I(afwGeom.Point2I(150, -10), afwGeom.Point2I(200, 10))
+        isolated = afwGeom.Box2I(afwGeom.Point2I(0, 300), afwGeom.Point2I(5, 305))
+        bridge = afwGeom.Box2I(afwGeom.Point2I(-160, 0), afwGeom.Point2I(160, 0))
+        touching = afwGeom.Box2I(afwGeom.Point2I(6, 300), afwGeom.Point2I(8, 302))
+        distant = afwGeom.Box2I(afwGeom.Point2I(5000, -5000), afwGeom.Point2I(5010, -4990))
+
+        catalog1 = makeCatalog([left, right, isolated])
+        catalog2 = makeCatalog([bridge, touching, distant])
+        merge, nob, npeak = mergeCatalogs([catalog1, catalog2], ["1", "2"], [-1, -1], self.idFactory)
+        self.assertEqual(nob, 3)
+        measArea = [i.getFootprint().getArea() for i in merge]
+        np.testing.assert_array_equal(measArea, [2*left.getArea() + bridge.getArea() - 22,
+                                                 isolated.getArea() + touching.getArea(),
+                                                 distant.getArea()])
+        self.assertEqual([r.get("merge_footprint_1") for r in merge], [True, True, False])
+        self.assertEqual([r.get("merge_footprint_2") for r in merge], [True, True, True])
+
 class MemoryTester(lsst.utils.tests.MemoryTestCase):
     pass
 
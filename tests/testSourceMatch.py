@@ -301,6 +301,98 @@ class SourceMatchTestCase(unittest.TestCase):
             noMatches = afwTable.matchRaDec(catMismatches, cat2, 1.0*afwGeom.arcseconds, mc)
             self.assertEqual(len(noMatches), 0)
 
+    def testMatchIndex(self):
+        """Check that a MatchIndex finds the same matches as a brute-force search,
+        near the pole and across ra = 0
+        """
+        rng = np.random.RandomState(12345)
+        radius = 30.0*afwGeom.arcseconds
+
+        refCat = afwTable.SimpleCatalog(afwTable.SimpleTable.makeMinimalSchema())
+        srcCat = afwTable.SourceCatalog(self.table)
+        for cat, num in ((refCat, 2000), (srcCat, 500)):
+            ra = rng.uniform(0.0, 360.0, num)
+            dec = rng.uniform(89.0, 90.0, num)
+            ra[:num//4] = rng.uniform(-0.1, 0.1, num//4) % 360.0
+            dec[:num//4] = rng.uniform(-0.1, 0.1, num//4)
+            for i in range(num):
+                record = cat.addNew()
+                record.setId(i + 1)
+                record.setRa(ra[i]*afwGeom.degrees)
+                record.setDec(dec[i]*afwGeom.degrees)
+        refCat[0].setRa(float('nan')*afwGeom.radians)
+
+        def unitVectors(cat):
+            ra = np.array([r.getRa().asRadians() for r in cat])
+            dec = np.array([r.getDec().asRadians() for r in cat])
+            return np.array([np.cos(ra)*np.cos(dec), np.sin(ra)*np.cos(dec), np.sin(dec)]).T
+
+        refVec = unitVectors(refCat)
+        srcVec = unitVectors(srcCat)
+        d2 = ((refVec[:, np.newaxis, :] - srcVec[np.newaxis, :, :])**2).sum(axis=2)
+        close = d2 < radius.toUnitSphereDistanceSquared()
+        expected = set((refCat[int(i)].getId(), srcCat[int(j)].getId()) for i, j in zip(*np.where(close)))
+        self.assertGreater(len(expected), 0)
+
+        index = afwTable.makeMatchIndex(refCat)
+        self.assertEqual(index.size(), len(refCat) - 1)
+        mc = afwTable.MatchControl()
+        mc.findOnlyClosest = False
+        for i in range(2):              # the index may be reused
+            matches = index.matchRaDec(srcCat, radius, mc)
+            self.assertEqual(set((m.first.getId(), m.second.getId()) for m in matches), expected)
+            self.assertEqual(len(matches), len(expected))
+
+        mc.findOnlyClosest = True
+        mc.includeMismatches = True
+        matches = afwTable.matchRaDec(refCat, srcCat, radius, mc)
+        self.assertEqual(len(matches), len(refCat) - 1)
+        for m in matches:
+            i = m.first.getId() - 1
+            if m.second is None:
+                self.assertFalse(close[i].any())
+            else:
+                self.assertEqual(m.second.getId() - 1, np.argmin(np.where(close[i], d2[i], np.inf)))
+                self.assertAlmostEqual(m.distance, 2.0*np.arcsin(0.5*np.sqrt(d2[i].min())), places=12)
+
+    def testMatchIndexPersistence(self):
+        """Check that a MatchIndex can be written alongside its catalog and read back
+        """
+        rng = np.random.RandomState(54321)
+        refCat = afwTable.SimpleCatalog(afwTable.SimpleTable.makeMinimalSchema())
+        srcCat = afwTable.SourceCatalog(self.table)
+        for cat, num in ((refCat, 300), (srcCat, 100)):
+            for i, (ra, dec) in enumerate(zip(rng.uniform(150.0, 150.1, num), rng.uniform(2.0, 2.1, num))):
+                record = cat.addNew()
+                record.setId(i + 1)
+                record.setRa(ra*afwGeom.degrees)
+                record.setDec(dec*afwGeom.degrees)
+        radius = 10.0*afwGeom.arcseconds
+        mc = afwTable.MatchControl()
+        mc.findOnlyClosest = False
+        index = afwTable.SimpleMatchIndex(refCat)
+        expected = [(m.first.getId(), m.second.getId(), m.distance)
+                    for m in index.matchRaDec(srcCat, radius, mc)]
+        self.assertGreater(len(expected), 0)
+
+        with lsst.utils.tests.getTempFilePath(".fits") as catFileName:
+            with lsst.utils.tests.getTempFilePath(".fits") as indexFileName:
+                refCat.writeFits(catFileName)
+                index.writeFits(indexFileName)
+                refCat2 = afwTable.SimpleCatalog.readFits(catFileName)
+                index2 = afwTable.SimpleMatchIndex.readFits(refCat2, indexFileName)
+                self.assertEqual(index2.size(), index.size())
+                matches = index2.matchRaDec(srcCat, radius, mc)
+                self.assertEqual([(m.first.getId(), m.second.getId(), m.distance) for m in matches],
+                                 expected)
+
+                # The index can't be used with a different catalog
+                refCat2[5].setId(1000)
+                self.assertRaises(pexExcept.InvalidParameterError,
+                                  afwTable.SimpleMatchIndex.readFits, refCat2, indexFileName)
+                self.assertRaises(pexExcept.InvalidParameterError,
+                                  afwTable.SimpleMatchIndex, refCat2[:100], index.pack())
+
     def checkPickle(self, matches, checkSlots=True):
         """Check that a match list pickles
 
@@ -31,6 +31,9 @@ or
    >>> import Stacker; Stacker.run()
 """
 from __future__ import absolute_import, division, print_function
+import os
+import shutil
+import tempfile
 import unittest
 from functools import reduce
 
@@ -337,6 +340,104 @@ class StackTestCase(lsst.utils.tests.TestCase):
                          (partialSum + 2*finalImage) / np.array([6.0, 4.0, 6.0, 4.0]),
                          rtol=1E-7)
 
+    def testFastStatisticsMatchStatistics(self):
+        """Test that the specialised stacking kernels agree with makeStatistics() pixel by pixel"""
+        nImg, width, height = 9, 7, 3
+        BAD = afwImage.MaskU_getPlaneBitMask("BAD")
+        sctrl = afwMath.StatisticsControl()
+        sctrl.setAndMask(BAD)
+
+        mimgList = afwImage.vectorMaskedImageF()
+        for i in range(nImg):
+            mimg = afwImage.MaskedImageF(width, height)
+            imArr, maskArr, varArr = mimg.getArrays()
+            imArr[:] = np.random.normal(10, 1, (height, width))
+            varArr[:] = np.random.uniform(0.5, 1.5, (height, width))
+            if i == 0:
+                imArr[0, 0] = 100.0     # an outlier to clip
+            maskArr[1, i % width] = BAD
+            imArr[2, i % width] = np.nan
+            mimgList.append(mimg)
+
+        for stat in (afwMath.MEAN, afwMath.MEANCLIP, afwMath.MEDIAN,
+                     afwMath.SUM, afwMath.VARIANCE, afwMath.STDEV):
+            stack = afwMath.statisticsStack(mimgList, stat, sctrl)
+            for y in range(height):
+                for x in range(width):
+                    pixels = afwImage.MaskedImageF(nImg, 1)
+                    for i, mimg in enumerate(mimgList):
+                        pixels.set(i, 0, mimg.get(x, y))
+                    stats = afwMath.makeStatistics(pixels, stat | afwMath.NPOINT | afwMath.ERRORS, sctrl)
+                    value, mask, variance = stack.get(x, y)
+                    self.assertClose(value, stats.getValue(stat), rtol=1E-5)
+                    self.assertClose(variance, stats.getError(stat)**2, rtol=1E-5)
+                    self.assertEqual(mask, stats.getOrMask())
+
+    def testThreadedStack(self):
+        """Test that stacking with several threads gives the same answer as with one"""
+        mimgList = afwImage.vectorMaskedImageF()
+        imgList = afwImage.vectorImageF()
+        for i in range(self.nImg):
+            mimg = afwImage.MaskedImageF(self.nX, self.nY)
+            imArr, maskArr, varArr = mimg.getArrays()
+            imArr[:] = np.random.normal(10, 1, (self.nY, self.nX))
+            varArr[:] = np.random.uniform(0.5, 1.5, (self.nY, self.nX))
+            mimgList.append(mimg)
+            imgList.append(mimg.getImage())
+
+        for stat in (afwMath.MEANCLIP, afwMath.IQRANGE):  # the specialised and generic code
+            sctrl = afwMath.StatisticsControl()
+            serialImage = afwMath.statisticsStack(imgList, stat, sctrl)
+            for numThreads in (2, 3, self.nY + 1):
+                sctrl.setNumThreads(numThreads)
+                parallelImage = afwMath.statisticsStack(imgList, stat, sctrl)
+                self.assertClose(parallelImage.getArray(), serialImage.getArray(), rtol=0, atol=0)
+
+            for weighted in (False, True):
+                sctrl = afwMath.StatisticsControl()
+                sctrl.setWeighted(weighted)
+                serial = afwMath.statisticsStack(mimgList, stat, sctrl)
+                for numThreads in (2, 3, self.nY + 1):
+                    sctrl.setNumThreads(numThreads)
+                    parallel = afwMath.statisticsStack(mimgList, stat, sctrl)
+                    for exp, got in zip(serial.getArrays(), parallel.getArrays()):
+                        self.assertClose(got, exp, rtol=0, atol=0)
+
+    def testStackFromFits(self):
+        """Test stacking MaskedImages read from FITS files a strip at a time"""
+        mimgList = afwImage.vectorMaskedImageF()
+        for i in range(self.nImg):
+            mimg = afwImage.MaskedImageF(afwGeom.Box2I(afwGeom.Point2I(10, 20),
+                                                       afwGeom.Extent2I(self.nX, self.nY)))
+            imArr, maskArr, varArr = mimg.getArrays()
+            imArr[:] = np.random.normal(10, 1, (self.nY, self.nX))
+            varArr[:] = 1.0
+            maskArr[i, :] = 0x1
+            mimgList.append(mimg)
+
+        sctrl = afwMath.StatisticsControl()
+        sctrl.setAndMask(0x1)
+        bbox = afwGeom.Box2I(afwGeom.Point2I(15, 25), afwGeom.Extent2I(self.nX - 10, self.nY - 7))
+        subList = afwImage.vectorMaskedImageF()
+        for mimg in mimgList:
+            subList.push_back(mimg.Factory(mimg, bbox, afwImage.PARENT))
+        expected = afwMath.statisticsStack(subList, afwMath.MEANCLIP, sctrl)
+
+        tempdir = tempfile.mkdtemp()
+        try:
+            fileNames = []
+            for i, mimg in enumerate(mimgList):
+                fileNames.append(os.path.join(tempdir, "stack%d.fits" % i))
+                mimg.writeFits(fileNames[-1])
+
+            for stripHeight in (1, 5, self.nY):
+                stack = afwImage.MaskedImageF(bbox)
+                afwMath.statisticsStack(stack, fileNames, afwMath.MEANCLIP, sctrl, [], stripHeight)
+                for exp, got in zip(expected.getArrays(), stack.getArrays()):
+                    self.assertClose(got, exp, rtol=0, atol=0)
+        finally:
+            shutil.rmtree(tempdir)
+
 #################################################################
 # Test suite boiler plate
 #################################################################
@@ -473,6 +473,43 @@ class StatisticsTestCase(lsst.utils.tests.TestCase):
         self.assertEqual(afwMath.makeStatistics(self.image, subMask, afwMath.MEDIAN, ctrl).getValue(),
                          self.val)
 
+    def testStatisticsBuffer(self):
+        """Test that reusing a StatisticsBuffer gives the same results as allocating a new one"""
+        np.random.seed(1)
+        mi = afwImage.MaskedImageF(afwGeom.Extent2I(40, 30))
+        imArr, maskArr, varArr = mi.getArrays()
+        imArr[:] = np.random.normal(10.0, 2.0, imArr.shape)
+        imArr[5, 5] = np.nan
+        maskArr[::3, ::7] = 0x1
+        varArr[:] = 4.0
+        ctrl = afwMath.StatisticsControl()
+        ctrl.setAndMask(0x1)
+
+        flags = (afwMath.NPOINT | afwMath.MEAN | afwMath.STDEV | afwMath.MEDIAN | afwMath.IQRANGE |
+                 afwMath.MEANCLIP | afwMath.STDEVCLIP | afwMath.MIN | afwMath.MAX)
+        props = (afwMath.NPOINT, afwMath.MEAN, afwMath.STDEV, afwMath.MEDIAN, afwMath.IQRANGE,
+                 afwMath.MEANCLIP, afwMath.STDEVCLIP, afwMath.MIN, afwMath.MAX)
+
+        buf = afwMath.StatisticsBuffer()
+        for box in (afwGeom.Box2I(afwGeom.Point2I(0, 0), afwGeom.Extent2I(40, 30)),
+                    afwGeom.Box2I(afwGeom.Point2I(3, 4), afwGeom.Extent2I(7, 5)),
+                    afwGeom.Box2I(afwGeom.Point2I(10, 2), afwGeom.Extent2I(20, 20))):
+            sub = afwImage.MaskedImageF(mi, box, afwImage.PARENT)
+            for image in (sub, sub.getImage()):
+                stats = afwMath.makeStatistics(image, flags, ctrl)
+                bufStats = afwMath.makeStatistics(image, flags, ctrl, buf)
+                for prop in props:
+                    self.assertEqual(bufStats.getValue(prop), stats.getValue(prop))
+                # Only the median and quantiles need the buffer
+                self.assertEqual(afwMath.makeStatistics(image, afwMath.MEAN, ctrl, buf).getValue(),
+                                 stats.getValue(afwMath.MEAN))
+        self.assertGreaterEqual(buf.getCapacity(), 40*30)
+
+        # The median of an image with no good pixels is NaN
+        ctrl.setAndMask(0xFF)
+        maskArr[:] = 0x1
+        self.assertTrue(np.isnan(afwMath.makeStatistics(mi, afwMath.MEDIAN, ctrl, buf).getValue()))
+
 
 class TestMemory(lsst.utils.tests.MemoryTestCase):
     pass
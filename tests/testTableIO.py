@@ -24,7 +24,9 @@ from __future__ import absolute_import, division, print_function
 import unittest
 
 import astropy.io.fits
+import numpy as np
 import lsst.utils.tests
+import lsst.pex.exceptions
 import lsst.afw.geom
 import lsst.afw.table
 import lsst.afw.image
@@ -67,6 +69,189 @@ class TableIoTestCase(lsst.utils.tests.TestCase):
             # python-accessible FITS header reader) returns a PropertySet, but we want a PropertyList
             # and it doesn't up-convert easily.
 
+    def testBlockWriting(self):
+        """Test that catalogs longer than the writer's row buffers round-trip through FITS,
+        whether or not they're contiguous.
+        """
+        schema = lsst.afw.table.Schema()
+        ki = schema.addField("i", type=np.int32, doc="int")
+        kd = schema.addField("d", type=float, doc="double")
+        ka = schema.addField("a", type="Angle", doc="angle")
+        ks = schema.addField("s", type=str, size=8, doc="string")
+        kf1 = schema.addField("f1", type="Flag", doc="flag 1")
+        kf2 = schema.addField("f2", type="Flag", doc="flag 2")
+        # A large array field, so the row buffers only hold a few tens of records
+        kb = schema.addField("b", type="ArrayD", size=20000, doc="big array")
+        kv = schema.addField("v", type="ArrayI", size=0, doc="variable-length array")
+        table = lsst.afw.table.BaseTable.make(schema)
+        contiguous = lsst.afw.table.BaseCatalog(table)
+        nRecords = 150
+        for i in range(nRecords):
+            record = contiguous.addNew()
+            record.set(ki, i)
+            record.set(kd, 0.5*i)
+            record.set(ka, 0.25*i*lsst.afw.geom.degrees)
+            record.set(ks, "s%d" % i)
+            record.set(kf1, i % 2 == 0)
+            record.set(kf2, i % 3 == 0)
+            record.set(kb, np.arange(20000, dtype=float) + i)
+            record.set(kv, np.arange(i % 5, dtype=np.int32))
+        # Interleave records from another table to make a non-contiguous catalog
+        other = lsst.afw.table.BaseTable.make(schema)
+        noncontiguous = lsst.afw.table.BaseCatalog(table)
+        for record in contiguous:
+            copied = other.copyRecord(record)
+            noncontiguous.append(copied if record.get(ki) % 2 else record)
+        self.assertFalse(noncontiguous.isContiguous())
+        for catalog in (contiguous, noncontiguous):
+            with lsst.utils.tests.getTempFilePath(".fits") as tmpFile:
+                catalog.writeFits(tmpFile)
+                data = astropy.io.fits.getdata(tmpFile)
+                self.assertEqual(len(data), nRecords)
+                self.assertTrue((data["i"] == np.arange(nRecords)).all())
+                self.assertEqual(data["s"][nRecords - 1], "s%d" % (nRecords - 1))
+                result = lsst.afw.table.BaseCatalog.readFits(tmpFile)
+            self.assertEqual(len(result), nRecords)
+            for i, record in enumerate(result):
+                self.assertEqual(record.get(ki), i)
+                self.assertEqual(record.get(kd), 0.5*i)
+                self.assertEqual(record.get(ka), 0.25*i*lsst.afw.geom.degrees)
+                self.assertEqual(record.get(ks), "s%d" % i)
+                self.assertEqual(record.get(kf1), i % 2 == 0)
+                self.assertEqual(record.get(kf2), i % 3 == 0)
+                self.assertFloatsEqual(record.get(kb), np.arange(20000, dtype=float) + i)
+                self.assertEqual(list(record.get(kv)), list(range(i % 5)))
+
+    def testFlagColumnLayout(self):
+        """Test that each record's flags are written to its own row of the flag column, when the
+        number of flags isn't a multiple of 8 (so the rows don't end on byte boundaries).
+        """
+        nRecords = 150
+        for nFlags in (3, 8, 11):
+            schema = lsst.afw.table.Schema()
+            ki = schema.addField("i", type=np.int32, doc="int")
+            flagKeys = [schema.addField("f%d" % j, type="Flag", doc="flag %d" % j) for j in range(nFlags)]
+            # A large array field, so the row buffers only hold a few tens of records
+            schema.addField("b", type="ArrayD", size=20000, doc="big array")
+            catalog = lsst.afw.table.BaseCatalog(schema)
+            expected = np.zeros((nRecords, nFlags), dtype=bool)
+            for i in range(nRecords):
+                record = catalog.addNew()
+                record.set(ki, i)
+                for j, key in enumerate(flagKeys):
+                    expected[i, j] = (i + j) % (j + 2) == 0
+                    record.set(key, bool(expected[i, j]))
+            with lsst.utils.tests.getTempFilePath(".fits") as tmpFile:
+                catalog.writeFits(tmpFile)
+                data = astropy.io.fits.getdata(tmpFile)
+                self.assertTrue((data["i"] == np.arange(nRecords)).all())
+                flags = np.asarray(data["flags"], dtype=bool).reshape(nRecords, nFlags)
+                self.assertTrue((flags == expected).all())
+
+    def testReadFlagColumn(self):
+        """Test reading flag columns written by another FITS writer, when the number of flags isn't a
+        multiple of 8 (so the rows don't end on byte boundaries).
+        """
+        nRecords = 100
+        for nFlags in (3, 11):
+            ids = np.arange(nRecords, dtype=np.int64)
+            expected = np.zeros((nRecords, nFlags), dtype=bool)
+            for j in range(nFlags):
+                expected[:, j] = (ids + j) % (j + 2) == 0
+            hdu = astropy.io.fits.BinTableHDU.from_columns([
+                astropy.io.fits.Column(name="id", format="K", array=ids),
+                astropy.io.fits.Column(name="flags", format="%dX" % nFlags, array=expected),
+            ])
+            hdu.header["FLAGCOL"] = 2
+            for j in range(nFlags):
+                hdu.header["TFLAG%d" % (j + 1)] = "f%d" % j
+            with lsst.utils.tests.getTempFilePath(".fits") as tmpFile:
+                hdu.writeto(tmpFile)
+                catalog = lsst.afw.table.BaseCatalog.readFits(tmpFile)
+            self.assertEqual(len(catalog), nRecords)
+            flagKeys = [catalog.schema.find("f%d" % j).key for j in range(nFlags)]
+            for i, record in enumerate(catalog):
+                self.assertEqual(record.get("id"), i)
+                for j, key in enumerate(flagKeys):
+                    self.assertEqual(record.get(key), expected[i, j])
+
+    def testColumnSelection(self):
+        """Test reading only some of the columns of a FITS binary table."""
+        schema = lsst.afw.table.SourceTable.makeMinimalSchema()
+        kx = schema.addField("x", type=float, doc="x")
+        ky = schema.addField("y", type=np.int32, doc="y")
+        ks = schema.addField("s", type=str, size=4, doc="s")
+        kf1 = schema.addField("f1", type="Flag", doc="flag 1")
+        kf2 = schema.addField("f2", type="Flag", doc="flag 2")
+        schema.getAliasMap().set("why", "y")
+        catalog = lsst.afw.table.SourceCatalog(schema)
+        for i in range(10):
+            record = catalog.addNew()
+            record.set(kx, 1.5*i)
+            record.set(ky, i)
+            record.set(ks, str(i))
+            record.set(kf1, i % 2 == 1)
+            record.set(kf2, i % 3 == 1)
+        with lsst.utils.tests.getTempFilePath(".fits") as tmpFile:
+            catalog.writeFits(tmpFile)
+            result = lsst.afw.table.BaseCatalog.readFits(tmpFile, columns=["x", "why", "f2"])
+            self.assertEqual(len(result), len(catalog))
+            self.assertEqual(sorted(result.schema.getNames()), ["f2", "x", "y"])
+            self.assertFloatsEqual(result["x"], catalog[kx])
+            self.assertFloatsEqual(result["y"], catalog[ky])
+            self.assertTrue((result["f2"] == catalog[kf2]).all())
+            result = lsst.afw.table.BaseCatalog.readFits(tmpFile, columns=["s", "f1"])
+            self.assertEqual([record.get("s") for record in result], [str(i) for i in range(10)])
+            self.assertTrue((result["f1"] == catalog[kf1]).all())
+            with self.assertRaises(lsst.pex.exceptions.NotFoundError):
+                lsst.afw.table.BaseCatalog.readFits(tmpFile, columns=["x", "z"])
+            # Without columns we still get everything
+            self.assertEqual(sorted(lsst.afw.table.BaseCatalog.readFits(tmpFile).schema.getNames()),
+                             sorted(catalog.schema.getNames()))
+
+    def testRowSelection(self):
+        """Test reading a range of rows and filtering rows while reading a FITS binary table."""
+        schema = lsst.afw.table.SourceTable.makeMinimalSchema()
+        kx = schema.addField("x", type=float, doc="x")
+        ky = schema.addField("y", type=np.int32, doc="y")
+        kf = schema.addField("f", type="Flag", doc="flag")
+        schema.getAliasMap().set("why", "y")
+        catalog = lsst.afw.table.SourceCatalog(schema)
+        for i in range(100):
+            record = catalog.addNew()
+            record.set(kx, 0.5*i)
+            record.set(ky, i % 7)
+            record.set(kf, i % 3 == 0)
+        with lsst.utils.tests.getTempFilePath(".fits") as tmpFile:
+            catalog.writeFits(tmpFile)
+            for rows in (slice(10, 20), slice(None, 5), slice(95, None), slice(-10, -2), slice(90, 200)):
+                result = lsst.afw.table.SourceCatalog.readFits(tmpFile, rows=rows)
+                self.assertIsInstance(result, lsst.afw.table.SourceCatalog)
+                self.assertTrue(result.isContiguous())
+                self.assertEqual(list(result["id"]), list(catalog["id"][rows]))
+                self.assertFloatsEqual(result[kx], catalog[kx][rows])
+            self.assertEqual(len(lsst.afw.table.SourceCatalog.readFits(tmpFile, rows=slice(50, 10))), 0)
+            with self.assertRaises(ValueError):
+                lsst.afw.table.SourceCatalog.readFits(tmpFile, rows=slice(0, 10, 2))
+
+            where = [("f", "==", 1), ("why", "<", 3), ("x", ">=", 10.0)]
+            expected = [record.getId() for record in catalog
+                        if record.get(kf) and record.get(ky) < 3 and record.get(kx) >= 10.0]
+            result = lsst.afw.table.SourceCatalog.readFits(tmpFile, where=where)
+            self.assertIsInstance(result, lsst.afw.table.SourceCatalog)
+            self.assertEqual([record.getId() for record in result], expected)
+            result = lsst.afw.table.BaseCatalog.readFits(tmpFile, columns=["id", "x", "f", "why"],
+                                                         rows=slice(30, None), where=where)
+            self.assertEqual(list(result["id"]), [i for i in expected if i > 30])
+            self.assertEqual(sorted(result.schema.getNames()), ["f", "id", "x", "y"])
+
+            with self.assertRaises(lsst.pex.exceptions.InvalidParameterError):
+                lsst.afw.table.SourceCatalog.readFits(tmpFile, where=[("x", "=<", 1.0)])
+            with self.assertRaises(lsst.pex.exceptions.NotFoundError):
+                lsst.afw.table.SourceCatalog.readFits(tmpFile, where=[("z", "<", 1.0)])
+            with self.assertRaises(lsst.pex.exceptions.NotFoundError):
+                lsst.afw.table.BaseCatalog.readFits(tmpFile, columns=["id"], where=[("x", "<", 1.0)])
+
 
 class MemoryTester(lsst.utils.tests.MemoryTestCase):
     pass
@@ -38,6 +38,8 @@ import os
 import re
 import unittest
 
+import numpy as np
+
 import lsst.afw.table as afwTable
 import lsst.afw.geom as afwGeom
 import lsst.pex.exceptions as pexExcept
@@ -134,6 +136,158 @@ class TestGroupView(lsst.utils.tests.TestCase):
         self.assertTrue(len(allMatches) > 0)
 
 
+class TestMultiMatch(lsst.utils.tests.TestCase):
+    """Test case for lsst.afw.table.multiMatch.MultiMatch on synthetic catalogs."""
+
+    def setUp(self):
+        self.schema = afwTable.SourceTable.makeMinimalSchema()
+        self.table = afwTable.SourceTable.make(self.schema)
+        self.nObj = 50
+        self.nVisit = 3
+
+    def tearDown(self):
+        del self.table
+        del self.schema
+
+    def makeCatalog(self, visit, extra):
+        """Make a catalog of self.nObj objects on a grid with 10" spacing, jittered by up to 0.1",
+        plus the (ra, dec) positions in extra (degrees)
+        """
+        rng = np.random.RandomState(visit)
+        catalog = afwTable.SourceCatalog(self.table)
+        positions = [(10.0 + (i % 10)*10.0/3600, 20.0 + (i//10)*10.0/3600) for i in range(self.nObj)]
+        for i, (ra, dec) in enumerate(positions + list(extra)):
+            record = catalog.addNew()
+            record.setId(1000*visit + i)
+            record.setRa((ra + rng.uniform(-0.1, 0.1)/3600)*afwGeom.degrees)
+            record.setDec((dec + rng.uniform(-0.1, 0.1)/3600)*afwGeom.degrees)
+        return catalog
+
+    def testMultiMatch(self):
+        """Check grouping, ambiguity detection and GroupView construction"""
+        # An isolated source in visit 1 only, and two sources ~0.4" apart in visit 1 that
+        # will both match a single source between them in visit 2.
+        pair = (12.0, 20.0)
+        extras = {1: [(11.0, 20.0), (pair[0] - 0.2/3600, pair[1]), (pair[0] + 0.2/3600, pair[1])],
+                  2: [pair],
+                  3: []}
+        for RecordClass in (afwTable.SimpleRecord, afwTable.SourceRecord):
+            m = afwTable.MultiMatch(self.schema, dict(visit=int), radius=0.5*afwGeom.arcseconds,
+                                    RecordClass=RecordClass)
+            for visit in range(1, self.nVisit + 1):
+                m.add(self.makeCatalog(visit, extras[visit]), dict(visit=visit))
+            self.assertEqual(len(m.ambiguous), 2)
+            result = m.finish(removeAmbiguous=False)
+            self.assertEqual(len(result), self.nVisit*self.nObj + 3 + 2)
+            self.assertTrue(result.isContiguous())
+            self.assertTrue((np.diff(result.get("object")) >= 0).all())
+
+            m = afwTable.MultiMatch(self.schema, dict(visit=int), radius=0.5*afwGeom.arcseconds,
+                                    RecordClass=RecordClass)
+            for visit in range(1, self.nVisit + 1):
+                m.add(self.makeCatalog(visit, extras[visit]), dict(visit=visit))
+            result = m.finish()
+            self.assertEqual(len(result), self.nVisit*self.nObj + 1)
+
+            groups = afwTable.GroupView.build(result)
+            self.assertEqual(len(groups), self.nObj + 1)
+            sizes = groups.aggregate(len, dtype=int)
+            self.assertEqual(sorted(sizes.tolist()), [1] + [self.nVisit]*self.nObj)
+            for objId, size in zip(groups.ids, sizes):
+                group = groups[objId]
+                self.assertTrue((group.get("object") == objId).all())
+                if size == self.nVisit:
+                    self.assertEqual(sorted(group.get("visit").tolist()), list(range(1, self.nVisit + 1)))
+                    self.assertEqual(len(set(group.get("id") % 1000)), 1)
+
+            # GroupView.build also accepts catalogs that aren't sorted by the group field
+            unsorted = result.copy(deep=True)
+            unsorted.sort(result.schema.find("id").key)
+            groups2 = afwTable.GroupView.build(unsorted.copy(deep=True))
+            self.assertTrue((groups2.ids == groups.ids).all())
+            self.assertTrue((groups2.aggregate(len, dtype=int) == sizes).all())
+
+    def assertAddAllEqualsAdd(self, catalogs, dataIds, nThreadsList=(1, 2, 4)):
+        """Check that addAll gives the same result, reference and ambiguous objects as adding the catalogs
+        one at a time"""
+        m = afwTable.MultiMatch(self.schema, dict(visit=int), radius=0.5*afwGeom.arcseconds)
+        for catalog, dataId in zip(catalogs, dataIds):
+            m.add(catalog, dataId)
+        expectedReference = m.reference.get("id").copy()
+        expectedAmbiguous = set(m.ambiguous)
+        expected = m.finish(removeAmbiguous=False)
+        for nThreads in nThreadsList:
+            m = afwTable.MultiMatch(self.schema, dict(visit=int), radius=0.5*afwGeom.arcseconds)
+            m.addAll(catalogs, dataIds, nThreads=nThreads)
+            self.assertTrue((m.reference.get("id") == expectedReference).all())
+            self.assertEqual(m.ambiguous, expectedAmbiguous)
+            result = m.finish(removeAmbiguous=False)
+            self.assertEqual(len(result), len(expected))
+            self.assertTrue((result.get("id") == expected.get("id")).all())
+            self.assertTrue((result.get("object") == expected.get("object")).all())
+            self.assertTrue((result.get("visit") == expected.get("visit")).all())
+
+    def testAddAll(self):
+        """Check that addAll gives the same result as adding the catalogs one at a time"""
+        extras = {1: [(11.0, 20.0)], 2: [(11.5, 20.0)], 3: [(11.5, 20.0), (11.5, 20.0 + 0.2/3600)],
+                  4: [], 5: [(11.0, 20.0)]}
+        catalogs = [self.makeCatalog(visit, extras[visit]) for visit in sorted(extras)]
+        dataIds = [dict(visit=visit) for visit in sorted(extras)]
+        self.assertAddAllEqualsAdd(catalogs, dataIds)
+
+        m = afwTable.MultiMatch(self.schema, dict(visit=int), radius=0.5*afwGeom.arcseconds)
+        m.addAll(catalogs[:2], dataIds[:2])
+        self.assertRaises(RuntimeError, m.addAll, catalogs, dataIds)
+        # add() still works after addAll()
+        m.add(catalogs[2], dataIds[2])
+        self.assertEqual(len(m.finish()), 3*self.nObj + 4)
+
+        # Two sources in one catalog that both match the same source in another make two ambiguous
+        # objects
+        pair = (12.0, 20.0)
+        catalogs = [self.makeCatalog(1, [(pair[0] - 0.2/3600, pair[1]), (pair[0] + 0.2/3600, pair[1])]),
+                    self.makeCatalog(2, [pair])]
+        self.assertAddAllEqualsAdd(catalogs, dataIds[:2])
+        m = afwTable.MultiMatch(self.schema, dict(visit=int), radius=0.5*afwGeom.arcseconds)
+        m.addAll(catalogs, dataIds[:2])
+        self.assertEqual(len(m.ambiguous), 2)
+        self.assertEqual(len(m.finish()), 2*self.nObj)
+
+    def testAddAllChain(self):
+        """Check that addAll matches each catalog only to the first source of each object, as add() does,
+        for chains of sources that are each within the match radius of the next"""
+        nVisit = 9
+        catalogs = [self.makeCatalog(visit, []) for visit in range(1, nVisit + 1)]
+        dataIds = [dict(visit=visit) for visit in range(1, nVisit + 1)]
+
+        def addSource(catalog, ra, dec):
+            record = catalog.addNew()
+            record.setId(100000 + len(catalog))
+            record.setRa(ra*afwGeom.degrees)
+            record.setDec(dec*afwGeom.degrees)
+
+        # With a radius of 0.5": 0" in visit 1, 0.4" in visit 3 and 0.8" in visit 4 give two objects
+        addSource(catalogs[0], 13.0, 20.0)
+        addSource(catalogs[2], 13.0, 20.0 + 0.4/3600)
+        addSource(catalogs[3], 13.0, 20.0 + 0.8/3600)
+        # A chain of sources 0.3" apart, one in each visit, which alternately start and join objects
+        for i, catalog in enumerate(catalogs):
+            addSource(catalog, 14.0, 20.0 + 0.3*i/3600)
+        # A dense clump of sources, several per visit, with many overlapping matches
+        rng = np.random.RandomState(5)
+        for catalog in catalogs:
+            for i in range(5):
+                addSource(catalog, 15.0 + rng.uniform(0.0, 1.5)/3600, 20.0 + rng.uniform(0.0, 1.5)/3600)
+
+        m = afwTable.MultiMatch(self.schema, dict(visit=int), radius=0.5*afwGeom.arcseconds)
+        for catalog, dataId in zip(catalogs[:4], dataIds[:4]):
+            m.add(catalog, dataId)
+        result = m.finish(removeAmbiguous=False)
+        isChain = np.abs(result.get("coord_ra") - np.radians(13.0)) < 1e-9
+        self.assertEqual(len(set(result.get("object")[isChain])), 2)
+
+        self.assertAddAllEqualsAdd(catalogs, dataIds, nThreadsList=(1, 2, 3, 4, 16))
+
 class MemoryTester(lsst.utils.tests.MemoryTestCase):
     pass
 
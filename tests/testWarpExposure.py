@@ -33,6 +33,7 @@ import lsst.utils
 import lsst.utils.tests
 import lsst.daf.base as dafBase
 import lsst.afw.coord as afwCoord
+import lsst.afw.detection as afwDetection
 import lsst.afw.geom as afwGeom
 import lsst.afw.image as afwImage
 import lsst.afw.math as afwMath
@@ -293,6 +294,279 @@ class WarpExposureTestCase(lsst.utils.tests.TestCase):
             with self.assertRaises(pexExcept.Exception):
                 afwMath.WarpingControl(kernelName, maskKernelName)
 
+        # invalid number of threads
+        warpingControl = afwMath.WarpingControl("bilinear")
+        self.assertEqual(warpingControl.getNumThreads(), 1)
+        with self.assertRaises(pexExcept.InvalidParameterError):
+            warpingControl.setNumThreads(0)
+
+    def testNumThreads(self):
+        """Test that warping on several threads gives exactly the same result as on one
+        """
+        srcWcs = makeWcs(
+            pixelScale=afwGeom.Angle(0.2, afwGeom.degrees),
+            crPixPos=(10.0, 11.0),
+            crValCoord=afwCoord.IcrsCoord(afwGeom.Point2D(41.7, 32.9), afwGeom.degrees),
+        )
+        destWcs = makeWcs(
+            pixelScale=afwGeom.Angle(0.17, afwGeom.degrees),
+            crPixPos=(9.0, 10.0),
+            crValCoord=afwCoord.IcrsCoord(afwGeom.Point2D(41.65, 32.95), afwGeom.degrees),
+            posAng=afwGeom.Angle(31, afwGeom.degrees),
+        )
+        srcMaskedImage = afwImage.MaskedImageF(100, 101)
+        srcArrays = srcMaskedImage.getArrays()
+        shape = srcArrays[0].shape
+        srcArrays[0][:] = np.random.normal(10000, 1000, size=shape)
+        srcArrays[1][:] = np.random.randint(0, 0x10, size=shape)
+        srcArrays[2][:] = np.random.normal(9000, 900, size=shape)
+        srcExposure = afwImage.ExposureF(srcMaskedImage, srcWcs)
+
+        for interpLength in (0, 1, 7, 10):
+            for maskKernelName in ("", "bilinear"):
+                warpingControl = afwMath.WarpingControl("lanczos3", maskKernelName, 1000, interpLength)
+                results = []
+                for numThreads in (1, 2, 5):
+                    warpingControl.setNumThreads(numThreads)
+                    destExposure = afwImage.ExposureF(afwImage.MaskedImageF(110, 121), destWcs)
+                    numGoodPix = afwMath.warpExposure(destExposure, srcExposure, warpingControl)
+                    results.append((numGoodPix, destExposure.getMaskedImage().getArrays()))
+                for numGoodPix, arrays in results[1:]:
+                    self.assertEqual(numGoodPix, results[0][0])
+                    for array, expected in zip(arrays, results[0][1]):
+                        # edge pixels are NaN, which assert_array_equal treats as equal
+                        np.testing.assert_array_equal(array, expected)
+
+        config = afwMath.Warper.ConfigClass()
+        config.numThreads = 3
+        warper = afwMath.Warper.fromConfig(config)
+        warpedExposure = warper.warpExposure(destWcs, srcExposure)
+        self.assertGreater(warpedExposure.getWidth(), 0)
+
+    def testWarpingPlan(self):
+        """Test that warping with a WarpingPlan gives exactly the same result as warping with the WCS
+        """
+        srcWcs = makeWcs(
+            pixelScale=afwGeom.Angle(0.2, afwGeom.degrees),
+            crPixPos=(10.0, 11.0),
+            crValCoord=afwCoord.IcrsCoord(afwGeom.Point2D(41.7, 32.9), afwGeom.degrees),
+        )
+        destWcs = makeWcs(
+            pixelScale=afwGeom.Angle(0.17, afwGeom.degrees),
+            crPixPos=(9.0, 10.0),
+            crValCoord=afwCoord.IcrsCoord(afwGeom.Point2D(41.65, 32.95), afwGeom.degrees),
+            posAng=afwGeom.Angle(31, afwGeom.degrees),
+        )
+        srcMaskedImage = afwImage.MaskedImageF(100, 101)
+        srcArrays = srcMaskedImage.getArrays()
+        shape = srcArrays[0].shape
+        srcArrays[0][:] = np.random.normal(10000, 1000, size=shape)
+        srcArrays[2][:] = np.random.normal(9000, 900, size=shape)
+        destBBox = afwGeom.Box2I(afwGeom.Point2I(3, -2), afwGeom.Extent2I(110, 121))
+
+        for interpLength in (0, 1, 10):
+            plan = afwMath.WarpingPlan(destWcs, destBBox, srcWcs, interpLength)
+            self.assertEqual(plan.getDestBBox(), destBBox)
+            self.assertEqual(plan.getInterpLength(), interpLength)
+            with lsst.utils.tests.getTempFilePath(".fits") as tmpFile:
+                plan.writeFits(tmpFile)
+                plans = [plan, afwMath.WarpingPlan.readFits(tmpFile)]
+            warpingControl = afwMath.WarpingControl("lanczos3", "bilinear", 1000, interpLength)
+            for numThreads in (1, 3):
+                warpingControl.setNumThreads(numThreads)
+                expected = afwImage.MaskedImageF(destBBox)
+                numGoodPix = afwMath.warpImage(expected, destWcs, srcMaskedImage, srcWcs, warpingControl)
+                expectedImage = afwImage.ImageF(destBBox)
+                afwMath.warpImage(expectedImage, destWcs, srcMaskedImage.getImage(), srcWcs, warpingControl)
+                for p in plans:
+                    destImage = afwImage.ImageF(destBBox)
+                    afwMath.warpImage(destImage, srcMaskedImage.getImage(), p, warpingControl)
+                    np.testing.assert_array_equal(destImage.getArray(), expectedImage.getArray())
+                    destMaskedImage = afwImage.MaskedImageF(destBBox)
+                    self.assertEqual(afwMath.warpImage(destMaskedImage, srcMaskedImage, p, warpingControl),
+                                     numGoodPix)
+                    for array, expectedArray in zip(destMaskedImage.getArrays(), expected.getArrays()):
+                        np.testing.assert_array_equal(array, expectedArray)
+
+            with self.assertRaises(pexExcept.InvalidParameterError):
+                afwMath.warpImage(afwImage.ImageF(110, 121), srcMaskedImage.getImage(), plan, warpingControl)
+            warpingControl.setInterpLength(interpLength + 2)
+            with self.assertRaises(pexExcept.InvalidParameterError):
+                afwMath.warpImage(afwImage.ImageF(destBBox), srcMaskedImage.getImage(), plan, warpingControl)
+
+        # plan has interpLength=10, so (9, 19) is a node and (5, 9) is not
+        srcPos = srcWcs.skyToPixel(destWcs.pixelToSky(afwGeom.Point2D(9 + 3, 19 - 2)))
+        for i in range(2):
+            self.assertAlmostEqual(plan.getSrcPosition(9, 19)[i], srcPos[i], places=6)
+        with self.assertRaises(pexExcept.InvalidParameterError):
+            plan.getSrcPosition(5, 9)
+
+    def testComputeWarpedBBox(self):
+        """Test that computeWarpedBBox follows the whole boundary of the source, not just its corners
+        """
+        srcBBox = afwGeom.Box2I(afwGeom.Point2I(-100, -50), afwGeom.Extent2I(300, 250))
+        # barrel distortion: the middle of each edge is warped further out than the corners
+        xyTransform = afwGeom.RadialXYTransform([0, 1.0, -0.0005])
+        srcPosBox = afwGeom.Box2D(srcBBox)
+        edgePosList = []
+        for x in np.linspace(srcPosBox.getMinX(), srcPosBox.getMaxX(), 3001):
+            edgePosList += [afwGeom.Point2D(x, srcPosBox.getMinY()), afwGeom.Point2D(x, srcPosBox.getMaxY())]
+        for y in np.linspace(srcPosBox.getMinY(), srcPosBox.getMaxY(), 2501):
+            edgePosList += [afwGeom.Point2D(srcPosBox.getMinX(), y), afwGeom.Point2D(srcPosBox.getMaxX(), y)]
+        edgeDestPosBox = afwGeom.Box2D()
+        for edgePos in edgePosList:
+            edgeDestPosBox.include(xyTransform.forwardTransform(edgePos))
+        expectedBBox = afwGeom.Box2I(edgeDestPosBox, afwGeom.Box2I.EXPAND)
+        cornerDestPosBox = afwGeom.Box2D()
+        for corner in srcPosBox.getCorners():
+            cornerDestPosBox.include(xyTransform.forwardTransform(corner))
+        self.assertFalse(afwGeom.Box2I(cornerDestPosBox, afwGeom.Box2I.EXPAND).contains(expectedBBox))
+
+        for sampleSpacing in (1, 7, 50):
+            self.assertEqual(afwMath.computeWarpedBBox(srcBBox, xyTransform, sampleSpacing), expectedBBox)
+        self.assertEqual(afwMath.computeWarpedBBox(srcBBox, xyTransform), expectedBBox)
+        with self.assertRaises(pexExcept.InvalidParameterError):
+            afwMath.computeWarpedBBox(srcBBox, xyTransform, 0)
+
+        srcWcs = makeWcs(
+            pixelScale=afwGeom.Angle(0.2, afwGeom.degrees),
+            crPixPos=(10.0, 11.0),
+            crValCoord=afwCoord.IcrsCoord(afwGeom.Point2D(41.7, 32.9), afwGeom.degrees),
+        )
+        destWcs = makeWcs(
+            pixelScale=afwGeom.Angle(0.17, afwGeom.degrees),
+            crPixPos=(9.0, 10.0),
+            crValCoord=afwCoord.IcrsCoord(afwGeom.Point2D(41.65, 32.95), afwGeom.degrees),
+            posAng=afwGeom.Angle(31, afwGeom.degrees),
+        )
+        srcMaskedImage = afwImage.MaskedImageF(
+            afwGeom.Box2I(afwGeom.Point2I(-3, 2), afwGeom.Extent2I(50, 60)))
+        srcMaskedImage.set(1.0, 0x0, 1.0)
+        warpedBBox = afwMath.computeWarpedBBox(destWcs, srcMaskedImage.getBBox(afwImage.PARENT), srcWcs)
+        # every pixel that can be warped lies within the bbox
+        destMaskedImage = afwImage.MaskedImageF(
+            afwGeom.Box2I(warpedBBox.getMin() - afwGeom.Extent2I(10, 10),
+                          warpedBBox.getDimensions() + afwGeom.Extent2I(20, 20)))
+        numGoodPix = afwMath.warpImage(destMaskedImage, destWcs, srcMaskedImage, srcWcs,
+                                       afwMath.WarpingControl("bilinear"))
+        self.assertGreater(numGoodPix, 0)
+        goodY, goodX = np.where(np.isfinite(destMaskedImage.getImage().getArray()))
+        self.assertGreaterEqual(goodX.min() + destMaskedImage.getX0(), warpedBBox.getMinX())
+        self.assertLessEqual(goodX.max() + destMaskedImage.getX0(), warpedBBox.getMaxX())
+        self.assertGreaterEqual(goodY.min() + destMaskedImage.getY0(), warpedBBox.getMinY())
+        self.assertLessEqual(goodY.max() + destMaskedImage.getY0(), warpedBBox.getMaxY())
+
+    def testWarpSpans(self):
+        """Test that warping only the pixels in a SpanSet matches a full warp there, and leaves the rest
+        """
+        srcWcs = makeWcs(
+            pixelScale=afwGeom.Angle(0.2, afwGeom.degrees),
+            crPixPos=(10.0, 11.0),
+            crValCoord=afwCoord.IcrsCoord(afwGeom.Point2D(41.7, 32.9), afwGeom.degrees),
+        )
+        destWcs = makeWcs(
+            pixelScale=afwGeom.Angle(0.17, afwGeom.degrees),
+            crPixPos=(9.0, 10.0),
+            crValCoord=afwCoord.IcrsCoord(afwGeom.Point2D(41.65, 32.95), afwGeom.degrees),
+            posAng=afwGeom.Angle(31, afwGeom.degrees),
+        )
+        srcMaskedImage = afwImage.MaskedImageF(100, 101)
+        srcArrays = srcMaskedImage.getArrays()
+        shape = srcArrays[0].shape
+        srcArrays[0][:] = np.random.normal(10000, 1000, size=shape)
+        srcArrays[1][:] = np.random.randint(0, 0x10, size=shape)
+        srcArrays[2][:] = np.random.normal(9000, 900, size=shape)
+
+        destBBox = afwGeom.Box2I(afwGeom.Point2I(-5, 3), afwGeom.Extent2I(110, 121))
+        # a disk, a bar that sticks out of destBBox, and some single pixels (including the corners)
+        spanList = [afwGeom.Span(y, 40 - int((100 - (y - 50)**2)**0.5), 40 + int((100 - (y - 50)**2)**0.5))
+                    for y in range(40, 61)]
+        spanList += [afwGeom.Span(y, 60, 200) for y in range(90, 95)]
+        spanList += [afwGeom.Span(y, x, x) for x, y in ((-5, 3), (104, 123), (20, 120), (-10, 50))]
+        spans = afwGeom.SpanSet(afwGeom.SpanVector(spanList))
+        inSpans = np.zeros((destBBox.getHeight(), destBBox.getWidth()), dtype=bool)
+        for span in spanList:
+            y = span.getY() - destBBox.getMinY()
+            x0 = max(0, span.getX0() - destBBox.getMinX())
+            x1 = span.getX1() - destBBox.getMinX()
+            if 0 <= y < destBBox.getHeight() and x0 <= x1:
+                inSpans[y, x0:x1 + 1] = True
+
+        for interpLength in (0, 1, 10):
+            warpingControl = afwMath.WarpingControl("lanczos3", "bilinear", 0, interpLength)
+            fullMaskedImage = afwImage.MaskedImageF(destBBox)
+            numGoodPix = afwMath.warpImage(fullMaskedImage, destWcs, srcMaskedImage, srcWcs, warpingControl)
+            self.assertGreater(numGoodPix, 0)
+            sparseMaskedImage = afwImage.MaskedImageF(destBBox)
+            sparseMaskedImage.set(-1.0, 0x1, -1.0)
+            numGoodPix = afwMath.warpImage(sparseMaskedImage, spans, destWcs, srcMaskedImage, srcWcs,
+                                           warpingControl)
+            self.assertGreater(numGoodPix, 0)
+            self.assertLessEqual(numGoodPix, inSpans.sum())
+            for sparseArray, fullArray in zip(sparseMaskedImage.getArrays(), fullMaskedImage.getArrays()):
+                if interpLength <= 1:
+                    np.testing.assert_array_equal(sparseArray[inSpans], fullArray[inSpans])
+                else:
+                    np.testing.assert_allclose(sparseArray[inSpans], fullArray[inSpans], rtol=1e-5)
+            self.assertTrue((sparseMaskedImage.getImage().getArray()[~inSpans] == -1.0).all())
+            self.assertTrue((sparseMaskedImage.getMask().getArray()[~inSpans] == 0x1).all())
+
+        footprints = [afwDetection.Footprint(afwGeom.Point2I(30, 60), 6.0),
+                      afwDetection.Footprint(afwGeom.Box2I(afwGeom.Point2I(70, 20), afwGeom.Extent2I(8, 5)))]
+        srcExposure = afwImage.ExposureF(srcMaskedImage, srcWcs)
+        warper = afwMath.Warper("lanczos3", interpLength=0)
+        heavyFootprints = warper.warpFootprints(destWcs, srcExposure, footprints)
+        self.assertEqual(len(heavyFootprints), len(footprints))
+        fullExposure = afwImage.ExposureF(destBBox, destWcs)
+        afwMath.warpExposure(fullExposure, srcExposure, afwMath.WarpingControl("lanczos3"))
+        for heavyFootprint, footprint in zip(heavyFootprints, footprints):
+            expected = afwDetection.makeHeavyFootprint(footprint, fullExposure.getMaskedImage())
+            np.testing.assert_array_equal(heavyFootprint.getImageArray(), expected.getImageArray())
+            np.testing.assert_array_equal(heavyFootprint.getMaskArray(), expected.getMaskArray())
+            np.testing.assert_array_equal(heavyFootprint.getVarianceArray(), expected.getVarianceArray())
+
+    def testTabulatedKernel(self):
+        """Test that tabulated Lanczos kernels match the same kernel evaluated directly
+        """
+        srcWcs = makeWcs(
+            pixelScale=afwGeom.Angle(0.2, afwGeom.degrees),
+            crPixPos=(10.0, 11.0),
+            crValCoord=afwCoord.IcrsCoord(afwGeom.Point2D(41.7, 32.9), afwGeom.degrees),
+        )
+        destWcs = makeWcs(
+            pixelScale=afwGeom.Angle(0.17, afwGeom.degrees),
+            crPixPos=(9.0, 10.0),
+            crValCoord=afwCoord.IcrsCoord(afwGeom.Point2D(41.65, 32.95), afwGeom.degrees),
+            posAng=afwGeom.Angle(31, afwGeom.degrees),
+        )
+        srcMaskedImage = afwImage.MaskedImageF(100, 101)
+        srcArrays = srcMaskedImage.getArrays()
+        shape = srcArrays[0].shape
+        srcArrays[0][:] = np.random.normal(10000, 1000, size=shape)
+        srcArrays[1][:] = np.random.randint(0, 0x10, size=shape)
+        srcArrays[2][:] = np.random.normal(9000, 900, size=shape)
+        srcArrays[0][50, 40] = np.nan
+        srcExposure = afwImage.ExposureF(srcMaskedImage, srcWcs)
+
+        for order in (2, 3, 4):
+            kernelName = "lanczos%d" % (order,)
+            # a plain SeparableKernel is not tabulated
+            directKernel = afwMath.SeparableKernel(2*order, 2*order, afwMath.LanczosFunction1D(order),
+                                                   afwMath.LanczosFunction1D(order))
+            for maskKernelName in ("", "bilinear"):
+                tabulatedControl = afwMath.WarpingControl(kernelName, maskKernelName)
+                directControl = afwMath.WarpingControl(kernelName, maskKernelName)
+                directControl.setWarpingKernel(directKernel)
+                results = []
+                for warpingControl in (tabulatedControl, directControl):
+                    destExposure = afwImage.ExposureF(afwImage.MaskedImageF(110, 121), destWcs)
+                    numGoodPix = afwMath.warpExposure(destExposure, srcExposure, warpingControl)
+                    results.append((numGoodPix, destExposure.getMaskedImage()))
+                msg = "kernel=%s, maskKernel=%r" % (kernelName, maskKernelName)
+                self.assertEqual(results[0][0], results[1][0], msg=msg)
+                self.assertMaskedImagesNearlyEqual(results[0][1], results[1][1], rtol=1e-5, atol=1e-3,
+                                                   msg=msg)
+
     def testWarpMask(self):
         """Test that warping the mask plane with a different kernel does the right thing
         """
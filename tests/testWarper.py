@@ -129,6 +129,40 @@ class WarpExposureTestCase(lsst.utils.tests.TestCase):
         )
         self.assertEqual(bbox, warpedExposure.getBBox(afwImage.PARENT))
 
+    @unittest.skipIf(dataDir is None, "afwdata not setup")
+    def testWarpExposureToPatches(self):
+        """Test that warping into several bboxes at once matches warping into each of them
+        """
+        kernelName = "lanczos2"
+        # with interpolation the WCS would be interpolated over different grids, so results would differ
+        warper = afwMath.Warper(kernelName, interpLength=0)
+        originalExposure, swarpedImage, swarpedWcs = self.getSwarpedImage(
+            kernelName=kernelName, useSubregion=True, useDeepCopy=False)
+        fullBBox = warper.warpExposure(destWcs=swarpedWcs, srcExposure=originalExposure).getBBox()
+
+        # overlapping quadrants of the warped image, a bbox that misses it entirely, and a bbox in
+        # another WCS
+        center = fullBBox.getCenter()
+        targets = [(swarpedWcs, afwGeom.Box2I(afwGeom.Point2I(x0, y0), afwGeom.Point2I(x1, y1)))
+                   for x0, x1 in ((fullBBox.getMinX(), int(center.getX()) + 5),
+                                  (int(center.getX()) - 5, fullBBox.getMaxX()))
+                   for y0, y1 in ((fullBBox.getMinY(), int(center.getY()) + 5),
+                                  (int(center.getY()) - 5, fullBBox.getMaxY()))]
+        targets.append((swarpedWcs, afwGeom.Box2I(fullBBox.getMax() + afwGeom.Extent2I(100, 100),
+                                                  afwGeom.Extent2I(10, 20))))
+        targets.append((originalExposure.getWcs(), afwGeom.Box2I(afwGeom.Point2I(50, 160),
+                                                                  afwGeom.Extent2I(30, 40))))
+
+        results = warper.warpExposureToPatches(targets, originalExposure)
+        self.assertEqual(len(results), len(targets))
+        for (destWcs, destBBox), warpedExposure in zip(targets, results):
+            expected = warper.warpExposure(destWcs=destWcs, srcExposure=originalExposure, destBBox=destBBox)
+            self.assertEqual(warpedExposure.getBBox(), destBBox)
+            self.assertEqual(warpedExposure.getWcs(), destWcs)
+            self.assertMaskedImagesEqual(warpedExposure.getMaskedImage(), expected.getMaskedImage())
+        noDataBitMask = afwImage.MaskU.getPlaneBitMask("NO_DATA")
+        self.assertTrue((results[-2].getMaskedImage().getMask().getArray() == noDataBitMask).all())
+
     @unittest.skipIf(dataDir is None, "afwdata not setup")
     def getSwarpedImage(self, kernelName, useSubregion=False, useDeepCopy=False):
         """